@@ -6,16 +6,24 @@ IronBull Cache Module
 组件：
 - CandleCache: K 线数据缓存
 - TickerCache: 行情数据缓存
+- CandleStore: 本地 K 线持久化存储（列式分块，长周期回测）
 """
 
-from .candle_cache import CandleCache, CachedCandle, get_candle_cache
+from .candle_cache import CandleCache, CachedCandle, get_candle_cache, is_series_fresh, merge_tail
 from .ticker_cache import TickerCache, CachedTicker, get_ticker_cache
+from .candle_store import CandleStore, get_candle_store
+from .candle_backfill import backfill_candles
 
 __all__ = [
     "CandleCache",
     "CachedCandle",
     "get_candle_cache",
+    "is_series_fresh",
+    "merge_tail",
     "TickerCache",
     "CachedTicker",
     "get_ticker_cache",
+    "CandleStore",
+    "get_candle_store",
+    "backfill_candles",
 ]
@@ -0,0 +1,109 @@
+"""
+Candle Backfill - 本地 K 线存储回填任务
+
+按 CandleStore.gaps() 找出缺口，逐页调用 ExchangeClient.fetch_ohlcv(since=...) 补齐：
+
+- 只拉缺口，已存储的区间不重复请求；中断后重跑即从缺口继续
+- 只写入已收盘的 K 线（end 默认对齐到当前周期起点）
+- 交易所本身缺失的区间（停机等）会保留为缺口，下次回填仍会尝试一次
+
+使用方式：
+    client = create_client("binance")
+    stats = await backfill_candles(client, store, "BTC/USDT", "1h", start=1640995200)
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from libs.core import get_logger
+
+from .candle_store import CandleStore, bar_open, timeframe_seconds
+
+logger = get_logger("candle-backfill")
+
+
+async def backfill_candles(
+    client,
+    store: CandleStore,
+    symbol: str,
+    timeframe: str,
+    start: int,
+    end: Optional[int] = None,
+    exchange: Optional[str] = None,
+    page_limit: int = 1000,
+    pause: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    回填 [start, end) 内的缺失 K 线
+
+    Args:
+        client: ExchangeClient
+        store: 本地 K 线存储
+        start / end: 秒级时间戳，end 默认为当前未收盘 K 线的起点
+        exchange: 存储使用的交易所名，默认 client.name
+        page_limit: 每页 K 线数量（交易所上限通常为 1000）
+        pause: 每页之间的等待秒数（限频）
+
+    Returns:
+        {"requests", "written", "gaps_before", "gaps_after"}
+    """
+    if timeframe not in client.supported_timeframes:
+        raise ValueError(f"timeframe {timeframe} not supported by {client.name}")
+
+    interval = timeframe_seconds(timeframe)
+    exchange = exchange or client.name
+    closed_end = bar_open(int(time.time()), timeframe)
+    end = closed_end if end is None else min(end, closed_end)
+
+    gaps = store.gaps(symbol, timeframe, start, end, exchange)
+    requests = 0
+    written = 0
+
+    for gap_start, gap_end in gaps:
+        since = gap_start
+        while since < gap_end:
+            page = await client.fetch_ohlcv(symbol, timeframe, limit=page_limit, since=since * 1000)
+            requests += 1
+            if not page:
+                break
+
+            candles = []
+            for ohlcv in page:
+                ts = ohlcv.timestamp // 1000
+                if since <= ts < gap_end:
+                    candles.append({
+                        "timestamp": ts,
+                        "open": ohlcv.open,
+                        "high": ohlcv.high,
+                        "low": ohlcv.low,
+                        "close": ohlcv.close,
+                        "volume": ohlcv.volume,
+                    })
+            written += store.write(symbol, timeframe, candles, exchange)
+
+            last_ts = page[-1].timestamp // 1000
+            if last_ts < since:
+                # 没有更新的数据（交易所对该区间无返回）
+                break
+            since = last_ts + interval
+            if pause:
+                await asyncio.sleep(pause)
+
+    gaps_after = store.gaps(symbol, timeframe, start, end, exchange)
+    logger.info(
+        "candle backfill done",
+        exchange=exchange,
+        symbol=symbol,
+        timeframe=timeframe,
+        requests=requests,
+        written=written,
+        gaps_before=len(gaps),
+        gaps_after=len(gaps_after),
+    )
+    return {
+        "requests": requests,
+        "written": written,
+        "gaps_before": len(gaps),
+        "gaps_after": len(gaps_after),
+    }
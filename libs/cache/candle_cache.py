@@ -3,14 +3,28 @@ Candle Cache - K 线数据缓存
 
 使用 Redis 缓存 K 线数据，减少交易所 API 调用
 支持 TTL 过期和增量更新
+
+存储格式（v2）：每个 symbol + timeframe 一个 Redis String，内容为按时间升序排列的
+定长二进制记录（struct "<qddddd"，48 字节：timestamp + OHLCV）。
+
+- 读取最近 N 根：GETRANGE 取末尾 N * 48 字节，struct 解包，O(N)，无 JSON、无排序
+- update_latest：Lua 脚本只改写末尾记录（同一时间戳 SETRANGE，新 K 线 APPEND）
+- 旧格式（Hash，field=时间戳，value=JSON）在读取未命中时自动迁移，也可 migrate_legacy() 批量迁移
+
+新鲜度按序列跟踪（而非固定 TTL）：末尾 K 线时间戳 + 最后更新时间（{key}:updated）。
+进入新周期后读取方只需拉取缺失的尾部（since=末尾时间戳）并通过 update_tail 合并，见 is_series_fresh。
+TTL 仅用于回收长期无人读取的序列。
 """
 
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from dataclasses import dataclass
 import json
+import struct
 import time
 
-from libs.core import get_redis, get_logger
+from libs.core import get_redis, get_redis_binary, get_logger
+
+from .candle_store import TIMEFRAME_SECONDS
 
 logger = get_logger("candle-cache")
 
@@ -26,18 +40,151 @@ class CachedCandle:
     volume: float
 
 
+# 定长记录：timestamp(int64) + open/high/low/close/volume(float64)，小端
+RECORD = struct.Struct("<qddddd")
+RECORD_SIZE = RECORD.size
+
+
+def pack_candles(candles: Sequence[CachedCandle]) -> bytes:
+    """K 线列表 → 二进制记录（调用方保证按时间升序）"""
+    pack = RECORD.pack
+    return b"".join(
+        pack(int(c.timestamp), c.open, c.high, c.low, c.close, c.volume)
+        for c in candles
+    )
+
+
+def unpack_candles(data: bytes) -> List[CachedCandle]:
+    """二进制记录 → K 线列表（忽略开头不完整的记录）"""
+    if not data:
+        return []
+    extra = len(data) % RECORD_SIZE
+    if extra:
+        data = data[extra:]
+    return [CachedCandle(*row) for row in RECORD.iter_unpack(data)]
+
+
+def merge_packed(existing: bytes, candles: Sequence[CachedCandle], max_bars: int) -> bytes:
+    """
+    合并已有记录与新 K 线（同一时间戳以新数据为准），保留最近 max_bars 根
+
+    新数据全部晚于已有末尾时（常见的顺序写入）直接拼接。
+    """
+    new = sorted(candles, key=lambda c: c.timestamp)
+    existing = existing[len(existing) % RECORD_SIZE:] if existing else b""
+    if not existing:
+        merged = pack_candles(new)
+    elif new and RECORD.unpack_from(existing, len(existing) - RECORD_SIZE)[0] < new[0].timestamp:
+        merged = existing + pack_candles(new)
+    else:
+        by_ts = {
+            RECORD.unpack_from(existing, i)[0]: existing[i:i + RECORD_SIZE]
+            for i in range(0, len(existing), RECORD_SIZE)
+        }
+        for c in new:
+            by_ts[int(c.timestamp)] = pack_candles([c])
+        merged = b"".join(by_ts[ts] for ts in sorted(by_ts))
+    limit_bytes = max_bars * RECORD_SIZE
+    if len(merged) > limit_bytes:
+        merged = merged[-limit_bytes:]
+    return merged
+
+
+def is_series_fresh(
+    last_ts: int,
+    updated_at: Optional[float],
+    interval: int,
+    max_age: float,
+    now: Optional[float] = None,
+    offset: int = 0,
+) -> bool:
+    """
+    缓存序列是否新鲜
+
+    - 末尾 K 线早于当前周期起点：已进入新 K 线，刚收盘的 K 线及新 K 线缺失 → 不新鲜
+    - 末尾为当前（未收盘）K 线：最后更新时间在 max_age 秒内才算新鲜
+    - offset: 周期起点偏移（周线按周一对齐，见 candle_store.TIMEFRAME_OFFSETS）
+    """
+    now = time.time() if now is None else now
+    current_bar = (int(now) - offset) // interval * interval + offset
+    if last_ts < current_bar:
+        return False
+    return updated_at is not None and now - updated_at <= max_age
+
+
+def merge_tail(cached: List[CachedCandle], tail: List[CachedCandle]) -> List[CachedCandle]:
+    """已排序的缓存序列与尾部增量合并（尾部覆盖同一时间戳及之后的缓存）"""
+    if not tail:
+        return cached
+    tail = sorted(tail, key=lambda c: c.timestamp)
+    first = tail[0].timestamp
+    cut = len(cached)
+    while cut and cached[cut - 1].timestamp >= first:
+        cut -= 1
+    return cached[:cut] + tail
+
+
+# KEYS[1] = key
+# ARGV = record, ttl, 截断阈值（字节），截断后保留（字节）
+# 自末尾向前找到同一时间戳则原地覆盖，否则插入到正确位置（通常为末尾 APPEND）
+# 时间戳按小端逐字节解码（秒级时间戳为正数，double 可精确表示）
+_UPDATE_LATEST_LUA = """
+local function ts_of(s)
+    local v = 0
+    for i = 8, 1, -1 do
+        v = v * 256 + string.byte(s, i)
+    end
+    return v
+end
+local key = KEYS[1]
+local rec = ARGV[1]
+local size = string.len(rec)
+local ts = ts_of(rec)
+local len = redis.call('STRLEN', key)
+local pos = len - size
+while pos >= 0 do
+    local cur = ts_of(redis.call('GETRANGE', key, pos, pos + 7))
+    if cur == ts then
+        redis.call('SETRANGE', key, pos, rec)
+        redis.call('EXPIRE', key, ARGV[2])
+        return 0
+    end
+    if cur < ts then
+        break
+    end
+    pos = pos - size
+end
+local at = pos + size
+if at >= len then
+    redis.call('APPEND', key, rec)
+else
+    local tail = redis.call('GETRANGE', key, at, -1)
+    redis.call('SETRANGE', key, at, rec .. tail)
+end
+len = len + size
+if len > tonumber(ARGV[3]) then
+    local keep = tonumber(ARGV[4])
+    redis.call('SET', key, redis.call('GETRANGE', key, len - keep, -1))
+end
+redis.call('EXPIRE', key, ARGV[2])
+return 1
+"""
+
+
 class CandleCache:
     """
     K 线数据缓存
-    
+
     缓存策略：
     - 每个 symbol + timeframe 组合一个 key
-    - 使用 Redis Hash 存储，field 为时间戳
-    - TTL 基于时间周期动态计算
-    
+    - 使用 Redis String 存储按时间排序的定长二进制记录
+    - 最多保留 MAX_BARS 根（update_latest 超过 MAX_BARS + TRIM_SLACK 时截断）
+    - 每次写入记录更新时间（{key}:updated），新鲜度由读取方按周期边界判断
+    - TTL 只做回收：max(RETENTION, 4 个周期)
+
     使用方式：
         cache = CandleCache()
-        
+
         # 检查缓存
         candles = cache.get("BTC/USDT", "15m", limit=100)
         if not candles:
@@ -45,43 +192,44 @@ class CandleCache:
             candles = fetch_from_exchange(...)
             cache.set("BTC/USDT", "15m", candles)
     """
-    
-    KEY_PREFIX = "ironbull:candles"
-    
-    # 时间周期对应的 TTL（秒）
-    # 较短周期缓存时间短，较长周期缓存时间长
-    TTL_MAP = {
-        "1m": 60,       # 1 分钟
-        "3m": 180,      # 3 分钟
-        "5m": 300,      # 5 分钟
-        "15m": 900,     # 15 分钟
-        "30m": 1800,    # 30 分钟
-        "1h": 3600,     # 1 小时
-        "2h": 7200,     # 2 小时
-        "4h": 14400,    # 4 小时
-        "6h": 21600,    # 6 小时
-        "12h": 43200,   # 12 小时
-        "1d": 86400,    # 1 天
-        "1w": 604800,   # 1 周
-    }
-    
-    def __init__(self, default_ttl: int = 900):
+
+    KEY_PREFIX = "ironbull:candles:bin"
+    LEGACY_KEY_PREFIX = "ironbull:candles"
+
+    MAX_BARS = 1500
+    TRIM_SLACK = 500
+
+    # 回收 TTL 下限（秒），超过后下次读取整段重拉
+    RETENTION = 86400
+
+    def __init__(self, retention: int = RETENTION):
         """
         Args:
-            default_ttl: 默认 TTL（秒），默认 15 分钟
+            retention: 回收 TTL 下限（秒），默认 1 天
         """
-        self.default_ttl = default_ttl
-    
+        self.retention = retention
+        self._update_script = None
+
     def _key(self, symbol: str, timeframe: str, exchange: str = "binance") -> str:
         """生成缓存 key"""
         # 标准化 symbol
         symbol = symbol.upper().replace("/", "")
         return f"{self.KEY_PREFIX}:{exchange}:{symbol}:{timeframe}"
-    
+
+    def _legacy_key(self, symbol: str, timeframe: str, exchange: str = "binance") -> str:
+        """旧格式（Hash + JSON）的 key"""
+        symbol = symbol.upper().replace("/", "")
+        return f"{self.LEGACY_KEY_PREFIX}:{exchange}:{symbol}:{timeframe}"
+
+    @staticmethod
+    def _meta_key(key: str) -> str:
+        """序列最后更新时间的 key"""
+        return f"{key}:updated"
+
     def _get_ttl(self, timeframe: str) -> int:
-        """获取 TTL"""
-        return self.TTL_MAP.get(timeframe, self.default_ttl)
-    
+        """获取回收 TTL"""
+        return max(self.retention, TIMEFRAME_SECONDS.get(timeframe, 0) * 4)
+
     def get(
         self,
         symbol: str,
@@ -90,46 +238,47 @@ class CandleCache:
         exchange: str = "binance",
     ) -> Optional[List[CachedCandle]]:
         """
-        获取缓存的 K 线数据
-        
+        获取缓存的 K 线数据（最近 limit 根）
+
         Returns:
             K 线列表，如果缓存不存在或过期返回 None
         """
-        redis = get_redis()
+        return self.get_with_meta(symbol, timeframe, limit, exchange)[0]
+
+    def get_with_meta(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int = 100,
+        exchange: str = "binance",
+    ) -> Tuple[Optional[List[CachedCandle]], Optional[float]]:
+        """
+        获取最近 limit 根 K 线及序列最后更新时间（一次往返）
+
+        Returns:
+            (K 线列表或 None, 最后更新时间戳或 None)
+        """
+        redis = get_redis_binary()
         if not redis:
-            return None
-        
+            return None, None
+
         key = self._key(symbol, timeframe, exchange)
-        
+
         try:
-            # 获取所有缓存数据
-            data = redis.hgetall(key)
+            pipe = redis.pipeline(transaction=False)
+            pipe.getrange(key, -limit * RECORD_SIZE, -1)
+            pipe.get(self._meta_key(key))
+            data, updated = pipe.execute()
+            updated_at = float(updated) if updated else None
             if not data:
-                logger.debug("cache miss", symbol=symbol, timeframe=timeframe)
-                return None
-            
-            # 解析并排序
-            candles = []
-            for ts_str, candle_json in data.items():
-                try:
-                    ts = int(ts_str)
-                    candle_data = json.loads(candle_json)
-                    candles.append(CachedCandle(
-                        timestamp=ts,
-                        open=candle_data["o"],
-                        high=candle_data["h"],
-                        low=candle_data["l"],
-                        close=candle_data["c"],
-                        volume=candle_data["v"],
-                    ))
-                except (ValueError, KeyError, json.JSONDecodeError):
-                    continue
-            
-            # 按时间排序并限制数量
-            candles.sort(key=lambda x: x.timestamp)
-            if len(candles) > limit:
+                candles = self._migrate_key(symbol, timeframe, exchange)
+                if not candles:
+                    logger.debug("cache miss", symbol=symbol, timeframe=timeframe)
+                    return None, None
                 candles = candles[-limit:]
-            
+            else:
+                candles = unpack_candles(data)
+
             if candles:
                 logger.debug(
                     "cache hit",
@@ -137,13 +286,13 @@ class CandleCache:
                     timeframe=timeframe,
                     count=len(candles),
                 )
-            
-            return candles if candles else None
-            
+
+            return (candles if candles else None), updated_at
+
         except Exception as e:
             logger.warning("cache get failed", symbol=symbol, error=str(e))
-            return None
-    
+            return None, None
+
     def set(
         self,
         symbol: str,
@@ -152,43 +301,37 @@ class CandleCache:
         exchange: str = "binance",
     ) -> bool:
         """
-        设置 K 线缓存
-        
+        设置 K 线缓存（与已有数据按时间戳合并）
+
+        读取 → 合并 → 写回在 WATCH/MULTI 事务中完成，不会覆盖并发 update_tail 写入的尾部。
+
         Args:
             symbol: 交易对
             timeframe: 时间周期
             candles: K 线列表
             exchange: 交易所
-        
+
         Returns:
             是否成功
         """
-        redis = get_redis()
+        redis = get_redis_binary()
         if not redis or not candles:
             return False
-        
+
         key = self._key(symbol, timeframe, exchange)
         ttl = self._get_ttl(timeframe)
-        
+
+        def _merge(pipe) -> None:
+            existing = pipe.get(key) or b""
+            packed = merge_packed(existing, candles, self.MAX_BARS)
+            pipe.multi()
+            pipe.set(key, packed, ex=ttl)
+            pipe.set(self._meta_key(key), repr(time.time()), ex=ttl)
+
         try:
-            # 构建 Hash 数据
-            mapping = {}
-            for candle in candles:
-                candle_data = {
-                    "o": candle.open,
-                    "h": candle.high,
-                    "l": candle.low,
-                    "c": candle.close,
-                    "v": candle.volume,
-                }
-                mapping[str(candle.timestamp)] = json.dumps(candle_data)
-            
-            # 使用 pipeline 批量写入
-            pipe = redis.pipeline()
-            pipe.hset(key, mapping=mapping)
-            pipe.expire(key, ttl)
-            pipe.execute()
-            
+            # WATCH key：读取到写回之间若有 update_tail 改写，事务放弃并重新合并
+            redis.transaction(_merge, key)
+
             logger.debug(
                 "cache set",
                 symbol=symbol,
@@ -196,13 +339,13 @@ class CandleCache:
                 count=len(candles),
                 ttl=ttl,
             )
-            
+
             return True
-            
+
         except Exception as e:
             logger.warning("cache set failed", symbol=symbol, error=str(e))
             return False
-    
+
     def update_latest(
         self,
         symbol: str,
@@ -212,71 +355,156 @@ class CandleCache:
     ) -> bool:
         """
         更新最新一根 K 线
-        
-        用于实时数据更新，只更新最后一根
+
+        用于实时数据更新，只改写末尾记录（单次 EVALSHA，原子）
         """
-        redis = get_redis()
-        if not redis:
+        return self.update_tail(symbol, timeframe, [candle], exchange)
+
+    def update_tail(
+        self,
+        symbol: str,
+        timeframe: str,
+        candles: List[CachedCandle],
+        exchange: str = "binance",
+    ) -> bool:
+        """
+        合并尾部增量（通常为 since=末尾时间戳 拉到的几根 K 线）
+
+        每根 K 线执行一次 update_latest 脚本，与更新时间一起在同一个 pipeline 中提交。
+        """
+        redis = get_redis_binary()
+        if not redis or not candles:
             return False
-        
+
         key = self._key(symbol, timeframe, exchange)
         ttl = self._get_ttl(timeframe)
-        
+
         try:
-            candle_data = {
-                "o": candle.open,
-                "h": candle.high,
-                "l": candle.low,
-                "c": candle.close,
-                "v": candle.volume,
-            }
-            
-            pipe = redis.pipeline()
-            pipe.hset(key, str(candle.timestamp), json.dumps(candle_data))
-            pipe.expire(key, ttl)
+            if self._update_script is None:
+                self._update_script = redis.register_script(_UPDATE_LATEST_LUA)
+            pipe = redis.pipeline(transaction=False)
+            for candle in sorted(candles, key=lambda c: c.timestamp):
+                self._update_script(
+                    keys=[key],
+                    args=[
+                        pack_candles([candle]),
+                        ttl,
+                        (self.MAX_BARS + self.TRIM_SLACK) * RECORD_SIZE,
+                        self.MAX_BARS * RECORD_SIZE,
+                    ],
+                    client=pipe,
+                )
+            pipe.set(self._meta_key(key), repr(time.time()), ex=ttl)
             pipe.execute()
-            
             return True
-            
+
         except Exception as e:
             logger.warning("cache update failed", symbol=symbol, error=str(e))
             return False
-    
+
     def delete(self, symbol: str, timeframe: str, exchange: str = "binance") -> bool:
-        """删除缓存"""
-        redis = get_redis()
+        """删除缓存（含旧格式）"""
+        redis = get_redis_binary()
         if not redis:
             return False
-        
-        key = self._key(symbol, timeframe, exchange)
-        
+
         try:
-            redis.delete(key)
+            key = self._key(symbol, timeframe, exchange)
+            redis.delete(key, self._meta_key(key), self._legacy_key(symbol, timeframe, exchange))
             return True
         except Exception:
             return False
-    
+
     def get_stats(self, symbol: str, timeframe: str, exchange: str = "binance") -> Dict[str, Any]:
         """获取缓存统计"""
-        redis = get_redis()
+        redis = get_redis_binary()
         if not redis:
             return {"exists": False}
-        
+
         key = self._key(symbol, timeframe, exchange)
-        
+
         try:
-            count = redis.hlen(key)
+            count = redis.strlen(key) // RECORD_SIZE
             ttl = redis.ttl(key)
-            
+            last = unpack_candles(redis.getrange(key, -RECORD_SIZE, -1)) if count else []
+            updated = redis.get(self._meta_key(key))
+
             return {
                 "exists": count > 0,
                 "count": count,
                 "ttl": ttl,
                 "key": key,
+                "last_ts": last[0].timestamp if last else None,
+                "updated_at": float(updated) if updated else None,
             }
         except Exception:
             return {"exists": False}
 
+    # ========== 旧格式迁移 ==========
+
+    def _migrate_key(self, symbol: str, timeframe: str, exchange: str) -> Optional[List[CachedCandle]]:
+        """把旧格式 Hash 迁移为二进制记录（旧 key 删除），返回迁移的 K 线"""
+        redis = get_redis()
+        legacy_key = self._legacy_key(symbol, timeframe, exchange)
+        data = redis.hgetall(legacy_key)
+        if not data:
+            return None
+
+        candles = decode_legacy_hash(data)
+        if candles:
+            ttl = redis.ttl(legacy_key)
+            get_redis_binary().set(
+                self._key(symbol, timeframe, exchange),
+                pack_candles(candles[-self.MAX_BARS:]),
+                ex=ttl if ttl and ttl > 0 else self._get_ttl(timeframe),
+            )
+        redis.delete(legacy_key)
+        logger.info("candle cache migrated", key=legacy_key, count=len(candles))
+        return candles
+
+    def migrate_legacy(self) -> int:
+        """
+        批量迁移全部旧格式 key（Hash），返回迁移的 key 数
+
+        data-provider 启动时调用一次；未迁移的 key 也会在 get() 未命中时惰性迁移。
+        """
+        redis = get_redis()
+        if not redis:
+            return 0
+
+        migrated = 0
+        for legacy_key in redis.scan_iter(match=f"{self.LEGACY_KEY_PREFIX}:*", _type="hash"):
+            parts = legacy_key.split(":")
+            if len(parts) != 5:
+                continue
+            _, _, exchange, symbol, timeframe = parts
+            try:
+                if self._migrate_key(symbol, timeframe, exchange) is not None:
+                    migrated += 1
+            except Exception as e:
+                logger.warning("candle cache migrate failed", key=legacy_key, error=str(e))
+        return migrated
+
+
+def decode_legacy_hash(data: Dict[str, str]) -> List[CachedCandle]:
+    """解析旧格式 Hash（field=秒级时间戳，value={"o","h","l","c","v"} JSON），按时间升序"""
+    candles = []
+    for ts_str, candle_json in data.items():
+        try:
+            candle_data = json.loads(candle_json)
+            candles.append(CachedCandle(
+                timestamp=int(ts_str),
+                open=candle_data["o"],
+                high=candle_data["h"],
+                low=candle_data["l"],
+                close=candle_data["c"],
+                volume=candle_data["v"],
+            ))
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+            continue
+    candles.sort(key=lambda x: x.timestamp)
+    return candles
+
 
 # 单例
 _candle_cache: Optional[CandleCache] = None
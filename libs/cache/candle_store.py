@@ -0,0 +1,381 @@
+"""
+Candle Store - 本地 K 线持久化存储（列式分块，可 mmap）
+
+按 exchange / symbol / timeframe 分目录，每个目录下按固定槽位分块：
+
+- 每个分块覆盖 CHUNK_BARS 根 K 线（块号 = (timestamp - offset) // (interval * CHUNK_BARS)）
+- offset 为周期起点相对 epoch 的偏移：1w 为 4 天（epoch 是周四，交易所周线从周一开盘），其余为 0
+- 块文件为 6 列连续数组：timestamp(int64) + open/high/low/close/volume(float64)，本机字节序
+- 槽位 = (timestamp - 块起点) // interval，timestamp == 0 表示缺失（稀疏文件，不占磁盘）
+- 写入只覆盖对应槽位（幂等），timestamp 列最后写：中途崩溃的槽位读出为缺失，补数据即可修复
+- 读取 [start, end) 直接按槽位切片，NumPy 可用时 mmap 零解析；缺失槽位即缺口（gaps）
+
+使用方式：
+    store = CandleStore("/data/candles")
+    store.write("BTC/USDT", "1h", candles)               # candles: List[dict]，秒级 timestamp
+    frame = store.read_range("BTC/USDT", "1h", start, end)
+    missing = store.gaps("BTC/USDT", "1h", start, end)   # [(gap_start, gap_end), ...]
+"""
+
+import os
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from libs.core import get_logger
+from libs.indicators.candle_frame import CandleFrame
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
+
+logger = get_logger("candle-store")
+
+
+# 时间周期 -> 秒数
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "3m": 180,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+    "6h": 21600,
+    "12h": 43200,
+    "1d": 86400,
+    "1w": 604800,
+}
+
+# 时间周期 -> 起点偏移秒数（周线按周一 00:00 UTC 对齐，1970-01-05 = 345600）
+TIMEFRAME_OFFSETS = {
+    "1w": 345600,
+}
+
+# 每个分块的槽位数（1m ≈ 5.7 天，1h ≈ 341 天，单块文件 384KB）
+CHUNK_BARS = 8192
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+_ITEM_SIZE = 8
+_COLUMN_BYTES = CHUNK_BARS * _ITEM_SIZE
+CHUNK_BYTES = _COLUMN_BYTES * len(COLUMNS)
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise ValueError(f"unsupported timeframe: {timeframe}")
+    return TIMEFRAME_SECONDS[timeframe]
+
+
+def timeframe_offset(timeframe: str) -> int:
+    return TIMEFRAME_OFFSETS.get(timeframe, 0)
+
+
+def bar_open(ts: int, timeframe: str) -> int:
+    """ts 所在 K 线的开盘时间（按周期与偏移向下对齐）"""
+    interval = timeframe_seconds(timeframe)
+    offset = timeframe_offset(timeframe)
+    return (ts - offset) // interval * interval + offset
+
+
+def _field(candle: Any, name: str):
+    if isinstance(candle, dict):
+        return candle[name]
+    return getattr(candle, name)
+
+
+class CandleStore:
+    """
+    本地 K 线存储
+
+    单写多读：同一 symbol/timeframe 同时只应有一个写入方（回填任务），
+    读取方（data-provider、回测脚本）可并发。
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    # ========== 路径 ==========
+
+    def _dir(self, symbol: str, timeframe: str, exchange: str) -> str:
+        safe_symbol = symbol.upper().replace("/", "").replace(":", "_")
+        return os.path.join(self.root, exchange, safe_symbol, timeframe)
+
+    def _chunk_path(self, directory: str, chunk_id: int) -> str:
+        return os.path.join(directory, f"{chunk_id:08d}.bin")
+
+    def _chunk_ids(self, directory: str) -> List[int]:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(n[:-4]) for n in names if n.endswith(".bin") and n[:-4].isdigit())
+
+    # ========== 写入 ==========
+
+    def write(
+        self,
+        symbol: str,
+        timeframe: str,
+        candles: Sequence[Any],
+        exchange: str = "binance",
+    ) -> int:
+        """
+        写入 K 线（dict 或带属性的对象，秒级 timestamp），已存在的槽位被覆盖
+
+        Returns:
+            写入的 K 线数量（未对齐周期的 K 线被跳过）
+        """
+        interval = timeframe_seconds(timeframe)
+        offset = timeframe_offset(timeframe)
+        span = interval * CHUNK_BARS
+        directory = self._dir(symbol, timeframe, exchange)
+
+        by_chunk: Dict[int, Dict[int, Tuple]] = {}
+        skipped = 0
+        for c in candles:
+            ts = int(_field(c, "timestamp"))
+            rel = ts - offset
+            if ts <= 0 or rel < 0 or rel % interval:
+                skipped += 1
+                continue
+            slot = (rel % span) // interval
+            by_chunk.setdefault(rel // span, {})[slot] = (
+                ts,
+                float(_field(c, "open")),
+                float(_field(c, "high")),
+                float(_field(c, "low")),
+                float(_field(c, "close")),
+                float(_field(c, "volume")),
+            )
+        if skipped:
+            logger.warning("misaligned candles skipped", symbol=symbol, timeframe=timeframe, count=skipped)
+        if not by_chunk:
+            return 0
+
+        os.makedirs(directory, exist_ok=True)
+        written = 0
+        for chunk_id, rows in by_chunk.items():
+            path = self._chunk_path(directory, chunk_id)
+            self._ensure_chunk(path)
+            with open(path, "r+b") as f:
+                for first, run in _contiguous_runs(rows):
+                    # 先写 OHLCV，最后写 timestamp（标记槽位有效）
+                    for col in range(len(COLUMNS) - 1, -1, -1):
+                        typecode = "q" if col == 0 else "d"
+                        f.seek(col * _COLUMN_BYTES + first * _ITEM_SIZE)
+                        array(typecode, (row[col] for row in run)).tofile(f)
+                    written += len(run)
+        return written
+
+    @staticmethod
+    def _ensure_chunk(path: str) -> None:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return
+        try:
+            os.ftruncate(fd, CHUNK_BYTES)
+        finally:
+            os.close(fd)
+
+    # ========== 读取 ==========
+
+    def iter_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        exchange: str = "binance",
+    ) -> Iterator[CandleFrame]:
+        """按分块逐段读取 [start, end)，每段一个 CandleFrame（跳过缺失槽位与空段）"""
+        interval = timeframe_seconds(timeframe)
+        directory = self._dir(symbol, timeframe, exchange)
+        for path, lo, hi in self._windows(directory, interval, timeframe_offset(timeframe), start, end):
+            if not os.path.exists(path):
+                continue
+            columns = _read_window(path, lo, hi)
+            if len(columns[0]):
+                yield CandleFrame.from_arrays(
+                    open=columns[1], high=columns[2], low=columns[3],
+                    close=columns[4], volume=columns[5], timestamp=columns[0],
+                )
+
+    def read_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        exchange: str = "binance",
+    ) -> CandleFrame:
+        """读取 [start, end) 内的全部 K 线（按时间升序，缺失槽位被跳过）"""
+        parts = list(self.iter_range(symbol, timeframe, start, end, exchange))
+        if len(parts) == 1:
+            return parts[0]
+        if NUMPY_AVAILABLE:
+            merged = {
+                name: (np.concatenate([p.column(name) for p in parts]) if parts
+                       else np.empty(0, dtype=np.int64 if name == "timestamp" else np.float64))
+                for name in COLUMNS
+            }
+        else:
+            merged = {name: [v for p in parts for v in p.column(name)] for name in COLUMNS}
+        return CandleFrame.from_arrays(**merged)
+
+    def gaps(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        exchange: str = "binance",
+    ) -> List[Tuple[int, int]]:
+        """
+        [start, end) 内缺失的 K 线区间，返回 [(gap_start, gap_end), ...]（左闭右开，按周期对齐）
+        """
+        interval = timeframe_seconds(timeframe)
+        offset = timeframe_offset(timeframe)
+        directory = self._dir(symbol, timeframe, exchange)
+        result: List[Tuple[int, int]] = []
+
+        def add(gap_start: int, gap_end: int) -> None:
+            if result and result[-1][1] == gap_start:
+                result[-1] = (result[-1][0], gap_end)
+            else:
+                result.append((gap_start, gap_end))
+
+        for path, lo, hi in self._windows(directory, interval, offset, start, end):
+            chunk_start = int(os.path.basename(path)[:-4]) * interval * CHUNK_BARS + offset
+            if not os.path.exists(path):
+                add(chunk_start + lo * interval, chunk_start + hi * interval)
+                continue
+            for run_lo, run_hi in _missing_runs(path, lo, hi):
+                add(chunk_start + run_lo * interval, chunk_start + run_hi * interval)
+        return result
+
+    def bounds(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: str = "binance",
+    ) -> Optional[Tuple[int, int]]:
+        """已存储的最早 / 最晚 K 线时间戳，无数据返回 None"""
+        directory = self._dir(symbol, timeframe, exchange)
+        chunk_ids = self._chunk_ids(directory)
+        first = last = None
+        for chunk_id in chunk_ids:
+            ts = _read_window(self._chunk_path(directory, chunk_id), 0, CHUNK_BARS)[0]
+            if len(ts):
+                first = int(ts[0])
+                break
+        for chunk_id in reversed(chunk_ids):
+            ts = _read_window(self._chunk_path(directory, chunk_id), 0, CHUNK_BARS)[0]
+            if len(ts):
+                last = int(ts[-1])
+                break
+        if first is None or last is None:
+            return None
+        return first, last
+
+    def _windows(
+        self, directory: str, interval: int, offset: int, start: int, end: int,
+    ) -> Iterator[Tuple[str, int, int]]:
+        """把 [start, end) 拆成各分块内的槽位窗口 (path, lo, hi)，内部按 timestamp - offset 计算"""
+        span = interval * CHUNK_BARS
+        # 起点向上对齐、终点向上对齐，保证 [start, end) 左闭右开
+        first = -(-max(start - offset, 0) // interval) * interval
+        last = -(-(end - offset) // interval) * interval
+        pos = first
+        while pos < last:
+            chunk_id = pos // span
+            chunk_end = min((chunk_id + 1) * span, last)
+            lo = (pos % span) // interval
+            hi = lo + (chunk_end - pos) // interval
+            yield self._chunk_path(directory, chunk_id), lo, hi
+            pos = chunk_end
+
+
+# ========== 块文件读写 ==========
+
+def _contiguous_runs(rows: Dict[int, Tuple]) -> Iterator[Tuple[int, List[Tuple]]]:
+    """按槽位排序，切成连续槽位段，每段一次顺序写"""
+    slots = sorted(rows)
+    begin = 0
+    for i in range(1, len(slots) + 1):
+        if i == len(slots) or slots[i] != slots[i - 1] + 1:
+            yield slots[begin], [rows[s] for s in slots[begin:i]]
+            begin = i
+
+
+def _read_window(path: str, lo: int, hi: int):
+    """读取槽位 [lo, hi)，过滤缺失槽位，返回 (timestamp, open, high, low, close, volume)"""
+    if NUMPY_AVAILABLE:
+        data = np.memmap(path, dtype=np.float64, mode="r", shape=(len(COLUMNS), CHUNK_BARS))
+        window = data[:, lo:hi]
+        ts = window[0].view(np.int64)
+        present = ts != 0
+        if present.all():
+            return (ts.copy(),) + tuple(window[i].copy() for i in range(1, len(COLUMNS)))
+        return (ts[present],) + tuple(window[i][present] for i in range(1, len(COLUMNS)))
+
+    columns = []
+    with open(path, "rb") as f:
+        for col in range(len(COLUMNS)):
+            values = array("q" if col == 0 else "d")
+            f.seek(col * _COLUMN_BYTES + lo * _ITEM_SIZE)
+            values.fromfile(f, hi - lo)
+            columns.append(values)
+    keep = [i for i, ts in enumerate(columns[0]) if ts != 0]
+    if len(keep) == hi - lo:
+        return tuple(columns)
+    return tuple(array(c.typecode, (c[i] for i in keep)) for c in columns)
+
+
+def _missing_runs(path: str, lo: int, hi: int) -> List[Tuple[int, int]]:
+    """槽位 [lo, hi) 中 timestamp == 0 的连续段 [(run_lo, run_hi), ...]"""
+    if NUMPY_AVAILABLE:
+        ts = np.memmap(path, dtype=np.int64, mode="r", shape=(CHUNK_BARS,))[lo:hi]
+        missing = np.flatnonzero(ts == 0)
+        if not len(missing):
+            return []
+        breaks = np.flatnonzero(np.diff(missing) != 1)
+        starts = np.concatenate(([missing[0]], missing[breaks + 1]))
+        ends = np.concatenate((missing[breaks], [missing[-1]])) + 1
+        return [(lo + int(s), lo + int(e)) for s, e in zip(starts, ends)]
+
+    ts = array("q")
+    with open(path, "rb") as f:
+        f.seek(lo * _ITEM_SIZE)
+        ts.fromfile(f, hi - lo)
+    runs: List[Tuple[int, int]] = []
+    run_start = None
+    for i, value in enumerate(ts):
+        if value == 0 and run_start is None:
+            run_start = i
+        elif value != 0 and run_start is not None:
+            runs.append((lo + run_start, lo + i))
+            run_start = None
+    if run_start is not None:
+        runs.append((lo + run_start, hi))
+    return runs
+
+
+# 单例
+_candle_store: Optional[CandleStore] = None
+
+
+def get_candle_store(root: Optional[str] = None) -> Optional[CandleStore]:
+    """获取本地 K 线存储（root 默认读取配置 candle_store_dir，未配置返回 None）"""
+    global _candle_store
+    if _candle_store is None:
+        if root is None:
+            from libs.core import get_config
+            root = get_config().get_str("candle_store_dir", "")
+        if not root:
+            return None
+        _candle_store = CandleStore(root)
+    return _candle_store
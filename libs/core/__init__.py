@@ -9,6 +9,8 @@ IronBull Core Library
 - exceptions: 基础异常
 - utils: 通用工具
 - database: MySQL 数据库连接 (v1)
+- singleflight: 异步请求合并
+- http_client: 共享 HTTP 连接池
 """
 
 from .config import Config, get_config
@@ -42,6 +44,7 @@ from .database import (
 from .redis_client import (
     init_redis,
     get_redis,
+    get_redis_binary,
     close_redis,
     check_redis_connection,
     set_with_ttl,
@@ -52,6 +55,13 @@ from .redis_client import (
     pop_from_queue,
     get_queue_length,
 )
+from .singleflight import SingleFlight
+from .http_client import (
+    get_http_client,
+    get_async_http_client,
+    close_http_clients,
+    aclose_http_clients,
+)
 
 __all__ = [
     # Config
@@ -91,6 +101,7 @@ __all__ = [
     # Redis (v1 Phase 3)
     "init_redis",
     "get_redis",
+    "get_redis_binary",
     "close_redis",
     "check_redis_connection",
     "set_with_ttl",
@@ -100,4 +111,13 @@ __all__ = [
     "push_to_queue",
     "pop_from_queue",
     "get_queue_length",
+    
+    # Concurrency
+    "SingleFlight",
+    
+    # HTTP
+    "get_http_client",
+    "get_async_http_client",
+    "close_http_clients",
+    "aclose_http_clients",
 ]
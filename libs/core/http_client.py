@@ -0,0 +1,141 @@
+"""
+HTTP Client - 共享 HTTP 连接池
+
+职责：
+- 服务间调用复用进程级 httpx.Client / httpx.AsyncClient，避免每次请求重建 TCP/TLS
+- 按目标分组（name）隔离连接池，单个慢目标不会占满其他目标的连接
+- 统一 keep-alive、连接上限、超时配置；安装 h2 时可选启用 HTTP/2
+
+配置（config/default.yaml）：
+- http_timeout: 默认请求超时（秒），单次请求可用 timeout= 覆盖
+- http_connect_timeout: 建连超时（秒）
+- http_max_connections / http_max_keepalive: 每个连接池的连接上限 / 保活连接数
+- http_keepalive_expiry: 空闲连接保活时长（秒）
+- http2_enabled: 是否启用 HTTP/2（需安装 h2）
+
+使用方式：
+    client = get_http_client("data-provider")
+    resp = client.get(url, params=params, timeout=10.0)
+
+    client = get_async_http_client("signal-hub")
+    resp = await client.post(url, json=payload)
+
+注意：
+- 共享客户端不要用 with 语句包裹（会关闭连接池），进程退出时调用 close_http_clients()
+- 客户端按 (name, timeout) 缓存：传入不同默认超时得到各自的客户端，不会沿用首个调用方的超时；
+  同一目标只是个别请求超时不同时，优先在请求上传 timeout=，共用一个连接池
+- AsyncClient 的连接绑定事件循环，按 (事件循环, name, timeout) 缓存
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from .config import get_config
+from .logger import get_logger
+
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+logger = get_logger("http")
+
+_lock = threading.Lock()
+_sync_clients: Dict[Tuple[str, Optional[float]], httpx.Client] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[float]], httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client_kwargs(timeout: Optional[float] = None) -> dict:
+    """根据配置构建 httpx 客户端参数"""
+    config = get_config()
+    read_timeout = timeout if timeout is not None else config.get_float("http_timeout", 30.0)
+    connect_timeout = min(config.get_float("http_connect_timeout", 5.0), read_timeout)
+    limits = httpx.Limits(
+        max_connections=config.get_int("http_max_connections", 100),
+        max_keepalive_connections=config.get_int("http_max_keepalive", 20),
+        keepalive_expiry=config.get_float("http_keepalive_expiry", 30.0),
+    )
+    http2 = config.get_bool("http2_enabled", False)
+    if http2 and not H2_AVAILABLE:
+        logger.warning("http2_enabled but h2 not installed, falling back to HTTP/1.1")
+        http2 = False
+    return {
+        "timeout": httpx.Timeout(read_timeout, connect=connect_timeout),
+        "limits": limits,
+        "http2": http2,
+    }
+
+
+def get_http_client(name: str = "default", timeout: Optional[float] = None) -> httpx.Client:
+    """
+    获取共享同步客户端（线程安全）
+
+    Args:
+        name: 连接池分组名（通常为目标服务名）
+        timeout: 客户端默认超时（参与缓存键），单次请求可用 timeout= 覆盖
+    """
+    key = (name, timeout)
+    client = _sync_clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_kwargs(timeout))
+            _sync_clients[key] = client
+    return client
+
+
+def get_async_http_client(name: str = "default", timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """
+    获取当前事件循环的共享异步客户端
+
+    Args:
+        name: 连接池分组名（通常为目标服务名）
+        timeout: 客户端默认超时（参与缓存键），单次请求可用 timeout= 覆盖
+    """
+    loop = asyncio.get_running_loop()
+    key = (name, timeout)
+    with _lock:
+        clients = _async_clients.get(loop)
+        if clients is None:
+            clients = _async_clients[loop] = {}
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_kwargs(timeout))
+            clients[key] = client
+    return client
+
+
+def close_http_clients() -> None:
+    """关闭所有共享同步客户端"""
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_http_clients() -> None:
+    """关闭当前事件循环的共享异步客户端（在服务 shutdown 中调用）"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def get_http_stats() -> Dict[str, int]:
+    """共享客户端数量（调试用）"""
+    with _lock:
+        return {
+            "sync_clients": len(_sync_clients),
+            "async_clients": sum(len(c) for c in _async_clients.values()),
+        }
@@ -25,6 +25,7 @@ from .logger import get_logger
 logger = get_logger("redis")
 
 _redis_client: Optional[Redis] = None
+_redis_binary_client: Optional[Redis] = None
 
 
 def get_redis_url() -> str:
@@ -89,9 +90,29 @@ def get_redis() -> Redis:
     return _redis_client
 
 
+def get_redis_binary() -> Redis:
+    """
+    获取二进制 Redis 客户端（decode_responses=False，值为 bytes）
+
+    用于存放二进制打包数据（如 K 线缓存），与 get_redis() 使用独立连接池。
+    """
+    global _redis_binary_client
+    if _redis_binary_client is None:
+        pool = redis.ConnectionPool.from_url(
+            get_redis_url(),
+            max_connections=get_config().get_int("redis_pool_size", 10),
+            decode_responses=False,
+        )
+        _redis_binary_client = Redis(connection_pool=pool)
+    return _redis_binary_client
+
+
 def close_redis() -> None:
     """关闭 Redis 连接"""
-    global _redis_client
+    global _redis_client, _redis_binary_client
+    if _redis_binary_client is not None:
+        _redis_binary_client.close()
+        _redis_binary_client = None
     if _redis_client is not None:
         _redis_client.close()
         _redis_client = None
@@ -0,0 +1,69 @@
+"""
+SingleFlight - 异步请求合并（in-flight 去重）
+
+同一 key 的并发调用只执行一次上游请求，其余调用等待并共享同一结果（或异常）：
+
+- 上游请求以独立 Task 运行，发起方被取消（客户端断开）不影响其他等待方
+- 请求完成后立即移除 key，不缓存结果（缓存由调用方负责）
+- stats() 提供上游调用数 / 合并调用数，用于观察限频压力
+
+使用方式：
+    flight = SingleFlight("candles")
+    candles = await flight.do((exchange, symbol, timeframe, limit),
+                              lambda: client.fetch_ohlcv(symbol, timeframe, limit))
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from .logger import get_logger
+
+logger = get_logger("singleflight")
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按 key 合并并发的异步调用"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.upstream = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 fn()，同一 key 已有进行中的调用时直接等待其结果
+
+        Args:
+            key: 合并键（如 (exchange, symbol, timeframe, limit)）
+            fn: 无参协程工厂，只在没有进行中的调用时执行
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self.upstream += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 读取异常，避免所有等待方都已取消时出现 "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.upstream + self.coalesced
+        return {
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "inflight": len(self._inflight),
+            "coalesce_rate": round(self.coalesced / total, 4) if total else 0.0,
+        }
@@ -6,6 +6,7 @@ IronBull Exchange Module (v1 Phase 5)
 组件：
 - ExchangeClient: 交易所客户端基类
 - BinanceClient / OKXClient / GateClient: 各交易所数据客户端
+- MarketsRegistry: 进程级 markets 元数据注册表（磁盘快照 + 后台刷新，注入 ccxt 实例）
 - 通用工具函数
 """
 
@@ -32,6 +33,13 @@ from .market_service import (
     contracts_to_coins_by_size,
     coins_to_contracts_by_size,
 )
+from .markets_registry import (
+    MarketsRegistry,
+    MarketsSnapshot,
+    get_markets_registry,
+    markets_key,
+    ccxt_class,
+)
 
 __all__ = [
     # 客户端
@@ -54,4 +62,10 @@ __all__ = [
     "get_market_service",
     "contracts_to_coins_by_size",
     "coins_to_contracts_by_size",
+    # markets 注册表
+    "MarketsRegistry",
+    "MarketsSnapshot",
+    "get_markets_registry",
+    "markets_key",
+    "ccxt_class",
 ]
@@ -358,7 +358,7 @@ class MarketInfoService:
         symbols: List[str] = None,
     ) -> Dict[str, int]:
         """
-        从 ccxt load_markets() 刷新市场信息到 dim_market_info。
+        从 ccxt load_markets() 刷新市场信息到 dim_market_info（markets 经 MarketsRegistry 下载并共享）。
 
         Args:
             exchange_id: ccxt 交易所 ID (binanceusdm / gateio / okx)
@@ -367,36 +367,25 @@ class MarketInfoService:
         Returns:
             {"total": N, "updated": M, "new": K}
         """
-        import ccxt
+        from libs.exchange.markets_registry import get_markets_registry
 
         exchange_name = _normalize_exchange(exchange_id)
 
-        # ccxt 映射
-        ccxt_class = {
-            "binance": ccxt.binanceusdm if market_type in ("swap", "future") else ccxt.binance,
-            "gate": ccxt.gateio,
-            "okx": ccxt.okx,
-        }.get(exchange_name)
-
-        if not ccxt_class:
+        if exchange_name not in ("binance", "gate", "okx"):
             log.warning("unsupported exchange for market sync", exchange=exchange_name)
             return {"total": 0, "updated": 0, "new": 0}
 
-        options = {}
-        if exchange_name == "okx":
-            options["defaultType"] = "swap" if market_type in ("swap", "future") else "spot"
-        elif exchange_name == "gate":
-            options["defaultType"] = "swap" if market_type in ("swap", "future") else "spot"
-
-        ex = ccxt_class({"enableRateLimit": True, "options": options})
-        ex.load_markets()
+        # 经由进程级注册表下载：同步 DB 的同时刷新共享 markets 与磁盘快照
+        snap = get_markets_registry().refresh(exchange_name, market_type)
+        if snap is None:
+            raise RuntimeError(f"load markets failed: {exchange_name} {market_type}")
 
         total = 0
         updated = 0
         new = 0
         now = datetime.now()
 
-        for sym, m in ex.markets.items():
+        for sym, m in snap.markets.items():
             # 只处理目标市场类型
             m_type = m.get("type", "")
             if market_type in ("swap", "future") and m_type != "swap":
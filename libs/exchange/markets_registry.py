@@ -0,0 +1,327 @@
+"""
+MarketsRegistry - 进程级交易所 markets 元数据注册表
+
+解决的问题：
+- LiveTrader / 持仓监控 / MarketInfoService 各自 load_markets()，每次都下载数 MB 的 markets
+- 热路径（下单、3 秒一轮的价格扫描）被 markets 下载拖慢
+
+设计：
+1. 每个 (ccxt 交易所, spot/swap, sandbox) 只保留一份 ccxt 原始 markets + currencies
+2. 首次使用优先读磁盘快照（markets_snapshot_dir），没有快照才下载；下载后写回快照
+3. 后台线程按 markets_refresh_interval 刷新，版本号递增；注入过的 ccxt 实例下次 apply 时更新
+4. 通过 ccxt set_markets() 注入，注入后 exchange.load_markets() 直接返回，不再走网络
+
+说明：dim_market_info 只存精度/限制等摘要字段，不足以还原 ccxt 下单所需的完整 market 结构，
+因此快照保存 ccxt 原始 payload；dim_market_info 由 MarketInfoService.sync_from_ccxt 从本注册表生成。
+
+配置（config/default.yaml）：
+- markets_snapshot_dir: 磁盘快照目录（空 = 不落盘）
+- markets_refresh_interval: 刷新周期（秒，0 = 不后台刷新）
+
+使用方式：
+    registry = get_markets_registry()
+
+    # 同步 ccxt 实例
+    registry.inject(ex, "binance", "future")
+
+    # 异步 ccxt 实例（未缓存时在线程中加载，不阻塞事件循环）
+    snap = await registry.aget("gate", "swap")
+    MarketsRegistry.apply(ex, snap)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from libs.core import get_config, get_logger
+
+log = get_logger("markets-registry")
+
+MarketsKey = Tuple[str, str, bool]
+
+# 合约类 market_type 统一视为 swap（LiveTrader 用 future，ccxt/bybit 用 swap/linear）
+_CONTRACT_TYPES = ("future", "swap", "linear")
+
+# ccxt 实例上记录已注入的版本号
+_VERSION_ATTR = "_registry_markets_version"
+
+
+@dataclass
+class MarketsSnapshot:
+    markets: Dict[str, Any]
+    currencies: Optional[Dict[str, Any]]
+    loaded_at: float
+    version: int
+
+
+def markets_key(exchange: str, market_type: str = "future", sandbox: bool = False) -> MarketsKey:
+    """规范化为 (ccxt 交易所 ID, spot/swap, sandbox)"""
+    kind = "swap" if (market_type or "future").lower() in _CONTRACT_TYPES else "spot"
+    name = (exchange or "").lower().strip()
+    if name in ("binance", "binanceusdm"):
+        ccxt_id = "binanceusdm" if kind == "swap" else "binance"
+    elif name in ("gate", "gateio"):
+        ccxt_id = "gateio"
+    elif name in ("okx", "okex"):
+        ccxt_id = "okx"
+    else:
+        ccxt_id = name
+    return (ccxt_id, kind, bool(sandbox))
+
+
+def ccxt_class(module: Any, ccxt_id: str) -> Any:
+    """从 ccxt / ccxt.async_support / ccxt.pro 模块取交易所类（新版 ccxt 只保留 gate，旧版为 gateio）"""
+    exchange_cls = getattr(module, ccxt_id, None)
+    if exchange_cls is None and ccxt_id == "gateio":
+        exchange_cls = getattr(module, "gate", None)
+    return exchange_cls
+
+
+def _download(key: MarketsKey) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """用同步 ccxt 下载 markets（在调用线程中执行）"""
+    import ccxt
+
+    ccxt_id, kind, sandbox = key
+    exchange_cls = ccxt_class(ccxt, ccxt_id)
+    if exchange_cls is None:
+        raise ValueError(f"unsupported exchange: {ccxt_id}")
+    if kind == "spot":
+        default_type = "spot"
+    elif ccxt_id == "binanceusdm":
+        default_type = "future"
+    elif ccxt_id == "bybit":
+        default_type = "linear"
+    else:
+        default_type = "swap"
+    ex = exchange_cls({"enableRateLimit": True, "options": {"defaultType": default_type}})
+    if sandbox:
+        ex.set_sandbox_mode(True)
+    ex.load_markets()
+    return ex.markets, ex.currencies
+
+
+class MarketsRegistry:
+    """按交易所共享 markets，磁盘快照 + 后台刷新"""
+
+    def __init__(
+        self,
+        snapshot_dir: str = "",
+        refresh_interval: float = 3600.0,
+        loader: Callable[[MarketsKey], Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = _download,
+        background: bool = True,
+    ):
+        self.snapshot_dir = snapshot_dir
+        self.refresh_interval = refresh_interval
+        self._loader = loader
+        self._background = background and refresh_interval > 0
+        self._entries: Dict[MarketsKey, MarketsSnapshot] = {}
+        self._key_locks: Dict[MarketsKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.downloads = 0
+        self.snapshot_loads = 0
+        self.refresh_errors = 0
+
+    # ---------- 查询 ----------
+
+    def peek(self, exchange: str, market_type: str = "future", sandbox: bool = False) -> Optional[MarketsSnapshot]:
+        """只查内存，不加载"""
+        return self._entries.get(markets_key(exchange, market_type, sandbox))
+
+    def get(self, exchange: str, market_type: str = "future", sandbox: bool = False) -> Optional[MarketsSnapshot]:
+        """
+        获取 markets（阻塞）：内存 → 磁盘快照 → 下载；下载失败返回 None
+
+        同一 key 并发调用只加载一次
+        """
+        key = markets_key(exchange, market_type, sandbox)
+        snap = self._entries.get(key)
+        if snap is not None:
+            return snap
+        with self._key_lock(key):
+            snap = self._entries.get(key)
+            if snap is None:
+                snap = self._read_snapshot(key)
+                if snap is None:
+                    try:
+                        snap = self._fetch(key)
+                    except Exception as e:
+                        log.warning("markets load failed", exchange=key[0], market_type=key[1], error=str(e))
+                        return None
+                self._entries[key] = snap
+        self._ensure_refresher()
+        return snap
+
+    async def aget(self, exchange: str, market_type: str = "future", sandbox: bool = False) -> Optional[MarketsSnapshot]:
+        """异步获取：已缓存直接返回，否则在线程中加载"""
+        snap = self.peek(exchange, market_type, sandbox)
+        if snap is not None:
+            return snap
+        return await asyncio.to_thread(self.get, exchange, market_type, sandbox)
+
+    # ---------- 注入 ----------
+
+    @staticmethod
+    def apply(ccxt_exchange: Any, snap: Optional[MarketsSnapshot]) -> bool:
+        """把快照注入 ccxt 实例（版本未变则跳过）；snap 为 None 返回 False"""
+        if snap is None:
+            return False
+        if getattr(ccxt_exchange, _VERSION_ATTR, None) != snap.version:
+            ccxt_exchange.set_markets(snap.markets, snap.currencies)
+            setattr(ccxt_exchange, _VERSION_ATTR, snap.version)
+        return True
+
+    def inject(self, ccxt_exchange: Any, exchange: str, market_type: str = "future", sandbox: bool = False) -> bool:
+        return self.apply(ccxt_exchange, self.get(exchange, market_type, sandbox))
+
+    async def ainject(self, ccxt_exchange: Any, exchange: str, market_type: str = "future", sandbox: bool = False) -> bool:
+        return self.apply(ccxt_exchange, await self.aget(exchange, market_type, sandbox))
+
+    # ---------- 刷新 ----------
+
+    def refresh(self, exchange: str, market_type: str = "future", sandbox: bool = False) -> Optional[MarketsSnapshot]:
+        """强制重新下载；失败时保留旧数据并返回旧快照（无旧数据返回 None）"""
+        key = markets_key(exchange, market_type, sandbox)
+        with self._key_lock(key):
+            try:
+                snap = self._fetch(key)
+            except Exception as e:
+                self.refresh_errors += 1
+                log.warning("markets refresh failed, keep previous",
+                            exchange=key[0], market_type=key[1], error=str(e))
+                return self._entries.get(key)
+            self._entries[key] = snap
+        self._ensure_refresher()
+        return snap
+
+    def refresh_stale(self) -> int:
+        """刷新所有超过 refresh_interval 的条目，返回成功刷新数"""
+        if self.refresh_interval <= 0:
+            return 0
+        now = time.time()
+        refreshed = 0
+        for key, snap in list(self._entries.items()):
+            if now - snap.loaded_at <= self.refresh_interval:
+                continue
+            new_snap = self.refresh(key[0], key[1], key[2])
+            if new_snap is not None and new_snap is not snap:
+                refreshed += 1
+        return refreshed
+
+    def _ensure_refresher(self) -> None:
+        if not self._background or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="markets-refresh", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        check_interval = min(self.refresh_interval, 60.0)
+        while not self._stop.wait(check_interval):
+            try:
+                self.refresh_stale()
+            except Exception as e:
+                log.warning("markets refresh loop error", error=str(e))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ---------- 内部 ----------
+
+    def _key_lock(self, key: MarketsKey) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _next_version(self) -> int:
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    def _fetch(self, key: MarketsKey) -> MarketsSnapshot:
+        started = time.time()
+        markets, currencies = self._loader(key)
+        self.downloads += 1
+        snap = MarketsSnapshot(markets=markets, currencies=currencies, loaded_at=time.time(),
+                               version=self._next_version())
+        log.info("markets downloaded", exchange=key[0], market_type=key[1], sandbox=key[2],
+                 count=len(markets or {}), elapsed_ms=int((time.time() - started) * 1000))
+        self._write_snapshot(key, snap)
+        return snap
+
+    def _snapshot_path(self, key: MarketsKey) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        ccxt_id, kind, sandbox = key
+        suffix = "-sandbox" if sandbox else ""
+        return os.path.join(self.snapshot_dir, f"{ccxt_id}-{kind}{suffix}.json")
+
+    def _read_snapshot(self, key: MarketsKey) -> Optional[MarketsSnapshot]:
+        path = self._snapshot_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            markets = data.get("markets")
+            if not markets:
+                return None
+        except (OSError, ValueError) as e:
+            log.warning("markets snapshot unreadable", path=path, error=str(e))
+            return None
+        self.snapshot_loads += 1
+        # 沿用快照的保存时间：过期快照先用着，由后台刷新替换
+        return MarketsSnapshot(markets=markets, currencies=data.get("currencies"),
+                               loaded_at=float(data.get("saved_at") or 0), version=self._next_version())
+
+    def _write_snapshot(self, key: MarketsKey, snap: MarketsSnapshot) -> None:
+        path = self._snapshot_path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": snap.loaded_at, "markets": snap.markets, "currencies": snap.currencies},
+                          f, ensure_ascii=False, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("markets snapshot write failed", path=path, error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "downloads": self.downloads,
+            "snapshot_loads": self.snapshot_loads,
+            "refresh_errors": self.refresh_errors,
+            "version": self._version,
+        }
+
+
+_registry: Optional[MarketsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_markets_registry() -> MarketsRegistry:
+    """获取进程级 MarketsRegistry（按配置创建）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                config = get_config()
+                _registry = MarketsRegistry(
+                    snapshot_dir=config.get_str("markets_snapshot_dir", ""),
+                    refresh_interval=config.get_float("markets_refresh_interval", 3600.0),
+                )
+    return _registry
@@ -3,6 +3,9 @@ IronBull Indicators Library
 
 纯计算函数库，无 IO、无网络、无数据库依赖。
 与 old3 指标计算逻辑保持一致。
+
+NumPy 可用时，长序列自动走 vectorized 向量化后端（结果在浮点容差内一致）；
+需要完整序列数组的新代码可直接使用 libs.indicators.vectorized。
 """
 
 from .ma import sma, ema, sma_series, ema_series
@@ -12,6 +15,8 @@ from .bollinger import bollinger
 from .atr import atr, true_range
 from .fibo import fibo_levels, price_in_fibo_zone
 from .volume import obv, vwap
+from .candle_frame import CandleFrame
+from .streaming import StreamingSMA, StreamingEMA, StreamingRSI, StreamingATR
 
 __all__ = [
     # MA
@@ -41,4 +46,13 @@ __all__ = [
     # Volume
     "obv",
     "vwap",
+    
+    # CandleFrame（列式 K 线容器）
+    "CandleFrame",
+    
+    # Streaming（增量指标）
+    "StreamingSMA",
+    "StreamingEMA",
+    "StreamingRSI",
+    "StreamingATR",
 ]
@@ -6,6 +6,8 @@ ATR Indicator
 
 from typing import List, Optional, Dict
 
+from . import vectorized as _vec
+
 
 def true_range(
     high: float,
@@ -55,7 +57,18 @@ def atr(
     if len(candles) < period + 1:
         return default_atr
     
-    # 计算所有 TR
+    vectorized = _vec.use_vectorized(candles)
+    
+    # 只需最近 period+1 根即可得到最近 period 个 TR（CandleFrame 切片为零拷贝视图）
+    candles = candles[-(period + 1):]
+    
+    if vectorized:
+        from .candle_frame import column
+        return _vec.atr_series(
+            column(candles, 'high'), column(candles, 'low'), column(candles, 'close'), period, min_pct,
+        )[-1].item()
+    
+    # 计算 TR
     trs: List[float] = []
     for i in range(1, len(candles)):
         high = candles[i].get('high', 0)
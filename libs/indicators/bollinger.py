@@ -7,6 +7,8 @@ Bollinger Bands Indicator
 from typing import List, Optional, Dict
 import math
 
+from . import vectorized as _vec
+
 
 def bollinger(
     prices: List[float],
@@ -34,6 +36,10 @@ def bollinger(
     if len(prices) < period:
         return None
     
+    if _vec.use_vectorized(prices):
+        bands = _vec.bollinger_series(prices[-period:], period, std_dev)
+        return {k: v[-1].item() for k, v in bands.items()}
+    
     # 取最近 period 个价格
     window = prices[-period:]
     
@@ -0,0 +1,241 @@
+"""
+CandleFrame - 列式 K 线容器
+
+把 List[Dict] 形式的 K 线转为连续的列数组（float64 价格/成交量 + int64 时间戳），
+在回测引擎、信号监控、策略、指标之间共享同一份数据：
+
+- 新代码直接读列：frame.close / frame.high / ...（NumPy 可用时为 ndarray 视图）
+- 旧策略照常使用：len(frame)、frame[-1]["close"]、for c in frame、frame[a:b]
+- 切片 frame[a:b] 返回共享底层数组的视图，O(1)、不复制
+
+NumPy 不可用时退化为 array.array + memoryview，接口不变。
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
+
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _float_column(values: List[float]):
+    if NUMPY_AVAILABLE:
+        return np.asarray(values, dtype=np.float64)
+    return memoryview(array("d", values))
+
+
+def _int_column(values: List[int]):
+    if NUMPY_AVAILABLE:
+        return np.asarray(values, dtype=np.int64)
+    return memoryview(array("q", values))
+
+
+class CandleFrame:
+    """
+    列式 K 线容器（行为兼容 List[Dict]）
+
+    构造：
+        frame = CandleFrame.from_candles(candles)
+
+    默认（keep_rows=False）只保存列数组，frame[i] 按需构造 dict，内存占用最小；
+    调用方需要原 dict（额外字段 / 非数值时间戳）时传 keep_rows=True，frame[i] 返回原 dict。
+    """
+
+    __slots__ = ("_cols", "_timestamps", "_rows", "_start", "_stop")
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence[float]],
+        timestamps: Optional[Sequence[int]] = None,
+        rows: Optional[List[Dict]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ):
+        self._cols = columns
+        self._timestamps = timestamps
+        self._rows = rows
+        self._start = start
+        self._stop = len(columns["close"]) if stop is None else stop
+
+    # ========== 构造 ==========
+
+    @classmethod
+    def from_candles(cls, candles: Sequence[Dict], keep_rows: bool = False) -> "CandleFrame":
+        """
+        从 List[Dict] 构建（已是 CandleFrame 时直接返回）
+
+        timestamp 非数值（字符串/datetime）时不生成时间戳列，必须保留原始行。
+        """
+        if isinstance(candles, CandleFrame):
+            return candles
+
+        columns = {
+            name: _float_column([float(c.get(name) or 0) for c in candles])
+            for name in PRICE_FIELDS
+        }
+
+        timestamps = None
+        raw_ts = [c.get("timestamp") for c in candles]
+        if all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in raw_ts):
+            timestamps = _int_column([int(t) for t in raw_ts])
+        elif not keep_rows:
+            raise ValueError("non-numeric candle timestamps require keep_rows=True")
+
+        rows = list(candles) if keep_rows else None
+        return cls(columns, timestamps, rows)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[float],
+        timestamp: Sequence[int],
+    ) -> "CandleFrame":
+        """从列数组构建（不保留行，frame[i] 按需构造 dict）"""
+        columns = {
+            "open": _as_float_column(open),
+            "high": _as_float_column(high),
+            "low": _as_float_column(low),
+            "close": _as_float_column(close),
+            "volume": _as_float_column(volume),
+        }
+        n = len(columns["close"])
+        for name, col in columns.items():
+            if len(col) != n:
+                raise ValueError(f"column {name} length {len(col)} != {n}")
+        if len(timestamp) != n:
+            raise ValueError(f"column timestamp length {len(timestamp)} != {n}")
+        ts = np.asarray(timestamp, dtype=np.int64) if NUMPY_AVAILABLE else _int_column(list(timestamp))
+        return cls(columns, ts)
+
+    # ========== 列访问（零拷贝视图）==========
+
+    def column(self, name: str):
+        """获取列视图：open/high/low/close/volume/timestamp"""
+        if name == "timestamp":
+            if self._timestamps is None:
+                raise KeyError("timestamp column unavailable (non-numeric timestamps)")
+            return self._timestamps[self._start:self._stop]
+        return self._cols[name][self._start:self._stop]
+
+    @property
+    def open(self):
+        return self.column("open")
+
+    @property
+    def high(self):
+        return self.column("high")
+
+    @property
+    def low(self):
+        return self.column("low")
+
+    @property
+    def close(self):
+        return self.column("close")
+
+    @property
+    def volume(self):
+        return self.column("volume")
+
+    @property
+    def timestamp(self):
+        return self.column("timestamp")
+
+    # ========== List[Dict] 兼容 ==========
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __bool__(self) -> bool:
+        return self._stop > self._start
+
+    def _row(self, idx: int) -> Dict:
+        if self._rows is not None:
+            return self._rows[idx]
+        cols = self._cols
+        return {
+            "open": float(cols["open"][idx]),
+            "high": float(cols["high"][idx]),
+            "low": float(cols["low"][idx]),
+            "close": float(cols["close"][idx]),
+            "volume": float(cols["volume"][idx]),
+            "timestamp": int(self._timestamps[idx]),
+        }
+
+    def __getitem__(self, key: Union[int, slice]):
+        if key.__class__ is int:
+            # 热路径：旧策略大量 candles[i] 访问
+            if key < 0:
+                key += self._stop
+            else:
+                key += self._start
+            if key < self._start or key >= self._stop:
+                raise IndexError("CandleFrame index out of range")
+            rows = self._rows
+            return rows[key] if rows is not None else self._row(key)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._stop - self._start)
+            if step != 1:
+                return [self._row(self._start + i) for i in range(start, stop, step)]
+            stop = max(start, stop)
+            return CandleFrame(
+                self._cols, self._timestamps, self._rows,
+                self._start + start, self._start + stop,
+            )
+        return self[int(key)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self._rows is not None:
+            return iter(self._rows[self._start:self._stop])
+        return (self._row(i) for i in range(self._start, self._stop))
+
+    def __reversed__(self) -> Iterator[Dict]:
+        return (self._row(i) for i in range(self._stop - 1, self._start - 1, -1))
+
+    def __repr__(self) -> str:
+        return f"CandleFrame(len={len(self)})"
+
+    def to_list(self) -> List[Dict]:
+        """转回 List[Dict]（复制）"""
+        if self._rows is not None:
+            return self._rows[self._start:self._stop]
+        return [self._row(i) for i in range(self._start, self._stop)]
+
+
+def _as_float_column(values: Sequence[float]):
+    if NUMPY_AVAILABLE:
+        return np.asarray(values, dtype=np.float64)
+    if isinstance(values, memoryview):
+        return values
+    return _float_column([float(v) for v in values])
+
+
+def column(candles: Sequence[Dict], name: str):
+    """
+    取单列：CandleFrame 返回零拷贝视图，List[Dict] 返回新列表
+
+    供指标/策略统一读取 close/high/low 等列，避免各处重复 [c["close"] for c in candles]。
+    """
+    if isinstance(candles, CandleFrame):
+        return candles.column(name)
+    return [c[name] for c in candles]
+
+
+def column_list(candles: Sequence[Dict], name: str) -> List:
+    """
+    取单列为 Python list（适合逐元素循环；CandleFrame 走 C 层 tolist，无逐行 dict 访问）
+    """
+    if isinstance(candles, CandleFrame):
+        return candles.column(name).tolist()
+    return [c[name] for c in candles]
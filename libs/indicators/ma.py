@@ -6,6 +6,8 @@ Moving Average Indicators
 
 from typing import List, Optional
 
+from . import vectorized as _vec
+
 
 def sma(prices: List[float], period: int) -> Optional[float]:
     """
@@ -34,6 +36,9 @@ def sma_series(prices: List[float], period: int) -> List[Optional[float]]:
     Returns:
         SMA 序列，前 period-1 个为 None
     """
+    if _vec.use_vectorized(prices):
+        return _vec.to_optional_list(_vec.sma_series(prices, period), period - 1)
+    
     result: List[Optional[float]] = []
     for i in range(len(prices)):
         if i < period - 1:
@@ -58,6 +63,9 @@ def ema(prices: List[float], period: int) -> Optional[float]:
     if len(prices) < period:
         return None
     
+    if _vec.use_vectorized(prices):
+        return _vec.ema_series(prices, period)[-1].item()
+    
     multiplier = 2 / (period + 1)
     
     # 初始 EMA = 前 period 个的 SMA
@@ -84,6 +92,9 @@ def ema_series(prices: List[float], period: int) -> List[Optional[float]]:
     if len(prices) < period:
         return [None] * len(prices)
     
+    if _vec.use_vectorized(prices):
+        return _vec.to_optional_list(_vec.ema_series(prices, period), period - 1)
+    
     result: List[Optional[float]] = [None] * (period - 1)
     
     multiplier = 2 / (period + 1)
@@ -6,6 +6,8 @@ RSI Indicator
 
 from typing import List, Optional
 
+from . import vectorized as _vec
+
 
 def rsi(prices: List[float], period: int = 14) -> Optional[float]:
     """
@@ -21,6 +23,9 @@ def rsi(prices: List[float], period: int = 14) -> Optional[float]:
     if len(prices) < period + 1:
         return None
     
+    # 只有最近 period 个变化参与计算
+    prices = prices[-(period + 1):]
+    
     # 计算价格变化
     changes = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
     
@@ -58,6 +63,9 @@ def rsi_series(prices: List[float], period: int = 14) -> List[Optional[float]]:
     if len(prices) < period + 1:
         return [None] * len(prices)
     
+    if _vec.use_vectorized(prices):
+        return _vec.to_optional_list(_vec.rsi_series(prices, period), period)
+    
     result: List[Optional[float]] = [None] * period
     
     # 计算价格变化
@@ -0,0 +1,161 @@
+"""
+Streaming Indicators
+
+增量（流式）指标：每根 K 线 O(1) 更新，不保存完整历史。
+
+供支持增量协议的策略（StrategyBase.on_bar）使用，
+计算口径与 ma / rsi / atr 中的批量函数保持一致：
+- StreamingSMA  ≈ sma(prices, period)
+- StreamingEMA  ≈ ema(prices, period)（以首 period 个 SMA 作为种子）
+- StreamingRSI  ≈ rsi_series(prices, period)[-1]（Wilder 平滑）
+- StreamingATR  ≈ atr(candles, period, min_pct)（最近 period 个 TR 的均值 + 最小值保护）
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .atr import true_range
+
+
+class StreamingSMA:
+    """
+    简单移动平均（滑动窗口累加和）
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window: Deque[float] = deque()
+        self._sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """推入新价格，返回最新 SMA（数据不足返回 None）"""
+        self._window.append(price)
+        self._sum += price
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+    def reset(self) -> None:
+        self._window.clear()
+        self._sum = 0.0
+        self.value = None
+
+
+class StreamingEMA:
+    """
+    指数移动平均（前 period 个取 SMA 作为初值，之后递推）
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._multiplier = 2 / (period + 1)
+        self._count = 0
+        self._seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """推入新价格，返回最新 EMA（数据不足返回 None）"""
+        self._count += 1
+        if self._count < self.period:
+            self._seed_sum += price
+            return None
+        if self._count == self.period:
+            self._seed_sum += price
+            self.value = self._seed_sum / self.period
+            return self.value
+        self.value = (price - self.value) * self._multiplier + self.value
+        return self.value
+
+    def reset(self) -> None:
+        self._count = 0
+        self._seed_sum = 0.0
+        self.value = None
+
+
+class StreamingRSI:
+    """
+    RSI（Wilder 平滑，与 rsi_series 一致）
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev: Optional[float] = None
+        self._changes = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """推入新价格，返回最新 RSI（数据不足返回 None）"""
+        prev = self._prev
+        self._prev = price
+        if prev is None:
+            return None
+
+        change = price - prev
+        gain = max(0, change)
+        loss = max(0, -change)
+        self._changes += 1
+
+        if self._changes < self.period:
+            self._avg_gain += gain
+            self._avg_loss += loss
+            return None
+        if self._changes == self.period:
+            self._avg_gain = (self._avg_gain + gain) / self.period
+            self._avg_loss = (self._avg_loss + loss) / self.period
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+
+        if self._avg_loss == 0:
+            self.value = 100.0
+        else:
+            rs = self._avg_gain / self._avg_loss
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+    def reset(self) -> None:
+        self._prev = None
+        self._changes = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self.value = None
+
+
+class StreamingATR:
+    """
+    ATR（最近 period 个 TR 的简单均值，带最小值保护，与 atr() 一致）
+    """
+
+    def __init__(self, period: int = 14, min_pct: float = 0.01):
+        self.period = period
+        self.min_pct = min_pct
+        self._prev_close: Optional[float] = None
+        self._trs = StreamingSMA(period)
+        self.value: float = 0.0
+
+    def update(self, candle: Dict) -> float:
+        """推入新 K 线（需包含 high/low/close），返回最新 ATR"""
+        high = candle.get("high", 0)
+        low = candle.get("low", 0)
+        close = candle.get("close", 0)
+
+        if self._prev_close is not None:
+            self._trs.update(true_range(high, low, self._prev_close))
+        self._prev_close = close
+
+        default_atr = close * self.min_pct
+        if self._trs.value is None:
+            self.value = default_atr
+        else:
+            self.value = max(self._trs.value, default_atr)
+        return self.value
+
+    def reset(self) -> None:
+        self._prev_close = None
+        self._trs.reset()
+        self.value = 0.0
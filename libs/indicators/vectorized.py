@@ -0,0 +1,309 @@
+"""
+Vectorized Indicators (NumPy)
+
+指标的 NumPy 向量化后端：输入数组，输出完整序列（np.ndarray，预热段为 NaN）。
+
+- SMA：累加和差分，O(n)
+- EMA / Wilder 平滑（RSI、ADX 等）：分块闭式递推，避免逐元素 Python 循环
+- Bollinger：滑动窗口标准差（总体标准差，与 bollinger() 一致）
+- ATR：与 atr() 口径一致（最近 period 个 TR 的简单均值 + 最小值保护）
+
+计算口径与 ma / rsi / macd / bollinger / atr / volume / fibo 中的列表版本一致（浮点容差内）。
+NumPy 可用且数据量足够时，列表版本会自动切换到这里（见 use_vectorized）。
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
+
+
+# 列表版本自动切换向量化的最小长度（更短的序列 NumPy 转换开销大于收益）
+VECTORIZE_MIN_LEN = 128
+
+# 分块递推时 (1-alpha)^-k 的上限，控制在 1e100 内防止溢出/精度损失
+_MAX_DECAY_EXP = 230.0
+
+
+def use_vectorized(values) -> bool:
+    """判断是否走向量化路径：NumPy 可用且（输入已是 ndarray 或长度足够）"""
+    if not NUMPY_AVAILABLE:
+        return False
+    if isinstance(values, np.ndarray):
+        return True
+    return len(values) >= VECTORIZE_MIN_LEN
+
+
+def to_optional_list(values, warmup: int) -> List[Optional[float]]:
+    """ndarray → List[Optional[float]]，前 warmup 个置 None（与列表版本返回格式一致）"""
+    out = values.tolist()
+    warmup = min(warmup, len(out))
+    out[:warmup] = [None] * warmup
+    return out
+
+
+def _as_array(values: Sequence[float]):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _ewm(values, alpha: float, seed: float):
+    """
+    一阶递推 y[j] = (1 - alpha) * y[j-1] + alpha * x[j]，y[-1] = seed
+
+    分块闭式：块内 y[j] = d^(j+1) * (y0 + alpha * Σ_{k<=j} x[k] * d^-(k+1))，d = 1 - alpha
+    """
+    x = _as_array(values)
+    n = len(x)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = x
+        return out
+
+    log_d = np.log(decay)
+    block = max(1, int(_MAX_DECAY_EXP / -log_d)) if log_d < 0 else n
+    prev = seed
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        k = np.arange(1, len(chunk) + 1, dtype=np.float64)
+        pw = np.exp(k * log_d)             # d^(k)
+        acc = np.cumsum(chunk / pw) * alpha
+        res = pw * (prev + acc)
+        out[start:start + len(chunk)] = res
+        prev = res[-1]
+    return out
+
+
+# ========== MA ==========
+
+def sma_series(prices: Sequence[float], period: int):
+    """SMA 序列（累加和差分），前 period-1 个为 NaN"""
+    x = _as_array(prices)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period or period <= 0:
+        return out
+    csum = np.cumsum(np.concatenate(([0.0], x)))
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def ema_series(prices: Sequence[float], period: int):
+    """EMA 序列（首 period 个 SMA 为种子），前 period-1 个为 NaN"""
+    x = _as_array(prices)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period or period <= 0:
+        return out
+    seed = x[:period].sum() / period
+    out[period - 1] = seed
+    if n > period:
+        out[period:] = _ewm(x[period:], 2 / (period + 1), seed)
+    return out
+
+
+# ========== RSI ==========
+
+def rsi_series(prices: Sequence[float], period: int = 14):
+    """RSI 序列（Wilder 平滑），前 period 个为 NaN"""
+    x = _as_array(prices)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < period + 1:
+        return out
+
+    changes = np.diff(x)
+    gains = np.maximum(changes, 0.0)
+    losses = np.maximum(-changes, 0.0)
+
+    avg_gain = np.empty(n - period, dtype=np.float64)
+    avg_loss = np.empty(n - period, dtype=np.float64)
+    avg_gain[0] = gains[:period].sum() / period
+    avg_loss[0] = losses[:period].sum() / period
+    if n - period > 1:
+        alpha = 1.0 / period
+        avg_gain[1:] = _ewm(gains[period:], alpha, avg_gain[0])
+        avg_loss[1:] = _ewm(losses[period:], alpha, avg_loss[0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        rsi_vals = 100 - (100 / (1 + rs))
+    rsi_vals[avg_loss == 0] = 100.0
+    out[period:] = rsi_vals
+    return out
+
+
+# ========== MACD ==========
+
+def macd_series(
+    prices: Sequence[float],
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+) -> Dict[str, "np.ndarray"]:
+    """
+    MACD 序列：{'macd', 'signal', 'histogram'}，与输入等长
+
+    信号线为有效 MACD 值（从第 slow-1 根起）的 EMA，与 macd() 一致。
+    """
+    x = _as_array(prices)
+    n = len(x)
+    macd_line = ema_series(x, fast) - ema_series(x, slow)
+    signal_line = np.full(n, np.nan)
+    first = max(fast, slow) - 1
+    if n > first:
+        signal_line[first:] = ema_series(macd_line[first:], signal)
+    return {
+        "macd": macd_line,
+        "signal": signal_line,
+        "histogram": macd_line - signal_line,
+    }
+
+
+# ========== Bollinger ==========
+
+def bollinger_series(
+    prices: Sequence[float],
+    period: int = 20,
+    std_dev: float = 2.0,
+) -> Dict[str, "np.ndarray"]:
+    """
+    布林带序列：{'middle', 'upper', 'lower', 'bandwidth', 'percent_b'}，前 period-1 个为 NaN
+    """
+    x = _as_array(prices)
+    n = len(x)
+    keys = ("middle", "upper", "lower", "bandwidth", "percent_b")
+    result = {k: np.full(n, np.nan) for k in keys}
+    if n < period or period <= 0:
+        return result
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, period)
+    middle = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    upper = middle + std * std_dev
+    lower = middle - std * std_dev
+    band_range = upper - lower
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bandwidth = np.where(middle != 0, band_range / middle * 100, 0.0)
+        percent_b = np.where(band_range != 0, (x[period - 1:] - lower) / band_range, 0.5)
+
+    for key, vals in zip(keys, (middle, upper, lower, bandwidth, percent_b)):
+        result[key][period - 1:] = vals
+    return result
+
+
+# ========== ATR ==========
+
+def true_range_series(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float]):
+    """TR 序列，第 0 个为 NaN（无前收盘价）"""
+    h = _as_array(highs)
+    l = _as_array(lows)
+    c = _as_array(closes)
+    out = np.full(len(c), np.nan)
+    if len(c) < 2:
+        return out
+    prev_close = c[:-1]
+    out[1:] = np.maximum.reduce([
+        h[1:] - l[1:],
+        np.abs(h[1:] - prev_close),
+        np.abs(l[1:] - prev_close),
+    ])
+    return out
+
+
+def atr_series(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    period: int = 14,
+    min_pct: float = 0.01,
+):
+    """
+    ATR 序列，out[i] == atr(candles[:i+1], period, min_pct)
+
+    数据不足处返回 close * min_pct（与 atr() 的兜底一致）。
+    """
+    c = _as_array(closes)
+    n = len(c)
+    default_atr = c * min_pct
+    if n < period + 1:
+        return default_atr
+    tr = true_range_series(highs, lows, c)
+    mean_tr = sma_series(tr[1:], period)
+    out = default_atr.copy()
+    out[period:] = np.maximum(mean_tr[period - 1:], default_atr[period:])
+    return out
+
+
+# ========== Volume ==========
+
+def obv_series(closes: Sequence[float], volumes: Sequence[float]):
+    """OBV 序列（首个为 0）"""
+    c = _as_array(closes)
+    v = _as_array(volumes)
+    out = np.zeros(len(c), dtype=np.float64)
+    if len(c) < 2:
+        return out
+    out[1:] = np.cumsum(np.sign(np.diff(c)) * v[1:])
+    return out
+
+
+def vwap_series(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    volumes: Sequence[float],
+):
+    """累计 VWAP 序列，out[-1] == vwap(...)；累计成交量为 0 处为 NaN"""
+    h = _as_array(highs)
+    l = _as_array(lows)
+    c = _as_array(closes)
+    v = _as_array(volumes)
+    typical = (h + l + c) / 3
+    cum_vol = np.cumsum(v)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(cum_vol != 0, np.cumsum(typical * v) / cum_vol, np.nan)
+
+
+# ========== Fibonacci ==========
+
+def fibo_levels(
+    swing_highs: Sequence[float],
+    swing_lows: Sequence[float],
+    levels: Optional[Sequence[float]] = None,
+) -> Dict[float, "np.ndarray"]:
+    """批量斐波那契回撤位：{比例: 价格数组}"""
+    from .fibo import DEFAULT_FIBO_LEVELS
+    if levels is None:
+        levels = DEFAULT_FIBO_LEVELS
+    hi = _as_array(swing_highs)
+    lo = _as_array(swing_lows)
+    swing_range = hi - lo
+    return {level: hi - swing_range * level for level in levels}
+
+
+def price_in_fibo_zone_series(
+    prices: Sequence[float],
+    fibo_dict: Dict[float, float],
+    tolerance_pct: float = 0.002,
+):
+    """
+    批量判断价格是否在斐波那契位附近，返回命中的比例数组（未命中为 NaN）
+
+    多个比例同时命中时取最大比例，与 price_in_fibo_zone() 的遍历顺序一致。
+    """
+    p = _as_array(prices)
+    out = np.full(len(p), np.nan)
+    for level, level_price in sorted(fibo_dict.items()):
+        if level_price == 0:
+            continue
+        hit = np.abs(p - level_price) / level_price <= tolerance_pct
+        out[hit] = level
+    return out
@@ -6,6 +6,8 @@ Volume Indicators
 
 from typing import List, Optional, Dict
 
+from . import vectorized as _vec
+
 
 def obv(
     closes: List[float],
@@ -27,6 +29,9 @@ def obv(
     if len(closes) != len(volumes):
         return None
     
+    if _vec.use_vectorized(closes):
+        return _vec.obv_series(closes, volumes)[-1].item()
+    
     obv_val = 0.0
     
     for i in range(1, len(closes)):
@@ -59,6 +64,9 @@ def obv_series(
     if len(closes) != len(volumes):
         return [None] * len(closes)
     
+    if _vec.use_vectorized(closes):
+        return _vec.obv_series(closes, volumes).tolist()
+    
     result: List[Optional[float]] = [0.0]  # 第一个 OBV = 0
     obv_val = 0.0
     
@@ -94,6 +102,10 @@ def vwap(
     if n == 0 or len(highs) != n or len(lows) != n or len(volumes) != n:
         return None
     
+    if _vec.use_vectorized(closes):
+        val = _vec.vwap_series(highs, lows, closes, volumes)[-1].item()
+        return None if val != val else val  # NaN = 总成交量为 0
+    
     total_volume = sum(volumes)
     if total_volume == 0:
         return None
@@ -7,7 +7,7 @@ Ledger Module - 数据仓库层
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import and_, desc, func
 from sqlalchemy.orm import Session
@@ -64,27 +64,33 @@ class AccountRepository:
         tenant_id: int,
         account_id: int,
         currency: str = "USDT",
+        for_update: bool = False,
     ) -> Optional[Account]:
-        """根据唯一键查询账户"""
-        return self.session.query(Account).filter(
+        """根据唯一键查询账户（for_update 时行加锁）"""
+        query = self.session.query(Account).filter(
             and_(
                 Account.tenant_id == tenant_id,
                 Account.account_id == account_id,
                 Account.currency == currency,
             )
-        ).first()
+        )
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
     
     def get_or_create(
         self,
         tenant_id: int,
         account_id: int,
         currency: str = "USDT",
+        for_update: bool = False,
     ) -> Tuple[Account, bool]:
         """获取或创建账户，返回 (account, is_new)"""
         account = self.get_by_key(
             tenant_id=tenant_id,
             account_id=account_id,
             currency=currency,
+            for_update=for_update,
         )
         
         if account:
@@ -200,6 +206,25 @@ class TransactionRepository:
         
         return query.first()
     
+    def get_sources(
+        self,
+        source_type: str,
+        source_ids: Iterable[str],
+        tenant_id: int,
+    ) -> Dict[str, str]:
+        """批量幂等检查：返回已存在流水的 {source_id: ledger_account_id}"""
+        source_ids = list(set(source_ids))
+        if not source_ids:
+            return {}
+        rows = self.session.query(Transaction.source_id, Transaction.ledger_account_id).filter(
+            and_(
+                Transaction.source_type == source_type,
+                Transaction.source_id.in_(source_ids),
+                Transaction.tenant_id == tenant_id,
+            )
+        ).all()
+        return {source_id: ledger_account_id for source_id, ledger_account_id in rows}
+    
     def list_transactions(self, filter: TransactionFilter) -> List[Transaction]:
         """查询流水列表"""
         query = self.session.query(Transaction).filter(
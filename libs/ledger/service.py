@@ -6,7 +6,7 @@ Ledger Module - 业务服务层
 
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from sqlalchemy.orm import Session
 
@@ -228,6 +228,21 @@ class LedgerService:
             currency=dto.currency,
         )
         
+        transaction = self.apply_trade(account, dto)
+        self.account_repo.update(account)
+        self.transaction_repo.create(transaction)
+        
+        return self._to_account_dto(account)
+    
+    def apply_trade(self, account: Account, dto: TradeSettlementDTO) -> Transaction:
+        """
+        在账户对象上应用一笔交易结算（只改内存，不写库）
+        
+        余额不足时抛异常且不修改账户。
+        
+        Returns:
+            未持久化的流水
+        """
         # 计算交易金额
         trade_value = dto.quantity * dto.price
         fee = dto.fee
@@ -269,10 +284,8 @@ class LedgerService:
         if dto.realized_pnl is not None:
             account.realized_pnl = Decimal(str(account.realized_pnl)) + dto.realized_pnl
         
-        self.account_repo.update(account)
-        
         # 记录流水
-        self._record_transaction(
+        return self._build_transaction(
             account=account,
             transaction_type=transaction_type,
             amount=amount,
@@ -282,8 +295,20 @@ class LedgerService:
             symbol=dto.symbol,
             transaction_at=dto.settled_at or datetime.now(),
         )
-        
-        return self._to_account_dto(account)
+    
+    def lock_account(self, tenant_id: int, account_id: int, currency: str = "USDT") -> Account:
+        """获取（不存在则创建）并锁定账户行，用于批量结算"""
+        account, _ = self.account_repo.get_or_create(
+            tenant_id=tenant_id,
+            account_id=account_id,
+            currency=currency,
+            for_update=True,
+        )
+        return account
+    
+    def settled_fills(self, fill_ids: Iterable[str], tenant_id: int) -> Dict[str, str]:
+        """批量幂等检查：已结算的 {fill_id: ledger_account_id}"""
+        return self.transaction_repo.get_sources("FILL", fill_ids, tenant_id)
     
     # ========== 冻结/解冻 ==========
     
@@ -771,7 +796,33 @@ class LedgerService:
         remark: Optional[str] = None,
     ) -> Transaction:
         """记录流水"""
-        transaction = Transaction(
+        transaction = self._build_transaction(
+            account=account,
+            transaction_type=transaction_type,
+            amount=amount,
+            fee=fee,
+            source_type=source_type,
+            source_id=source_id,
+            symbol=symbol,
+            transaction_at=transaction_at,
+            remark=remark,
+        )
+        return self.transaction_repo.create(transaction)
+    
+    def _build_transaction(
+        self,
+        account: Account,
+        transaction_type: TransactionType,
+        amount: Decimal,
+        fee: Decimal,
+        source_type: str,
+        source_id: Optional[str],
+        symbol: Optional[str] = None,
+        transaction_at: datetime = None,
+        remark: Optional[str] = None,
+    ) -> Transaction:
+        """构造流水（不写库）"""
+        return Transaction(
             transaction_id=generate_transaction_id(),
             ledger_account_id=account.ledger_account_id,
             tenant_id=account.tenant_id,
@@ -790,8 +841,6 @@ class LedgerService:
             transaction_at=transaction_at or datetime.now(),
             remark=remark,
         )
-        
-        return self.transaction_repo.create(transaction)
     
     def _to_account_dto(self, account: Account) -> AccountDTO:
         """模型转 DTO"""
@@ -4,11 +4,13 @@ Member Module - 会员/用户
 - 模型: User, ExchangeAccount, StrategyBinding
 - 服务: MemberService, LevelService
 - ExecutionTarget: 按策略绑定的可执行目标（含账户凭证，仅服务端）
+- ResolvedTarget: 批量解析后的执行目标（持仓/单次模式检查 + 下单参数），短 TTL 缓存
 """
 
 from .models import User, ExchangeAccount, StrategyBinding, Strategy
 from .repository import MemberRepository
-from .service import MemberService, ExecutionTarget
+from .service import MemberService, ExecutionTarget, ResolvedTarget
+from .target_cache import invalidate_execution_targets
 from .level_service import LevelService
 
 __all__ = [
@@ -19,5 +21,7 @@ __all__ = [
     "MemberRepository",
     "MemberService",
     "ExecutionTarget",
+    "ResolvedTarget",
+    "invalidate_execution_targets",
     "LevelService",
 ]
@@ -2,7 +2,7 @@
 Member Repository - 会员、账户、策略绑定数据访问
 """
 
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 from decimal import Decimal
 
 from sqlalchemy import func
@@ -22,6 +22,13 @@ class MemberRepository:
             q = q.filter(User.tenant_id == tenant_id)
         return q.first()
 
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        """批量查用户，返回 {user_id: User}"""
+        ids = set(user_ids)
+        if not ids:
+            return {}
+        return {u.id: u for u in self.db.query(User).filter(User.id.in_(ids)).all()}
+
     def get_user_by_email(self, email: str, tenant_id: int) -> Optional[User]:
         return self.db.query(User).filter(
             User.tenant_id == tenant_id,
@@ -93,6 +100,13 @@ class MemberRepository:
             q = q.filter(ExchangeAccount.user_id == user_id)
         return q.first()
 
+    def get_accounts_by_ids(self, account_ids: Iterable[int]) -> Dict[int, ExchangeAccount]:
+        """批量查交易所账户，返回 {account_id: ExchangeAccount}"""
+        ids = set(account_ids)
+        if not ids:
+            return {}
+        return {a.id: a for a in self.db.query(ExchangeAccount).filter(ExchangeAccount.id.in_(ids)).all()}
+
     def get_accounts_by_user(self, user_id: int) -> List[ExchangeAccount]:
         return self.db.query(ExchangeAccount).filter(
             ExchangeAccount.user_id == user_id,
@@ -135,6 +149,20 @@ class MemberRepository:
             ExchangeAccount.status == 1,
         ).all()
 
+    def futures_balance_by_user(self, user_ids: Iterable[int]) -> Dict[int, Decimal]:
+        """批量查各用户自持（status=1 账户 futures_balance 之和），返回 {user_id: Decimal}，无账户为 0"""
+        ids = set(user_ids)
+        if not ids:
+            return {}
+        rows = self.db.query(ExchangeAccount.user_id, func.sum(ExchangeAccount.futures_balance)).filter(
+            ExchangeAccount.user_id.in_(ids),
+            ExchangeAccount.status == 1,
+        ).group_by(ExchangeAccount.user_id).all()
+        result = {uid: Decimal("0") for uid in ids}
+        for uid, total in rows:
+            result[uid] = Decimal(str(total or 0))
+        return result
+
     def sum_futures_balance_by_user_ids(self, user_ids: List[int]) -> Decimal:
         if not user_ids:
             return Decimal("0")
@@ -242,6 +270,19 @@ class MemberRepository:
             TenantStrategy.strategy_id == strategy_id,
         ).first()
 
+    def get_tenant_strategies_by_tenants(
+        self, strategy_id: int, tenant_ids: Iterable[int],
+    ) -> Dict[int, TenantStrategy]:
+        """批量查某主策略在多个租户下的实例，返回 {tenant_id: TenantStrategy}"""
+        ids = set(tenant_ids)
+        if not ids:
+            return {}
+        rows = self.db.query(TenantStrategy).filter(
+            TenantStrategy.strategy_id == strategy_id,
+            TenantStrategy.tenant_id.in_(ids),
+        ).all()
+        return {ts.tenant_id: ts for ts in rows}
+
     def get_tenant_strategy_by_id(self, instance_id: int, tenant_id: Optional[int] = None) -> Optional[TenantStrategy]:
         q = self.db.query(TenantStrategy).filter(TenantStrategy.id == instance_id)
         if tenant_id is not None:
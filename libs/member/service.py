@@ -5,6 +5,7 @@ Member Service - 会员业务逻辑
 - 绑定/解绑交易所账户
 - 策略开启/关闭
 - 按策略获取可执行账户（供 signal-monitor 等多账户执行使用）
+- 按策略批量解析执行目标：持仓 / 单次模式检查 + 下单金额杠杆（短 TTL 缓存，见 target_cache）
 """
 
 import hashlib
@@ -15,8 +16,13 @@ from typing import Optional, List, Tuple
 
 from sqlalchemy.orm import Session
 
-from .models import User, ExchangeAccount, StrategyBinding, Strategy
+from libs.core import get_logger
+
+from .models import User, ExchangeAccount, StrategyBinding, Strategy, TenantStrategy
 from .repository import MemberRepository
+from .target_cache import get_target_cache
+
+log = get_logger("member-service")
 
 
 @dataclass
@@ -51,6 +57,95 @@ class ExecutionTarget:
     binding_max_loss_per_trade: float = 0  # 每单最大亏损(USDT)，优先于 capital×risk_pct
 
 
+@dataclass
+class ResolvedTarget:
+    """
+    批量解析后的执行目标：ExecutionTarget + 本次信号的执行前检查与下单参数。
+
+    amount_usdt / leverage / capital / max_loss_per_trade 按 绑定 > 租户实例 > 主策略 解析，
+    尚未按 ratio 缩放；以损定仓由调用方结合信号止损再计算。
+    """
+    target: ExecutionTarget
+    amount_usdt: float
+    leverage: int
+    capital: float
+    max_loss_per_trade: float
+    has_open_position: bool = False      # 已有同 symbol 同向持仓
+    single_mode_exhausted: bool = False  # 单次模式且该 symbol 已成交过
+
+
+def resolve_tenant_sizing(
+    strategy: Optional[Strategy],
+    ts: Optional[TenantStrategy],
+    default_amount: float,
+) -> Tuple[float, int, float, float]:
+    """
+    按租户解析下单金额与杠杆：
+    优先级：dim_tenant_strategy 覆盖 > dim_strategy 默认
+    返回 (amount_usdt, leverage, capital, max_loss_per_trade)。
+    如果设了 max_loss_per_trade，返回它（以损定仓直接用金额）；
+    否则 fallback 到 capital × risk_pct 计算 max_loss。
+    """
+    if not strategy:
+        return default_amount, 0, 0, 0
+
+    # 主策略默认值
+    base_capital = float(getattr(strategy, "capital", 0) or 0)
+    base_leverage = int(strategy.leverage or 0)
+    base_risk_mode = int(getattr(strategy, "risk_mode", 1) or 1)
+    base_amount = float(strategy.amount_usdt or 0)
+    base_max_loss = float(getattr(strategy, "max_loss_per_trade", 0) or 0)
+
+    # 租户覆盖
+    if ts:
+        capital = float(ts.capital) if getattr(ts, "capital", None) is not None else base_capital
+        leverage = int(ts.leverage) if ts.leverage is not None else base_leverage
+        risk_mode = int(getattr(ts, "risk_mode", None) or 0) if getattr(ts, "risk_mode", None) is not None else base_risk_mode
+        amount_fallback = float(ts.amount_usdt) if ts.amount_usdt is not None else base_amount
+        max_loss = float(getattr(ts, "max_loss_per_trade", 0) or 0) if getattr(ts, "max_loss_per_trade", None) is not None else base_max_loss
+    else:
+        capital = base_capital
+        leverage = base_leverage
+        risk_mode = base_risk_mode
+        amount_fallback = base_amount
+        max_loss = base_max_loss
+
+    # 计算 max_loss_per_trade: 优先直接设置的值，否则用 capital × risk_pct
+    if max_loss <= 0 and capital > 0:
+        pct = StrategyBinding.RISK_MODE_MAP.get(risk_mode, 0.01)
+        max_loss = round(capital * pct, 2)
+
+    # 计算固定金额（兜底值 / 非以损定仓策略用）
+    if capital > 0 and leverage > 0 and max_loss > 0:
+        amount = round(max_loss * leverage, 2)
+    elif capital > 0 and leverage > 0:
+        pct = StrategyBinding.RISK_MODE_MAP.get(risk_mode, 0.01)
+        amount = round(capital * pct * leverage, 2)
+    else:
+        amount = amount_fallback
+
+    amount = amount if amount > 0 else default_amount
+    return amount, leverage, capital, max_loss
+
+
+def resolve_target_sizing(
+    target: ExecutionTarget,
+    strategy: Optional[Strategy],
+    ts: Optional[TenantStrategy],
+    default_amount: float,
+) -> Tuple[float, int, float, float]:
+    """单个目标的下单参数，优先级: 用户绑定参数 > 租户配置 > 策略默认"""
+    if target.binding_amount_usdt > 0:
+        leverage = target.binding_leverage if target.binding_leverage > 0 else 20
+        capital = float(target.binding_capital or 0)
+        # max_loss_per_trade: 绑定级 > capital×risk_pct
+        max_loss = float(target.binding_max_loss_per_trade or 0)
+        if max_loss <= 0 and capital > 0:
+            max_loss = round(capital * StrategyBinding.RISK_MODE_MAP.get(target.binding_risk_mode or 1, 0.01), 2)
+        return target.binding_amount_usdt, leverage, capital, max_loss
+    return resolve_tenant_sizing(strategy, ts, default_amount)
+
+
 def _generate_invite_code() -> str:
     """8 位数字邀请码"""
     return "".join(random.choices(string.digits, k=8))
@@ -322,12 +417,66 @@ class MemberService:
             })
         return result
 
+    @staticmethod
+    def _build_execution_target(
+        b: StrategyBinding,
+        acc: Optional[ExchangeAccount],
+        user: Optional[User],
+        ts: Optional[TenantStrategy],
+    ) -> Optional[ExecutionTarget]:
+        """按过滤规则构建执行目标，不可执行时返回 None（规则见 get_execution_targets_by_strategy_code）"""
+        if not acc or acc.status != 1:
+            return None
+        if not user:
+            return None
+        # 该租户下该策略实例必须存在且启用，否则不执行（与开通校验一致）
+        if not ts or ts.status != 1:
+            return None
+        total_point = float(user.point_card_self or 0) + float(user.point_card_gift or 0)
+        if total_point <= 0:
+            return None  # 点卡为 0 不执行，相当于策略对该账户暂停
+        # ── 节点绑定校验（两步验证）──
+        # 用户绑定了策略 ≠ 可以下单，还需管理员绑定执行节点
+        # execution_node_id = None/0 表示未绑定节点，不执行
+        # execution_node_id > 0 表示绑定到远程节点
+        raw_node_id = getattr(acc, "execution_node_id", None)
+        if not raw_node_id or raw_node_id <= 0:
+            return None  # 未绑定执行节点，跳过
+        market_type = "future" if (acc.account_type or "futures").lower() in ("futures", "future") else "spot"
+        # 用户自定义仓位参数
+        b_capital = float(b.capital or 0)
+        b_leverage = int(b.leverage or 0)
+        b_amount = float(b.amount_usdt) if b_capital > 0 else 0
+
+        return ExecutionTarget(
+            tenant_id=acc.tenant_id,
+            account_id=acc.id,
+            user_id=acc.user_id,
+            exchange=acc.exchange or "binance",
+            api_key=acc.api_key,
+            api_secret=acc.api_secret,
+            passphrase=acc.passphrase,
+            market_type=market_type,
+            binding_id=b.id,
+            strategy_code=b.strategy_code,
+            ratio=int(b.ratio or 100),
+            execution_node_id=raw_node_id,
+            mode=int(b.mode or 2),
+            binding_capital=b_capital,
+            binding_leverage=b_leverage,
+            binding_amount_usdt=b_amount,
+            binding_risk_mode=int(b.risk_mode or 1),
+            binding_max_loss_per_trade=float(b.max_loss_per_trade or 0),
+        )
+
     def get_execution_targets_by_strategy_code(self, strategy_code: str) -> List[ExecutionTarget]:
         """
         根据 strategy_code 获取所有已绑定且启用的 (binding + 交易所账户) 列表，
         含执行所需字段（api_key/api_secret 等），仅服务端使用。
         用于按策略多账户执行时创建 LiveTrader + TradeSettlementService。
         点卡余额为 0 的用户不进入执行列表；该租户已下架/删除策略实例的也不执行。
+
+        逐条查询，适合少量绑定的管理查询；信号分发请用 resolve_execution_targets（批量 + 缓存）。
         """
         strategy = self.repo.get_strategy_by_code(strategy_code)
         if not strategy:
@@ -339,47 +488,113 @@ class MemberService:
             if not acc or acc.status != 1:
                 continue
             user = self.repo.get_user_by_id(acc.user_id)
-            if not user:
-                continue
-            # 该租户下该策略实例必须存在且启用，否则不执行（与开通校验一致）
-            ts = self.repo.get_tenant_strategy(acc.tenant_id, strategy.id)
-            if not ts or ts.status != 1:
-                continue
-            total_point = float(user.point_card_self or 0) + float(user.point_card_gift or 0)
-            if total_point <= 0:
-                continue  # 点卡为 0 不执行，相当于策略对该账户暂停
-            # ── 节点绑定校验（两步验证）──
-            # 用户绑定了策略 ≠ 可以下单，还需管理员绑定执行节点
-            # execution_node_id = None/0 表示未绑定节点，不执行
-            # execution_node_id > 0 表示绑定到远程节点
-            raw_node_id = getattr(acc, "execution_node_id", None)
-            if not raw_node_id or raw_node_id <= 0:
-                continue  # 未绑定执行节点，跳过
-            market_type = "future" if (acc.account_type or "futures").lower() in ("futures", "future") else "spot"
-            node_id = raw_node_id
-            # 用户自定义仓位参数
-            b_capital = float(b.capital or 0)
-            b_leverage = int(b.leverage or 0)
-            b_amount = float(b.amount_usdt) if b_capital > 0 else 0
-
-            targets.append(ExecutionTarget(
-                tenant_id=acc.tenant_id,
-                account_id=acc.id,
-                user_id=acc.user_id,
-                exchange=acc.exchange or "binance",
-                api_key=acc.api_key,
-                api_secret=acc.api_secret,
-                passphrase=acc.passphrase,
-                market_type=market_type,
-                binding_id=b.id,
-                strategy_code=b.strategy_code,
-                ratio=int(b.ratio or 100),
-                execution_node_id=node_id,
-                mode=int(b.mode or 2),
-                binding_capital=b_capital,
-                binding_leverage=b_leverage,
-                binding_amount_usdt=b_amount,
-                binding_risk_mode=int(b.risk_mode or 1),
-                binding_max_loss_per_trade=float(b.max_loss_per_trade or 0),
-            ))
+            ts = self.repo.get_tenant_strategy(acc.tenant_id, strategy.id) if user else None
+            target = self._build_execution_target(b, acc, user, ts)
+            if target:
+                targets.append(target)
         return targets
+
+    def _load_execution_targets(
+        self, strategy_code: str, default_amount: float,
+    ) -> List[Tuple[ExecutionTarget, Tuple[float, int, float, float]]]:
+        """批量加载策略的执行目标及下单参数（策略 / 绑定 / 账户 / 用户 / 租户实例 各一次查询）"""
+        strategy = self.repo.get_strategy_by_code(strategy_code)
+        if not strategy:
+            return []
+        bindings = self.repo.get_bindings_by_strategy_code(strategy_code)
+        if not bindings:
+            return []
+        accounts = self.repo.get_accounts_by_ids(b.account_id for b in bindings)
+        users = self.repo.get_users_by_ids(a.user_id for a in accounts.values())
+        tenant_strategies = self.repo.get_tenant_strategies_by_tenants(
+            strategy.id, (a.tenant_id for a in accounts.values()),
+        )
+        loaded = []
+        for b in bindings:
+            acc = accounts.get(b.account_id)
+            user = users.get(acc.user_id) if acc else None
+            ts = tenant_strategies.get(acc.tenant_id) if acc else None
+            target = self._build_execution_target(b, acc, user, ts)
+            if target:
+                loaded.append((target, resolve_target_sizing(target, strategy, ts, default_amount)))
+        return loaded
+
+    def resolve_execution_targets(
+        self,
+        strategy_code: str,
+        symbol: str,
+        position_side: str,
+        default_amount: float = 0.0,
+        use_cache: bool = True,
+    ) -> List[ResolvedTarget]:
+        """
+        批量解析本次信号的执行目标（供按策略分发使用）。
+
+        目标列表与下单参数走短 TTL 缓存（绑定等变更提交后自动失效）；
+        持仓去重与单次模式检查每次实时查询，但对所有目标各只查一次。
+
+        Args:
+            strategy_code: 策略代码
+            symbol: 规范化交易对（BTC/USDT），同时匹配无斜杠格式
+            position_side: LONG / SHORT
+            default_amount: 无策略 / 金额为 0 时的兜底下单金额
+        """
+        if use_cache:
+            loaded = get_target_cache().get_or_load(
+                (strategy_code, default_amount),
+                lambda: self._load_execution_targets(strategy_code, default_amount),
+            )
+        else:
+            loaded = self._load_execution_targets(strategy_code, default_amount)
+        if not loaded:
+            return []
+
+        targets = [t for t, _ in loaded]
+        open_keys = self._open_position_keys(targets, symbol, position_side)
+        exhausted = self._single_mode_exhausted_accounts(targets, symbol)
+        resolved = []
+        for target, (amount, leverage, capital, max_loss) in loaded:
+            resolved.append(ResolvedTarget(
+                target=target,
+                amount_usdt=amount,
+                leverage=leverage,
+                capital=capital,
+                max_loss_per_trade=max_loss,
+                has_open_position=(target.tenant_id, target.account_id, target.exchange or "binance") in open_keys,
+                single_mode_exhausted=target.mode == 1 and target.account_id in exhausted,
+            ))
+        return resolved
+
+    def _open_position_keys(
+        self, targets: List[ExecutionTarget], symbol: str, position_side: str,
+    ) -> set:
+        """一次查询所有目标账户的同 symbol 同向 OPEN 持仓，返回 {(tenant_id, account_id, exchange)}"""
+        from libs.position.models import Position
+        try:
+            rows = self.db.query(Position.tenant_id, Position.account_id, Position.exchange).filter(
+                Position.account_id.in_({t.account_id for t in targets}),
+                Position.symbol.in_({symbol, symbol.replace("/", "")}),
+                Position.position_side == position_side,
+                Position.quantity > 0,
+            ).all()
+        except Exception as e:
+            log.warning("batch open position check failed", error=str(e))
+            return set()
+        return {(r.tenant_id, r.account_id, r.exchange) for r in rows}
+
+    def _single_mode_exhausted_accounts(self, targets: List[ExecutionTarget], symbol: str) -> set:
+        """单次模式目标中已有该 symbol 成交记录的账户 ID"""
+        account_ids = {t.account_id for t in targets if t.mode == 1}
+        if not account_ids:
+            return set()
+        from libs.order_trade.models import Order
+        try:
+            rows = self.db.query(Order.account_id).filter(
+                Order.account_id.in_(account_ids),
+                Order.symbol.in_({symbol, symbol.replace("/", "")}),
+                Order.status.in_(["FILLED", "PARTIALLY_FILLED"]),
+            ).distinct().all()
+        except Exception as e:
+            log.warning("batch single mode check failed", error=str(e))
+            return set()
+        return {r.account_id for r in rows}
@@ -0,0 +1,132 @@
+"""
+Target Cache - 按策略执行目标的短 TTL 缓存
+
+缓存 MemberService 批量解析出的「绑定 + 账户 + 租户实例 + 下单参数」，信号高频到达时不必每次重查：
+
+- 进程内缓存，条目 TTL 由 member_target_cache_ttl 控制（秒，0 = 不缓存）
+- 跨进程失效：绑定 / 账户 / 策略 / 租户实例 / 用户点卡 变更提交后递增 Redis 版本号，
+  读取时版本号不一致即重新加载；Redis 不可用时退化为仅 TTL
+- 失效由 SQLAlchemy session 事件自动触发（after_flush 标记，after_commit 生效），
+  也可手动调用 invalidate_execution_targets()
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from libs.core import get_config, get_logger
+
+from .models import ExchangeAccount, Strategy, StrategyBinding, TenantStrategy, User
+
+log = get_logger("member-target-cache")
+
+VERSION_KEY = "ironbull:member:targets:version"
+
+# 变更后需要失效的模型；User / ExchangeAccount 只关注影响执行目标的字段
+# （登录、余额同步等高频更新不触发失效）
+_WATCHED_MODELS = (StrategyBinding, ExchangeAccount, TenantStrategy, Strategy, User)
+_WATCHED_FIELDS = {
+    User: ("point_card_self", "point_card_gift", "status"),
+    ExchangeAccount: (
+        "user_id", "tenant_id", "exchange", "account_type", "api_key", "api_secret",
+        "passphrase", "status", "execution_node_id",
+    ),
+}
+_DIRTY_FLAG = "member_targets_dirty"
+
+
+def _remote_version() -> Optional[str]:
+    try:
+        from libs.core import get_redis
+        return get_redis().get(VERSION_KEY)
+    except Exception:
+        return None
+
+
+def _bump_remote_version() -> None:
+    try:
+        from libs.core import get_redis
+        get_redis().incr(VERSION_KEY)
+    except Exception as e:
+        log.debug("target cache version bump skipped", error=str(e))
+
+
+class TargetCache:
+    """按 key 缓存加载结果，TTL + 版本号双重失效"""
+
+    def __init__(self, ttl: float = 10.0, version_fn: Callable[[], Optional[str]] = _remote_version):
+        self.ttl = ttl
+        self._version_fn = version_fn
+        self._entries: Dict[Hashable, Tuple[float, Optional[str], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if self.ttl <= 0:
+            return loader()
+        # 先取版本号再加载：加载期间若有变更，存入的旧版本号会让下次读取重新加载
+        version = self._version_fn()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_target_cache = TargetCache(ttl=get_config().get_float("member_target_cache_ttl", 10.0))
+
+
+def get_target_cache() -> TargetCache:
+    return _target_cache
+
+
+def invalidate_execution_targets() -> None:
+    """清空本进程缓存并通知其他进程（递增 Redis 版本号）"""
+    _target_cache.clear()
+    _bump_remote_version()
+
+
+def _touches_targets(session: Session) -> bool:
+    if any(isinstance(obj, _WATCHED_MODELS) for obj in list(session.new) + list(session.deleted)):
+        return True
+    for obj in session.dirty:
+        if not isinstance(obj, _WATCHED_MODELS):
+            continue
+        fields = _WATCHED_FIELDS.get(type(obj))
+        if fields is None:
+            return True
+        attrs = inspect(obj).attrs
+        if any(attrs[name].history.has_changes() for name in fields):
+            return True
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session: Session, flush_context) -> None:
+    if not session.info.get(_DIRTY_FLAG) and _touches_targets(session):
+        session.info[_DIRTY_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_FLAG, False):
+        invalidate_execution_targets()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_FLAG, None)
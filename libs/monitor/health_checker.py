@@ -12,6 +12,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import httpx
 
 from libs.core.logger import get_logger
+from libs.core.http_client import get_http_client
 
 log = get_logger("health-checker")
 
@@ -54,8 +55,8 @@ class HealthChecker:
         url = svc["url"]
         start = time.time()
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                resp = client.get(url)
+            client = get_http_client("health-check")
+            resp = client.get(url, timeout=self.timeout)
             latency = (time.time() - start) * 1000
             if resp.status_code == 200:
                 data = resp.json()
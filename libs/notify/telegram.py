@@ -13,11 +13,10 @@ Telegram Bot 通知器
    - TELEGRAM_CHAT_ID=xxx
 """
 
-import httpx
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
-from libs.core import get_config, get_logger
+from libs.core import get_config, get_logger, get_http_client
 from .base import NotifierBase, NotifyResult
 
 log = get_logger("telegram-notifier")
@@ -49,9 +48,9 @@ class TelegramNotifier(NotifierBase):
         """发送 API 请求"""
         url = f"{self.api_base}/{method}"
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                resp = client.post(url, json=data)
-                return resp.json()
+            client = get_http_client("telegram")
+            resp = client.post(url, json=data, timeout=self.timeout)
+            return resp.json()
         except Exception as e:
             log.error(f"Telegram API 请求失败: {e}")
             return {"ok": False, "description": str(e)}
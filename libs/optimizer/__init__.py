@@ -6,8 +6,12 @@ IronBull Optimizer Module
 组件：
 - GridOptimizer: 网格搜索优化（穷举）
 - GeneticOptimizer: 遗传算法优化（智能搜索）
+- ParallelEvaluator: 进程池并行评估（两种优化器通过 max_workers 启用）
+- EvaluationCache: 回测评估结果缓存（内容寻址，可选持久化）
 """
 
+from .parallel import ParallelEvaluator
+from .cache import EvaluationCache, fingerprint_candles, fingerprint_code
 from .grid_optimizer import GridOptimizer, OptimizationResult, ParameterGrid
 from .genetic_optimizer import (
     GeneticOptimizer,
@@ -22,6 +26,12 @@ from .genetic_optimizer import (
 )
 
 __all__ = [
+    # 并行评估
+    "ParallelEvaluator",
+    # 评估缓存
+    "EvaluationCache",
+    "fingerprint_candles",
+    "fingerprint_code",
     # 网格搜索
     "GridOptimizer",
     "OptimizationResult",
@@ -0,0 +1,182 @@
+"""
+Evaluation Cache - 回测评估结果缓存（内容寻址）
+
+键 = sha256(策略代码 + 代码指纹 + 规范化参数 + K 线数据指纹 + 引擎设置)，值 = 回测指标 dict。
+
+- 默认进程内（dict），同一次优化中的重复基因 / 跨代精英不再重复回测
+- 指定 path 时额外写入磁盘（每个键一个 JSON 文件，原子替换），
+  同一数据集上的多次 /api/backtest/optimize-genetic 调用可复用历史评估
+- 缓存的是回测指标而非适应度，切换 score_by 仍可命中
+- 命名空间带上策略 / 引擎源码指纹（fingerprint_code），改代码后持久化的旧结果自动失效
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from libs.core import get_logger
+
+logger = get_logger("optimizer-cache")
+
+
+def canonical_params(params: Dict[str, Any]) -> str:
+    """参数规范化：键排序、紧凑 JSON（int 与 float 保持区分）"""
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def fingerprint_candles(candles: Sequence[Dict]) -> str:
+    """
+    K 线数据集指纹（timestamp + OHLCV 全量参与哈希）
+
+    CandleFrame 直接哈希列数组字节；List[Dict] 逐根序列化。
+    """
+    from libs.indicators.candle_frame import CandleFrame, NUMPY_AVAILABLE
+
+    h = hashlib.sha256()
+    if isinstance(candles, CandleFrame) and NUMPY_AVAILABLE:
+        import numpy as np
+        for name in ("timestamp", "open", "high", "low", "close", "volume"):
+            try:
+                col = candles.column(name)
+            except KeyError:
+                # 非数值时间戳：回退到逐根序列化
+                return fingerprint_candles(candles.to_list())
+            h.update(np.ascontiguousarray(col).tobytes())
+        return h.hexdigest()
+
+    for c in candles:
+        h.update(repr((
+            c.get("timestamp"), c.get("open"), c.get("high"),
+            c.get("low"), c.get("close"), c.get("volume"),
+        )).encode())
+    return h.hexdigest()
+
+
+def _source_files(obj: Any) -> List[str]:
+    """对象对应的源文件：类含全部基类，包含目录下全部 .py"""
+    if inspect.isclass(obj):
+        files = []
+        for cls in obj.__mro__:
+            if cls is object:
+                continue
+            try:
+                files.append(inspect.getsourcefile(cls))
+            except TypeError:
+                continue  # 内置类型
+        return files
+    if inspect.ismodule(obj) and hasattr(obj, "__path__"):
+        files = []
+        for directory in obj.__path__:
+            for root, _, names in os.walk(directory):
+                files.extend(os.path.join(root, n) for n in names if n.endswith(".py"))
+        return files
+    return [inspect.getsourcefile(obj)]
+
+
+def fingerprint_code(*objs: Any) -> str:
+    """
+    代码指纹（类 / 模块 / 包 / 函数 的源文件内容 sha256）
+
+    用于评估缓存命名空间：策略或回测引擎源码变化后旧的持久化结果不再命中。
+    """
+    files = sorted({os.path.abspath(f) for obj in objs for f in _source_files(obj) if f})
+    h = hashlib.sha256()
+    for f in files:
+        h.update(os.path.basename(f).encode())
+        with open(f, "rb") as fh:
+            h.update(hashlib.sha256(fh.read()).digest())
+    return h.hexdigest()
+
+
+class EvaluationCache:
+    """
+    评估结果缓存
+
+    使用方式：
+        cache = EvaluationCache(
+            namespace={"strategy_code": "ma_cross", "code": fingerprint_code(MACrossStrategy, BacktestEngine),
+                       "dataset": fingerprint_candles(candles),
+                       "engine": {"initial_balance": 10000, "commission_rate": 0.001}},
+            path="/data/optimizer_cache",   # 可选，持久化目录
+        )
+        metrics = cache.get(params)
+        if metrics is None:
+            metrics = run_backtest(params)
+            cache.put(params, metrics)
+    """
+
+    def __init__(self, namespace: Optional[Dict[str, Any]] = None, path: Optional[str] = None):
+        self.namespace = canonical_params(namespace or {})
+        self.path = path or None
+        self.hits = 0
+        self.misses = 0
+        self._memory: Dict[str, Dict] = {}
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+
+    def key(self, params: Dict[str, Any]) -> str:
+        payload = self.namespace + "|" + canonical_params(params)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def get(self, params: Dict[str, Any]) -> Optional[Dict]:
+        """查询缓存，命中返回指标 dict（并计数），未命中返回 None"""
+        key = self.key(params)
+        metrics = self._memory.get(key)
+        if metrics is None and self.path:
+            metrics = self._load(key)
+            if metrics is not None:
+                self._memory[key] = metrics
+        if metrics is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return metrics
+
+    def record_hit(self) -> None:
+        """记一次命中（同一批次内的重复参数，由首个评估结果复用）"""
+        self.hits += 1
+
+    def put(self, params: Dict[str, Any], metrics: Dict) -> None:
+        """写入缓存（含错误结果的评估不缓存，下次重试）"""
+        if "error" in metrics:
+            return
+        key = self.key(params)
+        self._memory[key] = metrics
+        if self.path:
+            self._store(key, metrics)
+
+    def _load(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("cache entry unreadable", key=key, error=str(e))
+            return None
+
+    def _store(self, key: str, metrics: Dict) -> None:
+        target = self._file(key)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(metrics, f, default=str)
+            os.replace(tmp, target)
+        except Exception as e:
+            logger.warning("cache write failed", key=key, error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "persistent": bool(self.path),
+        }
@@ -9,7 +9,10 @@ import random
 import math
 from typing import Dict, List, Callable, Any, Optional, Tuple
 from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor
+
+from .cache import EvaluationCache
+from .parallel import ParallelEvaluator
 
 
 @dataclass
@@ -30,6 +33,7 @@ class GeneticConfig:
     mutation_rate: float = 0.2     # 变异概率
     tournament_size: int = 3       # 锦标赛选择大小
     early_stop_generations: int = 5  # 连续N代无改进则停止
+    seed: Optional[int] = None     # 随机种子（固定后结果可复现，与并行度无关）
 
 
 @dataclass
@@ -41,6 +45,7 @@ class GeneticResult:
     generations_run: int
     population_history: List[Dict]  # 每代统计
     all_individuals: List[Dict]     # 所有测试过的个体
+    cache_stats: Dict = field(default_factory=dict)  # 评估缓存命中统计
 
 
 class ParameterSpace:
@@ -77,50 +82,52 @@ class ParameterSpace:
         }
         return self
     
-    def random_value(self, name: str) -> Any:
+    def random_value(self, name: str, rng: random.Random = None) -> Any:
         """生成随机参数值"""
+        rng = rng or random
         spec = self.params[name]
         
         if spec["type"] == "int":
             steps = (spec["high"] - spec["low"]) // spec["step"]
-            return spec["low"] + random.randint(0, steps) * spec["step"]
+            return spec["low"] + rng.randint(0, steps) * spec["step"]
         
         elif spec["type"] == "float":
-            value = random.uniform(spec["low"], spec["high"])
+            value = rng.uniform(spec["low"], spec["high"])
             return round(value, spec["precision"])
         
         elif spec["type"] == "choice":
-            return random.choice(spec["choices"])
+            return rng.choice(spec["choices"])
         
         return None
     
-    def mutate_value(self, name: str, current: Any) -> Any:
+    def mutate_value(self, name: str, current: Any, rng: random.Random = None) -> Any:
         """变异参数值"""
+        rng = rng or random
         spec = self.params[name]
         
         if spec["type"] == "int":
             # 在当前值附近变异
-            delta = random.choice([-2, -1, 1, 2]) * spec["step"]
+            delta = rng.choice([-2, -1, 1, 2]) * spec["step"]
             new_val = current + delta
             return max(spec["low"], min(spec["high"], new_val))
         
         elif spec["type"] == "float":
             # 高斯变异
             range_size = spec["high"] - spec["low"]
-            delta = random.gauss(0, range_size * 0.1)
+            delta = rng.gauss(0, range_size * 0.1)
             new_val = current + delta
             new_val = max(spec["low"], min(spec["high"], new_val))
             return round(new_val, spec["precision"])
         
         elif spec["type"] == "choice":
             # 随机选择另一个
-            return random.choice(spec["choices"])
+            return rng.choice(spec["choices"])
         
         return current
     
-    def random_individual(self) -> Dict[str, Any]:
+    def random_individual(self, rng: random.Random = None) -> Dict[str, Any]:
         """生成随机个体"""
-        return {name: self.random_value(name) for name in self.params}
+        return {name: self.random_value(name, rng) for name in self.params}
 
 
 class GeneticOptimizer:
@@ -132,6 +139,14 @@ class GeneticOptimizer:
     2. 提供回测函数 backtest_func(params) -> metrics
     3. 提供适应度函数 fitness_func(metrics) -> float
     4. 调用 optimize() 获取最优参数
+    
+    并行：max_workers > 1 时每一代作为一个批次分发到进程池评估；
+    所有随机操作都在主进程用 config.seed 初始化的 RNG 完成，结果与并行度无关。
+    backtest_func 需可 pickle（模块级函数或 functools.partial），K 线等大对象放在 partial 中，
+    经进程池 initializer 每个进程只传一次。
+    
+    评估缓存：相同基因（重复个体 / 离散网格上的交叉变异结果）只回测一次。
+    默认进程内缓存；传入带 path 的 EvaluationCache 可跨调用持久复用。
     """
     
     def __init__(
@@ -141,12 +156,22 @@ class GeneticOptimizer:
         fitness_func: Callable[[Dict], float],
         config: GeneticConfig = None,
         constraints: List[Callable[[Dict], bool]] = None,
+        max_workers: int = 1,
+        executor: Optional[Executor] = None,
+        cache: Optional[EvaluationCache] = None,
+        start_method: Optional[str] = None,
     ):
         self.param_space = param_space
         self.backtest_func = backtest_func
         self.fitness_func = fitness_func
         self.config = config or GeneticConfig()
         self.constraints = constraints or []
+        self.max_workers = max_workers
+        self.executor = executor
+        self.start_method = start_method
+        self.cache = cache if cache is not None else EvaluationCache()
+        self._rng = random.Random(self.config.seed)
+        self._evaluator: Optional[ParallelEvaluator] = None
         
         self._all_individuals: List[Individual] = []
         self._population_history: List[Dict] = []
@@ -162,35 +187,72 @@ class GeneticOptimizer:
     
     def _create_individual(self, genes: Dict) -> Individual:
         """创建并评估个体"""
-        try:
-            metrics = self.backtest_func(genes)
-            fitness = self.fitness_func(metrics)
-        except Exception as e:
-            metrics = {"error": str(e)}
-            fitness = float("-inf")
-        
-        individual = Individual(genes=genes, fitness=fitness, metrics=metrics)
-        self._all_individuals.append(individual)
-        return individual
+        return self._create_individuals([genes])[0]
+    
+    def _create_individuals(self, genes_list: List[Dict]) -> List[Individual]:
+        """
+        批量创建并评估个体（并行时一批一次分发，结果顺序与输入一致）
+        
+        缓存命中及批内重复的基因不再回测，只有未命中的去重后分发。
+        """
+        evaluator = self._evaluator or ParallelEvaluator(self.backtest_func)
+        
+        outcomes: List[Optional[Tuple[Optional[Dict], Optional[str]]]] = [None] * len(genes_list)
+        pending: Dict[str, List[int]] = {}
+        for idx, genes in enumerate(genes_list):
+            key = self.cache.key(genes)
+            if key in pending:
+                self.cache.record_hit()
+                pending[key].append(idx)
+                continue
+            cached = self.cache.get(genes)
+            if cached is not None:
+                outcomes[idx] = (cached, None)
+            else:
+                pending[key] = [idx]
+        
+        to_run = [indexes[0] for indexes in pending.values()]
+        results = evaluator.map([((genes_list[i],), {}) for i in to_run])
+        for first, (metrics, error) in zip(to_run, results):
+            if error is None:
+                self.cache.put(genes_list[first], metrics)
+            for idx in pending[self.cache.key(genes_list[first])]:
+                outcomes[idx] = (metrics, error)
+        
+        individuals = []
+        for genes, (metrics, error) in zip(genes_list, outcomes):
+            if error is not None:
+                metrics = {"error": error}
+                fitness = float("-inf")
+            else:
+                try:
+                    fitness = self.fitness_func(metrics)
+                except Exception as e:
+                    metrics = {"error": str(e)}
+                    fitness = float("-inf")
+            
+            individual = Individual(genes=genes, fitness=fitness, metrics=metrics)
+            self._all_individuals.append(individual)
+            individuals.append(individual)
+        return individuals
     
     def _initialize_population(self) -> List[Individual]:
         """初始化种群"""
-        population = []
+        genes_list = []
         attempts = 0
         max_attempts = self.config.population_size * 10
         
-        while len(population) < self.config.population_size and attempts < max_attempts:
-            genes = self.param_space.random_individual()
+        while len(genes_list) < self.config.population_size and attempts < max_attempts:
+            genes = self.param_space.random_individual(self._rng)
             if self._is_valid(genes):
-                individual = self._create_individual(genes)
-                population.append(individual)
+                genes_list.append(genes)
             attempts += 1
         
-        return population
+        return self._create_individuals(genes_list)
     
     def _tournament_select(self, population: List[Individual]) -> Individual:
         """锦标赛选择"""
-        tournament = random.sample(population, min(self.config.tournament_size, len(population)))
+        tournament = self._rng.sample(population, min(self.config.tournament_size, len(population)))
         return max(tournament, key=lambda x: x.fitness)
     
     def _crossover(self, parent1: Individual, parent2: Individual) -> Tuple[Dict, Dict]:
@@ -199,7 +261,7 @@ class GeneticOptimizer:
         child2_genes = {}
         
         for name in self.param_space.params:
-            if random.random() < 0.5:
+            if self._rng.random() < 0.5:
                 child1_genes[name] = parent1.genes[name]
                 child2_genes[name] = parent2.genes[name]
             else:
@@ -213,8 +275,8 @@ class GeneticOptimizer:
         mutated = genes.copy()
         
         for name in self.param_space.params:
-            if random.random() < self.config.mutation_rate:
-                mutated[name] = self.param_space.mutate_value(name, mutated[name])
+            if self._rng.random() < self.config.mutation_rate:
+                mutated[name] = self.param_space.mutate_value(name, mutated[name], self._rng)
         
         return mutated
     
@@ -227,14 +289,15 @@ class GeneticOptimizer:
         elite_count = max(1, int(self.config.population_size * self.config.elite_ratio))
         new_population = population[:elite_count]
         
-        # 生成新个体
-        while len(new_population) < self.config.population_size:
+        # 生成新个体基因（整代生成后一次性批量评估）
+        offspring: List[Dict] = []
+        while len(new_population) + len(offspring) < self.config.population_size:
             # 选择父代
             parent1 = self._tournament_select(population)
             parent2 = self._tournament_select(population)
             
             # 交叉
-            if random.random() < self.config.crossover_rate:
+            if self._rng.random() < self.config.crossover_rate:
                 child1_genes, child2_genes = self._crossover(parent1, parent2)
             else:
                 child1_genes = parent1.genes.copy()
@@ -246,10 +309,10 @@ class GeneticOptimizer:
             
             # 验证约束并添加
             for genes in [child1_genes, child2_genes]:
-                if len(new_population) < self.config.population_size and self._is_valid(genes):
-                    individual = self._create_individual(genes)
-                    new_population.append(individual)
+                if len(new_population) + len(offspring) < self.config.population_size and self._is_valid(genes):
+                    offspring.append(genes)
         
+        new_population.extend(self._create_individuals(offspring))
         return new_population
     
     def _record_generation(self, generation: int, population: List[Individual]):
@@ -296,8 +359,23 @@ class GeneticOptimizer:
             print(f"   种群大小: {self.config.population_size}")
             print(f"   最大代数: {self.config.generations}")
             print(f"   参数数量: {len(self.param_space.params)}")
+            print(f"   并行进程: {self.max_workers}")
             print()
         
+        # 整个优化过程复用同一个进程池
+        self._evaluator = ParallelEvaluator(
+            self.backtest_func,
+            max_workers=self.max_workers,
+            executor=self.executor,
+            start_method=self.start_method,
+        )
+        try:
+            return self._run(verbose)
+        finally:
+            self._evaluator.close()
+            self._evaluator = None
+    
+    def _run(self, verbose: bool) -> GeneticResult:
         # 初始化种群
         population = self._initialize_population()
         self._record_generation(0, population)
@@ -330,6 +408,7 @@ class GeneticOptimizer:
             print(f"   最优适应度: {best_individual.fitness:.4f}")
             print(f"   最优参数: {best_individual.genes}")
             print(f"   总评估次数: {len(self._all_individuals)}")
+            print(f"   缓存命中: {self.cache.hits} / 未命中: {self.cache.misses}")
         
         return GeneticResult(
             best_params=best_individual.genes,
@@ -341,6 +420,7 @@ class GeneticOptimizer:
                 {"params": ind.genes, "fitness": ind.fitness, "metrics": ind.metrics}
                 for ind in self._all_individuals
             ],
+            cache_stats=self.cache.stats(),
         )
 
 
@@ -4,12 +4,14 @@ Grid Optimizer - 网格搜索参数优化器
 通过穷举参数组合找到最优策略参数
 """
 
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional, Callable
 from itertools import product
 import time
 
 from libs.core import get_logger
+from .parallel import ParallelEvaluator
 
 logger = get_logger("grid-optimizer")
 
@@ -116,6 +118,9 @@ class GridOptimizer:
         
         print(f"最优参数: {result.best_params}")
         print(f"最优收益: {result.best_score}")
+    
+    并行：max_workers > 1 时参数组合分发到进程池（K 线经 initializer 每个进程只传一次），
+    结果按网格顺序汇总，与串行一致。
     """
     
     def __init__(
@@ -123,16 +128,26 @@ class GridOptimizer:
         backtest_func: Callable,
         score_func: Optional[Callable] = None,
         constraints: Optional[Dict[str, Callable]] = None,
+        max_workers: int = 1,
+        executor: Optional[Executor] = None,
+        start_method: Optional[str] = None,
     ):
         """
         Args:
             backtest_func: 回测函数，签名为 (strategy_code, config, symbol, timeframe, candles) -> result
+                           并行时需为模块级函数（可 pickle）
             score_func: 评分函数，默认使用总收益
             constraints: 参数约束，如 {"slow_ma": lambda p: p["slow_ma"] > p["fast_ma"]}
+            max_workers: 并行进程数（1 = 串行）
+            executor: 自定义执行器（优先于 max_workers）
+            start_method: 进程池启动方式（None = fork 优先；多线程服务中传 "forkserver"）
         """
         self.backtest_func = backtest_func
         self.score_func = score_func or self._default_score
         self.constraints = constraints or {}
+        self.max_workers = max_workers
+        self.executor = executor
+        self.start_method = start_method
     
     def _default_score(self, result: dict) -> float:
         """默认评分函数：收益 / 最大回撤（夏普风格）"""
@@ -195,28 +210,43 @@ class GridOptimizer:
             strategy=strategy_code,
             symbol=symbol,
             combinations=total,
+            workers=self.max_workers,
         )
         
-        for i, params in enumerate(param_grid):
-            # 检查约束
-            if not self._check_constraints(params):
-                continue
-            
-            # 合并配置
-            config = {**base_config, **params}
+        # 先筛选满足约束的组合（保留原始序号用于进度回调）
+        candidates = [
+            (i, params) for i, params in enumerate(param_grid)
+            if self._check_constraints(params)
+        ]
+        
+        evaluator = ParallelEvaluator(
+            self.backtest_func,
+            static_kwargs={
+                "strategy_code": strategy_code,
+                "symbol": symbol,
+                "timeframe": timeframe,
+                "candles": candles,
+            },
+            max_workers=self.max_workers,
+            executor=self.executor,
+            start_method=self.start_method,
+        )
+        with evaluator:
+            outcomes = evaluator.imap([
+                ((), {"config": {**base_config, **params}}) for _, params in candidates
+            ])
             
-            try:
-                # 运行回测
-                result = self.backtest_func(
-                    strategy_code=strategy_code,
-                    config=config,
-                    symbol=symbol,
-                    timeframe=timeframe,
-                    candles=candles,
-                )
+            for (i, params), (result, error) in zip(candidates, outcomes):
+                if error is not None:
+                    logger.warning("backtest failed", params=params, error=error)
+                    continue
                 
-                # 计算得分
-                score = self.score_func(result)
+                try:
+                    # 计算得分
+                    score = self.score_func(result)
+                except Exception as e:
+                    logger.warning("backtest failed", params=params, error=str(e))
+                    continue
                 
                 # 记录结果
                 record = {
@@ -239,10 +269,6 @@ class GridOptimizer:
                 # 进度回调
                 if progress_callback:
                     progress_callback(i + 1, total, params, score)
-                    
-            except Exception as e:
-                logger.warning("backtest failed", params=params, error=str(e))
-                continue
         
         elapsed = time.time() - start_time
         
@@ -0,0 +1,139 @@
+"""
+Parallel Evaluator - 进程池并行回测评估
+
+供 GridOptimizer / GeneticOptimizer 把参数评估分发到多个进程：
+
+- 回测函数和不变参数（K 线等）通过进程池 initializer 每个 worker 只传一次，
+  每个任务只携带本组参数，不重复 pickle K 线
+- 默认在 Linux 下使用 fork 启动，worker 直接继承父进程内存（零拷贝）；
+  其他平台退化为 spawn，此时回测函数需可 pickle（模块级函数 / functools.partial）
+- 多线程进程（如 Flask 服务）中应传 start_method="forkserver"（或 "spawn"）：
+  fork 会把其他线程持有的锁、已打开的 DB / Redis 连接一并复制进 worker；
+  forkserver 从干净的单线程服务进程派生 worker，静态参数每个 worker pickle 一次
+- map() 按提交顺序返回结果，优化结果与串行执行一致
+
+使用方式：
+    with ParallelEvaluator(run_backtest, {"candles": candles}, max_workers=8) as ev:
+        outcomes = ev.map([((), {"config": p}) for p in params_list])
+        for result, error in outcomes:
+            ...
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from libs.core import get_logger
+
+logger = get_logger("optimizer-parallel")
+
+
+# (args, kwargs)
+Task = Tuple[Sequence[Any], Dict[str, Any]]
+# (result, error)
+Outcome = Tuple[Optional[Any], Optional[str]]
+
+
+# worker 进程内的回测函数与静态参数（由 initializer 设置）
+_worker_func: Optional[Callable] = None
+_worker_static: Dict[str, Any] = {}
+
+
+def _init_worker(func: Callable, static_kwargs: Dict[str, Any]) -> None:
+    global _worker_func, _worker_static
+    _worker_func = func
+    _worker_static = static_kwargs
+
+
+def _call(func: Callable, static_kwargs: Dict[str, Any], task: Task) -> Outcome:
+    args, kwargs = task
+    try:
+        return func(*args, **static_kwargs, **kwargs), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _run_in_worker(task: Task) -> Outcome:
+    return _call(_worker_func, _worker_static, task)
+
+
+def resolve_workers(max_workers: Optional[int]) -> int:
+    """规范化 worker 数：None/0/1 → 1（串行），上限为 CPU 核数"""
+    if not max_workers or max_workers <= 1:
+        return 1
+    return min(int(max_workers), os.cpu_count() or 1)
+
+
+class ParallelEvaluator:
+    """
+    并行评估器
+
+    - executor 为空且 max_workers <= 1：当前进程串行执行
+    - executor 为空且 max_workers > 1：创建进程池（initializer 传入回测函数与静态参数）
+    - 传入 executor：直接使用调用方的执行器（每个任务自行携带静态参数）
+    - start_method：进程启动方式（None = fork 优先；多线程服务传 "forkserver"）
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        static_kwargs: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        start_method: Optional[str] = None,
+    ):
+        self.func = func
+        self.static_kwargs = static_kwargs or {}
+        self.max_workers = resolve_workers(max_workers)
+        self.start_method = start_method
+        self._executor = executor
+        self._owns_executor = False
+
+    @property
+    def parallel(self) -> bool:
+        return self._executor is not None or self.max_workers > 1
+
+    def _ensure_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.max_workers > 1:
+            methods = multiprocessing.get_all_start_methods()
+            method = self.start_method or ("fork" if "fork" in methods else None)
+            ctx = multiprocessing.get_context(method)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(self.func, self.static_kwargs),
+            )
+            self._owns_executor = True
+            logger.info("process pool started", workers=self.max_workers, start_method=ctx.get_start_method())
+        return self._executor
+
+    def imap(self, tasks: List[Task]) -> Iterator[Outcome]:
+        """逐个产出评估结果（顺序与 tasks 一致，先完成的结果可先被消费）"""
+        if not tasks:
+            return iter(())
+        executor = self._ensure_executor()
+        if executor is None:
+            return (_call(self.func, self.static_kwargs, t) for t in tasks)
+        if self._owns_executor:
+            chunksize = max(1, len(tasks) // (self.max_workers * 4))
+            return executor.map(_run_in_worker, tasks, chunksize=chunksize)
+        futures = [executor.submit(_call, self.func, self.static_kwargs, t) for t in tasks]
+        return (f.result() for f in futures)
+
+    def map(self, tasks: List[Task]) -> List[Outcome]:
+        """批量评估，结果顺序与 tasks 一致"""
+        return list(self.imap(tasks))
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._owns_executor = False
+
+    def __enter__(self) -> "ParallelEvaluator":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -92,7 +92,7 @@ from .exceptions import (
 from .repository import OrderRepository, FillRepository
 
 # Service
-from .service import OrderTradeService
+from .service import OrderTradeService, OrderFillState
 
 
 __all__ = [
@@ -133,4 +133,5 @@ __all__ = [
     "FillRepository",
     # Service
     "OrderTradeService",
+    "OrderFillState",
 ]
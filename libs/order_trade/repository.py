@@ -6,7 +6,7 @@ OrderRepository 和 FillRepository
 """
 
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple
 from decimal import Decimal
 
 from sqlalchemy import select, update, func, and_, or_
@@ -73,6 +73,36 @@ class OrderRepository:
         )
         return self.session.execute(stmt).scalar_one_or_none()
     
+    def get_by_order_ids(
+        self,
+        order_ids: Iterable[str],
+        tenant_id: int,
+        for_update: bool = False,
+    ) -> Dict[str, Order]:
+        """
+        批量获取订单
+        
+        Args:
+            order_ids: 订单号列表
+            tenant_id: 租户ID
+            for_update: 是否行加锁
+            
+        Returns:
+            {order_id: Order}
+        """
+        order_ids = list(set(order_ids))
+        if not order_ids:
+            return {}
+        stmt = select(Order).where(
+            and_(
+                Order.order_id.in_(order_ids),
+                Order.tenant_id == tenant_id
+            )
+        ).order_by(Order.id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        return {order.order_id: order for order in self.session.execute(stmt).scalars()}
+    
     def get_by_order_id_any_tenant(self, order_id: str) -> Optional[Order]:
         """
         根据 order_id 获取订单（不限租户，内部使用）
@@ -425,6 +455,34 @@ class FillRepository:
         )
         return self.session.execute(stmt).scalar_one_or_none()
     
+    def get_by_exchange_trade_ids(
+        self,
+        order_ids: Iterable[str],
+        exchange_trade_ids: Iterable[str],
+        tenant_id: int,
+    ) -> Dict[Tuple[str, str], Fill]:
+        """
+        批量幂等检查
+        
+        Returns:
+            {(order_id, exchange_trade_id): Fill}
+        """
+        order_ids = list(set(order_ids))
+        exchange_trade_ids = list(set(exchange_trade_ids))
+        if not order_ids or not exchange_trade_ids:
+            return {}
+        stmt = select(Fill).where(
+            and_(
+                Fill.order_id.in_(order_ids),
+                Fill.exchange_trade_id.in_(exchange_trade_ids),
+                Fill.tenant_id == tenant_id
+            )
+        )
+        return {
+            (fill.order_id, fill.exchange_trade_id): fill
+            for fill in self.session.execute(stmt).scalars()
+        }
+    
     def get_fills_by_order(self, order_id: str, tenant_id: int) -> List[Fill]:
         """
         获取订单的所有成交记录
@@ -482,6 +540,40 @@ class FillRepository:
         
         return total_quantity, avg_price, total_fee
     
+    def get_fills_summaries(
+        self,
+        order_ids: Iterable[str],
+        tenant_id: int,
+    ) -> Dict[str, Tuple[float, float, Optional[datetime]]]:
+        """
+        批量获取订单成交汇总（一次 GROUP BY 查询）
+        
+        Returns:
+            {order_id: (total_quantity, total_fee, max_filled_at)}，无成交的订单不在结果中
+        """
+        order_ids = list(set(order_ids))
+        if not order_ids:
+            return {}
+        stmt = (
+            select(
+                Fill.order_id,
+                func.sum(Fill.quantity).label("total_quantity"),
+                func.sum(Fill.fee).label("total_fee"),
+                func.max(Fill.filled_at).label("max_filled_at"),
+            )
+            .where(
+                and_(
+                    Fill.order_id.in_(order_ids),
+                    Fill.tenant_id == tenant_id
+                )
+            )
+            .group_by(Fill.order_id)
+        )
+        return {
+            row.order_id: (float(row.total_quantity or 0), float(row.total_fee or 0), row.max_filled_at)
+            for row in self.session.execute(stmt)
+        }
+    
     def get_max_fill_time(self, order_id: str, tenant_id: int) -> Optional[datetime]:
         """
         获取订单的最大成交时间
@@ -6,8 +6,9 @@ OrderTradeService 提供订单和成交的核心业务逻辑
 """
 
 import uuid
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -46,6 +47,16 @@ def _generate_fill_id() -> str:
     return f"FILL-{uuid.uuid4().hex[:16].upper()}"
 
 
+@dataclass(frozen=True)
+class OrderFillState:
+    """订单累计成交状态（record_fill 与批量结算共用的校验 / 累加基准）"""
+    filled_quantity: float
+    avg_price: float
+    total_fee: float
+    status: OrderStatus
+    max_fill_time: Optional[datetime] = None
+
+
 def _order_to_dto(order: Order) -> OrderDTO:
     """Order 模型转 DTO"""
     return OrderDTO(
@@ -412,24 +423,9 @@ class OrderTradeService:
         # 获取订单
         order = self._get_order_or_raise(dto.order_id, dto.tenant_id)
         
-        # 验证订单状态（必须是活跃状态或已提交）
+        # 验证订单状态与成交匹配
         current_status = OrderStatus(order.status)
-        if current_status.is_terminal() and current_status != OrderStatus.FILLED:
-            raise OrderInTerminalStateError(dto.order_id, order.status)
-        
-        # 验证成交与订单匹配
-        if dto.symbol != order.symbol:
-            raise FillOrderMismatchError(
-                fill_id="(new)",
-                order_id=dto.order_id,
-                reason=f"symbol mismatch: fill={dto.symbol}, order={order.symbol}"
-            )
-        if dto.side != order.side:
-            raise FillOrderMismatchError(
-                fill_id="(new)",
-                order_id=dto.order_id,
-                reason=f"side mismatch: fill={dto.side}, order={order.side}"
-            )
+        self.check_fill_matches(order, dto, current_status)
         
         # 幂等检查：如果有交易所成交ID，检查是否已存在
         if dto.exchange_trade_id:
@@ -446,21 +442,68 @@ class OrderTradeService:
         existing_filled, _, existing_fee = self.fill_repo.get_fills_summary(
             dto.order_id, dto.tenant_id
         )
+        state = OrderFillState(
+            filled_quantity=existing_filled,
+            avg_price=float(order.avg_price) if order.avg_price else 0,
+            total_fee=existing_fee,
+            status=current_status,
+            max_fill_time=self.fill_repo.get_max_fill_time(dto.order_id, dto.tenant_id),
+        )
+        
+        fill, new_state = self.prepare_fill(order, dto, state)
+        fill = self.fill_repo.create(fill)
+        
+        # 更新订单
+        self.apply_fill_state(order, new_state, dto.fee_currency)
+        
+        return _fill_to_dto(fill)
+    
+    def check_fill_matches(self, order: Order, dto: RecordFillDTO, status: OrderStatus) -> None:
+        """校验订单可接收成交且成交与订单匹配（状态 / symbol / side）"""
+        # 验证订单状态（必须是活跃状态或已提交）
+        if status.is_terminal() and status != OrderStatus.FILLED:
+            raise OrderInTerminalStateError(dto.order_id, status.value)
         
+        # 验证成交与订单匹配
+        if dto.symbol != order.symbol:
+            raise FillOrderMismatchError(
+                fill_id="(new)",
+                order_id=dto.order_id,
+                reason=f"symbol mismatch: fill={dto.symbol}, order={order.symbol}"
+            )
+        if dto.side != order.side:
+            raise FillOrderMismatchError(
+                fill_id="(new)",
+                order_id=dto.order_id,
+                reason=f"side mismatch: fill={dto.side}, order={order.side}"
+            )
+    
+    def prepare_fill(
+        self,
+        order: Order,
+        dto: RecordFillDTO,
+        state: OrderFillState,
+    ) -> Tuple[Fill, OrderFillState]:
+        """
+        校验不变量并构造成交记录（不写库）
+        
+        不变量：成交 ≤ 订单、时间有序；校验失败抛异常
+        
+        Returns:
+            (未持久化的 Fill, 计入本笔后的订单成交状态)
+        """
         # 不变量检查：成交 ≤ 订单
         order_quantity = float(order.quantity)
-        new_fill_qty = float(dto.quantity)
         FillValidation.validate_fill_quantity(
             order_quantity=order_quantity,
-            existing_filled=existing_filled,
-            new_fill_quantity=new_fill_qty,
+            existing_filled=state.filled_quantity,
+            new_fill_quantity=float(dto.quantity),
         )
         
         # 不变量检查：时间有序
-        max_fill_time = self.fill_repo.get_max_fill_time(dto.order_id, dto.tenant_id)
-        if max_fill_time:
+        if state.max_fill_time:
             FillValidation.validate_fill_time_order(
-                existing_max_time=max_fill_time.timestamp(),
+                existing_max_time=state.max_fill_time.timestamp(),
                 new_fill_time=dto.filled_at.timestamp(),
             )
         
@@ -482,40 +525,81 @@ class OrderTradeService:
             request_id=dto.request_id,
         )
         
-        fill = self.fill_repo.create(fill)
-        
         # 更新订单成交信息（统一转为 float 避免类型不兼容）
         fill_quantity = float(dto.quantity)
         fill_price = float(dto.price)
         fill_fee = float(dto.fee) if dto.fee else 0
         
-        new_filled_quantity = existing_filled + fill_quantity
-        new_total_fee = existing_fee + fill_fee
+        new_filled_quantity = state.filled_quantity + fill_quantity
+        new_total_fee = state.total_fee + fill_fee
         
         # 计算加权平均价
-        existing_avg_price = float(order.avg_price) if order.avg_price else 0
-        new_total_value = (existing_filled * existing_avg_price) + (fill_quantity * fill_price)
+        new_total_value = (state.filled_quantity * state.avg_price) + (fill_quantity * fill_price)
         new_avg_price = new_total_value / new_filled_quantity if new_filled_quantity > 0 else 0
         
         # 确定新状态
         new_status = OrderStateMachine.determine_status_after_fill(
             order_quantity=order_quantity,
             filled_quantity=new_filled_quantity,
-            current_status=current_status,
+            current_status=state.status,
         )
         
-        # 更新订单
-        self.order_repo.update_fill_info(
-            order_id=dto.order_id,
-            tenant_id=dto.tenant_id,
+        max_fill_time = dto.filled_at
+        if state.max_fill_time and state.max_fill_time > max_fill_time:
+            max_fill_time = state.max_fill_time
+        return fill, replace(
+            state,
             filled_quantity=new_filled_quantity,
             avg_price=new_avg_price,
             total_fee=new_total_fee,
-            fee_currency=dto.fee_currency,
             status=new_status,
+            max_fill_time=max_fill_time,
         )
-        
-        return _fill_to_dto(fill)
+    
+    def apply_fill_state(self, order: Order, state: OrderFillState, fee_currency: Optional[str]) -> bool:
+        """把累计成交状态写回订单"""
+        return self.order_repo.update_fill_info(
+            order_id=order.order_id,
+            tenant_id=order.tenant_id,
+            filled_quantity=state.filled_quantity,
+            avg_price=state.avg_price,
+            total_fee=state.total_fee,
+            fee_currency=fee_currency,
+            status=state.status,
+        )
+    
+    def get_fill_states(
+        self,
+        order_ids: Iterable[str],
+        tenant_id: int,
+        for_update: bool = False,
+    ) -> Dict[str, Tuple[Order, OrderFillState]]:
+        """批量加载订单及其累计成交状态（订单一次查询、成交汇总一次 GROUP BY）"""
+        orders = self.order_repo.get_by_order_ids(order_ids, tenant_id, for_update=for_update)
+        summaries = self.fill_repo.get_fills_summaries(orders.keys(), tenant_id)
+        result = {}
+        for order_id, order in orders.items():
+            filled, fee, max_fill_time = summaries.get(order_id, (0.0, 0.0, None))
+            result[order_id] = (order, OrderFillState(
+                filled_quantity=filled,
+                avg_price=float(order.avg_price) if order.avg_price else 0,
+                total_fee=fee,
+                status=OrderStatus(order.status),
+                max_fill_time=max_fill_time,
+            ))
+        return result
+    
+    def find_fills_by_exchange_trade_ids(
+        self,
+        keys: Iterable[Tuple[str, str]],
+        tenant_id: int,
+    ) -> Dict[Tuple[str, str], Fill]:
+        """批量幂等检查：{(order_id, exchange_trade_id): Fill}"""
+        keys = set(keys)
+        found = self.fill_repo.get_by_exchange_trade_ids(
+            {k[0] for k in keys}, {k[1] for k in keys}, tenant_id
+        )
+        return {k: v for k, v in found.items() if k in keys}
     
     def get_fills_by_order(self, order_id: str, tenant_id: int) -> List[FillDTO]:
         """
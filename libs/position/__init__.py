@@ -45,6 +45,7 @@ from libs.position.exceptions import (
 )
 from libs.position.repository import PositionRepository, PositionChangeRepository
 from libs.position.service import PositionService
+from libs.position.trigger_book import TriggerBook, get_trigger_book, register_session_events
 
 __all__ = [
     # Models
@@ -77,4 +78,8 @@ __all__ = [
     "PositionChangeRepository",
     # Service
     "PositionService",
+    # SL/TP 触发簿
+    "TriggerBook",
+    "get_trigger_book",
+    "register_session_events",
 ]
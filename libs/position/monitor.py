@@ -2,19 +2,21 @@
 Position Monitor - 自管止盈止损监控（分布式架构）
 
 核心功能：
-1. 定时扫描所有 OPEN 持仓中带 stop_loss / take_profit 的记录
-2. 批量获取价格（一个 symbol 只查一次，不管多少用户）
-3. 到价时按节点分发平仓：本机账户直接平，远程节点 POST /api/close-position
-4. 全程异步并发，用户再多也不卡
+1. OPEN 持仓中带 stop_loss / take_profit 的记录维护在触发簿（TriggerBook）中：按 (exchange, symbol)
+   排序价位，持仓变更事件增量更新，版本号变化或定时全量重载
+2. 订阅推送价格（PriceFeed / TickerStream），每次价格更新二分查找越过的价位，只取出触发的持仓
+3. 推送过期或不可用的 symbol 回退为批量轮询（一个 symbol 只查一次，不管多少用户）
+4. 到价时按节点分发平仓：本机账户直接平，远程节点 POST /api/close-position
+5. 全程异步并发，用户再多也不卡
 
 优势：交易所看不到止损位，防止"扫损"
 
 架构：
     ┌─────────────────────────────┐
     │ position_monitor (中心)      │
-    │   1. 查 DB: OPEN + 有SL/TP  │
-    │   2. 批量获取价格(公共API)    │
-    │   3. 判断是否触发             │
+    │   1. 触发簿: OPEN + 有SL/TP │
+    │   2. 推送价格 / 批量轮询      │
+    │   3. 二分查找触发，DB 复核    │
     │   4. 分发平仓:               │
     │      - 本机账户 → LiveTrader  │
     │      - 远程账户 → POST 节点   │
@@ -34,14 +36,16 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Optional, Any, Tuple
 
-import httpx
 from sqlalchemy import and_, or_
 
-from libs.core import get_config, get_logger, gen_id
+from libs.core import get_config, get_logger, gen_id, get_async_http_client, aclose_http_clients
 from libs.core.database import get_session
+from libs.exchange.markets_registry import get_markets_registry
 from libs.position.models import Position
 from libs.member.models import ExchangeAccount
 from libs.facts.models import SignalEvent
+from libs.position.price_feed import PriceFeed, resolve_market_symbol
+from libs.position.trigger_book import TriggerBook, get_trigger_book, register_session_events, remote_version
 
 log = get_logger("position-monitor")
 config = get_config()
@@ -54,6 +58,12 @@ _monitor_thread: Optional[threading.Thread] = None
 _price_cache: Dict[str, Tuple[float, float]] = {}
 _PRICE_CACHE_TTL = 2  # 秒
 
+# 推送价格源：开启后价格更新即触发检查，推送过期（秒）的 symbol 回退轮询
+STREAM_ENABLED = config.get_bool("position_monitor_stream_enabled", True)
+STREAM_STALE_SECONDS = config.get_float("position_monitor_stream_stale", 10.0)
+# 触发簿定时全量重载间隔（秒）；其余时间由持仓变更事件增量维护
+RELOAD_INTERVAL = config.get_float("position_monitor_reload_interval", 60.0)
+
 # 统计
 _stats = {
     "last_scan_at": None,
@@ -61,11 +71,19 @@ _stats = {
     "triggers_total": 0,
     "closes_success": 0,
     "closes_failed": 0,
+    "stream_triggers": 0,
+    "stream_symbols": 0,
+    "poll_symbols": 0,
 }
 
 # 正在处理中的持仓（防止重复触发）
 _closing_in_progress: set = set()  # position_id 集合
 
+# 推送触发的平仓任务（持有引用防止被回收）
+_pending_closes: set = set()
+# 监控线程持有的推送价格源（run_scan_once 不使用）
+_price_feed: Optional[PriceFeed] = None
+
 # 止损冷却回调（由 signal-monitor 注册，避免循环依赖）
 # 签名: callback(symbol: str, strategy_code: str) -> None
 _on_sl_triggered_callback = None
@@ -137,13 +155,13 @@ def _write_close_signal_event(
 # ─────────────────────── 数据库查询 ───────────────────────
 
 def _get_monitored_positions(session) -> List[Position]:
-    """查询所有需要监控的持仓：OPEN + quantity > 0 + 有 SL 或 TP"""
+    """查询所有需要监控的持仓：OPEN + quantity > 0 + 有 SL 或 TP（0 视为未设置，NULL != 0 不成立）"""
     return session.query(Position).filter(
         Position.status == "OPEN",
         Position.quantity > 0,
         or_(
-            Position.stop_loss.isnot(None),
-            Position.take_profit.isnot(None),
+            Position.stop_loss != 0,
+            Position.take_profit != 0,
         ),
     ).all()
 
@@ -218,7 +236,9 @@ async def _fetch_prices_batch(symbols_by_exchange: Dict[str, set]) -> Dict[str,
             opts["options"] = {"defaultType": "future"}
         ex = exchange_cls(opts)
         try:
-            await ex.load_markets()
+            # markets 从进程级注册表注入，不在每轮扫描中重新下载
+            if not await get_markets_registry().ainject(ex, ccxt_exchange_name, "swap"):
+                await ex.load_markets()
             for sym in syms:
                 try:
                     ccxt_sym = _resolve_ccxt_symbol(ex, sym)
@@ -251,14 +271,7 @@ async def _fetch_prices_batch(symbols_by_exchange: Dict[str, set]) -> Dict[str,
 
 def _resolve_ccxt_symbol(exchange, symbol: str) -> Optional[str]:
     """尝试多种格式解析出 ccxt symbol"""
-    for s in [symbol, symbol.replace("/", ""), f"{symbol}:USDT"]:
-        if s in exchange.markets:
-            return s
-    base = symbol.split("/")[0] if "/" in symbol else symbol.replace("USDT", "")
-    for candidate in [f"{base}/USDT:USDT", f"{base}/USDT"]:
-        if candidate in exchange.markets:
-            return candidate
-    return None
+    return resolve_market_symbol(exchange.markets, symbol)
 
 
 # ─────────────────────── SL/TP 判断 ───────────────────────
@@ -337,7 +350,7 @@ async def _close_position_local(
         pm_signal_id = gen_id("PM")
 
         # 将币数量转为交易所下单数量（Gate/OKX 需要张数，Binance 直接用币数量）
-        await trader.exchange.load_markets()
+        await trader.ensure_markets()
         ccxt_sym = trader._ccxt_symbol(position.symbol)
         market_info = trader.exchange.markets.get(ccxt_sym, {})
         cs = float(market_info.get("contractSize") or 0)
@@ -480,14 +493,14 @@ async def _close_position_remote(
             account_id=position.account_id, symbol=position.symbol,
             side=side, qty=qty, price=current_price,
         )
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                f"{node_base_url}/api/close-position",
-                json=payload,
-                headers=headers or None,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await get_async_http_client("execution-node").post(
+            f"{node_base_url}/api/close-position",
+            json=payload,
+            headers=headers or None,
+            timeout=30,
+        )
+        resp.raise_for_status()
+        data = resp.json()
         ok = data.get("success", False)
         if ok:
             filled_qty = float(data.get("filled_quantity") or qty)
@@ -611,111 +624,210 @@ async def _close_position_remote(
 
 # ─────────────────────── 主监控循环 ───────────────────────
 
-async def _monitor_cycle():
-    """一次完整的监控扫描周期（异步）"""
-    session = get_session()
-    triggered: List[Tuple[Position, str, float]] = []  # 提前声明，防止 except 中 NameError
-    try:
-        # 1. 查询需要监控的持仓
-        positions = _get_monitored_positions(session)
-        if not positions:
-            return
-        _stats["positions_monitored"] = len(positions)
-        _stats["last_scan_at"] = datetime.now().isoformat()
+async def _monitor_cycle(feed: Optional[PriceFeed] = None, reload: bool = False):
+    """
+    一次完整的监控扫描周期（异步）
 
-        # 2. 收集需要查询的 symbol（按交易所分组，一个 symbol 只查一次）
-        symbols_by_exchange: Dict[str, set] = defaultdict(set)
-        for pos in positions:
-            symbols_by_exchange[pos.exchange].add(pos.symbol)
+    持仓来自触发簿（增量维护，按需全量重载），不再每轮查询全部持仓。
 
-        # 3. 异步批量获取价格
-        prices = await _fetch_prices_batch(dict(symbols_by_exchange))
-        if not prices:
-            return
+    Args:
+        feed: 推送价格源；传入时同步订阅，只对推送过期的 symbol 轮询价格
+        reload: 强制从 DB 全量重载触发簿
+    """
+    # 1. 触发簿：版本号变化 / 定时 / 强制 时全量重载，否则沿用增量维护的内存数据
+    book = _refresh_trigger_book(force=reload)
+    _stats["positions_monitored"] = len(book)
+    _stats["last_scan_at"] = datetime.now().isoformat()
+
+    # 2. 需要价格的 symbol（按交易所分组，一个 symbol 只查一次）
+    symbols_by_exchange = book.symbols_by_exchange()
+    if not symbols_by_exchange:
+        if feed is not None:
+            await feed.sync({})
+        return
 
-        # 4. 判断触发，收集需要平仓的持仓（跳过正在处理中的）
-        for pos in positions:
-            if pos.position_id in _closing_in_progress:
-                continue  # 上一轮平仓还没完成，跳过防止重复发单
-            price_key = f"{pos.exchange}:{pos.symbol}"
-            current_price = prices.get(price_key)
-            if current_price is None:
+    # 3. 取价：推送价格优先，过期/无推送的 symbol 异步批量轮询
+    if feed is not None:
+        await feed.sync(symbols_by_exchange)
+        prices, stale = _stream_prices(feed, symbols_by_exchange)
+        if stale:
+            prices.update(await _fetch_prices_batch(stale))
+    else:
+        prices = await _fetch_prices_batch(symbols_by_exchange)
+    if not prices:
+        return
+
+    # 4. 每个 symbol 二分查找越过的价位，只取出触发的持仓
+    hits: Dict[str, float] = {}
+    for key, price in prices.items():
+        exchange, symbol = key.split(":", 1)
+        for pid in _claim_triggered(book, exchange, symbol, price):
+            hits[pid] = price
+    if hits:
+        # 5-7. 重新加载触发的持仓并复核，分发平仓
+        await _close_triggered_ids(hits)
+
+
+def _refresh_trigger_book(force: bool = False) -> TriggerBook:
+    """触发簿从未加载、Redis 版本号变化或超过重载间隔时，从 DB 全量重载"""
+    book = get_trigger_book()
+    version = remote_version()
+    if not force and book.loaded_at is not None:
+        if time.time() - book.loaded_at < RELOAD_INTERVAL and (version is None or version == book.version):
+            return book
+    session = get_session()
+    try:
+        loaded_at = time.time()
+        book.replace(_get_monitored_positions(session), loaded_at, version)
+    except Exception as e:
+        log.warning("position_monitor 触发簿重载失败", error=str(e))
+    finally:
+        try:
+            session.close()
+        except Exception:
+            pass
+    return book
+
+
+def _claim_triggered(book: TriggerBook, exchange: str, symbol: str, price: float) -> List[str]:
+    """取出该价格越过的持仓并标记为处理中（跳过已在处理中的）"""
+    claimed = []
+    for watched, _ in book.crossed(exchange, symbol, price):
+        if watched.position_id in _closing_in_progress:
+            continue  # 上一次平仓还没完成，跳过防止重复发单
+        _closing_in_progress.add(watched.position_id)
+        claimed.append(watched.position_id)
+    return claimed
+
+
+async def _close_triggered(session, triggered: List[Tuple[Position, str, float]]) -> None:
+    """按账户所在节点分发平仓（本机 / 远程），并为远程平仓写入信号事件；不 commit"""
+    # 5. 批量获取交易所账户凭证
+    account_ids = list({pos.account_id for pos, _, _ in triggered})
+    accounts_map = _get_exchange_accounts_map(session, account_ids)
+
+    # 6. 获取远程节点信息（按 execution_node_id 查）
+    node_urls = _get_node_urls(session, accounts_map)
+
+    # 7. 并发执行平仓
+    close_tasks = []
+    close_meta = []  # 与 close_tasks 一一对应，记录 (pos, trigger_type, price, is_remote)
+    for pos, trigger_type, current_price in triggered:
+        account = accounts_map.get(pos.account_id)
+        if not account:
+            log.warning("账户不可用", account_id=pos.account_id)
+            continue
+        node_id = account.execution_node_id
+        if node_id and node_id in node_urls:
+            # 远程节点
+            close_tasks.append(
+                _close_position_remote(pos, account, current_price, trigger_type, node_urls[node_id], session)
+            )
+            close_meta.append((pos, trigger_type, current_price, True))
+        else:
+            # 本机（本机平仓内部已写信号事件）
+            close_tasks.append(
+                _close_position_local(pos, account, current_price, trigger_type, session)
+            )
+            close_meta.append((pos, trigger_type, current_price, False))
+
+    if close_tasks:
+        results = await asyncio.gather(*close_tasks, return_exceptions=True)
+        success = sum(1 for r in results if r is True)
+        failed = len(results) - success
+        _stats["closes_success"] += success
+        _stats["closes_failed"] += failed
+        if success > 0:
+            log.info(f"平仓完成: {success} 成功, {failed} 失败")
+
+        # 远程平仓结果写入信号事件（本机平仓已在内部写入）
+        for i, (pos, tt, price, is_remote) in enumerate(close_meta):
+            if not is_remote:
                 continue
-            trigger = _check_trigger(pos, current_price)
-            if trigger:
-                triggered.append((pos, trigger, current_price))
-                _closing_in_progress.add(pos.position_id)
+            ok = results[i] is True if i < len(results) else False
+            err_msg = str(results[i]) if not ok and i < len(results) else None
+            _write_close_signal_event(
+                session, pos, tt, price,
+                gen_id("PM"), success=ok, error_msg=err_msg,
+            )
 
-        if not triggered:
-            return
 
-        log.info(f"position_monitor: {len(triggered)} 个持仓触发平仓")
-        _stats["triggers_total"] += len(triggered)
+def _release_closing(position_ids) -> None:
+    """释放处理中标记（无论成功失败都释放，失败的下一次价格更新可重试）"""
+    for pid in position_ids:
+        _closing_in_progress.discard(pid)
 
-        # 5. 批量获取交易所账户凭证
-        account_ids = list({pos.account_id for pos, _, _ in triggered})
-        accounts_map = _get_exchange_accounts_map(session, account_ids)
 
-        # 6. 获取远程节点信息（按 execution_node_id 查）
-        node_urls = _get_node_urls(session, accounts_map)
+# ─────────────────────── 推送价格触发 ───────────────────────
 
-        # 7. 并发执行平仓
-        close_tasks = []
-        close_meta = []  # 与 close_tasks 一一对应，记录 (pos, trigger_type, price, is_remote)
-        for pos, trigger_type, current_price in triggered:
-            account = accounts_map.get(pos.account_id)
-            if not account:
-                log.warning("账户不可用", account_id=pos.account_id)
-                continue
-            node_id = account.execution_node_id
-            if node_id and node_id in node_urls:
-                # 远程节点
-                close_tasks.append(
-                    _close_position_remote(pos, account, current_price, trigger_type, node_urls[node_id], session)
-                )
-                close_meta.append((pos, trigger_type, current_price, True))
+def _stream_prices(feed: PriceFeed, symbols_by_exchange: Dict[str, set]) -> Tuple[Dict[str, float], Dict[str, set]]:
+    """从推送价格源取价，返回 ({exchange:symbol: price}, 需轮询的 {exchange: symbols})"""
+    prices: Dict[str, float] = {}
+    stale: Dict[str, set] = defaultdict(set)
+    for exchange, syms in symbols_by_exchange.items():
+        for sym in syms:
+            price = feed.get_price(exchange, sym)
+            if price is None:
+                stale[exchange].add(sym)
             else:
-                # 本机（本机平仓内部已写信号事件）
-                close_tasks.append(
-                    _close_position_local(pos, account, current_price, trigger_type, session)
-                )
-                close_meta.append((pos, trigger_type, current_price, False))
-
-        if close_tasks:
-            results = await asyncio.gather(*close_tasks, return_exceptions=True)
-            success = sum(1 for r in results if r is True)
-            failed = len(results) - success
-            _stats["closes_success"] += success
-            _stats["closes_failed"] += failed
-            if success > 0:
-                log.info(f"平仓完成: {success} 成功, {failed} 失败")
-
-            # 远程平仓结果写入信号事件（本机平仓已在内部写入）
-            for i, (pos, tt, price, is_remote) in enumerate(close_meta):
-                if not is_remote:
-                    continue
-                ok = results[i] is True if i < len(results) else False
-                err_msg = str(results[i]) if not ok and i < len(results) else None
-                _write_close_signal_event(
-                    session, pos, tt, price,
-                    gen_id("PM"), success=ok, error_msg=err_msg,
-                )
-
-        # 清除处理中标记（无论成功失败都释放，下一轮可重试失败的）
-        for pos, _, _ in triggered:
-            _closing_in_progress.discard(pos.position_id)
+                prices[f"{exchange}:{sym}"] = price
+    _stats["stream_symbols"] = len(prices)
+    _stats["poll_symbols"] = sum(len(v) for v in stale.values())
+    return prices, dict(stale)
+
+
+def _on_stream_price(exchange: str, symbol: str, price: float) -> None:
+    """推送价格回调：在触发簿中二分查找该 symbol 越过的价位，触发后异步平仓"""
+    hits = _claim_triggered(get_trigger_book(), exchange, symbol, price)
+    if not hits:
+        return
+    _stats["stream_triggers"] += len(hits)
+    task = asyncio.get_running_loop().create_task(_close_triggered_ids({pid: price for pid in hits}))
+    _pending_closes.add(task)
+    task.add_done_callback(_pending_closes.discard)
 
+
+async def _close_triggered_ids(hits: Dict[str, float]) -> None:
+    """
+    按 position_id 重新加载持仓，用 DB 最新状态复核后平仓（hits: position_id -> 触发价格）
+
+    DB 中已不再触发（已平仓 / SL/TP 已修改）的持仓同步修正触发簿
+    """
+    session = get_session()
+    triggered: List[Tuple[Position, str, float]] = []
+    try:
+        rows = session.query(Position).filter(
+            Position.position_id.in_(list(hits)),
+            Position.status == "OPEN",
+            Position.quantity > 0,
+        ).all()
+        book = get_trigger_book()
+        found = set()
+        for pos in rows:
+            found.add(pos.position_id)
+            price = hits[pos.position_id]
+            trigger = _check_trigger(pos, price)
+            if trigger:
+                triggered.append((pos, trigger, price))
+            else:
+                book.apply_position(pos)
+        for pid in set(hits) - found:
+            book.remove(pid)
+        if not triggered:
+            return
+        log.info(f"position_monitor: {len(triggered)} 个持仓触发平仓")
+        _stats["triggers_total"] += len(triggered)
+        await _close_triggered(session, triggered)
         session.commit()
     except Exception as e:
-        log.warning("position_monitor 周期异常", error=str(e))
-        # 异常时也要清除处理中标记，否则永远不会重试
-        for pos, _, _ in triggered:
-            _closing_in_progress.discard(pos.position_id)
+        log.warning("position_monitor 平仓周期异常", error=str(e))
         try:
             session.rollback()
         except Exception:
             pass
     finally:
+        # 清除处理中标记，否则失败的持仓永远不会重试
+        _release_closing(hits)
         try:
             session.close()
         except Exception:
@@ -745,20 +857,41 @@ def _get_node_urls(session, accounts_map: Dict[int, ExchangeAccount]) -> Dict[in
 def _monitor_loop(interval: float = 3.0):
     """
     后台监控主循环（阻塞，在独立线程中运行）。
-    内部每个周期用 asyncio 并发处理。
+    内部每个周期用 asyncio 并发处理；开启推送价格时事件循环常驻，价格更新随到随查。
     """
-    log.info("position_monitor 启动", interval=interval)
+    log.info("position_monitor 启动", interval=interval, stream=STREAM_ENABLED)
     loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(_monitor_main(interval))
+    finally:
+        # 共享异步客户端按事件循环缓存，关闭循环前先关掉其连接池
+        loop.run_until_complete(aclose_http_clients())
+        loop.close()
+    log.info("position_monitor 已停止")
+
+
+async def _monitor_main(interval: float) -> None:
+    global _price_feed
+    feed = None
+    if STREAM_ENABLED:
+        feed = _price_feed = PriceFeed(stale_after=STREAM_STALE_SECONDS)
+        feed.set_listener(_on_stream_price)
     try:
         while not _monitor_stop_event.is_set():
             try:
-                loop.run_until_complete(_monitor_cycle())
+                await _monitor_cycle(feed)
             except Exception as e:
                 log.warning("position_monitor loop error", error=str(e))
-            _monitor_stop_event.wait(interval)
+            # 不阻塞线程等待：推送回调和平仓任务需要事件循环继续运行
+            deadline = time.monotonic() + interval
+            while not _monitor_stop_event.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
     finally:
-        loop.close()
-    log.info("position_monitor 已停止")
+        if feed is not None:
+            await feed.stop()
+            _price_feed = None
+        if _pending_closes:
+            await asyncio.gather(*list(_pending_closes), return_exceptions=True)
 
 
 def start_position_monitor(interval: float = 3.0):
@@ -767,6 +900,8 @@ def start_position_monitor(interval: float = 3.0):
     if _monitor_thread and _monitor_thread.is_alive():
         log.warning("position_monitor 已在运行")
         return
+    # 本进程的持仓提交增量更新触发簿
+    register_session_events()
     _monitor_stop_event.clear()
     _monitor_thread = threading.Thread(
         target=_monitor_loop,
@@ -788,19 +923,23 @@ def stop_position_monitor():
 
 def get_monitor_stats() -> dict:
     """获取监控统计信息"""
-    return dict(_stats)
+    stats = dict(_stats)
+    stats["trigger_book"] = get_trigger_book().stats()
+    if _price_feed is not None:
+        stats["price_feed"] = _price_feed.stats()
+    return stats
 
 
 def run_scan_once() -> dict:
     """
     手动触发一次监控扫描（同步接口，供 API 调用）。
-    在新的 event loop 中运行一次 _monitor_cycle()。
+    在新的 event loop 中运行一次 _monitor_cycle()（强制全量重载触发簿）。
     返回扫描结果摘要。
     """
     import asyncio as _asyncio
     loop = _asyncio.new_event_loop()
     try:
-        loop.run_until_complete(_monitor_cycle())
+        loop.run_until_complete(_monitor_cycle(reload=True))
         return {
             "scanned": True,
             "positions_monitored": _stats.get("positions_monitored", 0),
@@ -810,4 +949,5 @@ def run_scan_once() -> dict:
     except Exception as e:
         return {"scanned": False, "error": str(e)}
     finally:
+        loop.run_until_complete(aclose_http_clients())
         loop.close()
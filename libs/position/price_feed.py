@@ -0,0 +1,157 @@
+"""
+Price Feed - 持仓监控的推送式价格源
+
+职责：
+- 按交易所维护合约 TickerStream（ccxt.pro），订阅集合随监控持仓的 symbol 同步增删
+- 持仓 symbol（BTC/USDT）与流 symbol（BTC/USDT:USDT）互相映射，markets 来自 MarketsRegistry
+- 记录每个 (exchange, symbol) 最新价格与时间，超过 stale_after 视为过期（由调用方回退轮询）
+- 每次价格更新回调 listener(exchange, symbol, price)，由监控只检查该 symbol 的持仓
+
+流对象只需实现 set_callback / subscribe / unsubscribe / start / stop / is_alive，
+测试可用 stream_factory 注入模拟流。
+"""
+
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from libs.core import get_logger
+from libs.exchange.markets_registry import get_markets_registry
+from libs.exchange.utils import symbol_for_ccxt_futures
+
+log = get_logger("price-feed")
+
+# 流异常退出后的重启间隔（秒）
+RESTART_BACKOFF = 30.0
+
+
+def resolve_market_symbol(markets: Dict[str, Any], symbol: str) -> Optional[str]:
+    """在 ccxt markets 中尝试多种格式解析出 ccxt symbol"""
+    for s in [symbol, symbol.replace("/", ""), f"{symbol}:USDT"]:
+        if s in markets:
+            return s
+    base = symbol.split("/")[0] if "/" in symbol else symbol.replace("USDT", "")
+    for candidate in [f"{base}/USDT:USDT", f"{base}/USDT"]:
+        if candidate in markets:
+            return candidate
+    return None
+
+
+def _default_stream_factory(exchange: str):
+    from libs.ws.ticker_stream import TickerStream
+    return TickerStream(exchange, market_type="swap", allow_mock=False)
+
+
+class PriceFeed:
+    """按交易所聚合的推送价格源（须在同一个事件循环内使用）"""
+
+    def __init__(
+        self,
+        stream_factory: Callable[[str], Any] = _default_stream_factory,
+        stale_after: float = 10.0,
+    ):
+        self.stale_after = stale_after
+        self._factory = stream_factory
+        self._streams: Dict[str, Any] = {}
+        # exchange -> {流 symbol: 持仓 symbol}
+        self._symbols: Dict[str, Dict[str, str]] = {}
+        self._prices: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._restarted_at: Dict[str, float] = {}
+        self._listener: Optional[Callable[[str, str, float], None]] = None
+        self.ticks = 0
+
+    def set_listener(self, listener: Callable[[str, str, float], None]) -> None:
+        self._listener = listener
+
+    # ---------- 订阅同步 ----------
+
+    async def sync(self, symbols_by_exchange: Dict[str, Set[str]]) -> None:
+        """让订阅集合与当前监控的 symbol 一致；无持仓的交易所停止其流"""
+        for exchange, symbols in symbols_by_exchange.items():
+            wanted: Dict[str, str] = {}
+            for symbol in symbols:
+                stream_symbol = await self._stream_symbol(exchange, symbol)
+                if stream_symbol:
+                    wanted[stream_symbol] = symbol
+            stream = self._streams.get(exchange)
+            if stream is None:
+                if not wanted:
+                    continue
+                stream = self._factory(exchange)
+                stream.set_callback(partial(self._on_ticker, exchange))
+                self._streams[exchange] = stream
+            current = self._symbols.get(exchange, {})
+            for s in set(current) - set(wanted):
+                await stream.unsubscribe(s)
+            for s in set(wanted) - set(current):
+                await stream.subscribe(s)
+            self._symbols[exchange] = wanted
+            await self._ensure_running(exchange, stream)
+
+        for exchange in set(self._streams) - set(symbols_by_exchange):
+            await self._stop_stream(exchange)
+
+    async def _ensure_running(self, exchange: str, stream: Any) -> None:
+        if stream.is_alive:
+            return
+        now = time.monotonic()
+        last = self._restarted_at.get(exchange)
+        if last is not None and now - last < RESTART_BACKOFF:
+            return
+        self._restarted_at[exchange] = now
+        if last is not None:
+            log.warning("price stream not alive, restarting", exchange=exchange)
+            await stream.stop()
+        await stream.start()
+
+    async def _stream_symbol(self, exchange: str, symbol: str) -> Optional[str]:
+        snap = await get_markets_registry().aget(exchange, "swap")
+        if snap is not None:
+            return resolve_market_symbol(snap.markets, symbol)
+        return symbol_for_ccxt_futures(symbol)
+
+    async def _stop_stream(self, exchange: str) -> None:
+        stream = self._streams.pop(exchange, None)
+        for symbol in self._symbols.pop(exchange, {}).values():
+            self._prices.pop((exchange, symbol), None)
+        self._restarted_at.pop(exchange, None)
+        if stream is not None:
+            try:
+                await stream.stop()
+            except Exception as e:
+                log.warning("price stream stop failed", exchange=exchange, error=str(e))
+
+    async def stop(self) -> None:
+        for exchange in list(self._streams):
+            await self._stop_stream(exchange)
+
+    # ---------- 价格 ----------
+
+    def _on_ticker(self, exchange: str, data: Any) -> None:
+        symbol = self._symbols.get(exchange, {}).get(data.symbol)
+        price = float(data.last or 0)
+        if symbol is None or price <= 0:
+            return
+        self._prices[(exchange, symbol)] = (price, time.time())
+        self.ticks += 1
+        if self._listener is not None:
+            try:
+                self._listener(exchange, symbol, price)
+            except Exception as e:
+                log.warning("price listener error", exchange=exchange, symbol=symbol, error=str(e))
+
+    def get_price(self, exchange: str, symbol: str) -> Optional[float]:
+        """未过期的最新推送价格，过期或无数据返回 None"""
+        entry = self._prices.get((exchange, symbol))
+        if entry is None or time.time() - entry[1] > self.stale_after:
+            return None
+        return entry[0]
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        return {
+            "streams": len(self._streams),
+            "subscriptions": sum(len(m) for m in self._symbols.values()),
+            "fresh_symbols": sum(1 for _, ts in self._prices.values() if now - ts <= self.stale_after),
+            "ticks": self.ticks,
+        }
@@ -7,7 +7,7 @@ Position Module - 数据仓库层
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import and_, desc
 from sqlalchemy.orm import Session
@@ -95,7 +95,30 @@ class PositionRepository:
             return position, False
         
         # 创建新持仓
-        position = Position(
+        position = self.new_position(
+            tenant_id=tenant_id,
+            account_id=account_id,
+            symbol=symbol,
+            exchange=exchange,
+            market_type=market_type,
+            position_side=position_side,
+        )
+        
+        self.session.add(position)
+        self.session.flush()
+        return position, True
+    
+    @staticmethod
+    def new_position(
+        tenant_id: int,
+        account_id: int,
+        symbol: str,
+        exchange: str,
+        market_type: str = "spot",
+        position_side: str = "NONE",
+    ) -> Position:
+        """构造空持仓（未加入 session）"""
+        return Position(
             position_id=generate_position_id(),
             tenant_id=tenant_id,
             account_id=account_id,
@@ -111,10 +134,33 @@ class PositionRepository:
             realized_pnl=Decimal("0"),
             status="OPEN",
         )
-        
-        self.session.add(position)
-        self.session.flush()
-        return position, True
+    
+    def get_by_keys(
+        self,
+        tenant_id: int,
+        account_id: int,
+        keys: Iterable[Tuple[str, str, str]],
+        for_update: bool = False,
+    ) -> Dict[Tuple[str, str, str], Position]:
+        """按 (symbol, exchange, position_side) 批量查询同一账户的持仓，for_update 时行加锁"""
+        keys = set(keys)
+        if not keys:
+            return {}
+        query = self.session.query(Position).filter(
+            and_(
+                Position.tenant_id == tenant_id,
+                Position.account_id == account_id,
+                Position.symbol.in_({k[0] for k in keys}),
+            )
+        ).order_by(Position.id)
+        if for_update:
+            query = query.with_for_update()
+        result = {}
+        for position in query.all():
+            key = (position.symbol, position.exchange, position.position_side)
+            if key in keys:
+                result[key] = position
+        return result
     
     def update(self, position: Position) -> Position:
         """更新持仓"""
@@ -275,6 +321,25 @@ class PositionChangeRepository:
             )
         ).first()
     
+    def get_sources(
+        self,
+        source_type: str,
+        source_ids: Iterable[str],
+        tenant_id: int,
+    ) -> Dict[str, str]:
+        """批量幂等检查：返回已存在变动的 {source_id: position_id}"""
+        source_ids = list(set(source_ids))
+        if not source_ids:
+            return {}
+        rows = self.session.query(PositionChange.source_id, PositionChange.position_id).filter(
+            and_(
+                PositionChange.source_type == source_type,
+                PositionChange.source_id.in_(source_ids),
+                PositionChange.tenant_id == tenant_id,
+            )
+        ).all()
+        return {source_id: position_id for source_id, position_id in rows}
+    
     def list_changes(self, filter: PositionChangeFilter) -> List[PositionChange]:
         """查询变动列表"""
         query = self.session.query(PositionChange).filter(
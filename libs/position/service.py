@@ -6,7 +6,7 @@ Position Module - 业务服务层
 
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -105,11 +105,26 @@ class PositionService:
             position_side=dto.position_side,
         )
         
-        # 确定变动类型和数量
-        is_buy = dto.side.upper() == "BUY"
-        quantity = dto.quantity
-        price = dto.price
+        # 开仓/加仓/减仓/平仓
+        change, _ = self.apply_fill(position, dto)
+        self.position_repo.update(position)
+        self.change_repo.create(change)
         
+        return self._to_dto(position)
+    
+    def apply_fill(
+        self,
+        position: Position,
+        dto: UpdatePositionDTO,
+    ) -> Tuple[PositionChange, Optional[Decimal]]:
+        """
+        在持仓对象上应用一笔成交（只改内存，不写库）
+        
+        不变量校验失败时抛异常且不修改持仓。
+        
+        Returns:
+            (未持久化的变动记录, 本次已实现盈亏；开仓/加仓为 None)
+        """
         # 对于合约，根据 position_side 判断是开仓还是平仓
         # LONG + BUY = 开仓/加仓
         # LONG + SELL = 减仓/平仓
@@ -122,10 +137,23 @@ class PositionService:
         
         if is_opening:
             # 开仓/加仓
-            return self._add_position(position, quantity, price, dto)
+            return self._add_position(position, dto.quantity, dto.price, dto), None
         else:
             # 减仓/平仓
-            return self._reduce_position(position, quantity, price, dto)
+            return self._reduce_position(position, dto.quantity, dto.price, dto)
+    
+    def lock_positions(
+        self,
+        tenant_id: int,
+        account_id: int,
+        keys: Iterable[Tuple[str, str, str]],
+    ) -> Dict[Tuple[str, str, str], Position]:
+        """批量加载并锁定同一账户的持仓行，key 为 (symbol, exchange, position_side)"""
+        return self.position_repo.get_by_keys(tenant_id, account_id, keys, for_update=True)
+    
+    def processed_fills(self, fill_ids: Iterable[str], tenant_id: int) -> Dict[str, str]:
+        """批量幂等检查：已处理过的 {fill_id: position_id}"""
+        return self.change_repo.get_sources("FILL", fill_ids, tenant_id)
     
     def _is_opening_position(self, position_side: PositionSide, side: str) -> bool:
         """判断是否是开仓方向"""
@@ -142,15 +170,13 @@ class PositionService:
         quantity: Decimal,
         price: Decimal,
         dto: UpdatePositionDTO,
-    ) -> PositionDTO:
-        """加仓（开仓或追加）"""
+    ) -> PositionChange:
+        """加仓（开仓或追加），返回未持久化的变动记录"""
         current_quantity = Decimal(str(position.quantity))
         current_cost = Decimal(str(position.avg_cost))
         
         # 记录变动前状态
         quantity_before = current_quantity
-        available_before = Decimal(str(position.available))
-        frozen_before = Decimal(str(position.frozen))
         
         # 计算新的平均成本
         new_avg_cost = PositionValidation.calculate_avg_cost(
@@ -173,13 +199,11 @@ class PositionService:
         if dto.leverage:
             position.leverage = dto.leverage
         
-        self.position_repo.update(position)
-        
         # 确定变动类型
         change_type = ChangeType.OPEN if quantity_before == 0 else ChangeType.ADD
         
         # 记录变动
-        self._record_change(
+        return self._build_change(
             position=position,
             change_type=change_type,
             quantity_change=quantity,
@@ -191,8 +215,6 @@ class PositionService:
             source_id=dto.fill_id,
             changed_at=dto.filled_at or datetime.now(),
         )
-        
-        return self._to_dto(position)
     
     def _reduce_position(
         self,
@@ -200,8 +222,8 @@ class PositionService:
         quantity: Decimal,
         price: Decimal,
         dto: UpdatePositionDTO,
-    ) -> PositionDTO:
-        """减仓（部分平仓或全部平仓）"""
+    ) -> Tuple[PositionChange, Decimal]:
+        """减仓（部分平仓或全部平仓），返回 (未持久化的变动记录, 已实现盈亏)"""
         current_quantity = Decimal(str(position.quantity))
         current_available = Decimal(str(position.available))
         current_frozen = Decimal(str(position.frozen))
@@ -246,10 +268,8 @@ class PositionService:
             position.total_cost = new_quantity * current_cost
             change_type = ChangeType.REDUCE
         
-        self.position_repo.update(position)
-        
         # 记录变动
-        self._record_change(
+        change = self._build_change(
             position=position,
             change_type=change_type,
             quantity_change=-quantity,  # 减仓为负
@@ -261,8 +281,7 @@ class PositionService:
             source_id=dto.fill_id,
             changed_at=dto.filled_at or datetime.now(),
         )
-        
-        return self._to_dto(position)
+        return change, realized_pnl
     
     # ========== 冻结/解冻 ==========
     
@@ -627,7 +646,37 @@ class PositionService:
         remark: Optional[str] = None,
     ) -> PositionChange:
         """记录持仓变动"""
-        change = PositionChange(
+        change = self._build_change(
+            position=position,
+            change_type=change_type,
+            quantity_change=quantity_change,
+            available_change=available_change,
+            frozen_change=frozen_change,
+            price=price,
+            realized_pnl=realized_pnl,
+            source_type=source_type,
+            source_id=source_id,
+            changed_at=changed_at,
+            remark=remark,
+        )
+        return self.change_repo.create(change)
+    
+    def _build_change(
+        self,
+        position: Position,
+        change_type: ChangeType,
+        quantity_change: Decimal,
+        available_change: Decimal,
+        frozen_change: Decimal,
+        price: Optional[Decimal],
+        realized_pnl: Optional[Decimal],
+        source_type: str,
+        source_id: Optional[str],
+        changed_at: datetime,
+        remark: Optional[str] = None,
+    ) -> PositionChange:
+        """构造持仓变动记录（不写库）"""
+        return PositionChange(
             change_id=generate_change_id(),
             position_id=position.position_id,
             tenant_id=position.tenant_id,
@@ -649,8 +698,6 @@ class PositionService:
             changed_at=changed_at,
             remark=remark,
         )
-        
-        return self.change_repo.create(change)
     
     def _to_dto(self, position: Position) -> PositionDTO:
         """模型转 DTO"""
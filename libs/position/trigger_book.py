@@ -0,0 +1,332 @@
+"""
+Trigger Book - 按价位排序的 SL/TP 触发簿（持仓监控使用）
+
+解决的问题：
+- 监控每轮查全部 OPEN 持仓并逐个 _check_trigger，持仓数上千时每个价格都是 O(持仓数)
+
+设计：
+1. 每个 (exchange, symbol) 维护 4 个按价位升序的列表：多单 SL / 多单 TP / 空单 SL / 空单 TP
+2. 价格到达时二分定位越过的价位段：多单 SL、空单 TP 取 level >= price，多单 TP、空单 SL 取 level <= price，
+   开销为 O(log n + 触发数)
+3. 增量维护：持仓 开仓 / 平仓 / 改 SL/TP 经 ORM 提交后，由 SQLAlchemy session 事件
+   （after_flush 记录变更，after_commit 生效）直接更新本进程触发簿
+4. 跨进程：提交后递增 Redis 版本号，监控发现版本变化时全量重载；另有定时全量重载兜底
+   （绕过 ORM 的批量 UPDATE 也由此覆盖）
+5. session 事件不在导入时注册：运行持仓监控的进程（start_position_monitor）与写持仓的服务
+   （data-api、node_execute_worker）显式调用 register_session_events()
+
+配置（config/default.yaml）：
+- position_monitor_reload_interval: 触发簿定时全量重载间隔（秒）
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from libs.core import get_logger
+
+from .models import Position
+
+log = get_logger("trigger-book")
+
+VERSION_KEY = "ironbull:position:triggers:version"
+
+# 影响触发判断的字段；其他字段（未实现盈亏、保证金等）高频同步不触发更新
+_WATCHED_FIELDS = (
+    "status", "quantity", "stop_loss", "take_profit", "position_side", "symbol", "exchange",
+)
+_CHANGES_KEY = "position_trigger_changes"
+
+BookKey = Tuple[str, str]
+
+
+def trigger_level(value) -> Optional[float]:
+    """SL/TP 价位；None 与 0 都视为未设置（与 monitor._check_trigger 一致）"""
+    if value is None or value == 0:
+        return None
+    return float(value)
+
+
+@dataclass
+class WatchedPosition:
+    """触发簿中的持仓快照（只含触发判断所需字段，不持有 ORM 对象）"""
+    position_id: str
+    exchange: str
+    symbol: str
+    position_side: str
+    stop_loss: Optional[float]
+    take_profit: Optional[float]
+    loaded_at: float
+
+    @classmethod
+    def from_position(cls, pos: Position, loaded_at: Optional[float] = None) -> "WatchedPosition":
+        return cls(
+            position_id=pos.position_id,
+            exchange=pos.exchange,
+            symbol=pos.symbol,
+            position_side=(pos.position_side or "LONG").upper(),
+            stop_loss=trigger_level(pos.stop_loss),
+            take_profit=trigger_level(pos.take_profit),
+            loaded_at=loaded_at if loaded_at is not None else time.time(),
+        )
+
+
+def is_watchable(pos: Position) -> bool:
+    """与 _get_monitored_positions 条件一致：OPEN + quantity > 0 + 有 SL 或 TP（非空且非 0）"""
+    return (
+        pos.status == "OPEN"
+        and pos.quantity is not None and pos.quantity > 0
+        and (trigger_level(pos.stop_loss) is not None or trigger_level(pos.take_profit) is not None)
+    )
+
+
+class _Levels:
+    """按价位升序的 (level, position_id) 列表"""
+
+    __slots__ = ("levels", "ids")
+
+    def __init__(self):
+        self.levels: List[float] = []
+        self.ids: List[str] = []
+
+    def add(self, level: float, position_id: str) -> None:
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, position_id)
+
+    def discard(self, level: float, position_id: str) -> None:
+        for i in range(bisect_left(self.levels, level), bisect_right(self.levels, level)):
+            if self.ids[i] == position_id:
+                del self.levels[i]
+                del self.ids[i]
+                return
+
+    def at_or_above(self, price: float) -> List[str]:
+        return self.ids[bisect_left(self.levels, price):]
+
+    def at_or_below(self, price: float) -> List[str]:
+        return self.ids[:bisect_right(self.levels, price)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class _SymbolBook:
+    __slots__ = ("long_sl", "long_tp", "short_sl", "short_tp")
+
+    def __init__(self):
+        self.long_sl = _Levels()
+        self.long_tp = _Levels()
+        self.short_sl = _Levels()
+        self.short_tp = _Levels()
+
+    def sides(self, position_side: str) -> Tuple[_Levels, _Levels]:
+        if position_side == "SHORT":
+            return self.short_sl, self.short_tp
+        return self.long_sl, self.long_tp
+
+    def empty(self) -> bool:
+        return not (self.long_sl or self.long_tp or self.short_sl or self.short_tp)
+
+
+class TriggerBook:
+    """按 (exchange, symbol) 组织的 SL/TP 价位簿（线程安全）"""
+
+    def __init__(self):
+        self._books: Dict[BookKey, _SymbolBook] = {}
+        self._entries: Dict[str, WatchedPosition] = {}
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.version: Optional[str] = None
+        self.incremental_updates = 0
+        self.reloads = 0
+
+    # ---------- 维护 ----------
+
+    def replace(self, positions: List[Position], loaded_at: float, version: Optional[str] = None) -> None:
+        """用 DB 全量查询结果重建"""
+        with self._lock:
+            self._books = {}
+            self._entries = {}
+            for pos in positions:
+                watched = WatchedPosition.from_position(pos, loaded_at)
+                if watched.stop_loss is not None or watched.take_profit is not None:
+                    self._add(watched)
+            self.loaded_at = loaded_at
+            self.version = version
+            self.reloads += 1
+
+    def upsert(self, watched: WatchedPosition) -> None:
+        with self._lock:
+            self._remove(watched.position_id)
+            if watched.stop_loss is not None or watched.take_profit is not None:
+                self._add(watched)
+            self.incremental_updates += 1
+
+    def remove(self, position_id: str) -> None:
+        with self._lock:
+            if self._remove(position_id):
+                self.incremental_updates += 1
+
+    def apply_position(self, pos: Position) -> None:
+        """按持仓当前状态更新：仍需监控则 upsert，否则移除"""
+        if is_watchable(pos):
+            self.upsert(WatchedPosition.from_position(pos))
+        else:
+            self.remove(pos.position_id)
+
+    def _add(self, w: WatchedPosition) -> None:
+        book = self._books.get((w.exchange, w.symbol))
+        if book is None:
+            book = self._books[(w.exchange, w.symbol)] = _SymbolBook()
+        sl_levels, tp_levels = book.sides(w.position_side)
+        if w.stop_loss is not None:
+            sl_levels.add(w.stop_loss, w.position_id)
+        if w.take_profit is not None:
+            tp_levels.add(w.take_profit, w.position_id)
+        self._entries[w.position_id] = w
+
+    def _remove(self, position_id: str) -> bool:
+        w = self._entries.pop(position_id, None)
+        if w is None:
+            return False
+        key = (w.exchange, w.symbol)
+        book = self._books.get(key)
+        if book is not None:
+            sl_levels, tp_levels = book.sides(w.position_side)
+            if w.stop_loss is not None:
+                sl_levels.discard(w.stop_loss, position_id)
+            if w.take_profit is not None:
+                tp_levels.discard(w.take_profit, position_id)
+            if book.empty():
+                del self._books[key]
+        return True
+
+    # ---------- 查询 ----------
+
+    def crossed(self, exchange: str, symbol: str, price: float) -> List[Tuple[WatchedPosition, str]]:
+        """返回该价格越过的持仓及触发类型（"SL" / "TP"），同一持仓 SL 优先"""
+        with self._lock:
+            book = self._books.get((exchange, symbol))
+            if book is None:
+                return []
+            hits: Dict[str, str] = {}
+            for pid in book.long_sl.at_or_above(price) + book.short_sl.at_or_below(price):
+                hits[pid] = "SL"
+            for pid in book.long_tp.at_or_below(price) + book.short_tp.at_or_above(price):
+                hits.setdefault(pid, "TP")
+            return [(self._entries[pid], trigger) for pid, trigger in hits.items()]
+
+    def get(self, position_id: str) -> Optional[WatchedPosition]:
+        return self._entries.get(position_id)
+
+    def symbols_by_exchange(self) -> Dict[str, Set[str]]:
+        with self._lock:
+            result: Dict[str, Set[str]] = defaultdict(set)
+            for exchange, symbol in self._books:
+                result[exchange].add(symbol)
+            return dict(result)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "positions": len(self._entries),
+                "symbols": len(self._books),
+                "incremental_updates": self.incremental_updates,
+                "reloads": self.reloads,
+            }
+
+
+_book = TriggerBook()
+
+
+def get_trigger_book() -> TriggerBook:
+    return _book
+
+
+def remote_version() -> Optional[str]:
+    try:
+        from libs.core import get_redis
+        return get_redis().get(VERSION_KEY)
+    except Exception:
+        return None
+
+
+def _bump_remote_version() -> None:
+    try:
+        from libs.core import get_redis
+        new_version = int(get_redis().incr(VERSION_KEY))
+    except Exception as e:
+        log.debug("trigger book version bump skipped", error=str(e))
+        return
+    # 本进程的变更已增量生效：触发簿原本与上一版本一致时直接跟进版本号，避免监控自己触发全量重载
+    if _book.version is not None and _book.version == str(new_version - 1):
+        _book.version = str(new_version)
+
+
+# ---------- SQLAlchemy session 事件：提交后增量更新 ----------
+
+def _collect_changes(session: Session) -> List[Tuple[str, Optional[WatchedPosition]]]:
+    """收集本次 flush 中影响触发判断的持仓变更：(position_id, 快照 / None=移除)"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Position) and obj.position_id:
+            changes.append((obj.position_id, WatchedPosition.from_position(obj) if is_watchable(obj) else None))
+    for obj in session.dirty:
+        if not isinstance(obj, Position):
+            continue
+        attrs = inspect(obj).attrs
+        if not any(attrs[name].history.has_changes() for name in _WATCHED_FIELDS):
+            continue
+        changes.append((obj.position_id, WatchedPosition.from_position(obj) if is_watchable(obj) else None))
+    for obj in session.deleted:
+        if isinstance(obj, Position):
+            changes.append((obj.position_id, None))
+    return changes
+
+
+def _record_changes(session: Session, flush_context) -> None:
+    changes = _collect_changes(session)
+    if changes:
+        session.info.setdefault(_CHANGES_KEY, []).extend(changes)
+
+
+def _apply_on_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    for position_id, watched in changes:
+        if watched is None:
+            _book.remove(position_id)
+        else:
+            _book.upsert(watched)
+    _bump_remote_version()
+
+
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
+
+
+_SESSION_EVENTS = (
+    ("after_flush", _record_changes),
+    ("after_commit", _apply_on_commit),
+    ("after_rollback", _discard_on_rollback),
+)
+_events_lock = threading.Lock()
+
+
+def register_session_events() -> None:
+    """注册持仓变更的 session 事件（幂等）；只在监控进程与写持仓的服务中调用"""
+    with _events_lock:
+        for name, fn in _SESSION_EVENTS:
+            if not event.contains(Session, name, fn):
+                event.listen(Session, name, fn)
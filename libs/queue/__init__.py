@@ -5,9 +5,11 @@ IronBull Queue Module (v1 Phase 3)
 
 组件：
 - TaskQueue: 任务队列（生产者/消费者）
+- ReliableTaskQueue: 可靠任务队列 v2（原子领取、租约回收、批量、优先级）
 - TaskMessage: 任务消息
 - IdempotencyChecker: 幂等性检查
 - TaskWorker: 任务消费者
+- ConcurrentTaskWorker: 并发任务消费者（分组限流、同账户顺序、停机排空、指标）
 - TaskHandler: 任务处理器基类
 - FunctionHandler: 函数处理器
 """
@@ -22,8 +24,22 @@ from .task_queue import (
     get_notification_queue,
     get_node_execute_queue,
 )
+from .reliable_queue import (
+    ReliableTaskQueue,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW,
+    reliable_queue,
+)
 from .idempotency import IdempotencyChecker, TaskState, IdempotencyRecord, get_signal_idempotency
-from .worker import TaskWorker, TaskHandler, FunctionHandler
+from .worker import (
+    TaskWorker,
+    TaskHandler,
+    FunctionHandler,
+    ConcurrentTaskWorker,
+    WorkerMetrics,
+    account_order_keys,
+)
 
 __all__ = [
     # Queue
@@ -35,6 +51,11 @@ __all__ = [
     "get_execution_queue",
     "get_notification_queue",
     "get_node_execute_queue",
+    "ReliableTaskQueue",
+    "PRIORITY_HIGH",
+    "PRIORITY_NORMAL",
+    "PRIORITY_LOW",
+    "reliable_queue",
     # Idempotency
     "IdempotencyChecker",
     "TaskState",
@@ -44,4 +65,7 @@ __all__ = [
     "TaskWorker",
     "TaskHandler",
     "FunctionHandler",
+    "ConcurrentTaskWorker",
+    "WorkerMetrics",
+    "account_order_keys",
 ]
@@ -5,9 +5,14 @@ Idempotency Checker - 幂等性检查
 - 防止重复执行相同信号
 - 支持 TTL 过期自动清理
 - 提供执行状态查询
+- 批量获取执行权：acquire_many / complete_many 一次往返（pipeline）
+- complete / fail 为服务端原子更新（Lua），无读-改-写竞争
+
+不做进程内缓存：acquire（API 进程）与 complete / fail（Worker 进程）通常不在同一进程，
+且 delete / 重置需要立即对所有进程生效，判重始终以 Redis 为准。
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Union
 from enum import Enum
 from dataclasses import dataclass, asdict
 from datetime import datetime
@@ -17,6 +22,39 @@ from libs.core import get_redis, get_logger
 
 logger = get_logger("idempotency")
 
+# KEYS: key   ARGV: ttl, 幂等键, state, updated_at, 更新字段名（result / error）, 字段 JSON
+# 保留已有记录的 task_id / created_at（及未更新的 result / error），其余字段覆盖；
+# 更新字段按客户端编码的 JSON 原样拼接，避免 cjson 重编码（空数组会变成 {}）
+_UPDATE_LUA = """
+local raw = redis.call('GET', KEYS[1])
+local old = {}
+if raw then
+    local ok, decoded = pcall(cjson.decode, raw)
+    if ok and type(decoded) == 'table' then old = decoded end
+end
+local function enc(v)
+    if v == nil or v == cjson.null then return 'null' end
+    return cjson.encode(v)
+end
+local fields = {
+    {'key', cjson.encode(ARGV[2])},
+    {'state', cjson.encode(ARGV[3])},
+    {'task_id', enc(old['task_id'])},
+    {'result', enc(old['result'])},
+    {'error', enc(old['error'])},
+    {'created_at', old['created_at'] and enc(old['created_at']) or cjson.encode(ARGV[4])},
+    {'updated_at', cjson.encode(ARGV[4])},
+}
+local parts = {}
+for i, f in ipairs(fields) do
+    local value = f[2]
+    if f[1] == ARGV[5] then value = ARGV[6] end
+    parts[i] = '"' .. f[1] .. '": ' .. value
+end
+redis.call('SET', KEYS[1], '{' .. table.concat(parts, ', ') .. '}', 'EX', tonumber(ARGV[1]))
+return raw and 1 or 0
+"""
+
 
 class TaskState(str, Enum):
     """任务状态"""
@@ -73,6 +111,7 @@ class IdempotencyChecker:
     
     def __init__(self, ttl_seconds: int = DEFAULT_TTL):
         self.ttl = ttl_seconds
+        self._update = None
     
     def _key(self, idempotency_key: str) -> str:
         """生成 Redis key"""
@@ -94,8 +133,8 @@ class IdempotencyChecker:
             True 如果成功获取（可以执行）
             False 如果已存在（重复请求）
         """
-        redis = get_redis()
         key = self._key(idempotency_key)
+        redis = get_redis()
         now = datetime.now().isoformat()
         
         record = IdempotencyRecord(
@@ -124,57 +163,106 @@ class IdempotencyChecker:
         )
         return False
     
+    def acquire_many(
+        self,
+        idempotency_keys: Iterable[str],
+        task_ids: Optional[Union[str, Dict[str, str]]] = None,
+    ) -> Dict[str, bool]:
+        """
+        批量获取执行权（一次 pipeline 往返）
+        
+        Args:
+            idempotency_keys: 幂等键列表
+            task_ids: 统一任务ID，或 {幂等键: 任务ID}
+        
+        Returns:
+            {幂等键: 是否获取成功}，顺序与输入一致
+        """
+        keys = list(dict.fromkeys(idempotency_keys))
+        results: Dict[str, bool] = {}
+        
+        if keys:
+            now = datetime.now().isoformat()
+            pipe = get_redis().pipeline(transaction=False)
+            for k in keys:
+                task_id = task_ids.get(k) if isinstance(task_ids, dict) else task_ids
+                record = IdempotencyRecord(
+                    key=k,
+                    state=TaskState.PROCESSING,
+                    task_id=task_id,
+                    created_at=now,
+                    updated_at=now,
+                )
+                pipe.set(self._key(k), record.to_json(), nx=True, ex=self.ttl)
+            for k, acquired in zip(keys, pipe.execute()):
+                results[k] = bool(acquired)
+        
+        acquired_count = sum(1 for v in results.values() if v)
+        logger.info(
+            "idempotency acquired (batch)",
+            total=len(keys),
+            acquired=acquired_count,
+            duplicates=len(keys) - acquired_count,
+        )
+        return {k: results[k] for k in keys}
+    
+    def _update_script(self, redis):
+        if self._update is None:
+            self._update = redis.register_script(_UPDATE_LUA)
+        return self._update
+    
+    def _update_args(self, idempotency_key: str, state: TaskState, field: str, value: Any) -> list:
+        return [
+            self.ttl,
+            idempotency_key,
+            state.value,
+            datetime.now().isoformat(),
+            field,
+            json.dumps(value, ensure_ascii=False),
+        ]
+    
     def complete(
         self,
         idempotency_key: str,
         result: Optional[Dict] = None,
     ) -> None:
-        """标记执行完成"""
+        """标记执行完成（服务端原子更新，保留 task_id / created_at）"""
         redis = get_redis()
-        key = self._key(idempotency_key)
+        self._update_script(redis)(
+            keys=[self._key(idempotency_key)],
+            args=self._update_args(idempotency_key, TaskState.COMPLETED, "result", result),
+        )
         
-        existing = redis.get(key)
-        if existing:
-            record = IdempotencyRecord.from_json(existing)
-        else:
-            record = IdempotencyRecord(
-                key=idempotency_key,
-                state=TaskState.PENDING,
-                created_at=datetime.now().isoformat(),
+        logger.info("idempotency completed", key=idempotency_key)
+    
+    def complete_many(self, results: Dict[str, Optional[Dict]]) -> None:
+        """批量标记执行完成（一次 pipeline 往返）"""
+        if not results:
+            return
+        redis = get_redis()
+        script = self._update_script(redis)
+        pipe = redis.pipeline(transaction=False)
+        for k, result in results.items():
+            script(
+                keys=[self._key(k)],
+                args=self._update_args(k, TaskState.COMPLETED, "result", result),
+                client=pipe,
             )
+        pipe.execute()
         
-        record.state = TaskState.COMPLETED
-        record.result = result
-        record.updated_at = datetime.now().isoformat()
-        
-        redis.setex(key, self.ttl, record.to_json())
-        
-        logger.info("idempotency completed", key=idempotency_key)
+        logger.info("idempotency completed (batch)", count=len(results))
     
     def fail(
         self,
         idempotency_key: str,
         error: str,
     ) -> None:
-        """标记执行失败"""
+        """标记执行失败（服务端原子更新）"""
         redis = get_redis()
-        key = self._key(idempotency_key)
-        
-        existing = redis.get(key)
-        if existing:
-            record = IdempotencyRecord.from_json(existing)
-        else:
-            record = IdempotencyRecord(
-                key=idempotency_key,
-                state=TaskState.PENDING,
-                created_at=datetime.now().isoformat(),
-            )
-        
-        record.state = TaskState.FAILED
-        record.error = error
-        record.updated_at = datetime.now().isoformat()
-        
-        redis.setex(key, self.ttl, record.to_json())
+        self._update_script(redis)(
+            keys=[self._key(idempotency_key)],
+            args=self._update_args(idempotency_key, TaskState.FAILED, "error", error),
+        )
         
         logger.error("idempotency failed", key=idempotency_key, error=error)
     
@@ -0,0 +1,359 @@
+"""
+Reliable Task Queue - 可靠任务队列（v2）
+
+相对 TaskQueue（v1）的改进：
+- 原子领取：Lua 脚本在一次调用内完成 出队 + 写入租约，进程在两步之间崩溃不会丢任务
+- 租约（visibility timeout）：领取的任务在 lease 秒内未 ack / nack 视为失联，
+  由 reap_expired() 放回队列头部（超过 max_retries 进入死信）；消费者领取时顺带回收，无需单独进程
+- 批量：push_many / pop_many / ack_many 每批一次往返（pipeline / 单次脚本调用）
+- 优先级通道：high → normal → low 依次领取；normal 通道与 v1 主队列同 key，v1 遗留消息可直接消费
+
+Key 规划（{name} 为队列名）：
+- ironbull:queue:{name}             normal 通道（与 v1 主队列相同）
+- ironbull:queue:{name}:high / :low 高 / 低优先级通道
+- ironbull:queue:{name}:leases      ZSET  task_id -> 租约到期时间（毫秒，Redis 时钟）
+- ironbull:queue:{name}:inflight    HASH  task_id -> 原始消息
+- ironbull:queue:{name}:attempts    HASH  task_id -> 租约过期次数
+- ironbull:queue:{name}:notify      LIST  入队唤醒信号（只用于缩短阻塞等待，不承载数据）
+- ironbull:queue:{name}:dead        死信队列
+
+配置（config/default.yaml）：
+- queue_lease_seconds: 默认租约时长（秒）
+- queue_reap_interval: 消费者顺带回收过期租约的最小间隔（秒）
+
+接口与 TaskQueue 兼容（push / pop / ack / nack / stats），TaskWorker 与 node_execute_worker 可直接使用。
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional
+
+from libs.core import get_config, get_redis, get_logger
+
+from .task_queue import TaskMessage, TaskQueue
+
+logger = get_logger("reliable-queue")
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+# 入队唤醒信号最多保留条数（够唤醒一批消费者即可）
+_NOTIFY_CAP = 64
+
+# KEYS: high, normal, low, leases, inflight, dead   ARGV: count, lease_ms
+_CLAIM_LUA = """
+local leases, inflight = KEYS[4], KEYS[5]
+local count = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local deadline = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000) + tonumber(ARGV[2])
+local out = {}
+for i = 1, 3 do
+    while #out < count do
+        local raw = redis.call('RPOP', KEYS[i])
+        if not raw then break end
+        local ok, msg = pcall(cjson.decode, raw)
+        local id = ok and type(msg) == 'table' and msg['task_id'] or nil
+        if id then
+            redis.call('ZADD', leases, deadline, id)
+            redis.call('HSET', inflight, id, raw)
+            out[#out + 1] = raw
+        else
+            -- 无法解析的消息直接进死信，不阻塞队列
+            redis.call('LPUSH', KEYS[6], raw)
+        end
+    end
+    if #out >= count then break end
+end
+return out
+"""
+
+# KEYS: leases, inflight, attempts, dead, high, normal, low   ARGV: limit
+_REAP_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1]))
+local lanes = {high = KEYS[5], normal = KEYS[6], low = KEYS[7]}
+local requeued, dead = 0, 0
+for _, id in ipairs(ids) do
+    local raw = redis.call('HGET', KEYS[2], id)
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', KEYS[2], id)
+    if raw then
+        local msg = cjson.decode(raw)
+        local attempts = redis.call('HINCRBY', KEYS[3], id, 1)
+        if attempts > (tonumber(msg['max_retries']) or 3) then
+            redis.call('HDEL', KEYS[3], id)
+            redis.call('LPUSH', KEYS[4], raw)
+            dead = dead + 1
+        else
+            -- 放回通道消费端（RPOP 一侧），下一个领取
+            redis.call('RPUSH', lanes[msg['priority']] or KEYS[6], raw)
+            requeued = requeued + 1
+        end
+    end
+end
+return {requeued, dead}
+"""
+
+
+class ReliableTaskQueue(TaskQueue):
+    """
+    可靠任务队列（原子领取 + 租约 + 批量 + 优先级）
+
+    使用方式：
+        queue = ReliableTaskQueue("node-execute")
+        queue.push_many(messages, priority="high")
+
+        for msg in queue.pop_many(10, timeout=5):
+            try:
+                handle(msg)
+                queue.ack(msg.task_id)
+            except Exception as e:
+                queue.nack(msg, str(e))
+    """
+
+    def __init__(self, name: str, lease_seconds: float = 300.0, reap_interval: float = 5.0):
+        super().__init__(name)
+        self.lease_seconds = lease_seconds
+        self.reap_interval = reap_interval
+        self.lane_keys = {
+            PRIORITY_HIGH: f"{self.queue_key}:high",
+            PRIORITY_NORMAL: self.queue_key,
+            PRIORITY_LOW: f"{self.queue_key}:low",
+        }
+        self.leases_key = f"{self.queue_key}:leases"
+        self.inflight_key = f"{self.queue_key}:inflight"
+        self.attempts_key = f"{self.queue_key}:attempts"
+        self.notify_key = f"{self.queue_key}:notify"
+        self._claim_script = None
+        self._reap_script = None
+        self._last_reap = 0.0
+
+    def _scripts(self, redis):
+        if self._claim_script is None:
+            self._claim_script = redis.register_script(_CLAIM_LUA)
+            self._reap_script = redis.register_script(_REAP_LUA)
+        return self._claim_script, self._reap_script
+
+    def _lane(self, priority: Optional[str]) -> str:
+        return self.lane_keys.get(priority or PRIORITY_NORMAL, self.queue_key)
+
+    # ---------- 入队 ----------
+
+    def push(self, message: TaskMessage, priority: Optional[str] = None) -> str:
+        """推送任务（priority 为空时使用 message.priority）"""
+        self.push_many([message], priority)
+        logger.info(
+            "task pushed",
+            queue=self.name,
+            task_id=message.task_id,
+            task_type=message.task_type,
+            signal_id=message.signal_id,
+            priority=message.priority,
+        )
+        return message.task_id
+
+    def push_many(self, messages: Iterable[TaskMessage], priority: Optional[str] = None) -> List[str]:
+        """批量推送（一次往返）"""
+        by_lane: Dict[str, List[str]] = {}
+        task_ids = []
+        for message in messages:
+            if priority:
+                message.priority = priority
+            by_lane.setdefault(self._lane(message.priority), []).append(message.to_json())
+            task_ids.append(message.task_id)
+        if not task_ids:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        for lane, raws in by_lane.items():
+            pipe.lpush(lane, *raws)
+        pipe.lpush(self.notify_key, *(["1"] * min(len(task_ids), _NOTIFY_CAP)))
+        pipe.ltrim(self.notify_key, 0, _NOTIFY_CAP - 1)
+        pipe.execute()
+        return task_ids
+
+    # ---------- 领取 ----------
+
+    def pop(self, timeout: int = 0, lease: Optional[float] = None) -> Optional[TaskMessage]:
+        """领取一个任务（阻塞，timeout=0 表示永久阻塞）"""
+        messages = self.pop_many(1, timeout=timeout, lease=lease)
+        return messages[0] if messages else None
+
+    def pop_many(self, count: int, timeout: float = 0, lease: Optional[float] = None) -> List[TaskMessage]:
+        """
+        原子领取最多 count 个任务（按优先级），没有任务时最多等待 timeout 秒（0 = 永久等待）
+
+        Args:
+            count: 最多领取数
+            timeout: 等待秒数
+            lease: 租约秒数（默认 lease_seconds），到期未 ack/nack 的任务会被重新投递
+        """
+        redis = get_redis()
+        claim, _ = self._scripts(redis)
+        lease_ms = int((lease or self.lease_seconds) * 1000)
+        keys = [self.lane_keys[p] for p in PRIORITIES] + [self.leases_key, self.inflight_key, self.dead_key]
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            self._maybe_reap()
+            raws = claim(keys=keys, args=[max(1, count), lease_ms])
+            if raws:
+                messages = [TaskMessage.from_json(raw) for raw in raws]
+                logger.info("tasks claimed", queue=self.name, count=len(messages),
+                            task_ids=[m.task_id for m in messages][:10])
+                return messages
+            if deadline is None:
+                wait = 1.0
+            else:
+                wait = min(deadline - time.monotonic(), 1.0)
+                if wait <= 0:
+                    return []
+            # 等待入队信号（只是提示，真正领取仍走原子脚本）；最多等 1 秒以便回收过期租约
+            redis.blpop(self.notify_key, timeout=max(wait, 0.01))
+
+    # ---------- 确认 ----------
+
+    def ack(self, task_id: str) -> bool:
+        """确认任务完成（释放租约）"""
+        return self.ack_many([task_id]) > 0
+
+    def ack_many(self, task_ids: Iterable[str]) -> int:
+        """批量确认，返回成功释放的租约数"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.zrem(self.leases_key, *task_ids)
+        pipe.hdel(self.inflight_key, *task_ids)
+        pipe.hdel(self.attempts_key, *task_ids)
+        removed = pipe.execute()[0]
+        if removed:
+            logger.info("tasks acked", queue=self.name, count=removed)
+        return removed
+
+    def extend(self, task_id: str, lease: Optional[float] = None) -> bool:
+        """续约（长任务处理中调用），任务已不在租约中时返回 False"""
+        redis = get_redis()
+        seconds, micros = redis.time()
+        deadline = seconds * 1000 + micros // 1000 + int((lease or self.lease_seconds) * 1000)
+        return bool(redis.zadd(self.leases_key, {task_id: deadline}, xx=True, ch=True))
+
+    def nack(self, message: TaskMessage, error: Optional[str] = None) -> bool:
+        """
+        任务失败：重新入队（原优先级通道）或进入死信队列
+
+        Returns:
+            True 如果重新入队，False 如果进入死信队列
+        """
+        message.retry_count += 1
+        requeue = message.retry_count <= message.max_retries
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.zrem(self.leases_key, message.task_id)
+        pipe.hdel(self.inflight_key, message.task_id)
+        pipe.hdel(self.attempts_key, message.task_id)
+        if requeue:
+            pipe.lpush(self._lane(message.priority), message.to_json())
+            pipe.lpush(self.notify_key, "1")
+            pipe.ltrim(self.notify_key, 0, _NOTIFY_CAP - 1)
+        else:
+            pipe.lpush(self.dead_key, message.to_json())
+        pipe.execute()
+
+        if requeue:
+            logger.warning("task requeued", queue=self.name, task_id=message.task_id,
+                           retry_count=message.retry_count, error=error)
+        else:
+            logger.error("task moved to dead queue", queue=self.name, task_id=message.task_id,
+                         retry_count=message.retry_count, error=error)
+        return requeue
+
+    def release(self, messages: Iterable[TaskMessage]) -> int:
+        """
+        归还已领取但未开始处理的任务（不计重试次数），放回原通道头部、保持原顺序
+
+        用于消费者停机排空时交还预取的任务，避免等待租约过期。
+        """
+        messages = list(messages)
+        if not messages:
+            return 0
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.zrem(self.leases_key, *[m.task_id for m in messages])
+        pipe.hdel(self.inflight_key, *[m.task_id for m in messages])
+        # RPOP 一侧为队头：倒序 RPUSH，最早领取的任务最先被再次领取
+        for message in reversed(messages):
+            pipe.rpush(self._lane(message.priority), message.to_json())
+        pipe.lpush(self.notify_key, "1")
+        pipe.ltrim(self.notify_key, 0, _NOTIFY_CAP - 1)
+        pipe.execute()
+        logger.info("tasks released", queue=self.name, count=len(messages))
+        return len(messages)
+
+    # ---------- 租约回收 ----------
+
+    def reap_expired(self, limit: int = 100) -> Dict[str, int]:
+        """把租约过期的任务放回队列（超过重试上限进入死信），返回 {requeued, dead}"""
+        redis = get_redis()
+        _, reap = self._scripts(redis)
+        requeued, dead = reap(
+            keys=[self.leases_key, self.inflight_key, self.attempts_key, self.dead_key,
+                  self.lane_keys[PRIORITY_HIGH], self.lane_keys[PRIORITY_NORMAL], self.lane_keys[PRIORITY_LOW]],
+            args=[limit],
+        )
+        if requeued or dead:
+            logger.warning("expired leases reclaimed", queue=self.name, requeued=requeued, dead=dead)
+        return {"requeued": int(requeued), "dead": int(dead)}
+
+    def _maybe_reap(self) -> None:
+        now = time.monotonic()
+        if now - self._last_reap < self.reap_interval:
+            return
+        self._last_reap = now
+        try:
+            self.reap_expired()
+        except Exception as e:
+            logger.warning("lease reap failed", queue=self.name, error=str(e))
+
+    # ---------- 统计 ----------
+
+    def length(self) -> int:
+        """待处理任务数（全部通道）"""
+        pipe = get_redis().pipeline(transaction=False)
+        for key in self.lane_keys.values():
+            pipe.llen(key)
+        return sum(pipe.execute())
+
+    def processing_count(self) -> int:
+        """租约中任务数"""
+        return get_redis().zcard(self.leases_key)
+
+    def stats(self) -> Dict[str, int]:
+        """获取队列统计（各通道待处理、租约中、已过期未回收、死信）"""
+        redis = get_redis()
+        seconds, micros = redis.time()
+        now_ms = seconds * 1000 + micros // 1000
+        pipe = redis.pipeline(transaction=False)
+        for key in self.lane_keys.values():
+            pipe.llen(key)
+        pipe.zcard(self.leases_key)
+        pipe.zcount(self.leases_key, "-inf", now_ms)
+        pipe.llen(self.dead_key)
+        high, normal, low, processing, expired, dead = pipe.execute()
+        return {
+            "pending": high + normal + low,
+            "pending_high": high,
+            "pending_normal": normal,
+            "pending_low": low,
+            "processing": processing,
+            "expired": expired,
+            "dead": dead,
+        }
+
+
+def reliable_queue(name: str) -> ReliableTaskQueue:
+    """按配置创建可靠队列"""
+    config = get_config()
+    return ReliableTaskQueue(
+        name,
+        lease_seconds=config.get_float("queue_lease_seconds", 300.0),
+        reap_interval=config.get_float("queue_reap_interval", 5.0),
+    )
@@ -5,6 +5,9 @@ Task Queue - 任务队列
 - LPUSH 入队（生产者）
 - BRPOP 出队（消费者，阻塞）
 - 支持死信队列（失败重试）
+
+跨服务的 node-execute / notification 队列使用 v2（ReliableTaskQueue，见 reliable_queue.py）：
+原子领取、租约过期回收、批量与优先级通道。
 """
 
 import json
@@ -40,6 +43,9 @@ class TaskMessage:
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     scheduled_at: Optional[str] = None    # 预定执行时间
     
+    # 优先级通道（ReliableTaskQueue 使用：high / normal / low）
+    priority: str = "normal"
+    
     def to_json(self) -> str:
         return json.dumps(asdict(self), ensure_ascii=False)
     
@@ -207,10 +213,12 @@ def get_execution_queue() -> TaskQueue:
 
 
 def get_notification_queue() -> TaskQueue:
-    """获取通知队列"""
-    return TaskQueue(NOTIFICATION_QUEUE)
+    """获取通知队列（v2 可靠队列）"""
+    from .reliable_queue import reliable_queue
+    return reliable_queue(NOTIFICATION_QUEUE)
 
 
 def get_node_execute_queue() -> TaskQueue:
-    """获取节点执行队列（中心投递，worker 消费并 POST 到各节点）"""
-    return TaskQueue(NODE_EXECUTE_QUEUE)
+    """获取节点执行队列（中心投递，worker 消费并 POST 到各节点；v2 可靠队列）"""
+    from .reliable_queue import reliable_queue
+    return reliable_queue(NODE_EXECUTE_QUEUE)
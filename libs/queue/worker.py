@@ -3,11 +3,18 @@ Task Worker - 任务消费者
 
 后台 Worker 进程，从队列消费任务并执行
 支持优雅关闭和重试机制
+
+- TaskWorker: 单线程逐个处理
+- ConcurrentTaskWorker: 每进程 N 个工作线程并发处理，支持分组并发上限、同账户顺序、停机排空与指标
 """
 
 import signal
+import threading
 import time
-from typing import Callable, Optional, Dict, Any
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Dict, Any, FrozenSet, Iterable, List, Tuple
 from abc import ABC, abstractmethod
 
 from libs.core import get_logger
@@ -177,6 +184,364 @@ class TaskWorker:
             raise
 
 
+def account_order_keys(message: TaskMessage) -> FrozenSet[str]:
+    """默认顺序键：消息关联账户 + payload.tasks 中的全部账户（同一账户的任务按领取顺序串行执行）"""
+    keys = set()
+    if message.account_id is not None:
+        keys.add(f"account:{message.account_id}")
+    payload = message.payload or {}
+    if payload.get("account_id") is not None:
+        keys.add(f"account:{payload['account_id']}")
+    for task in payload.get("tasks") or []:
+        if isinstance(task, dict) and task.get("account_id") is not None:
+            keys.add(f"account:{task['account_id']}")
+    return frozenset(keys)
+
+
+def _queue_lag(message: TaskMessage) -> Optional[float]:
+    """入队到被领取的间隔（秒）；created_at 无法解析时返回 None"""
+    try:
+        return max(0.0, (datetime.now() - datetime.fromisoformat(message.created_at)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _summary(values: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class WorkerMetrics:
+    """Worker 指标（线程安全）：排队延迟、处理耗时取最近 window 个样本，计数为累计值"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._lag: deque = deque(maxlen=window)
+        self._latency: deque = deque(maxlen=window)
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead = 0
+
+    def record_claim(self, message: TaskMessage) -> None:
+        lag = _queue_lag(message)
+        with self._lock:
+            self.claimed += 1
+            if lag is not None:
+                self._lag.append(lag)
+
+    def record_done(self, elapsed: float, failed: bool = False, requeued: bool = False) -> None:
+        with self._lock:
+            self._latency.append(elapsed)
+            if not failed:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+                if requeued:
+                    self.retried += 1
+                else:
+                    self.dead += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "claimed": self.claimed,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "retried": self.retried,
+                "dead": self.dead,
+                "queue_lag": _summary(self._lag),
+                "latency": _summary(self._latency),
+            }
+
+
+# 并发 Worker 单次领取最长等待（秒）
+_MAX_FETCH_WAIT = 5
+
+# 待执行项：(消息, 顺序键, 分组键)
+_Item = Tuple[TaskMessage, FrozenSet[str], Optional[str]]
+
+
+class ConcurrentTaskWorker(TaskWorker):
+    """
+    并发任务消费者
+
+    - 主线程批量领取（最多预取 prefetch 个），工作线程池并发执行 handler
+    - group_key(message) 相同的任务同时最多执行 group_limit 个（如按执行节点限流，避免一个慢节点占满线程）
+    - order_keys(message) 有交集的任务（默认：同一账户）按领取顺序串行执行
+    - SIGTERM / SIGINT：停止领取，等待已领取任务完成（最多 drain_timeout 秒），
+      仍未开始的任务通过 queue.release 归还（ReliableTaskQueue）
+    - 队列支持 extend 时，定期为已领取的任务续约，避免排队中的预取任务被回收重投
+
+    使用方式：
+        worker = ConcurrentTaskWorker(
+            queue=get_node_execute_queue(),
+            handler=FunctionHandler(process_task),
+            concurrency=8,
+            group_key=lambda m: m.payload.get("node_id"),
+            group_limit=2,
+        )
+        worker.run()
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        handler: TaskHandler,
+        concurrency: int = 4,
+        poll_timeout: int = 5,
+        prefetch: Optional[int] = None,
+        group_key: Optional[Callable[[TaskMessage], Optional[str]]] = None,
+        group_limit: int = 0,
+        order_keys: Callable[[TaskMessage], FrozenSet[str]] = account_order_keys,
+        drain_timeout: float = 30.0,
+        metrics_interval: float = 60.0,
+    ):
+        """
+        Args:
+            queue: 任务队列（TaskQueue 或 ReliableTaskQueue）
+            handler: 任务处理器（须线程安全）
+            concurrency: 工作线程数
+            poll_timeout: 领取等待超时（秒）
+            prefetch: 最多持有（执行中 + 排队）的任务数，默认 2 × concurrency
+            group_key: 分组函数，返回 None 表示不受分组上限约束
+            group_limit: 同一分组同时执行上限（0 = 不限制）
+            order_keys: 顺序键函数，键有交集的任务串行执行
+            drain_timeout: 停机排空最长等待（秒）
+            metrics_interval: 指标日志间隔（秒，0 = 不输出）
+        """
+        super().__init__(queue, handler, poll_timeout=poll_timeout)
+        self.concurrency = max(1, concurrency)
+        self.prefetch = max(self.concurrency, prefetch or self.concurrency * 2)
+        self.group_key = group_key
+        self.group_limit = group_limit
+        self.order_keys = order_keys
+        self.drain_timeout = drain_timeout
+        self.metrics_interval = metrics_interval
+        self.metrics = WorkerMetrics()
+
+        self._cond = threading.Condition()
+        self._pending: List[_Item] = []
+        self._inflight: Dict[str, _Item] = {}
+        self._active_keys: set = set()
+        self._group_inflight: Counter = Counter()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._last_extend = time.monotonic()
+        self._last_metrics = time.monotonic()
+
+    # ---------- 主循环 ----------
+
+    def run(self) -> None:
+        """启动 Worker（阻塞，收到停止信号后排空再返回）"""
+        self._setup_signals()
+        self.start()
+        logger.info(
+            "concurrent worker started",
+            queue=self.queue.name,
+            handler=type(self.handler).__name__,
+            concurrency=self.concurrency,
+            prefetch=self.prefetch,
+            group_limit=self.group_limit,
+        )
+        while self._running and not self._shutdown_requested:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("worker error", error=str(e))
+                time.sleep(1)
+        self.drain()
+        logger.info("concurrent worker stopped", queue=self.queue.name, **self.stats())
+
+    def start(self) -> None:
+        """创建工作线程池（run 会自动调用；测试中可配合 poll / drain 单步驱动）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix=f"worker-{self.queue.name}"
+            )
+        self._running = True
+
+    def poll(self) -> int:
+        """领取一批任务交给调度（持有数已满时等待空位），返回领取数"""
+        with self._cond:
+            room = self.prefetch - len(self._pending) - len(self._inflight)
+            if room <= 0:
+                self._cond.wait(timeout=1.0)
+        claimed = self.submit(self._fetch(room)) if room > 0 else 0
+        self._housekeeping()
+        return claimed
+
+    def _fetch(self, count: int) -> List[TaskMessage]:
+        # 单次等待不超过 _MAX_FETCH_WAIT 秒，停止信号后尽快进入排空
+        timeout = min(self.poll_timeout, _MAX_FETCH_WAIT) if self.poll_timeout else _MAX_FETCH_WAIT
+        if hasattr(self.queue, "pop_many"):
+            return self.queue.pop_many(count, timeout=timeout)
+        message = self.queue.pop(timeout=timeout)
+        return [message] if message is not None else []
+
+    def submit(self, messages: Iterable[TaskMessage]) -> int:
+        """把已领取的任务加入调度（按领取顺序）"""
+        items = []
+        for message in messages:
+            self.metrics.record_claim(message)
+            try:
+                keys = frozenset(self.order_keys(message)) if self.order_keys else frozenset()
+                group = self.group_key(message) if self.group_key else None
+            except Exception as e:
+                logger.warning("task key extraction failed", task_id=message.task_id, error=str(e))
+                keys, group = frozenset(), None
+            items.append((message, keys, group))
+        if items:
+            with self._cond:
+                self._pending.extend(items)
+                self._schedule()
+        return len(items)
+
+    # ---------- 调度 ----------
+
+    def _schedule(self) -> None:
+        """按领取顺序启动可执行的任务（调用方持有 _cond）"""
+        blocked = set(self._active_keys)
+        remaining: List[_Item] = []
+        for item in self._pending:
+            _, keys, group = item
+            runnable = (
+                len(self._inflight) < self.concurrency
+                and not (keys & blocked)
+                and not (group is not None and self.group_limit > 0
+                         and self._group_inflight[group] >= self.group_limit)
+            )
+            if not runnable:
+                # 排在后面的同键任务不能越过它
+                blocked |= keys
+                remaining.append(item)
+                continue
+            self._start(item)
+            blocked |= keys
+        self._pending = remaining
+
+    def _start(self, item: _Item) -> None:
+        message, keys, group = item
+        self._inflight[message.task_id] = item
+        self._active_keys |= keys
+        if group is not None:
+            self._group_inflight[group] += 1
+        self._executor.submit(self._execute, item)
+
+    def _execute(self, item: _Item) -> None:
+        message, keys, group = item
+        start_time = time.monotonic()
+        error = None
+        try:
+            self.handler.handle(message)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        elapsed = time.monotonic() - start_time
+
+        requeued = False
+        try:
+            if error is None:
+                self.queue.ack(message.task_id)
+            else:
+                requeued = self.queue.nack(message, error=error)
+        except Exception as e:
+            logger.error("task ack/nack failed", task_id=message.task_id, error=str(e))
+        self.metrics.record_done(elapsed, failed=error is not None, requeued=requeued)
+
+        if error is None:
+            logger.info("task completed", task_id=message.task_id, group=group,
+                        elapsed_ms=round(elapsed * 1000, 2))
+        else:
+            logger.error("task failed", task_id=message.task_id, group=group, error=error,
+                         requeued=requeued, elapsed_ms=round(elapsed * 1000, 2))
+
+        with self._cond:
+            self._inflight.pop(message.task_id, None)
+            self._active_keys -= keys
+            if group is not None:
+                self._group_inflight[group] -= 1
+                if self._group_inflight[group] <= 0:
+                    del self._group_inflight[group]
+            self._schedule()
+            self._cond.notify_all()
+
+    # ---------- 续约 / 指标 ----------
+
+    def _housekeeping(self) -> None:
+        now = time.monotonic()
+        lease = getattr(self.queue, "lease_seconds", None)
+        if lease and hasattr(self.queue, "extend") and now - self._last_extend >= lease / 3:
+            self._last_extend = now
+            with self._cond:
+                task_ids = list(self._inflight) + [item[0].task_id for item in self._pending]
+            for task_id in task_ids:
+                try:
+                    self.queue.extend(task_id)
+                except Exception as e:
+                    logger.warning("lease extend failed", task_id=task_id, error=str(e))
+                    break
+        if self.metrics_interval and now - self._last_metrics >= self.metrics_interval:
+            self._last_metrics = now
+            logger.info("worker metrics", queue=self.queue.name, **self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            state = {
+                "inflight": len(self._inflight),
+                "buffered": len(self._pending),
+                "groups": dict(self._group_inflight),
+            }
+        state.update(self.metrics.snapshot())
+        return state
+
+    # ---------- 停机 ----------
+
+    def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        停止领取后排空：等待执行中与已领取的任务完成，超时后归还未开始的任务
+
+        Returns:
+            超时时仍在执行的任务数（由租约到期后重投兜底）
+        """
+        timeout = self.drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        logger.info("worker draining", queue=self.queue.name,
+                    inflight=len(self._inflight), buffered=len(self._pending))
+        with self._cond:
+            while self._inflight or self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=min(remaining, 1.0))
+            leftover = [item[0] for item in self._pending]
+            self._pending = []
+            still_running = len(self._inflight)
+
+        if leftover:
+            try:
+                if hasattr(self.queue, "release"):
+                    self.queue.release(leftover)
+                else:
+                    for message in leftover:
+                        self.queue.nack(message, error="worker shutdown")
+            except Exception as e:
+                logger.error("release on shutdown failed", count=len(leftover), error=str(e))
+        if still_running:
+            logger.warning("drain timeout, tasks still running", queue=self.queue.name, count=still_running)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._running = False
+        return still_running
+
+
 class FunctionHandler(TaskHandler):
     """
     函数处理器（简化版）
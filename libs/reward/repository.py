@@ -43,6 +43,12 @@ class RewardRepository:
         self.db.flush()
         return r
 
+    def create_rewards(self, rewards: List[UserReward]) -> List[UserReward]:
+        """批量写入奖励（一次 flush，写入后可取 id）"""
+        self.db.add_all(rewards)
+        self.db.flush()
+        return rewards
+
     def list_rewards(
         self,
         user_id: int,
@@ -63,6 +69,11 @@ class RewardRepository:
         self.db.flush()
         return log
 
+    def create_reward_logs(self, logs: List[RewardLog]) -> List[RewardLog]:
+        self.db.add_all(logs)
+        self.db.flush()
+        return logs
+
     def list_reward_logs(
         self,
         user_id: int,
@@ -10,22 +10,31 @@ Reward Service - 奖励分销逻辑
   - 网体 20% 是**硬预算**，直推+级差+平级 合计不超过 network_amount
   - 分配优先级：直推 > 级差 > 平级
   - 预算用完即停，不超发
+
+批量结算（distribute_pools）：
+  - 来源用户、邀请链上全部祖先、根账户、租户各一次 IN 查询，邀请人自持一次 GROUP BY 查询
+  - LevelConfig 按 service 实例缓存
+  - 奖励与流水批量写入；用户余额按利润池、奖励顺序在内存中逐笔累加，流水余额链与逐条分销一致
+  - 租户累计字段每批更新一次
 """
 
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 from sqlalchemy.orm import Session
 
+from libs.core import get_logger
 from libs.member.models import User
 from libs.member.repository import MemberRepository
-from libs.member.level_service import LevelService
 from libs.member.models import LevelConfig
 from libs.tenant.models import Tenant
 from libs.tenant.repository import TenantRepository
 from .models import ProfitPool, UserReward, RewardLog
 from .repository import RewardRepository
 
+log = get_logger("reward")
+
 TECH_RATE = Decimal("0.10")
 NETWORK_RATE = Decimal("0.20")
 DIRECT_RATE = Decimal("0.25")
@@ -33,84 +42,188 @@ PEER_RATE = Decimal("0.10")
 SELF_HOLD_MIN = Decimal("1000")
 
 
+def _path_ids(user: User) -> List[int]:
+    """inviter_path（/1/2/3/）→ 祖先 id 列表，根在前"""
+    if not user.inviter_path:
+        return []
+    return [int(x) for x in user.inviter_path.strip().split("/") if x.strip()]
+
+
+@dataclass
+class _PoolPlan:
+    """单条利润池的分配结果（尚未写库）"""
+    pool: ProfitPool
+    tenant_id: int
+    rewards: List[UserReward] = field(default_factory=list)
+    tech_amount: Decimal = Decimal("0")
+    network_amount: Decimal = Decimal("0")
+    platform_amount: Decimal = Decimal("0")
+    direct_distributed: Decimal = Decimal("0")
+    diff_distributed: Decimal = Decimal("0")
+    peer_distributed: Decimal = Decimal("0")
+
+    @property
+    def network_undistributed(self) -> Decimal:
+        return self.network_amount - self.direct_distributed - self.diff_distributed - self.peer_distributed
+
+
+@dataclass
+class _Batch:
+    """一批利润池分销所需的预加载数据"""
+    sources: Dict[int, User]
+    users: Dict[int, User]
+    tenants: Dict[int, Tenant]
+    root_user_ids: Dict[int, int]
+    self_holds: Dict[int, Decimal]
+    level_configs: Dict[int, LevelConfig]
+
+
 class RewardService:
     def __init__(self, db: Session):
         self.db = db
         self.repo = RewardRepository(db)
         self.member_repo = MemberRepository(db)
-        self.level_service = LevelService(db)
         self.tenant_repo = TenantRepository(db)
+        self._level_configs: Optional[Dict[int, LevelConfig]] = None
 
     # ------------------------------------------------------------------
     # 内部工具
     # ------------------------------------------------------------------
-    def _get_root_user_id(self, tenant_id: int) -> Optional[int]:
-        """获取租户的根账户 user_id"""
-        tenant = self.tenant_repo.get_by_id(tenant_id)
-        if tenant and tenant.root_user_id:
-            return tenant.root_user_id
-        # fallback: 查 is_root=1
-        root = self.db.query(User).filter(
-            User.tenant_id == tenant_id, User.is_root == 1
-        ).first()
-        return root.id if root else None
-
-    def _create_reward_with_log(
-        self,
+    def _get_level_configs(self) -> Dict[int, LevelConfig]:
+        if self._level_configs is None:
+            self._level_configs = {c.level: c for c in self.db.query(LevelConfig).all()}
+        return self._level_configs
+
+    def _get_root_user_ids(self, tenant_ids: Set[int], tenants: Dict[int, Tenant]) -> Dict[int, int]:
+        """批量获取租户根账户 user_id：优先 tenant.root_user_id，否则查 is_root=1"""
+        result = {tid: t.root_user_id for tid, t in tenants.items() if t.root_user_id}
+        missing = tenant_ids - set(result)
+        if missing:
+            roots = self.db.query(User.tenant_id, User.id).filter(
+                User.tenant_id.in_(missing), User.is_root == 1
+            ).all()
+            for tid, uid in roots:
+                result.setdefault(tid, uid)
+        return result
+
+    def _load_batch(self, pools: List[ProfitPool]) -> _Batch:
+        """预加载：来源用户 → 租户/根账户 → 祖先/邀请人/根账户 → 邀请人自持 → LevelConfig"""
+        sources = self.member_repo.get_users_by_ids(p.user_id for p in pools)
+        tenant_ids = {u.tenant_id for u in sources.values()}
+        tenants = self.tenant_repo.get_by_ids(tenant_ids)
+        root_user_ids = self._get_root_user_ids(tenant_ids, tenants)
+
+        wanted = set(root_user_ids.values())
+        inviter_ids = set()
+        has_path = False
+        for u in sources.values():
+            if u.inviter_id:
+                inviter_ids.add(u.inviter_id)
+            try:
+                path = _path_ids(u)
+            except ValueError:
+                continue  # 由 _plan_pool 报错
+            wanted.update(path)
+            has_path = has_path or bool(path)
+        wanted |= inviter_ids
+
+        users = dict(sources)
+        users.update(self.member_repo.get_users_by_ids(wanted - set(users)))
+        self_holds = self.member_repo.futures_balance_by_user(i for i in inviter_ids if i in users)
+        return _Batch(
+            sources=sources,
+            users=users,
+            tenants=tenants,
+            root_user_ids=root_user_ids,
+            self_holds=self_holds,
+            level_configs=self._get_level_configs() if has_path else {},
+        )
+
+    @staticmethod
+    def _new_reward(
+        pool: ProfitPool,
         user_id: int,
-        source_user_id: int,
-        profit_pool_id: int,
         reward_type: str,
         amount: Decimal,
         rate: Decimal,
-        settle_batch: str,
         remark: str,
         from_level: int = None,
         to_level: int = None,
     ) -> UserReward:
-        """统一入口：写 UserReward + RewardLog + 更新用户余额"""
-        r = UserReward(
+        return UserReward(
             user_id=user_id,
-            source_user_id=source_user_id,
-            profit_pool_id=profit_pool_id,
+            source_user_id=pool.user_id,
+            profit_pool_id=pool.id,
             reward_type=reward_type,
             amount=amount,
             rate=rate,
             from_level=from_level,
             to_level=to_level,
-            settle_batch=settle_batch,
+            settle_batch=pool.settle_batch,
             remark=remark,
         )
-        self.repo.create_reward(r)
-
-        before_bal = Decimal("0")
-        after_bal = Decimal("0")
-        user = self.member_repo.get_user_by_id(user_id)
-        if user:
-            before_bal = Decimal(str(user.reward_usdt or 0))
-            user.reward_usdt = before_bal + amount
-            user.total_reward = Decimal(str(user.total_reward or 0)) + amount
-            self.member_repo.update_user(user)
-            after_bal = user.reward_usdt
-
-        self.repo.create_reward_log(RewardLog(
-            user_id=user_id,
-            change_type="reward_in",
-            ref_type="user_reward",
-            ref_id=r.id,
-            amount=amount,
-            before_balance=before_bal,
-            after_balance=after_bal,
-            remark=remark,
-        ))
-        return r
+
+    def _write_rewards(self, rewards: List[UserReward], users: Dict[int, User]) -> None:
+        """统一入口：批量写 UserReward + RewardLog，按奖励顺序累加用户余额"""
+        if not rewards:
+            return
+        self.repo.create_rewards(rewards)
+
+        logs = []
+        for r in rewards:
+            before_bal = Decimal("0")
+            after_bal = Decimal("0")
+            user = users.get(r.user_id)
+            if user:
+                before_bal = Decimal(str(user.reward_usdt or 0))
+                user.reward_usdt = before_bal + r.amount
+                user.total_reward = Decimal(str(user.total_reward or 0)) + r.amount
+                after_bal = user.reward_usdt
+            logs.append(RewardLog(
+                user_id=r.user_id,
+                change_type="reward_in",
+                ref_type="user_reward",
+                ref_id=r.id,
+                amount=r.amount,
+                before_balance=before_bal,
+                after_balance=after_bal,
+                remark=r.remark,
+            ))
+        self.repo.create_reward_logs(logs)
+
+    def _apply_plans(self, plans: List[_PoolPlan], batch: _Batch) -> None:
+        """写奖励与流水、更新利润池，租户累计字段每个租户只更新一次"""
+        self._write_rewards([r for plan in plans for r in plan.rewards], batch.users)
+
+        tenant_totals: Dict[int, Tuple[Decimal, Decimal]] = {}
+        for plan in plans:
+            pool = plan.pool
+            pool.tech_amount = plan.tech_amount
+            pool.network_amount = plan.network_amount
+            pool.platform_amount = plan.platform_amount
+            pool.direct_distributed = plan.direct_distributed
+            pool.diff_distributed = plan.diff_distributed
+            pool.peer_distributed = plan.peer_distributed
+            pool.network_undistributed = plan.network_undistributed
+            pool.status = 2
+            self.db.merge(pool)
+
+            tech, undist = tenant_totals.get(plan.tenant_id, (Decimal("0"), Decimal("0")))
+            tenant_totals[plan.tenant_id] = (tech + plan.tech_amount, undist + plan.network_undistributed)
+
+        for tenant_id, (tech, undist) in tenant_totals.items():
+            tenant = batch.tenants.get(tenant_id)
+            if tenant:
+                tenant.tech_reward_total = Decimal(str(tenant.tech_reward_total or 0)) + tech
+                tenant.undist_reward_total = Decimal(str(tenant.undist_reward_total or 0)) + undist
+        self.db.flush()
 
     # ------------------------------------------------------------------
-    # 主方法
+    # 分配规则
     # ------------------------------------------------------------------
-    def distribute_for_pool(self, pool: ProfitPool) -> List[UserReward]:
+    def _plan_pool(self, pool: ProfitPool, batch: _Batch) -> _PoolPlan:
         """
-        对一条利润池记录进行全额分销。
+        对一条利润池计算全额分销（只读预加载数据，不写库）。
 
         资金分配（每一分钱都有 UserReward + RewardLog）：
 
@@ -131,34 +244,30 @@ class RewardService:
         platform_amount = pool_amount - tech_amount - network_amount  # 固定 70%
 
         # 获取产生利润的用户信息
-        source_user = self.member_repo.get_user_by_id(pool.user_id)
+        source_user = batch.sources.get(pool.user_id)
         if not source_user:
             raise ValueError(f"利润池 user_id={pool.user_id} 用户不存在")
 
         tenant_id = source_user.tenant_id
-        root_user_id = self._get_root_user_id(tenant_id)
+        root_user_id = batch.root_user_ids.get(tenant_id)
         if not root_user_id:
             raise ValueError(f"租户 {tenant_id} 无根账户，无法分配")
 
-        rewards: List[UserReward] = []
+        path_ids = _path_ids(source_user)
+        plan = _PoolPlan(
+            pool=pool,
+            tenant_id=tenant_id,
+            tech_amount=tech_amount,
+            network_amount=network_amount,
+            platform_amount=platform_amount,
+        )
+        rewards = plan.rewards
 
         # ==================== 1. 技术团队 10% → 租户根账户 ================
-        rewards.append(self._create_reward_with_log(
-            user_id=root_user_id,
-            source_user_id=pool.user_id,
-            profit_pool_id=pool.id,
-            reward_type="tech_team",
-            amount=tech_amount,
-            rate=TECH_RATE,
-            settle_batch=pool.settle_batch,
-            remark="技术团队 10%",
-        ))
+        rewards.append(self._new_reward(pool, root_user_id, "tech_team", tech_amount, TECH_RATE, "技术团队 10%"))
 
         # ==================== 2. 网体 20%（预算制）========================
         budget = network_amount  # 剩余预算，分完即停
-        direct_distributed = Decimal("0")
-        diff_distributed = Decimal("0")
-        peer_distributed = Decimal("0")
 
         # --- 2a. 直推奖（优先级 1）---
         direct_wanted = network_amount * DIRECT_RATE
@@ -166,20 +275,11 @@ class RewardService:
         direct_ok = False
 
         if inviter_id and budget > 0:
-            inviter = self.member_repo.get_user_by_id(inviter_id)
-            if inviter and self.level_service.get_self_hold(inviter_id) >= SELF_HOLD_MIN:
+            inviter = batch.users.get(inviter_id)
+            if inviter and batch.self_holds.get(inviter_id, Decimal("0")) >= SELF_HOLD_MIN:
                 actual_direct = min(direct_wanted, budget)
-                rewards.append(self._create_reward_with_log(
-                    user_id=inviter_id,
-                    source_user_id=pool.user_id,
-                    profit_pool_id=pool.id,
-                    reward_type="direct",
-                    amount=actual_direct,
-                    rate=DIRECT_RATE,
-                    settle_batch=pool.settle_batch,
-                    remark="直推奖励",
-                ))
-                direct_distributed = actual_direct
+                rewards.append(self._new_reward(pool, inviter_id, "direct", actual_direct, DIRECT_RATE, "直推奖励"))
+                plan.direct_distributed = actual_direct
                 budget -= actual_direct
                 direct_ok = True
 
@@ -188,59 +288,39 @@ class RewardService:
             reason = "无邀请人" if not inviter_id else "邀请人自持不足"
             actual_direct_undist = min(direct_wanted, budget)
             if actual_direct_undist > 0:
-                rewards.append(self._create_reward_with_log(
-                    user_id=root_user_id,
-                    source_user_id=pool.user_id,
-                    profit_pool_id=pool.id,
-                    reward_type="direct_undist",
-                    amount=actual_direct_undist,
-                    rate=DIRECT_RATE,
-                    settle_batch=pool.settle_batch,
-                    remark="直推未发放（" + reason + "）→ 根账户",
+                rewards.append(self._new_reward(
+                    pool, root_user_id, "direct_undist", actual_direct_undist, DIRECT_RATE,
+                    "直推未发放（" + reason + "）→ 根账户",
                 ))
                 budget -= actual_direct_undist
 
+        source_level = source_user.member_level
+        ancestors = [
+            anc for anc in (batch.users.get(anc_id) for anc_id in reversed(path_ids))
+            if anc and anc.is_market_node
+        ]
+
         # --- 2b. 级差奖（优先级 2）---
         if source_user.inviter_path and budget > 0:
-            path_ids = [
-                int(x)
-                for x in source_user.inviter_path.strip().split("/")
-                if x.strip()
-            ]
-            level_configs = {
-                c.level: c for c in self.db.query(LevelConfig).all()
-            }
             last_rate = Decimal("0")
-            source_level = source_user.member_level
-
-            for anc_id in reversed(path_ids):
+            for anc in ancestors:
                 if budget <= 0:
                     break
-                anc = self.member_repo.get_user_by_id(anc_id)
-                if not anc or not anc.is_market_node:
-                    continue
-
-                cfg = level_configs.get(anc.member_level)
+                cfg = batch.level_configs.get(anc.member_level)
                 current_rate = Decimal(str(cfg.diff_rate)) if cfg else Decimal("0")
                 diff = current_rate - last_rate
                 if diff > 0:
                     wanted = network_amount * diff
                     actual = min(wanted, budget)
-                    rewards.append(self._create_reward_with_log(
-                        user_id=anc_id,
-                        source_user_id=pool.user_id,
-                        profit_pool_id=pool.id,
-                        reward_type="level_diff",
-                        amount=actual,
-                        rate=diff,
+                    rewards.append(self._new_reward(
+                        pool, anc.id, "level_diff", actual, diff,
+                        "级差奖 S" + str(source_level) + "->S" + str(anc.member_level)
+                        + " diff=" + str(diff)
+                        + (" (预算封顶)" if actual < wanted else ""),
                         from_level=source_level,
                         to_level=anc.member_level,
-                        settle_batch=pool.settle_batch,
-                        remark="级差奖 S" + str(source_level) + "->S" + str(anc.member_level)
-                               + " diff=" + str(diff)
-                               + (" (预算封顶)" if actual < wanted else ""),
                     ))
-                    diff_distributed += actual
+                    plan.diff_distributed += actual
                     budget -= actual
                     last_rate = current_rate
 
@@ -249,31 +329,16 @@ class RewardService:
         peer_done = False
 
         if source_user.inviter_path and budget > 0:
-            path_ids = [
-                int(x)
-                for x in source_user.inviter_path.strip().split("/")
-                if x.strip()
-            ]
-            source_level = source_user.member_level
-            for anc_id in reversed(path_ids):
-                anc = self.member_repo.get_user_by_id(anc_id)
-                if not anc or not anc.is_market_node:
-                    continue
+            for anc in ancestors:
                 if anc.member_level == source_level:
                     actual_peer = min(peer_wanted, budget)
-                    rewards.append(self._create_reward_with_log(
-                        user_id=anc_id,
-                        source_user_id=pool.user_id,
-                        profit_pool_id=pool.id,
-                        reward_type="peer",
-                        amount=actual_peer,
-                        rate=PEER_RATE,
+                    rewards.append(self._new_reward(
+                        pool, anc.id, "peer", actual_peer, PEER_RATE,
+                        "平级奖" + (" (预算封顶)" if actual_peer < peer_wanted else ""),
                         from_level=source_level,
                         to_level=anc.member_level,
-                        settle_batch=pool.settle_batch,
-                        remark="平级奖" + (" (预算封顶)" if actual_peer < peer_wanted else ""),
                     ))
-                    peer_distributed = actual_peer
+                    plan.peer_distributed = actual_peer
                     budget -= actual_peer
                     peer_done = True
                     break
@@ -282,62 +347,64 @@ class RewardService:
             # 平级未发放 → 根账户
             actual_peer_undist = min(peer_wanted, budget)
             if actual_peer_undist > 0:
-                rewards.append(self._create_reward_with_log(
-                    user_id=root_user_id,
-                    source_user_id=pool.user_id,
-                    profit_pool_id=pool.id,
-                    reward_type="peer_undist",
-                    amount=actual_peer_undist,
-                    rate=PEER_RATE,
-                    settle_batch=pool.settle_batch,
-                    remark="平级未发放（无同级市场节点）→ 根账户",
+                rewards.append(self._new_reward(
+                    pool, root_user_id, "peer_undist", actual_peer_undist, PEER_RATE,
+                    "平级未发放（无同级市场节点）→ 根账户",
                 ))
                 budget -= actual_peer_undist
 
         # --- 2d. 网体剩余预算 → 根账户 ---
         if budget > 0:
-            rewards.append(self._create_reward_with_log(
-                user_id=root_user_id,
-                source_user_id=pool.user_id,
-                profit_pool_id=pool.id,
-                reward_type="network_undist",
-                amount=budget,
-                rate=Decimal("0"),
-                settle_batch=pool.settle_batch,
-                remark="网体剩余预算 → 根账户",
+            rewards.append(self._new_reward(
+                pool, root_user_id, "network_undist", budget, Decimal("0"), "网体剩余预算 → 根账户",
             ))
 
         # ==================== 3. 平台留存 70% → 租户根账户 ================
-        rewards.append(self._create_reward_with_log(
-            user_id=root_user_id,
-            source_user_id=pool.user_id,
-            profit_pool_id=pool.id,
-            reward_type="platform_retain",
-            amount=platform_amount,
-            rate=Decimal("1") - TECH_RATE - NETWORK_RATE,
-            settle_batch=pool.settle_batch,
-            remark="平台留存 70%",
+        rewards.append(self._new_reward(
+            pool, root_user_id, "platform_retain", platform_amount,
+            Decimal("1") - TECH_RATE - NETWORK_RATE, "平台留存 70%",
         ))
+        return plan
 
-        # ==================== 4. 更新 ProfitPool 追踪字段 =================
-        pool.tech_amount = tech_amount
-        pool.network_amount = network_amount
-        pool.platform_amount = platform_amount
-        pool.direct_distributed = direct_distributed
-        pool.diff_distributed = diff_distributed
-        pool.peer_distributed = peer_distributed
-        pool.network_undistributed = network_amount - direct_distributed - diff_distributed - peer_distributed
-
-        pool.status = 2
-        self.repo.update_profit_pool(pool)
-
-        # ==================== 5. 更新租户累计字段 =========================
-        tenant = self.tenant_repo.get_by_id(tenant_id)
-        if tenant:
-            tenant.tech_reward_total = Decimal(str(tenant.tech_reward_total or 0)) + tech_amount
-            undist_this_pool = network_amount - direct_distributed - diff_distributed - peer_distributed
-            tenant.undist_reward_total = Decimal(str(tenant.undist_reward_total or 0)) + undist_this_pool
-            self.db.merge(tenant)
-            self.db.flush()
-
-        return rewards
+    # ------------------------------------------------------------------
+    # 主方法
+    # ------------------------------------------------------------------
+    def distribute_for_pool(self, pool: ProfitPool) -> List[UserReward]:
+        """
+        对一条利润池记录进行全额分销（规则见 _plan_pool）。
+
+        用户 / 根账户不存在时抛 ValueError，且不写入任何奖励。
+        """
+        batch = self._load_batch([pool])
+        plan = self._plan_pool(pool, batch)
+        self._apply_plans([plan], batch)
+        return plan.rewards
+
+    def distribute_pools(self, pools: List[ProfitPool]) -> Dict[int, List[UserReward]]:
+        """
+        批量分销（按传入顺序，结果与逐条 distribute_for_pool 一致），返回 {pool_id: rewards}。
+
+        单条失败（用户 / 根账户不存在等）标记 status=3 待重试，不影响其他利润池。
+        """
+        if not pools:
+            return {}
+        batch = self._load_batch(pools)
+        plans: List[_PoolPlan] = []
+        for pool in pools:
+            try:
+                plans.append(self._plan_pool(pool, batch))
+            except ValueError as e:
+                log.warning("distribute pool failed", pool_id=pool.id, user_id=pool.user_id, error=str(e))
+                pool.status = 3  # 3=分发失败待重试
+                pool.retry_count = (pool.retry_count or 0) + 1
+                pool.last_error = str(e)[:500]
+                self.db.merge(pool)
+        self._apply_plans(plans, batch)
+        log.info("profit pools distributed", pools=len(pools), settled=len(plans),
+                 rewards=sum(len(p.rewards) for p in plans))
+        return {plan.pool.id: plan.rewards for plan in plans}
+
+    def settle_pending(self, limit: int = 100, max_retry: int = 10) -> Dict[int, List[UserReward]]:
+        """结算一批待结算（status=1）与失败待重试（status=3）的利润池"""
+        pools = self.repo.get_pending_pools(limit) + self.repo.get_failed_pools(limit, max_retry)
+        return self.distribute_pools(pools)
@@ -12,6 +12,7 @@ from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime
 import httpx
 
+from libs.core.http_client import get_async_http_client
 from libs.strategies import get_strategy, STRATEGY_REGISTRY
 from libs.contracts import StrategyOutput
 
@@ -209,7 +210,7 @@ class StrategyRunner:
         
         # 确保 HTTP 客户端存在
         if not self._http_client:
-            self._http_client = httpx.AsyncClient()
+            self._http_client = get_async_http_client("strategy-runner")
         
         return await self._run_task(task)
     
@@ -236,7 +237,7 @@ class StrategyRunner:
             return
         
         self._running = True
-        self._http_client = httpx.AsyncClient()
+        self._http_client = get_async_http_client("strategy-runner")
         
         logger.info(f"StrategyRunner started with {len(self._tasks)} tasks")
         
@@ -246,9 +247,8 @@ class StrategyRunner:
         """停止运行器"""
         self._running = False
         
-        if self._http_client:
-            await self._http_client.aclose()
-            self._http_client = None
+        # 共享连接池由服务 shutdown 时 aclose_http_clients() 统一关闭
+        self._http_client = None
         
         logger.info("StrategyRunner stopped")
     
@@ -5,7 +5,7 @@ IronBull Strategies Library
 从 old3 迁移的所有策略。
 """
 
-from .base import StrategyBase
+from .base import StrategyBase, BarContext
 
 # 基础策略
 from .ma_cross import MACrossStrategy
@@ -56,6 +56,7 @@ from .market_regime import MarketRegimeStrategy
 
 __all__ = [
     "StrategyBase",
+    "BarContext",
     # 基础策略
     "MACrossStrategy",
     "MACDStrategy",
@@ -5,18 +5,49 @@ Strategy Base Class
 """
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 from libs.contracts import StrategyOutput
 
 
+@dataclass
+class BarContext:
+    """
+    增量协议的逐根上下文（由回测引擎构造并传给 on_bar）
+    
+    warmup=True 表示预热阶段：策略只需更新内部指标状态，返回值会被忽略。
+    """
+    symbol: str
+    timeframe: str
+    index: int
+    positions: Optional[Dict] = None
+    warmup: bool = False
+
+
 class StrategyBase(ABC):
     """
     策略基类
     
     所有策略必须继承此类并实现 analyze 方法。
+    
+    增量协议（可选）：
+    - 设置 supports_incremental = True 并实现 on_start / on_bar
+    - 回测引擎逐根推送 K 线，策略内部用流式指标（libs.indicators.streaming）O(1) 更新，
+      不再每根 K 线切片历史并从头重算
+    - 回测需显式 BacktestEngine.run(..., incremental=True)；未实现或未开启时走 analyze 切片路径
+    - 增量路径指标连续累积（等价于全部历史），与切片路径（最近 lookback+1 根）的信号可能不同
+    - 目前实现增量协议的策略：ema_cross；smc_fibo_flex 等依赖摆动点 / 结构识别的策略仍走 analyze
+    
+    列式 K 线（可选）：
+    - 设置 accepts_candle_frame = True 表示 analyze 可接收 CandleFrame 视图
+      （按列读取 close/high/low，见 libs.indicators.candle_frame.column_list）
+    - 回测引擎对这类策略传零拷贝切片视图，其余策略仍传 list 切片
     """
     
+    supports_incremental: bool = False
+    accepts_candle_frame: bool = False
+    
     def __init__(self, config: dict = None):
         self.config = config or {}
         self.code = "base"
@@ -44,3 +75,22 @@ class StrategyBase(ABC):
             StrategyOutput 或 None（无信号时）
         """
         pass
+    
+    def on_start(self, symbol: str, timeframe: str) -> None:
+        """
+        增量模式开始前调用，用于重置流式指标状态（默认无操作）
+        """
+        pass
+    
+    def on_bar(self, candle: Dict, ctx: BarContext) -> Optional[StrategyOutput]:
+        """
+        增量分析：推入一根已收盘 K 线，返回 StrategyOutput 或 None
+        
+        Args:
+            candle: 单根K线 {'open', 'high', 'low', 'close', 'volume', 'timestamp'}
+            ctx: 逐根上下文（交易对/周期/索引/持仓/是否预热）
+        
+        Returns:
+            StrategyOutput 或 None（无信号时）；默认无信号，引擎只对 supports_incremental 的策略调用
+        """
+        return None
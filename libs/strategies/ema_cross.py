@@ -8,8 +8,8 @@ EMA Cross Strategy
 from typing import Dict, List, Optional
 
 from libs.contracts import StrategyOutput
-from libs.indicators import ema, atr
-from .base import StrategyBase
+from libs.indicators import ema, atr, StreamingEMA, StreamingATR
+from .base import StrategyBase, BarContext
 
 
 class EMACrossStrategy(StrategyBase):
@@ -23,8 +23,15 @@ class EMACrossStrategy(StrategyBase):
     - fast_ema: 快线周期（默认 9）
     - slow_ema: 慢线周期（默认 21）
     - signal_ema: 信号线周期（默认 5，用于过滤）
+    
+    支持增量协议（on_bar），回测时 EMA/ATR 逐根 O(1) 更新。
+    增量路径的 EMA 从回测第 1 根起连续递推，信号等价于 analyze 收到全部历史；
+    回测引擎切片路径只给 analyze 最近 lookback+1 根（EMA 在窗口内重新起算），两者结果会有差异，
+    因此增量路径需显式 BacktestEngine.run(..., incremental=True) 开启，默认仍走切片路径。
     """
     
+    supports_incremental = True
+    
     def __init__(self, config: dict = None):
         super().__init__(config)
         self.code = "ema_cross"
@@ -65,6 +72,51 @@ class EMACrossStrategy(StrategyBase):
         if None in [fast, slow, fast_prev, slow_prev]:
             return None
         
+        return self._cross_signal(
+            symbol, current_price, fast, slow, signal, fast_prev, slow_prev, atr_val
+        )
+    
+    # ========== 增量协议 ==========
+    
+    def on_start(self, symbol: str, timeframe: str) -> None:
+        self._fast = StreamingEMA(self.fast_ema)
+        self._slow = StreamingEMA(self.slow_ema)
+        self._signal = StreamingEMA(self.signal_ema)
+        self._atr = StreamingATR(14)
+        self._bars = 0
+    
+    def on_bar(self, candle: Dict, ctx: BarContext) -> Optional[StrategyOutput]:
+        fast_prev = self._fast.value
+        slow_prev = self._slow.value
+        
+        current_price = candle["close"]
+        fast = self._fast.update(current_price)
+        slow = self._slow.update(current_price)
+        signal = self._signal.update(current_price)
+        atr_val = self._atr.update(candle)
+        self._bars += 1
+        
+        if ctx.warmup or self._bars < self.slow_ema + 2:
+            return None
+        if None in [fast, slow, fast_prev, slow_prev]:
+            return None
+        
+        return self._cross_signal(
+            ctx.symbol, current_price, fast, slow, signal, fast_prev, slow_prev, atr_val
+        )
+    
+    def _cross_signal(
+        self,
+        symbol: str,
+        current_price: float,
+        fast: float,
+        slow: float,
+        signal: Optional[float],
+        fast_prev: float,
+        slow_prev: float,
+        atr_val: float,
+    ) -> Optional[StrategyOutput]:
+        """根据当前/前一根 EMA 判断金叉死叉"""
         # 金叉：快线从下方穿过慢线
         if fast_prev <= slow_prev and fast > slow:
             # 信号线确认
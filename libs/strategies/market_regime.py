@@ -34,6 +34,7 @@ from dataclasses import dataclass
 from libs.contracts import StrategyOutput
 from libs.indicators import sma, ema, atr, rsi, macd
 from libs.indicators.bollinger import bollinger
+from libs.indicators.candle_frame import column_list
 from libs.indicators.volume import volume_ratio
 from .base import StrategyBase
 
@@ -205,13 +206,16 @@ class MarketRegimeStrategy(StrategyBase):
         minus_dm = []
         tr_list = []
         
+        highs = column_list(candles, "high")
+        lows = column_list(candles, "low")
+        closes = column_list(candles, "close")
+        
         for i in range(1, len(candles)):
-            high = candles[i]["high"]
-            low = candles[i]["low"]
-            close = candles[i]["close"]
-            prev_high = candles[i-1]["high"]
-            prev_low = candles[i-1]["low"]
-            prev_close = candles[i-1]["close"]
+            high = highs[i]
+            low = lows[i]
+            prev_high = highs[i-1]
+            prev_low = lows[i-1]
+            prev_close = closes[i-1]
             
             # True Range
             tr = max(
@@ -292,7 +296,7 @@ class MarketRegimeStrategy(StrategyBase):
         宽度 < 2%: 震荡/盘整（squeeze）
         宽度 > 4%: 趋势/波动
         """
-        closes = [c["close"] for c in candles]
+        closes = column_list(candles, "close")
         bb = bollinger(closes, self.bb_period, self.bb_std)
         if not bb:
             return None
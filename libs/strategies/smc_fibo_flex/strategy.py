@@ -46,6 +46,9 @@ class SMCFiboFlexStrategy(StrategyBase):
     # 列表切片 candles[:i+1] 仅复制指针，2000根仅~20ms，不是瓶颈
     requires_full_history = True
     
+    # 摆动点等工具按列读取 K 线，可直接接收 CandleFrame 零拷贝视图
+    accepts_candle_frame = True
+    
     def __init__(self, config: dict = None):
         super().__init__(config)
         self.code = "smc_fibo_flex"
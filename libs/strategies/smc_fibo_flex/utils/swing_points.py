@@ -7,6 +7,8 @@
 from typing import List, Dict, Tuple, Optional, Union
 from dataclasses import dataclass
 
+from libs.indicators.candle_frame import column_list
+
 
 @dataclass
 class SwingPoint:
@@ -74,14 +76,18 @@ def find_swing_points(
     swing_highs = []
     swing_lows = []
     
+    # 列一次性取出，窗口比较用 max/min 代替逐根 dict 访问
+    highs = column_list(candles, "high")
+    lows = column_list(candles, "low")
+    
     if realtime_mode:
         # 实时模式：只检查左侧
         for i in range(swing_value, len(candles)):
-            high = candles[i]["high"]
-            low = candles[i]["low"]
+            high = highs[i]
+            low = lows[i]
             
             # 检查是否是摆动高点
-            is_swing_high = all(high >= candles[j]["high"] for j in range(i - swing_value, i + 1))
+            is_swing_high = high >= max(highs[i - swing_value : i + 1])
             if is_swing_high:
                 swing_highs.append(SwingPoint(
                     index=i,
@@ -91,7 +97,7 @@ def find_swing_points(
                 ))
             
             # 检查是否是摆动低点
-            is_swing_low = all(low <= candles[j]["low"] for j in range(i - swing_value, i + 1))
+            is_swing_low = low <= min(lows[i - swing_value : i + 1])
             if is_swing_low:
                 swing_lows.append(SwingPoint(
                     index=i,
@@ -102,11 +108,11 @@ def find_swing_points(
     else:
         # 回测模式：检查左右两侧
         for i in range(swing_value, len(candles) - swing_value):
-            high = candles[i]["high"]
-            low = candles[i]["low"]
+            high = highs[i]
+            low = lows[i]
             
             # 检查是否是摆动高点
-            is_swing_high = all(high >= candles[j]["high"] for j in range(i - swing_value, i + swing_value + 1))
+            is_swing_high = high >= max(highs[i - swing_value : i + swing_value + 1])
             if is_swing_high:
                 swing_highs.append(SwingPoint(
                     index=i,
@@ -116,7 +122,7 @@ def find_swing_points(
                 ))
             
             # 检查是否是摆动低点
-            is_swing_low = all(low <= candles[j]["low"] for j in range(i - swing_value, i + swing_value + 1))
+            is_swing_low = low <= min(lows[i - swing_value : i + swing_value + 1])
             if is_swing_low:
                 swing_lows.append(SwingPoint(
                     index=i,
@@ -6,9 +6,7 @@ import time as _time
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 
-import httpx
-
-from libs.core import get_config, get_logger
+from libs.core import get_config, get_logger, get_http_client
 from libs.execution_node import ExecutionNodeRepository
 from libs.member import MemberRepository
 from datetime import datetime, timedelta
@@ -104,10 +102,10 @@ def sync_balance_from_nodes(
         if secret:
             node_headers["X-Center-Token"] = secret
         try:
-            with httpx.Client(timeout=timeout) as client:
-                resp = client.post(f"{base_url}/api/sync-balance", json=payload, headers=node_headers or None)
-                resp.raise_for_status()
-                data = resp.json()
+            client = get_http_client("execution-node")
+            resp = client.post(f"{base_url}/api/sync-balance", json=payload, headers=node_headers or None, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
         except Exception as e:
             log.warning("sync_balance failed", node_id=node.id, error=str(e))
             errors.append({"node_id": node.id, "error": str(e)})
@@ -227,10 +225,10 @@ def sync_positions_from_nodes(
         if secret:
             node_headers["X-Center-Token"] = secret
         try:
-            with httpx.Client(timeout=timeout) as client:
-                resp = client.post(f"{base_url}/api/sync-positions", json=payload, headers=node_headers or None)
-                resp.raise_for_status()
-                data = resp.json()
+            client = get_http_client("execution-node")
+            resp = client.post(f"{base_url}/api/sync-positions", json=payload, headers=node_headers or None, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
         except Exception as e:
             log.warning("sync_positions failed", node_id=node.id, error=str(e))
             errors.append({"node_id": node.id, "error": str(e)})
@@ -358,30 +356,31 @@ def sync_positions_from_nodes(
                         log.info("发送取消残留条件单请求",
                                  account_id=r["account_id"],
                                  symbols=list(closed_symbols))
-                        with httpx.Client(timeout=30) as cancel_client:
-                            cancel_resp = cancel_client.post(
-                                f"{base_url}/api/cancel-conditionals",
-                                json=cancel_payload,
-                                headers=node_headers or None,
-                            )
-                            if cancel_resp.status_code == 200:
-                                cancel_data = cancel_resp.json()
-                                for cr in cancel_data.get("results", []):
-                                    cancelled_n = cr.get("cancelled", 0)
-                                    if cancelled_n > 0:
-                                        log.info("自动取消残留条件单成功",
-                                                 account_id=r["account_id"],
-                                                 symbols=list(closed_symbols),
-                                                 cancelled=cancelled_n)
-                                    else:
-                                        log.debug("无残留条件单需取消",
-                                                  account_id=r["account_id"],
-                                                  symbols=list(closed_symbols))
-                            else:
-                                log.warning("取消条件单请求失败",
-                                            account_id=r["account_id"],
-                                            status=cancel_resp.status_code,
-                                            body=cancel_resp.text[:200])
+                        cancel_client = get_http_client("execution-node")
+                        cancel_resp = cancel_client.post(
+                            f"{base_url}/api/cancel-conditionals",
+                            json=cancel_payload,
+                            headers=node_headers or None,
+                            timeout=30,
+                        )
+                        if cancel_resp.status_code == 200:
+                            cancel_data = cancel_resp.json()
+                            for cr in cancel_data.get("results", []):
+                                cancelled_n = cr.get("cancelled", 0)
+                                if cancelled_n > 0:
+                                    log.info("自动取消残留条件单成功",
+                                             account_id=r["account_id"],
+                                             symbols=list(closed_symbols),
+                                             cancelled=cancelled_n)
+                                else:
+                                    log.debug("无残留条件单需取消",
+                                              account_id=r["account_id"],
+                                              symbols=list(closed_symbols))
+                        else:
+                            log.warning("取消条件单请求失败",
+                                        account_id=r["account_id"],
+                                        status=cancel_resp.status_code,
+                                        body=cancel_resp.text[:200])
                 except Exception as e:
                     log.warning("cancel conditionals failed",
                                 account_id=r.get("account_id"), error=str(e))
@@ -441,10 +440,10 @@ def sync_trades_from_nodes(
         if secret:
             node_headers["X-Center-Token"] = secret
         try:
-            with httpx.Client(timeout=timeout) as client:
-                resp = client.post(f"{base_url}/api/sync-trades", json=payload, headers=node_headers or None)
-                resp.raise_for_status()
-                data = resp.json()
+            client = get_http_client("execution-node")
+            resp = client.post(f"{base_url}/api/sync-trades", json=payload, headers=node_headers or None, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
         except Exception as e:
             log.warning("sync_trades failed", node_id=node.id, error=str(e))
             errors.append({"node_id": node.id, "error": str(e)})
@@ -468,15 +467,22 @@ def sync_trades_from_nodes(
             ledger_account_id = acct.ledger_account_id if acct else f"ACCT-{account_id}"
             current_balance = float(acct.balance) if acct else 0
 
-            for trade in r.get("trades") or []:
+            trades = r.get("trades") or []
+            # 去重：该账户本批成交一次 IN 查询
+            source_ids = {f"TRADE-{account_id}-{t.get('trade_id') or ''}" for t in trades}
+            seen = set()
+            if source_ids:
+                seen = {
+                    row[0] for row in session.query(Transaction.source_id).filter(
+                        Transaction.source_id.in_(source_ids),
+                        Transaction.tenant_id == tenant_id,
+                    ).all()
+                }
+            new_txns = []
+            for trade in trades:
                 trade_id = trade.get("trade_id") or ""
                 source_id = f"TRADE-{account_id}-{trade_id}"
-                # 去重：检查是否已存在
-                existing = session.query(Transaction).filter(
-                    Transaction.source_id == source_id,
-                    Transaction.tenant_id == tenant_id,
-                ).first()
-                if existing:
+                if source_id in seen:
                     total_skip += 1
                     continue
                 try:
@@ -507,12 +513,14 @@ def sync_trades_from_nodes(
                         transaction_at=tx_at,
                         remark=f"{side} {trade.get('quantity', 0)} @ {trade.get('price', 0)} (fee: {fee})",
                     )
-                    session.add(txn)
+                    new_txns.append(txn)
+                    seen.add(source_id)
                     total_ok += 1
                 except Exception as e:
                     log.warning("sync_trades write failed",
                                 account_id=account_id, trade_id=trade_id, error=str(e))
                     total_fail += 1
+            session.add_all(new_txns)
         # flush after each node
         try:
             session.flush()
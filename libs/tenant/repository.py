@@ -2,7 +2,7 @@
 Tenant Repository - 租户数据访问
 """
 
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from sqlalchemy.orm import Session
 
@@ -16,6 +16,13 @@ class TenantRepository:
     def get_by_id(self, tenant_id: int) -> Optional[Tenant]:
         return self.db.query(Tenant).filter(Tenant.id == tenant_id).first()
 
+    def get_by_ids(self, tenant_ids: Iterable[int]) -> Dict[int, Tenant]:
+        """批量查租户，返回 {tenant_id: Tenant}"""
+        ids = set(tenant_ids)
+        if not ids:
+            return {}
+        return {t.id: t for t in self.db.query(Tenant).filter(Tenant.id.in_(ids)).all()}
+
     def get_by_app_key(self, app_key: str) -> Optional[Tenant]:
         return self.db.query(Tenant).filter(
             Tenant.app_key == app_key,
@@ -9,13 +9,15 @@ IronBull Trading Module
 - PaperTrader: 模拟交易
 - AutoTrader: 自动交易执行器（信号驱动）
 - TradeSettlementService: 交易结算服务（OrderTrade → Position → Ledger）
+- TraderPool: LiveTrader 复用池（共享 markets、常驻事件循环）
 """
 
 from .base import Trader, OrderResult, OrderStatus, OrderSide, OrderType, Balance
 from .live_trader import LiveTrader
 from .paper_trader import PaperTrader
 from .auto_trader import AutoTrader, TradeMode, RiskLimits, TradeRecord
-from .settlement import TradeSettlementService, SettlementResult
+from .settlement import TradeSettlementService, SettlementResult, SettlementFill
+from .trader_pool import TraderPool, get_trader_pool
 
 __all__ = [
     "Trader",
@@ -32,4 +34,7 @@ __all__ = [
     "TradeRecord",
     "TradeSettlementService",
     "SettlementResult",
+    "SettlementFill",
+    "TraderPool",
+    "get_trader_pool",
 ]
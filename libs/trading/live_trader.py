@@ -15,6 +15,7 @@ import ccxt.async_support as ccxt
 
 from libs.core import get_logger, gen_id
 from libs.exchange.utils import symbol_for_ccxt_futures, normalize_symbol
+from libs.exchange.markets_registry import MarketsRegistry, get_markets_registry
 from .base import (
     Trader, OrderResult, OrderStatus, OrderSide, OrderType, Balance
 )
@@ -167,6 +168,20 @@ class LiveTrader(Trader):
         
         logger.info("live trader initialized", exchange=exchange, sandbox=sandbox)
 
+    def reset_account_state(self) -> None:
+        """清除按账户缓存的交易所设置（持仓模式、逐仓尝试），下次下单时重新检测（复用实例时调用）"""
+        self._position_mode_dual = None
+        self._margin_isolated_tried = set()
+
+    async def ensure_markets(self) -> None:
+        """
+        注入进程级共享 markets（libs.exchange.markets_registry），避免每个实例重新下载；
+        注册表不可用时回退到 ccxt load_markets()
+        """
+        snap = await get_markets_registry().aget(self.exchange_name, self.market_type, self.sandbox)
+        if not MarketsRegistry.apply(self.exchange, snap):
+            await self.exchange.load_markets()
+
     def _ccxt_symbol(self, symbol: str) -> str:
         """下单用 symbol：合约时转为 CCXT 格式 BASE/QUOTE:USDT"""
         if self.market_type == "future" and symbol and ":" not in symbol:
@@ -195,7 +210,7 @@ class LiveTrader(Trader):
         - Gate BTC/USDT: 0.0001（1张 = 0.0001 BTC）
         - OKX BTC/USDT:  0.01  （1张 = 0.01 BTC）
         - Binance:        1     （以币为单位，contractSize=1）
-        markets 必须已加载（load_markets），否则返回 0。
+        markets 必须已加载（ensure_markets），否则返回 0。
         """
         try:
             ccxt_sym = self._ccxt_symbol(symbol)
@@ -239,7 +254,7 @@ class LiveTrader(Trader):
             raise ValueError(f"invalid amount_usdt: {amount_usdt}")
 
         ccxt_sym = self._ccxt_symbol(symbol)
-        await self.exchange.load_markets()
+        await self.ensure_markets()
         market = self.exchange.market(ccxt_sym)
 
         contract_size = float(market.get("contractSize") or 0)
@@ -308,6 +323,7 @@ class LiveTrader(Trader):
             symbol: 交易对（BTC/USDT）
             leverage: 杠杆倍数（如 20）
         """
+        await self.ensure_markets()
         if self.market_type != "future" or not symbol or not leverage or leverage < 1:
             return
         ccxt_sym = self._ccxt_symbol(symbol)
@@ -334,7 +350,6 @@ class LiveTrader(Trader):
                         return
             elif self.exchange_name == "okx":
                 # OKX：通过 set-leverage API，需同时传 mgnMode
-                await self.exchange.load_markets()
                 inst_id = self.exchange.market_id(ccxt_sym)
                 params: Dict[str, Any] = {
                     "instId": inst_id,
@@ -376,6 +391,7 @@ class LiveTrader(Trader):
         合约账户：尝试设为双向持仓，保证下单可传 positionSide。
         若当前为单向或有持仓无法切换，则返回 False，下单时不传 positionSide（参考 old3）。
         """
+        await self.ensure_markets()
         if self.market_type != "future":
             return False
         if self._position_mode_dual is not None:
@@ -526,6 +542,7 @@ class LiveTrader(Trader):
         Raises:
             RuntimeError: 当逐仓模式无法设置且不应继续下单时。
         """
+        await self.ensure_markets()
         if self.market_type != "future" or not symbol:
             return
         ccxt_sym = self._ccxt_symbol(symbol) if ":" not in symbol else symbol
@@ -599,7 +616,6 @@ class LiveTrader(Trader):
         if self.exchange_name == "okx":
             try:
                 # 先查当前杠杆和保证金模式
-                await self.exchange.load_markets()
                 inst_id = self.exchange.market_id(ccxt_sym)
                 lev_info = await self.exchange.privateGetAccountLeverageInfo({
                     "instId": inst_id,
@@ -701,6 +717,7 @@ class LiveTrader(Trader):
         兼容用法（传 quantity，调用方自行换算）：
             await trader.create_order(symbol, side, OrderType.MARKET, quantity=0.001)
         """
+        await self.ensure_markets()
         order_id = gen_id("ord_")
         db_order_id = None  # 数据库订单ID（如果使用 OrderTradeService）
         ccxt_sym = self._ccxt_symbol(symbol)
@@ -1297,6 +1314,7 @@ class LiveTrader(Trader):
             stop_price: 触发价格
             position_side: 持仓方向 (LONG/SHORT)
         """
+        await self.ensure_markets()
         pos_side = (position_side or ("LONG" if side == OrderSide.SELL else "SHORT")).upper()
 
         # Gate 统一账户：仓位级止损
@@ -1391,6 +1409,7 @@ class LiveTrader(Trader):
             take_profit_price: 触发价格
             position_side: 持仓方向 (LONG/SHORT)
         """
+        await self.ensure_markets()
         pos_side = (position_side or ("LONG" if side == OrderSide.SELL else "SHORT")).upper()
 
         # Gate 统一账户：仓位级止盈
@@ -1489,6 +1508,7 @@ class LiveTrader(Trader):
         Returns:
             {"sl": OrderResult, "tp": OrderResult}
         """
+        await self.ensure_markets()
         results = {}
         
         # 持仓方向
@@ -1527,6 +1547,7 @@ class LiveTrader(Trader):
 
     async def cancel_order(self, order_id: str, symbol: str) -> OrderResult:
         """取消订单。symbol 可为规范形式，合约时会转为 CCXT 格式。"""
+        await self.ensure_markets()
         try:
             ccxt_sym = self._ccxt_symbol(symbol)
             response = await self.exchange.cancel_order(order_id, ccxt_sym)
@@ -1572,6 +1593,7 @@ class LiveTrader(Trader):
         Returns:
             {"cancelled": int, "errors": int, "details": [...]}
         """
+        await self.ensure_markets()
         ccxt_sym = self._ccxt_symbol(symbol)
         cancelled = 0
         errors = 0
@@ -1629,6 +1651,7 @@ class LiveTrader(Trader):
 
     async def get_order(self, order_id: str, symbol: str) -> OrderResult:
         """查询订单。symbol 可为规范形式，合约时会转为 CCXT 格式。"""
+        await self.ensure_markets()
         try:
             ccxt_sym = self._ccxt_symbol(symbol)
             response = await self.exchange.fetch_order(order_id, ccxt_sym)
@@ -1674,6 +1697,7 @@ class LiveTrader(Trader):
     
     async def get_balance(self, asset: Optional[str] = None) -> Dict[str, Balance]:
         """查询余额。Gate 统一账户通过 spot 端点获取统一余额。"""
+        await self.ensure_markets()
         try:
             # Gate 统一账户：swap 端点返回空，需用 spot 端点查统一余额
             params: Dict[str, Any] = {}
@@ -11,11 +11,12 @@ Trade Settlement Service - 交易结算服务
 - 接收成交通知，触发持仓和资金更新
 - 确保三个模块的一致性（同一事务）
 - 提供幂等性保证（通过 fill_id 去重）
+- 批量结算（settle_fills）：订单 / 持仓 / 账户各一次加载并加锁，逐笔按原不变量计算，一次 flush 批量写入
 """
 
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
@@ -23,10 +24,12 @@ from sqlalchemy.orm import Session
 from libs.core import get_logger
 from libs.order_trade import (
     OrderTradeService,
+    OrderFillState,
     CreateOrderDTO,
     RecordFillDTO,
     OrderDTO,
     FillDTO,
+    OrderNotFoundError,
 )
 from libs.position import (
     PositionService,
@@ -72,6 +75,23 @@ class SettlementResult:
     error: Optional[str] = None
 
 
+@dataclass
+class SettlementFill:
+    """批量结算的一笔成交（字段同 settle_fill 参数）"""
+    order_id: str
+    symbol: str
+    exchange: str
+    side: str
+    quantity: Decimal
+    price: Decimal
+    fee: Decimal = Decimal("0")
+    fee_currency: str = "USDT"
+    exchange_trade_id: Optional[str] = None
+    filled_at: Optional[datetime] = None
+    position_side: str = "NONE"
+    market_type: str = "spot"
+
+
 class TradeSettlementService:
     """
     交易结算服务
@@ -258,6 +278,234 @@ class TradeSettlementService:
                 error=str(e),
             )
     
+    def settle_fills(self, fills: List[SettlementFill]) -> List[SettlementResult]:
+        """
+        批量结算成交（同一账户，按输入顺序逐笔生效）
+        
+        与逐笔 settle_fill 的结果一致（成交 ≤ 订单、时间有序、卖出 ≤ 可用、买入扣款 ≤ 可用、
+        fill_id 幂等），但：
+        1. 订单、成交汇总、持仓、账户各一次查询，持仓 / 订单 / 账户行加锁
+        2. 每笔只在内存中校验并累加，成交、持仓变动、流水最后一次 flush 批量写入
+        3. 某笔校验失败只跳过该笔（不影响其他笔），不回滚整个 session
+        
+        调用方负责 commit；写库阶段出错时回滚并全部返回失败。
+        
+        Returns:
+            与输入一一对应的结算结果
+        """
+        if not fills:
+            return []
+        try:
+            results = self._settle_batch(fills)
+        except Exception as e:
+            logger.error("batch settlement failed", error=str(e), fills=len(fills))
+            try:
+                self.session.rollback()
+            except Exception as rb:
+                logger.warning("settlement rollback failed", error=str(rb))
+            return [
+                SettlementResult(
+                    success=False,
+                    order_id=f.order_id,
+                    symbol=f.symbol,
+                    side=f.side,
+                    quantity=float(f.quantity),
+                    price=float(f.price),
+                    error=str(e),
+                )
+                for f in fills
+            ]
+        
+        succeeded = sum(1 for r in results if r.success)
+        logger.info(
+            "batch settlement completed",
+            account_id=self.account_id,
+            fills=len(fills),
+            succeeded=succeeded,
+            failed=len(fills) - succeeded,
+        )
+        
+        # 盈利时扣点卡（逐笔，与 settle_fill 一致）
+        for result in results:
+            if result.success and result.realized_pnl > 0:
+                self._deduct_point_card_for_profit(Decimal(str(result.realized_pnl)))
+        return results
+    
+    def _settle_batch(self, fills: List[SettlementFill]) -> List[SettlementResult]:
+        now = datetime.now()
+        
+        # 1. 批量加载（订单、持仓、账户加锁）
+        orders: Dict[str, Tuple[Any, OrderFillState]] = self.order_trade_service.get_fill_states(
+            {f.order_id for f in fills}, self.tenant_id, for_update=True,
+        )
+        known_fills = self.order_trade_service.find_fills_by_exchange_trade_ids(
+            {(f.order_id, f.exchange_trade_id) for f in fills if f.exchange_trade_id}, self.tenant_id,
+        )
+        existing_ids = [fill.fill_id for fill in known_fills.values()]
+        positioned = self.position_service.processed_fills(existing_ids, self.tenant_id)
+        settled = self.ledger_service.settled_fills(existing_ids, self.tenant_id)
+        positions = self.position_service.lock_positions(
+            self.tenant_id, self.account_id,
+            {(f.symbol, f.exchange, f.position_side) for f in fills},
+        )
+        account = self.ledger_service.lock_account(self.tenant_id, self.account_id, self.currency)
+        
+        new_positions = []
+        new_fills = []
+        changes = []
+        transactions = []
+        dirty_orders: Dict[str, str] = {}  # order_id -> 最新一笔的 fee_currency
+        results: List[SettlementResult] = []
+        
+        # 2. 逐笔在内存中校验并生效
+        for f in fills:
+            side = f.side.upper()
+            filled_at = f.filled_at or now
+            failed = SettlementResult(
+                success=False,
+                order_id=f.order_id,
+                symbol=f.symbol,
+                side=f.side,
+                quantity=float(f.quantity),
+                price=float(f.price),
+            )
+            
+            # 2.1 成交（订单状态 / 匹配 / 幂等 / 成交 ≤ 订单 / 时间有序）
+            fill_dto = RecordFillDTO(
+                order_id=f.order_id,
+                tenant_id=self.tenant_id,
+                account_id=self.account_id,
+                symbol=f.symbol,
+                side=side,
+                quantity=f.quantity,
+                price=f.price,
+                filled_at=filled_at,
+                exchange_trade_id=f.exchange_trade_id,
+                fee=f.fee,
+                fee_currency=f.fee_currency,
+            )
+            fill = None
+            try:
+                entry = orders.get(f.order_id)
+                if entry is None:
+                    raise OrderNotFoundError(f.order_id)
+                order, order_state = entry
+                self.order_trade_service.check_fill_matches(order, fill_dto, order_state.status)
+                existing = known_fills.get((f.order_id, f.exchange_trade_id)) if f.exchange_trade_id else None
+                if existing is not None:
+                    fill_id = existing.fill_id
+                else:
+                    fill, order_state = self.order_trade_service.prepare_fill(order, fill_dto, order_state)
+                    fill_id = fill.fill_id
+            except Exception as e:
+                logger.warning("record fill failed", error=str(e), order_id=f.order_id)
+                failed.error = "Failed to record fill"
+                results.append(failed)
+                continue
+            
+            # 2.2 持仓（fill_id 幂等 / 卖出 ≤ 可用）
+            key = (f.symbol, f.exchange, f.position_side)
+            position = positions.get(key)
+            realized_pnl = Decimal("0")
+            if fill_id not in positioned or position is None:
+                if position is None:
+                    position = self.position_service.position_repo.new_position(
+                        tenant_id=self.tenant_id,
+                        account_id=self.account_id,
+                        symbol=f.symbol,
+                        exchange=f.exchange,
+                        market_type=f.market_type,
+                        position_side=f.position_side,
+                    )
+                try:
+                    change, pnl = self.position_service.apply_fill(position, UpdatePositionDTO(
+                        tenant_id=self.tenant_id,
+                        account_id=self.account_id,
+                        symbol=f.symbol,
+                        exchange=f.exchange,
+                        market_type=f.market_type,
+                        position_side=f.position_side,
+                        side=side,
+                        quantity=f.quantity,
+                        price=f.price,
+                        fill_id=fill_id,
+                        filled_at=filled_at,
+                    ))
+                except Exception as e:
+                    logger.warning("update position failed", error=str(e), order_id=f.order_id)
+                    failed.error = f"Position update failed for fill {fill_id}, data may be inconsistent"
+                    results.append(failed)
+                    continue
+                if key not in positions:
+                    positions[key] = position
+                    new_positions.append(position)
+                position.updated_at = now
+                changes.append(change)
+                positioned[fill_id] = position.position_id
+                realized_pnl = pnl if pnl is not None else Decimal("0")
+            
+            # 持仓生效后成交才计入订单
+            if fill is not None:
+                new_fills.append(fill)
+                orders[f.order_id] = (order, order_state)
+                dirty_orders[f.order_id] = f.fee_currency
+                if f.exchange_trade_id:
+                    known_fills[(f.order_id, f.exchange_trade_id)] = fill
+            
+            # 2.3 资金（fill_id 幂等 / 买入扣款 ≤ 可用；失败只记录日志，与 settle_fill 一致）
+            if fill_id not in settled:
+                try:
+                    transactions.append(self.ledger_service.apply_trade(account, TradeSettlementDTO(
+                        tenant_id=self.tenant_id,
+                        account_id=self.account_id,
+                        currency=self.currency,
+                        symbol=f.symbol,
+                        side=side,
+                        quantity=f.quantity,
+                        price=f.price,
+                        fee=f.fee,
+                        fee_currency=f.fee_currency,
+                        realized_pnl=realized_pnl,
+                        fill_id=fill_id,
+                        settled_at=filled_at,
+                    )))
+                    account.updated_at = now
+                    settled[fill_id] = account.ledger_account_id
+                except Exception as e:
+                    logger.warning("settle ledger failed", error=str(e))
+                    logger.error("ledger settlement returned None, position updated but ledger may be inconsistent",
+                                 fill_id=fill_id, order_id=f.order_id)
+            
+            results.append(SettlementResult(
+                success=True,
+                fill_id=fill_id,
+                order_id=f.order_id,
+                position_id=position.position_id,
+                ledger_account_id=account.ledger_account_id,
+                symbol=f.symbol,
+                side=f.side,
+                quantity=float(f.quantity),
+                price=float(f.price),
+                fee=float(f.fee),
+                position_quantity_after=float(position.quantity),
+                position_avg_cost=float(position.avg_cost),
+                realized_pnl=float(realized_pnl),
+                balance_after=float(account.balance),
+                available_after=float(account.available),
+            ))
+        
+        # 3. 批量写入：新持仓、成交、持仓变动、流水一次 flush，订单每个一条 UPDATE
+        self.session.add_all(new_positions)
+        self.session.add_all(new_fills)
+        self.session.add_all(changes)
+        self.session.add_all(transactions)
+        self.session.flush()
+        for order_id, fee_currency in dirty_orders.items():
+            order, order_state = orders[order_id]
+            self.order_trade_service.apply_fill_state(order, order_state, fee_currency)
+        
+        return results
+    
     def _record_fill(
         self,
         order_id: str,
@@ -0,0 +1,262 @@
+"""
+Trader Pool - 进程级 LiveTrader 复用池（execution-node 使用）
+
+职责：
+- 按 (exchange, api_key, sandbox, market_type) 复用 LiveTrader，避免每个任务重建 ccxt 实例和连接
+- markets 来自进程级 MarketsRegistry（同一交易所所有账户共享，后台刷新），借出时按版本注入
+- 所有 trader 运行在同一个常驻事件循环（后台线程）上，同步端点通过 run()、async 端点通过 arun() 提交协程
+- 空闲超时的 trader 由后台维护任务关闭回收
+
+配置（config/default.yaml）：
+- trader_pool_idle_ttl: trader 空闲多久后关闭（秒）
+- trader_pool_sweep_interval: 空闲回收任务执行间隔（秒）
+- markets 刷新周期见 markets_refresh_interval（libs/exchange/markets_registry.py）
+
+使用方式：
+    pool = get_trader_pool()
+
+    async def _job():
+        async with pool.lease(exchange="binance", api_key=k, api_secret=s, sandbox=True) as trader:
+            return await trader.get_balance("USDT")
+
+    result = pool.run(_job())
+
+注意：
+- lease 结束不会关闭 trader；进程退出时调用 shutdown()
+- 同一 api_key 的 secret / passphrase 变更时会重建 trader
+- 空闲借出时调用 trader.reset_account_state()，持仓模式等账户级设置每个任务重新检测
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from libs.core import get_config, get_logger
+from libs.exchange.markets_registry import MarketsRegistry, get_markets_registry
+
+from .live_trader import LiveTrader
+
+logger = get_logger("trader-pool")
+
+TraderKey = Tuple[str, str, bool, str]
+
+
+@dataclass
+class _PooledTrader:
+    trader: Any
+    credentials: Tuple[str, str]
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+
+
+class TraderPool:
+    """LiveTrader 复用池 + 常驻事件循环"""
+
+    def __init__(
+        self,
+        idle_ttl: float = 600.0,
+        sweep_interval: float = 60.0,
+        trader_factory: Callable[..., Any] = LiveTrader,
+        registry: Optional[MarketsRegistry] = None,
+    ):
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._factory = trader_factory
+        self._registry = registry or get_markets_registry()
+        self._traders: Dict[TraderKey, _PooledTrader] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._start_lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    # ---------- 事件循环 ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None and self._loop.is_running():
+            return self._loop
+        with self._start_lock:
+            if self._loop is None or not self._loop.is_running():
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name="trader-pool-loop", daemon=True)
+                self._thread.start()
+                started.wait()
+                self._loop = loop
+                if self.sweep_interval > 0:
+                    asyncio.run_coroutine_threadsafe(self._start_sweeper(), loop).result()
+        return self._loop
+
+    async def _start_sweeper(self) -> None:
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    def submit(self, coro: Awaitable) -> "concurrent.futures.Future":
+        """把协程提交到池的事件循环，返回 concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """在池的事件循环上执行协程并阻塞等待结果（供同步端点调用）"""
+        return self.submit(coro).result(timeout)
+
+    async def arun(self, coro: Awaitable) -> Any:
+        """
+        在池的事件循环上执行协程，从其他事件循环 await 结果（供 async 端点调用）
+
+        调用方被取消（如客户端断开）时只放弃等待，池内协程继续执行完（下单不可半途放弃）。
+        """
+        return await asyncio.shield(asyncio.wrap_future(self.submit(coro)))
+
+    # ---------- trader 租借 ----------
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        exchange: str,
+        api_key: str,
+        api_secret: str,
+        passphrase: Optional[str] = None,
+        sandbox: bool = False,
+        market_type: str = "future",
+    ):
+        """借出 trader（须在池的事件循环内调用），退出时仅归还不关闭"""
+        key: TraderKey = ((exchange or "binance").lower(), api_key, bool(sandbox), market_type or "future")
+        credentials = (api_secret, passphrase or "")
+        entry = self._traders.get(key)
+        if entry is not None and entry.credentials != credentials and entry.in_use == 0:
+            self._traders.pop(key, None)
+            await self._close(entry)
+            entry = None
+        if entry is None or entry.credentials != credentials:
+            trader = self._factory(
+                exchange=key[0],
+                api_key=api_key,
+                api_secret=api_secret,
+                passphrase=passphrase,
+                sandbox=key[2],
+                market_type=key[3],
+                settlement_service=None,
+            )
+            entry = _PooledTrader(trader=trader, credentials=credentials)
+            if key not in self._traders:
+                self._traders[key] = entry
+            self.created += 1
+        else:
+            self.reused += 1
+            if entry.in_use == 0:
+                # 用户可能在交易所切换了持仓模式 / 保证金模式：复用前清除账户级缓存，由本次任务重新检测
+                reset = getattr(entry.trader, "reset_account_state", None)
+                if reset is not None:
+                    reset()
+        entry.in_use += 1
+        try:
+            await self._attach_markets(entry.trader)
+            yield entry.trader
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            # 凭证变更时未入池的临时 trader 用完即关
+            if self._traders.get(key) is not entry and entry.in_use == 0:
+                await self._close(entry)
+
+    # ---------- 共享 markets ----------
+
+    async def _attach_markets(self, trader: Any) -> None:
+        """从 MarketsRegistry 注入共享 markets（版本变化时重新注入）；注册表不可用时由 trader 自行加载"""
+        snap = await self._registry.aget(trader.exchange_name, trader.market_type, trader.sandbox)
+        if not MarketsRegistry.apply(trader.exchange, snap):
+            await trader.exchange.load_markets()
+
+    # ---------- 维护 ----------
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning("trader pool sweep failed", error=str(e))
+
+    async def sweep(self) -> None:
+        """关闭空闲超时的 trader"""
+        if self.idle_ttl <= 0:
+            return
+        now = time.monotonic()
+        expired = [
+            k for k, e in self._traders.items()
+            if e.in_use == 0 and now - e.last_used > self.idle_ttl
+        ]
+        for k in expired:
+            entry = self._traders.pop(k)
+            await self._close(entry)
+        if expired:
+            logger.info("idle traders closed", count=len(expired), remaining=len(self._traders))
+
+    @staticmethod
+    async def _close(entry: _PooledTrader) -> None:
+        try:
+            await entry.trader.close()
+        except Exception as e:
+            logger.warning("trader close failed", error=str(e))
+
+    async def aclose(self) -> None:
+        """关闭池内全部 trader（在池的事件循环内调用）"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        entries = list(self._traders.values())
+        self._traders.clear()
+        for entry in entries:
+            await self._close(entry)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """关闭全部 trader 并停止事件循环线程"""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout)
+        except Exception as e:
+            logger.warning("trader pool close failed", error=str(e))
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "traders": len(self._traders),
+            "in_use": sum(e.in_use for e in self._traders.values()),
+            "created": self.created,
+            "reused": self.reused,
+            "markets": self._registry.stats(),
+        }
+
+
+_pool: Optional[TraderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_trader_pool() -> TraderPool:
+    """获取进程级 TraderPool（按配置创建）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_config()
+                _pool = TraderPool(
+                    idle_ttl=config.get_float("trader_pool_idle_ttl", 600.0),
+                    sweep_interval=config.get_float("trader_pool_sweep_interval", 60.0),
+                )
+    return _pool
@@ -2,20 +2,40 @@
 WebSocket Connection Manager
 
 管理 WebSocket 连接和消息广播
+
+背压：
+- 广播时消息只编码一次，放入每个客户端的有界发送队列后立即返回，由客户端各自的写任务发送
+- 行情频道（ticker:*）合并：队列中同一频道未发送的旧值直接被新值替换，只保留最新值
+- 队列达到上限（高水位）时丢弃新的非合并消息；持续高水位超过 slow_client_timeout 秒、
+  或单条发送超过 send_timeout 秒的客户端被断开，慢客户端不会拖慢广播方的事件循环
+- 高水位计时只在队列回落到低水位（max_queue // 2）以下才清零，
+  消费速度略低于广播速度、队列一直贴着上限的客户端同样会被断开
+
+配置（config/default.yaml）：
+- ws_client_queue_size / ws_slow_client_timeout / ws_send_timeout
 """
 
 import asyncio
+import itertools
 import json
-from typing import Dict, Set, Optional, Any
+import time
+from collections import OrderedDict
+from typing import Dict, Set, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
 from fastapi import WebSocket, WebSocketDisconnect
 
-from libs.core import get_logger, gen_id
+from libs.core import get_config, get_logger, gen_id
 
 logger = get_logger("ws-manager")
 
+# 按频道合并（只保留最新值）的频道前缀
+CONFLATE_PREFIXES: Tuple[str, ...] = ("ticker:",)
+
+# 慢客户端断开使用的关闭码（1013 = Try Again Later）
+SLOW_CLIENT_CLOSE_CODE = 1013
+
 
 @dataclass
 class Client:
@@ -25,6 +45,19 @@ class Client:
     subscriptions: Set[str] = field(default_factory=set)
     connected_at: datetime = field(default_factory=datetime.now)
     last_ping: datetime = field(default_factory=datetime.now)
+    # 发送队列：key 为频道（合并消息）或序号（普通消息），value 为已编码的文本
+    outbox: "OrderedDict[Any, str]" = field(default_factory=OrderedDict)
+    ready: Optional[asyncio.Event] = None
+    writer: Optional[asyncio.Task] = None
+    over_since: Optional[float] = None
+    sent: int = 0
+    dropped: int = 0
+    conflated: int = 0
+
+
+def encode_message(data: dict) -> str:
+    """与 WebSocket.send_json 相同的编码方式"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
 
 
 class ConnectionManager:
@@ -45,17 +78,30 @@ class ConnectionManager:
         # 订阅
         manager.subscribe(client_id, "ticker:BTC/USDT")
         
-        # 广播
+        # 广播（入队即返回，不等待客户端发送完成）
         await manager.broadcast("ticker:BTC/USDT", {"price": 98000})
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_queue: int = 256,
+        slow_client_timeout: float = 5.0,
+        send_timeout: float = 10.0,
+        conflate_prefixes: Tuple[str, ...] = CONFLATE_PREFIXES,
+    ):
         # client_id -> Client
         self.clients: Dict[str, Client] = {}
         # channel -> set of client_ids
         self.channels: Dict[str, Set[str]] = {}
         # websocket -> client_id (反向映射)
         self._ws_to_client: Dict[WebSocket, str] = {}
+        self.max_queue = max(1, max_queue)
+        self.low_water = self.max_queue // 2
+        self.slow_client_timeout = slow_client_timeout
+        self.send_timeout = send_timeout
+        self.conflate_prefixes = conflate_prefixes
+        self._seq = itertools.count()
+        self.slow_disconnects = 0
     
     async def connect(self, websocket: WebSocket) -> str:
         """
@@ -70,7 +116,9 @@ class ConnectionManager:
         client = Client(
             client_id=client_id,
             websocket=websocket,
+            ready=asyncio.Event(),
         )
+        client.writer = asyncio.create_task(self._writer(client))
         
         self.clients[client_id] = client
         self._ws_to_client[websocket] = client_id
@@ -99,6 +147,8 @@ class ConnectionManager:
                 self.unsubscribe(client_id, channel)
             
             del self.clients[client_id]
+            if client.writer is not None and client.writer is not asyncio.current_task():
+                client.writer.cancel()
         
         del self._ws_to_client[websocket]
         
@@ -144,19 +194,15 @@ class ConnectionManager:
         return True
     
     async def send_to_client(self, client_id: str, data: dict):
-        """发送消息到指定客户端"""
+        """发送消息到指定客户端（入队，由写任务发送）"""
         client = self.clients.get(client_id)
         if not client:
             return
-        
-        try:
-            await client.websocket.send_json(data)
-        except Exception as e:
-            logger.warning("send failed", client_id=client_id, error=str(e))
+        self._enqueue(client, None, encode_message(data))
     
     async def broadcast(self, channel: str, data: dict):
         """
-        广播消息到频道
+        广播消息到频道（只编码一次，入队后立即返回）
         
         Args:
             channel: 频道名称
@@ -167,31 +213,73 @@ class ConnectionManager:
             return
         
         # 添加频道信息
-        message = {"channel": channel, **data}
+        text = encode_message({"channel": channel, **data})
+        key = channel if channel.startswith(self.conflate_prefixes) else None
         
-        # 并发发送
-        tasks = []
         for client_id in list(client_ids):
             client = self.clients.get(client_id)
             if client:
-                tasks.append(self._safe_send(client, message))
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+                self._enqueue(client, key, text)
     
     async def broadcast_all(self, data: dict):
         """广播到所有客户端"""
-        tasks = []
-        for client in self.clients.values():
-            tasks.append(self._safe_send(client, data))
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        text = encode_message(data)
+        for client in list(self.clients.values()):
+            self._enqueue(client, None, text)
     
-    async def _safe_send(self, client: Client, data: dict):
-        """安全发送（捕获异常）"""
+    # ---------- 发送队列 ----------
+    
+    def _enqueue(self, client: Client, key: Optional[str], text: str):
+        """放入客户端发送队列；key 非空时替换同 key 未发送的旧值"""
+        if key is not None and key in client.outbox:
+            client.outbox[key] = text
+            client.conflated += 1
+            return
+        if len(client.outbox) >= self.max_queue:
+            client.dropped += 1
+            now = time.monotonic()
+            if client.over_since is None:
+                client.over_since = now
+            elif now - client.over_since > self.slow_client_timeout:
+                self._evict(client, "queue over high-water mark")
+            return
+        client.outbox[key if key is not None else next(self._seq)] = text
+        client.ready.set()
+    
+    async def _writer(self, client: Client):
+        """客户端写任务：按顺序发送队列中的消息，发送失败或超时则断开"""
+        try:
+            while True:
+                if not client.outbox:
+                    client.ready.clear()
+                    await client.ready.wait()
+                    continue
+                _, text = client.outbox.popitem(last=False)
+                if len(client.outbox) <= self.low_water:
+                    client.over_since = None
+                await asyncio.wait_for(client.websocket.send_text(text), self.send_timeout)
+                client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("send failed", client_id=client.client_id, error=str(e) or type(e).__name__)
+            self._evict(client, "send failed")
+    
+    def _evict(self, client: Client, reason: str):
+        """断开慢 / 失效客户端（关闭连接后接收循环会退出）"""
+        if self.clients.get(client.client_id) is not client:
+            return
+        self.slow_disconnects += 1
+        logger.warning("evicting websocket client", client_id=client.client_id, reason=reason,
+                       queued=len(client.outbox), dropped=client.dropped)
+        self.disconnect(client.websocket)
+        client.outbox.clear()
+        asyncio.get_running_loop().create_task(self._close_quietly(client.websocket))
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
         try:
-            await client.websocket.send_json(data)
+            await websocket.close(code=SLOW_CLIENT_CLOSE_CODE)
         except Exception:
             pass
     
@@ -210,12 +298,19 @@ class ConnectionManager:
     
     def get_stats(self) -> dict:
         """获取统计信息"""
+        clients = list(self.clients.values())
         return {
             "total_clients": len(self.clients),
             "total_channels": len(self.channels),
             "channels": {
                 ch: len(subs) for ch, subs in self.channels.items()
             },
+            "queued": sum(len(c.outbox) for c in clients),
+            "max_queue_depth": max((len(c.outbox) for c in clients), default=0),
+            "over_high_water": sum(1 for c in clients if c.over_since is not None),
+            "dropped": sum(c.dropped for c in clients),
+            "conflated": sum(c.conflated for c in clients),
+            "slow_disconnects": self.slow_disconnects,
         }
 
 
@@ -224,8 +319,13 @@ _manager: Optional[ConnectionManager] = None
 
 
 def get_connection_manager() -> ConnectionManager:
-    """获取连接管理器实例"""
+    """获取连接管理器实例（按配置创建）"""
     global _manager
     if _manager is None:
-        _manager = ConnectionManager()
+        config = get_config()
+        _manager = ConnectionManager(
+            max_queue=config.get_int("ws_client_queue_size", 256),
+            slow_client_timeout=config.get_float("ws_slow_client_timeout", 5.0),
+            send_timeout=config.get_float("ws_send_timeout", 10.0),
+        )
     return _manager
@@ -1,15 +1,18 @@
 """
 Ticker Stream - 实时行情流
 
-从交易所订阅实时行情，推送给 WebSocket 客户端
+从交易所订阅实时行情，推送给 WebSocket 客户端；也作为持仓监控的推送价格源（market_type="swap"）
+同一连接上多路复用：watch_tickers 批量监听或每个交易对一个任务，经合并队列单点回调
 """
 
 import asyncio
+import time
 from typing import Dict, Set, Optional, Callable, Any
 from dataclasses import dataclass
 from datetime import datetime
 
 from libs.core import get_logger
+from libs.exchange.markets_registry import ccxt_class, get_markets_registry, markets_key
 
 logger = get_logger("ticker-stream")
 
@@ -40,30 +43,76 @@ class TickerData:
         }
 
 
+@dataclass
+class _SymbolStats:
+    """单个 symbol 的推送统计"""
+    updates: int = 0
+    coalesced: int = 0
+    last_update: float = 0.0
+
+
 class TickerStream:
     """
     实时行情流
     
     功能：
-    - 订阅交易所 WebSocket
+    - 订阅交易所 WebSocket（同一连接多路复用）
     - 解析并转发行情数据
     - 管理订阅的交易对
     
+    多路复用：
+    - 交易所支持 watchTickers 时，一个任务批量监听全部订阅；否则每个交易对一个任务，互不阻塞
+    - 各监听任务只写入「每个 symbol 最新值」并标记待推送，由单个分发任务回调；
+      回调慢时同一 symbol 的中间值被合并（coalesce），只推送最新值，不积压
+    - stats() 提供每个 symbol 的更新次数、合并次数、距上次更新的秒数与是否过期
+    
     使用示例：
         stream = TickerStream(exchange="binance")
         stream.set_callback(on_ticker)
         
         await stream.subscribe("BTC/USDT")
         await stream.start()
+    
+    合约行情（symbol 为 ccxt 合约格式 BTC/USDT:USDT）：
+        stream = TickerStream(exchange="gate", market_type="swap", allow_mock=False)
     """
     
-    def __init__(self, exchange: str = "binance"):
+    def __init__(
+        self,
+        exchange: str = "binance",
+        market_type: str = "spot",
+        allow_mock: bool = True,
+        stale_after: float = 10.0,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            exchange: 交易所名称 (binance/okx/gate)
+            market_type: spot=现货, swap/future=永续合约
+            allow_mock: ccxt.pro 不可用时是否退化为模拟行情（交易相关场景必须为 False）
+            stale_after: 超过该秒数无更新的 symbol 在 stats() 中标记为过期
+            client_factory: 创建 ccxt.pro 客户端（默认按 exchange / market_type 创建，测试可注入）
+        """
         self.exchange = exchange
+        self.market_type = market_type
+        self.allow_mock = allow_mock
+        self.stale_after = stale_after
+        self._client_factory = client_factory or self._create_client
         self._subscriptions: Set[str] = set()
         self._callback: Optional[Callable[[TickerData], Any]] = None
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._ccxt_ws = None
+        self.mode: Optional[str] = None
+        # 监听任务：watch_tickers 模式 key 为订阅集合，逐个模式 key 为 symbol
+        self._watchers: Dict[Any, asyncio.Task] = {}
+        self._changed: Optional[asyncio.Event] = None
+        # 合并队列：symbol -> 最新行情；待推送 symbol（dict 作有序集合）
+        self._latest: Dict[str, TickerData] = {}
+        self._pending: Dict[str, None] = {}
+        self._ready: Optional[asyncio.Event] = None
+        self._symbol_stats: Dict[str, _SymbolStats] = {}
+        self.coalesced = 0
         
     def set_callback(self, callback: Callable[[TickerData], Any]):
         """设置行情回调"""
@@ -72,19 +121,30 @@ class TickerStream:
     async def subscribe(self, symbol: str):
         """订阅交易对"""
         self._subscriptions.add(symbol)
+        self._notify_changed()
         logger.info("subscribed to ticker", symbol=symbol, exchange=self.exchange)
     
     async def unsubscribe(self, symbol: str):
         """取消订阅"""
         self._subscriptions.discard(symbol)
+        self._latest.pop(symbol, None)
+        self._pending.pop(symbol, None)
+        self._symbol_stats.pop(symbol, None)
+        self._notify_changed()
         logger.info("unsubscribed from ticker", symbol=symbol)
     
+    def _notify_changed(self):
+        if self._changed is not None:
+            self._changed.set()
+    
     async def start(self):
         """启动行情流"""
         if self._running:
             return
         
         self._running = True
+        self._changed = asyncio.Event()
+        self._ready = asyncio.Event()
         self._task = asyncio.create_task(self._run_loop())
         logger.info("ticker stream started", exchange=self.exchange)
     
@@ -107,78 +167,169 @@ class TickerStream:
         
         logger.info("ticker stream stopped")
     
+    def _create_client(self):
+        """按交易所名创建 ccxt.pro 客户端（gate -> gate/gateio，binance 合约 -> binanceusdm）"""
+        import ccxt.pro as ccxtpro
+        
+        ccxt_id, kind, _ = markets_key(self.exchange, self.market_type)
+        exchange_class = ccxt_class(ccxtpro, ccxt_id)
+        if exchange_class is None:
+            raise ValueError(f"unsupported exchange: {ccxt_id}")
+        options = {}
+        if kind == "swap" and ccxt_id in ("okx", "gateio"):
+            options["defaultType"] = "swap"
+        return exchange_class({
+            'enableRateLimit': True,
+            'options': options,
+        })
+    
     async def _run_loop(self):
-        """主循环 - 从交易所获取行情"""
+        """主循环 - 建立连接，按订阅维护监听任务，分发任务负责回调"""
+        dispatcher = asyncio.create_task(self._dispatch_loop())
         try:
-            # 动态导入 ccxt
-            import ccxt.pro as ccxtpro
+            try:
+                self._ccxt_ws = self._client_factory()
+            except ImportError:
+                if not self.allow_mock:
+                    logger.warning("ccxt.pro not available, stream disabled", exchange=self.exchange)
+                    return
+                logger.warning("ccxt.pro not available, using mock stream")
+                self.mode = "mock"
+                await self._run_mock_loop()
+                return
             
-            # 交易所名 -> CCXT 类名（gate -> gateio）
-            ccxt_id = "gateio" if self.exchange == "gate" else self.exchange
-            exchange_class = getattr(ccxtpro, ccxt_id)
-            self._ccxt_ws = exchange_class({
-                'enableRateLimit': True,
-            })
+            # 注入共享 markets，避免连接时重新下载
+            try:
+                await get_markets_registry().ainject(self._ccxt_ws, self.exchange, self.market_type)
+            except Exception as e:
+                logger.warning("markets inject failed", exchange=self.exchange, error=str(e))
             
-            logger.info("connected to exchange ws", exchange=self.exchange)
+            has = getattr(self._ccxt_ws, "has", None) or {}
+            self.mode = "watch_tickers" if has.get("watchTickers") else "per_symbol"
+            logger.info("connected to exchange ws", exchange=self.exchange, mode=self.mode)
             
             while self._running:
-                if not self._subscriptions:
-                    await asyncio.sleep(1)
-                    continue
-                
+                self._reconcile_watchers()
+                self._changed.clear()
                 try:
-                    # 监听所有订阅的交易对
-                    for symbol in list(self._subscriptions):
-                        try:
-                            ticker = await asyncio.wait_for(
-                                self._ccxt_ws.watch_ticker(symbol),
-                                timeout=5.0
-                            )
-                            
-                            # 转换为 TickerData
-                            data = TickerData(
-                                symbol=ticker['symbol'],
-                                last=ticker.get('last', 0) or 0,
-                                bid=ticker.get('bid', 0) or 0,
-                                ask=ticker.get('ask', 0) or 0,
-                                volume_24h=ticker.get('baseVolume', 0) or 0,
-                                change_24h=ticker.get('change', 0) or 0,
-                                change_pct_24h=ticker.get('percentage', 0) or 0,
-                                timestamp=ticker.get('timestamp', 0) or 0,
-                            )
-                            
-                            # 回调
-                            if self._callback:
-                                try:
-                                    result = self._callback(data)
-                                    if asyncio.iscoroutine(result):
-                                        await result
-                                except Exception as e:
-                                    logger.warning("callback error", error=str(e))
-                                    
-                        except asyncio.TimeoutError:
-                            continue
-                        except Exception as e:
-                            logger.warning("watch ticker error", symbol=symbol, error=str(e))
-                            await asyncio.sleep(1)
-                            
-                except Exception as e:
-                    logger.error("stream error", error=str(e))
-                    await asyncio.sleep(5)
+                    await asyncio.wait_for(self._changed.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
                     
-        except ImportError:
-            logger.warning("ccxt.pro not available, using mock stream")
-            await self._run_mock_loop()
         except Exception as e:
             logger.error("stream fatal error", error=str(e))
         finally:
+            await self._cancel_watchers(list(self._watchers))
+            dispatcher.cancel()
+            try:
+                await dispatcher
+            except asyncio.CancelledError:
+                pass
             if self._ccxt_ws:
                 try:
                     await self._ccxt_ws.close()
                 except Exception:
                     pass
     
+    def _reconcile_watchers(self):
+        """让监听任务与订阅集合一致（watch_tickers 模式订阅变化时整体重建）"""
+        if self.mode == "watch_tickers":
+            wanted = {frozenset(self._subscriptions)} if self._subscriptions else set()
+        else:
+            wanted = set(self._subscriptions)
+        for key in list(self._watchers):
+            if key not in wanted or self._watchers[key].done():
+                self._watchers.pop(key).cancel()
+        for key in wanted - set(self._watchers):
+            if self.mode == "watch_tickers":
+                coro = self._watch_batch(sorted(key))
+            else:
+                coro = self._watch_symbol(key)
+            self._watchers[key] = asyncio.create_task(coro)
+    
+    async def _cancel_watchers(self, keys):
+        tasks = [self._watchers.pop(k) for k in keys if k in self._watchers]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _watch_batch(self, symbols):
+        """一个任务批量监听多个交易对（watch_tickers 每次返回有更新的交易对）"""
+        while self._running:
+            try:
+                tickers = await self._ccxt_ws.watch_tickers(symbols)
+                for ticker in (tickers or {}).values():
+                    self._publish(self._to_ticker_data(ticker))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("watch tickers error", count=len(symbols), error=str(e))
+                await asyncio.sleep(1)
+    
+    async def _watch_symbol(self, symbol: str):
+        """单个交易对的监听任务，某个交易对无成交不影响其他交易对"""
+        while self._running:
+            try:
+                ticker = await self._ccxt_ws.watch_ticker(symbol)
+                self._publish(self._to_ticker_data(ticker))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("watch ticker error", symbol=symbol, error=str(e))
+                await asyncio.sleep(1)
+    
+    @staticmethod
+    def _to_ticker_data(ticker: dict) -> TickerData:
+        return TickerData(
+            symbol=ticker['symbol'],
+            last=ticker.get('last', 0) or 0,
+            bid=ticker.get('bid', 0) or 0,
+            ask=ticker.get('ask', 0) or 0,
+            volume_24h=ticker.get('baseVolume', 0) or 0,
+            change_24h=ticker.get('change', 0) or 0,
+            change_pct_24h=ticker.get('percentage', 0) or 0,
+            timestamp=ticker.get('timestamp', 0) or 0,
+        )
+    
+    # ---------- 合并队列 ----------
+    
+    def _publish(self, data: TickerData):
+        """写入最新值并标记待推送；同一 symbol 尚未推送时覆盖旧值（合并）"""
+        symbol = data.symbol
+        if symbol not in self._subscriptions:
+            return
+        stats = self._symbol_stats.get(symbol)
+        if stats is None:
+            stats = self._symbol_stats[symbol] = _SymbolStats()
+        stats.updates += 1
+        stats.last_update = time.time()
+        if symbol in self._pending:
+            stats.coalesced += 1
+            self.coalesced += 1
+        else:
+            self._pending[symbol] = None
+        self._latest[symbol] = data
+        self._ready.set()
+    
+    async def _dispatch_loop(self):
+        """单个分发任务：按到达顺序回调每个 symbol 的最新值"""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._pending:
+                symbol = next(iter(self._pending))
+                del self._pending[symbol]
+                data = self._latest.get(symbol)
+                if data is None or not self._callback:
+                    continue
+                try:
+                    result = self._callback(data)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.warning("callback error", error=str(e))
+    
     async def _run_mock_loop(self):
         """模拟行情流（用于测试）"""
         import random
@@ -202,7 +353,7 @@ class TickerStream:
                 new_price = base_price * (1 + change)
                 prices[symbol] = new_price
                 
-                data = TickerData(
+                self._publish(TickerData(
                     symbol=symbol,
                     last=round(new_price, 2),
                     bid=round(new_price * 0.9999, 2),
@@ -211,15 +362,7 @@ class TickerStream:
                     change_24h=round(new_price * change, 2),
                     change_pct_24h=round(change * 100, 4),
                     timestamp=int(datetime.now().timestamp() * 1000),
-                )
-                
-                if self._callback:
-                    try:
-                        result = self._callback(data)
-                        if asyncio.iscoroutine(result):
-                            await result
-                    except Exception as e:
-                        logger.warning("callback error", error=str(e))
+                ))
             
             # 模拟延迟
             await asyncio.sleep(1)
@@ -228,9 +371,41 @@ class TickerStream:
     def is_running(self) -> bool:
         return self._running
     
+    @property
+    def is_alive(self) -> bool:
+        """主循环任务仍在运行（启动后因异常或 ccxt.pro 不可用退出时为 False）"""
+        return self._task is not None and not self._task.done()
+    
     @property
     def subscriptions(self) -> Set[str]:
         return self._subscriptions.copy()
+    
+    def stats(self) -> Dict[str, Any]:
+        """行情流统计，含每个订阅 symbol 的更新次数 / 合并次数 / 距上次更新秒数 / 是否过期"""
+        now = time.time()
+        symbols = {}
+        for symbol in sorted(self._subscriptions):
+            s = self._symbol_stats.get(symbol)
+            age = round(now - s.last_update, 3) if s is not None else None
+            symbols[symbol] = {
+                "updates": s.updates if s is not None else 0,
+                "coalesced": s.coalesced if s is not None else 0,
+                "age_seconds": age,
+                "stale": age is None or age > self.stale_after,
+            }
+        return {
+            "exchange": self.exchange,
+            "market_type": self.market_type,
+            "mode": self.mode,
+            "running": self._running,
+            "alive": self.is_alive,
+            "subscriptions": sorted(self._subscriptions),
+            "watchers": len(self._watchers),
+            "pending": len(self._pending),
+            "coalesced": self.coalesced,
+            "stale_symbols": sum(1 for v in symbols.values() if v["stale"]),
+            "symbols": symbols,
+        }
 
 
 # 单例
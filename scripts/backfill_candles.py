@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+回填本地 K 线存储（供 /api/candles/range 与长周期回测使用）
+
+只拉取存储中缺失的区间，可反复执行（如 cron 每小时一次）。
+
+用法:
+  python scripts/backfill_candles.py --symbols BTC/USDT,ETH/USDT --timeframes 1h,15m --start 2022-01-01
+  python scripts/backfill_candles.py --symbols BTC/USDT --timeframes 1m --start 2024-01-01 --end 2024-07-01 --store /data/candles
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from libs.cache import CandleStore, backfill_candles, get_candle_store
+from libs.exchange import create_client
+
+
+def _parse_date(value: str) -> int:
+    """YYYY-MM-DD 或秒级时间戳 -> 秒级时间戳（UTC）"""
+    if value.isdigit():
+        return int(value)
+    return int(datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+async def main(args) -> None:
+    store = CandleStore(args.store) if args.store else get_candle_store()
+    if store is None:
+        print("未配置 candle_store_dir，请使用 --store 指定目录")
+        sys.exit(1)
+
+    start = _parse_date(args.start)
+    end = _parse_date(args.end) if args.end else None
+    client = create_client(args.exchange)
+    try:
+        for symbol in args.symbols.split(","):
+            for timeframe in args.timeframes.split(","):
+                stats = await backfill_candles(
+                    client, store, symbol.strip(), timeframe.strip(),
+                    start=start, end=end, exchange=args.exchange, pause=args.pause,
+                )
+                print(
+                    f"{symbol} {timeframe}: 请求 {stats['requests']} 次, 写入 {stats['written']} 根, "
+                    f"缺口 {stats['gaps_before']} -> {stats['gaps_after']}"
+                )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回填本地 K 线存储")
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbols", required=True, help="逗号分隔，如 BTC/USDT,ETH/USDT")
+    parser.add_argument("--timeframes", default="1h", help="逗号分隔，如 15m,1h")
+    parser.add_argument("--start", required=True, help="开始日期 YYYY-MM-DD 或秒级时间戳")
+    parser.add_argument("--end", default=None, help="结束日期（不包含），默认到最新已收盘 K 线")
+    parser.add_argument("--store", default=None, help="存储目录，默认读取配置 candle_store_dir")
+    parser.add_argument("--pause", type=float, default=0.2, help="每页请求间隔（秒）")
+    asyncio.run(main(parser.parse_args()))
@@ -2,10 +2,13 @@
 """
 Node Execute Worker - 消费 NODE_EXECUTE_QUEUE，向执行节点 POST /api/execute，并在中心写库与结算。
 
+并发：每进程 node_execute_worker_concurrency 个工作线程，同一节点同时最多 node_execute_per_node_limit 个任务，
+同一账户的任务按领取顺序串行；SIGTERM 后停止领取并排空在途任务。
+
 用法（在项目根目录）:
   PYTHONPATH=. python3 scripts/node_execute_worker.py
-  # 或指定轮询间隔（秒）
-  NODE_EXECUTE_POLL_TIMEOUT=15 PYTHONPATH=. python3 scripts/node_execute_worker.py
+  # 或指定轮询间隔（秒）/ 并发数
+  NODE_EXECUTE_POLL_TIMEOUT=15 NODE_EXECUTE_CONCURRENCY=16 PYTHONPATH=. python3 scripts/node_execute_worker.py
 """
 
 import os
@@ -13,11 +16,11 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import httpx
-from libs.core import get_config, get_logger, setup_logging
+from libs.core import get_config, get_logger, setup_logging, get_http_client, close_http_clients
 from libs.core.database import get_session
 from libs.member import ExecutionTarget
-from libs.queue import get_node_execute_queue
+from libs.position import register_session_events
+from libs.queue import ConcurrentTaskWorker, FunctionHandler, TaskMessage, get_node_execute_queue
 from libs.execution_node.apply_results import apply_remote_results
 
 config = get_config()
@@ -29,106 +32,128 @@ setup_logging(
 log = get_logger("node-execute-worker")
 
 POLL_TIMEOUT = int(os.environ.get("NODE_EXECUTE_POLL_TIMEOUT", "30"))
+CONCURRENCY = int(os.environ.get("NODE_EXECUTE_CONCURRENCY", config.get_int("node_execute_worker_concurrency", 8)))
+PER_NODE_LIMIT = config.get_int("node_execute_per_node_limit", 2)
 
+# 执行节点请求超时（秒）；工作线程共享进程级连接池（httpx.Client 线程安全）
+NODE_EXECUTE_TIMEOUT = 30.0
+
+
+def _node_group(msg: TaskMessage):
+    return (msg.payload or {}).get("node_id")
 
-def run():
-    queue = get_node_execute_queue()
-    log.info("node execute worker started", poll_timeout=POLL_TIMEOUT)
-
-    while True:
-        msg = queue.pop(timeout=POLL_TIMEOUT)
-        if msg is None:
-            continue
-        task_id = msg.task_id
-        payload = msg.payload or {}
-        node_id = payload.get("node_id")
-        base_url = (payload.get("base_url") or "").rstrip("/")
-        signal = payload.get("signal") or {}
-        amount_usdt = payload.get("amount_usdt", 0)
-        sandbox = payload.get("sandbox", True)
-        tasks = payload.get("tasks") or []
-
-        if not base_url or not tasks:
-            log.warning("invalid payload missing base_url or tasks", task_id=task_id, node_id=node_id)
-            queue.nack(msg, "missing base_url or tasks")
-            continue
-
-        # 重建 ExecutionTarget 供 apply_remote_results 使用
-        targets_by_account = {}
-        for t in tasks:
-            try:
-                target = ExecutionTarget(
-                    tenant_id=int(t["tenant_id"]),
-                    account_id=int(t["account_id"]),
-                    user_id=int(t["user_id"]),
-                    exchange=t.get("exchange", "binance"),
-                    api_key=t.get("api_key", ""),
-                    api_secret=t.get("api_secret", ""),
-                    passphrase=t.get("passphrase"),
-                    market_type=t.get("market_type", "future"),
-                    binding_id=int(t.get("binding_id", 0)),
-                    strategy_code=t.get("strategy_code", ""),
-                    ratio=int(t.get("ratio", 100)),
-                    execution_node_id=t.get("execution_node_id"),
-                )
-                targets_by_account[target.account_id] = target
-            except Exception as e:
-                log.warning("skip invalid task", task_id=task_id, account_id=t.get("account_id"), error=str(e))
-
-        if not targets_by_account:
-            log.warning("no valid targets", task_id=task_id)
-            queue.nack(msg, "no valid targets")
-            continue
-
-        # 发给节点的 body 与 signal-monitor 一致；保留每 task 的 amount_usdt/leverage（租户实例覆盖）
-        post_body = {
-            "signal": signal,
-            "amount_usdt": amount_usdt,
-            "sandbox": sandbox,
-            "tasks": [
-                {
-                    "account_id": t["account_id"],
-                    "tenant_id": t["tenant_id"],
-                    "user_id": t["user_id"],
-                    "exchange": t.get("exchange", "binance"),
-                    "api_key": t.get("api_key", ""),
-                    "api_secret": t.get("api_secret", ""),
-                    "passphrase": t.get("passphrase"),
-                    "market_type": t.get("market_type", "future"),
-                    "amount_usdt": t.get("amount_usdt"),
-                    "leverage": t.get("leverage"),
-                }
-                for t in tasks
-            ],
-        }
-
-        node_headers = {}
-        secret = config.get_str("node_auth_secret", "").strip()
-        if secret:
-            node_headers["X-Center-Token"] = secret
-        try:
-            with httpx.Client(timeout=30.0) as client:
-                resp = client.post(f"{base_url}/api/execute", json=post_body, headers=node_headers or None)
-                resp.raise_for_status()
-                data = resp.json()
-        except Exception as e:
-            log.warning("node execute POST failed", task_id=task_id, node_id=node_id, error=str(e))
-            queue.nack(msg, str(e))
-            continue
 
-        response_results = data.get("results") or []
-        session = get_session()
+def handle(msg: TaskMessage) -> dict:
+    """处理一条 node_execute 任务；失败抛异常，由 Worker nack（重试 / 死信）"""
+    task_id = msg.task_id
+    payload = msg.payload or {}
+    node_id = payload.get("node_id")
+    base_url = (payload.get("base_url") or "").rstrip("/")
+    signal = payload.get("signal") or {}
+    amount_usdt = payload.get("amount_usdt", 0)
+    sandbox = payload.get("sandbox", True)
+    tasks = payload.get("tasks") or []
+
+    if not base_url or not tasks:
+        log.warning("invalid payload missing base_url or tasks", task_id=task_id, node_id=node_id)
+        raise ValueError("missing base_url or tasks")
+
+    # 重建 ExecutionTarget 供 apply_remote_results 使用
+    targets_by_account = {}
+    for t in tasks:
         try:
-            apply_remote_results(session, signal, targets_by_account, response_results)
-            session.commit()
-            queue.ack(task_id)
-            log.info("node execute done", task_id=task_id, node_id=node_id, results=len(response_results))
+            target = ExecutionTarget(
+                tenant_id=int(t["tenant_id"]),
+                account_id=int(t["account_id"]),
+                user_id=int(t["user_id"]),
+                exchange=t.get("exchange", "binance"),
+                api_key=t.get("api_key", ""),
+                api_secret=t.get("api_secret", ""),
+                passphrase=t.get("passphrase"),
+                market_type=t.get("market_type", "future"),
+                binding_id=int(t.get("binding_id", 0)),
+                strategy_code=t.get("strategy_code", ""),
+                ratio=int(t.get("ratio", 100)),
+                execution_node_id=t.get("execution_node_id"),
+            )
+            targets_by_account[target.account_id] = target
         except Exception as e:
-            session.rollback()
-            log.error("apply_remote_results failed", task_id=task_id, error=str(e))
-            queue.nack(msg, str(e))
-        finally:
-            session.close()
+            log.warning("skip invalid task", task_id=task_id, account_id=t.get("account_id"), error=str(e))
+
+    if not targets_by_account:
+        log.warning("no valid targets", task_id=task_id)
+        raise ValueError("no valid targets")
+
+    # 发给节点的 body 与 signal-monitor 一致；保留每 task 的 amount_usdt/leverage（租户实例覆盖）
+    post_body = {
+        "signal": signal,
+        "amount_usdt": amount_usdt,
+        "sandbox": sandbox,
+        "tasks": [
+            {
+                "account_id": t["account_id"],
+                "tenant_id": t["tenant_id"],
+                "user_id": t["user_id"],
+                "exchange": t.get("exchange", "binance"),
+                "api_key": t.get("api_key", ""),
+                "api_secret": t.get("api_secret", ""),
+                "passphrase": t.get("passphrase"),
+                "market_type": t.get("market_type", "future"),
+                "amount_usdt": t.get("amount_usdt"),
+                "leverage": t.get("leverage"),
+            }
+            for t in tasks
+        ],
+    }
+
+    node_headers = {}
+    secret = config.get_str("node_auth_secret", "").strip()
+    if secret:
+        node_headers["X-Center-Token"] = secret
+    try:
+        resp = get_http_client("execution-node", timeout=NODE_EXECUTE_TIMEOUT).post(
+            f"{base_url}/api/execute", json=post_body, headers=node_headers or None,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:
+        log.warning("node execute POST failed", task_id=task_id, node_id=node_id, error=str(e))
+        raise
+
+    response_results = data.get("results") or []
+    session = get_session()
+    try:
+        apply_remote_results(session, signal, targets_by_account, response_results)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        log.error("apply_remote_results failed", task_id=task_id, error=str(e))
+        raise
+    finally:
+        session.close()
+    log.info("node execute done", task_id=task_id, node_id=node_id, results=len(response_results))
+    return {"results": len(response_results)}
+
+
+def run():
+    # 写入的持仓提交后通知持仓监控重载触发簿
+    register_session_events()
+    worker = ConcurrentTaskWorker(
+        queue=get_node_execute_queue(),
+        handler=FunctionHandler(handle),
+        concurrency=CONCURRENCY,
+        poll_timeout=POLL_TIMEOUT,
+        group_key=_node_group,
+        group_limit=PER_NODE_LIMIT,
+        drain_timeout=config.get_float("worker_drain_timeout", 30.0),
+        metrics_interval=config.get_float("worker_metrics_interval", 60.0),
+    )
+    log.info("node execute worker started", poll_timeout=POLL_TIMEOUT,
+             concurrency=CONCURRENCY, per_node_limit=PER_NODE_LIMIT)
+    try:
+        worker.run()
+    finally:
+        close_http_clients()
 
 
 if __name__ == "__main__":
@@ -6,12 +6,16 @@ Backtest Engine - 回测引擎核心
 2. 双向持仓（对冲模式）
 3. 止损止盈
 4. 基础指标计算（胜率/收益/回撤/盈亏比）
+5. 增量策略协议（StrategyBase.on_bar，逐根 O(1) 更新指标）
 """
 
 from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from libs.indicators.candle_frame import CandleFrame
+from libs.strategies.base import BarContext
+
 
 @dataclass
 class Trade:
@@ -257,8 +261,19 @@ class BacktestEngine:
         timeframe: str,
         candles: List[Dict],
         lookback: int = 50,
+        incremental: bool = False,
     ) -> BacktestResult:
-        """运行回测"""
+        """
+        运行回测
+
+        Args:
+            incremental: 是否走增量协议（on_bar），默认 False（analyze 切片路径）；
+                仅对 supports_incremental 的策略生效，其余策略忽略
+
+        注意：增量路径的指标从第 1 根 K 线起连续累积（等价于 analyze 收到全部历史），
+        而切片路径每根 K 线只给 analyze 最近 lookback+1 根、EMA 等递推指标在窗口内重新起算。
+        两者对 EMA 类策略的信号不完全相同，因此增量路径需显式开启。
+        """
         
         # 如果策略声明了 min_lookback，使用较大值确保足够的历史数据
         strategy_min = getattr(strategy, "min_lookback", 0)
@@ -277,18 +292,32 @@ class BacktestEngine:
         # 重置状态
         self._reset()
         
+        # 列式容器只构建一次：切片为零拷贝视图（不再每根 K 线复制 list）
+        # 声明 accepts_candle_frame 的策略直接拿视图；旧策略仍拿 list 切片（逐根 dict 下标访问更快）
+        # 回测 K 线可能带字符串时间戳 / 额外字段，保留原始行（引擎本身已持有该列表）
+        frame = CandleFrame.from_candles(candles, keep_rows=True)
+        history_source = frame if getattr(strategy, "accepts_candle_frame", False) else candles
+        
         # 保存完整candles引用，供_check_pending使用
-        self._full_candles = candles
+        self._full_candles = history_source
         
         # 保存策略引用，供_check_pending_orders使用
         self._strategy = strategy
         
+        # ── 增量协议：显式开启且策略支持 on_bar 时逐根推送，不再切片历史 ──
+        # 前 lookback 根作为预热（只更新指标状态），之后每根 O(1)
+        incremental = incremental and getattr(strategy, "supports_incremental", False)
+        full_history = getattr(strategy, "requires_full_history", False)
+        if incremental:
+            strategy.on_start(symbol, timeframe)
+            for j in range(lookback):
+                strategy.on_bar(
+                    candles[j],
+                    BarContext(symbol=symbol, timeframe=timeframe, index=j, warmup=True),
+                )
+        
         # 逐根K线回放
         for i in range(lookback, len(candles)):
-            if getattr(strategy, "requires_full_history", False):
-                history = candles[: i + 1]
-            else:
-                history = candles[i - lookback : i + 1]
             current_candle = candles[i]
             current_price = current_candle["close"]
             current_open = current_candle["open"]
@@ -330,12 +359,22 @@ class BacktestEngine:
             positions = self._build_positions_info()
             
             # 调用策略分析
-            signal = strategy.analyze(
-                symbol=symbol,
-                timeframe=timeframe,
-                candles=history,
-                positions=positions,
-            )
+            if incremental:
+                signal = strategy.on_bar(
+                    current_candle,
+                    BarContext(symbol=symbol, timeframe=timeframe, index=i, positions=positions),
+                )
+            else:
+                if full_history:
+                    history = history_source[: i + 1]
+                else:
+                    history = history_source[i - lookback : i + 1]
+                signal = strategy.analyze(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    candles=history,
+                    positions=positions,
+                )
             
             # 处理信号（含回撤保护 + 连续亏损保护）
             if signal and not self._is_risk_halted():
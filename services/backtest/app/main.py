@@ -12,16 +12,17 @@ Backtest Service - HTTP API
 
 import sys
 import os
+import functools
 import httpx
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from flask import Flask, request, jsonify, g
 from werkzeug.exceptions import HTTPException
-from libs.core import get_config, get_logger, setup_logging, gen_id, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, AppError, get_http_client
 from libs.strategies import get_strategy
 from services.backtest.app.backtest_engine import BacktestEngine, BacktestResult
 
@@ -106,6 +107,7 @@ def run_backtest():
         "initial_balance": 10000.0,  // 可选，默认 10000
         "commission_rate": 0.001,    // 可选，默认 0.001
         "lookback": 50,              // 可选，默认 50
+        "incremental": true,         // 可选，走增量 on_bar 路径（默认 false；仅 supports_incremental 的策略生效，信号与切片路径不同）
         "risk_per_trade": 100        // 可选，以损定仓：每笔最大亏损（0=固定仓位）
     }
     
@@ -180,6 +182,7 @@ def run_backtest():
             timeframe=timeframe,
             candles=candles,
             lookback=lookback,
+            incremental=bool(data.get("incremental", False)),
         )
         
         log.info(
@@ -274,9 +277,29 @@ def _fetch_candles_from_data_provider(
     limit: int = 500,
     exchange: str = None,
     source: str = "live",
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    backfill: bool = False,
 ) -> List[dict]:
+    """从 data-provider 获取 K 线数据（区间读取有缺口时记录告警，参数同 _fetch_candles_with_gaps）"""
+    candles, _ = _fetch_candles_with_gaps(
+        symbol, timeframe, limit, exchange, source, start_time, end_time, backfill,
+    )
+    return candles
+
+
+def _fetch_candles_with_gaps(
+    symbol: str,
+    timeframe: str,
+    limit: int = 500,
+    exchange: str = None,
+    source: str = "live",
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    backfill: bool = False,
+) -> Tuple[List[dict], List[List[int]]]:
     """
-    从 data-provider 获取 K 线数据
+    从 data-provider 获取 K 线数据及区间内仍缺失的时间段
     
     Args:
         symbol: 交易对
@@ -284,27 +307,42 @@ def _fetch_candles_from_data_provider(
         limit: K 线数量
         exchange: 交易所（可选）
         source: 数据源 mock/live
+        start_time: 开始时间戳（秒，可选）；指定时从本地 K 线存储按区间读取，忽略 limit
+        end_time: 结束时间戳（秒，不包含，可选）
+        backfill: 区间有缺口时由 data-provider 同步从交易所回填（仅 live；长区间请先运行
+            scripts/backfill_candles.py，避免单个请求内分页拉取超时）
     
     Returns:
-        K 线数据列表
+        (K 线数据列表, 缺失区间 [[start, end), ...])；按 limit 读取时缺失区间为空。
+        有缺口时回测会跨过缺失区间运行，这里记录告警，调用方可把缺口返回给请求方
     """
-    params = {
-        "symbol": symbol,
-        "timeframe": timeframe,
-        "limit": limit,
-        "source": source,
-    }
+    if start_time is not None:
+        params = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "start": int(start_time),
+            "backfill": "true" if backfill and source == "live" else "false",
+        }
+        if end_time is not None:
+            params["end"] = int(end_time)
+        url = f"{DATA_PROVIDER_URL}/api/candles/range"
+        timeout = 300.0
+    else:
+        params = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "limit": limit,
+            "source": source,
+        }
+        url = f"{DATA_PROVIDER_URL}/api/candles"
+        timeout = 30.0
     if exchange:
         params["exchange"] = exchange
     
-    url = f"{DATA_PROVIDER_URL}/api/candles"
-    
     try:
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            return data.get("candles", [])
+        resp = get_http_client("data-provider").get(url, params=params, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
     except httpx.TimeoutException:
         raise Exception(f"Data provider timeout: {url}")
     except httpx.HTTPStatusError as e:
@@ -312,6 +350,15 @@ def _fetch_candles_from_data_provider(
     except Exception as e:
         raise Exception(f"Failed to fetch candles: {str(e)}")
 
+    candles = data.get("candles", [])
+    gaps = data.get("gaps") or []
+    if gaps:
+        log.warning(
+            f"K线区间存在缺口: symbol={symbol}, timeframe={timeframe}, gaps={len(gaps)}, "
+            f"first={gaps[0]}, candles={len(candles)}（可先运行 scripts/backfill_candles.py 或传 backfill=true）"
+        )
+    return candles, gaps
+
 
 @app.route("/api/backtest/run-live", methods=["POST"])
 def run_backtest_live():
@@ -325,10 +372,14 @@ def run_backtest_live():
         "symbol": "BTC/USDT",
         "timeframe": "15m",
         "limit": 500,                 // K线数量，默认 500
+        "start_time": 1704067200,     // 可选，区间回测开始时间（秒），指定后从本地 K 线存储读取并忽略 limit
+        "end_time": 1735689600,       // 可选，区间结束时间（秒，不包含）
+        "backfill": false,            // 可选，区间缺口同步从交易所回填（默认 false，长区间请用 scripts/backfill_candles.py）
         "exchange": "binance",        // 可选，默认使用配置
         "initial_balance": 10000.0,   // 可选，默认 10000
         "commission_rate": 0.001,     // 可选，默认 0.001
-        "lookback": 50                // 可选，默认 50
+        "lookback": 50,               // 可选，默认 50
+        "incremental": true           // 可选，走增量 on_bar 路径（默认 false；仅 supports_incremental 的策略生效，信号与切片路径不同）
     }
     
     Response:
@@ -336,6 +387,7 @@ def run_backtest_live():
         "success": true,
         "data_source": "live",
         "candles_count": 500,
+        "gaps": [[start, end], ...],  // 区间读取时本地存储仍缺失的时间段（回测跨过这些区间运行）
         "result": BacktestResult
     }
     """
@@ -373,12 +425,15 @@ def run_backtest_live():
         )
         
         try:
-            candles = _fetch_candles_from_data_provider(
+            candles, gaps = _fetch_candles_with_gaps(
                 symbol=symbol,
                 timeframe=timeframe,
                 limit=limit,
                 exchange=exchange,
                 source="live",
+                start_time=data.get("start_time"),
+                end_time=data.get("end_time"),
+                backfill=bool(data.get("backfill", False)),
             )
         except Exception as e:
             return jsonify(
@@ -438,6 +493,7 @@ def run_backtest_live():
             timeframe=timeframe,
             candles=candles,
             lookback=lookback,
+            incremental=bool(data.get("incremental", False)),
         )
         
         log.info(
@@ -452,6 +508,7 @@ def run_backtest_live():
             "data_source": "live",
             "exchange": exchange or "binance",
             "candles_count": len(candles),
+            "gaps": gaps,
             "result": _backtest_result_to_dict(result)
         }), 200
         
@@ -465,6 +522,21 @@ def run_backtest_live():
 
 # ========== 参数优化 API ==========
 
+# 优化器回测使用的引擎设置（同时参与评估缓存键，修改后旧缓存自动失效）
+OPTIMIZER_ENGINE_SETTINGS = {
+    "initial_balance": 10000,
+    "commission_rate": 0.001,
+    "lookback": 50,
+}
+
+# 遗传算法评估缓存持久化目录（空 = 仅进程内缓存）
+OPTIMIZER_CACHE_DIR = config.get_str("optimizer_cache_dir", "")
+
+# 优化器进程池启动方式：本服务为多线程 Flask，fork 会把其他请求线程持有的锁、
+# 已打开的 DB / Redis 连接复制进 worker，默认 forkserver
+OPTIMIZER_START_METHOD = config.get_str("optimizer_start_method", "forkserver") or None
+
+
 def _run_backtest_for_optimizer(
     strategy_code: str,
     config: dict,
@@ -474,13 +546,17 @@ def _run_backtest_for_optimizer(
 ) -> dict:
     """为优化器提供的回测函数"""
     strategy = get_strategy(strategy_code, config)
-    engine = BacktestEngine(initial_balance=10000, commission_rate=0.001)
+    engine = BacktestEngine(
+        initial_balance=OPTIMIZER_ENGINE_SETTINGS["initial_balance"],
+        commission_rate=OPTIMIZER_ENGINE_SETTINGS["commission_rate"],
+    )
     result = engine.run(
         strategy=strategy,
         symbol=symbol,
         timeframe=timeframe,
         candles=candles,
-        lookback=50,
+        lookback=OPTIMIZER_ENGINE_SETTINGS["lookback"],
+        incremental=False,
     )
     return {
         "total_pnl": result.total_pnl,
@@ -493,6 +569,11 @@ def _run_backtest_for_optimizer(
     }
 
 
+def _run_genetic_backtest(params: dict, **kwargs) -> dict:
+    """遗传算法回测函数（模块级，可 pickle，供进程池使用）"""
+    return _run_backtest_for_optimizer(config=params, **kwargs)
+
+
 @app.route("/api/backtest/optimize", methods=["POST"])
 def optimize_strategy():
     """
@@ -511,7 +592,8 @@ def optimize_strategy():
         "score_by": "pnl",               // 优化目标: pnl / sharpe / win_rate
         "constraints": {                 // 可选约束
             "slow_ma_gt_fast_ma": true
-        }
+        },
+        "max_workers": 8                 // 可选，并行进程数（默认 1，上限 CPU 核数；响应返回实际进程数）
     }
     
     Response:
@@ -526,6 +608,7 @@ def optimize_strategy():
     }
     """
     from libs.optimizer import GridOptimizer, ParameterGrid
+    from libs.optimizer.parallel import resolve_workers
     
     try:
         data = request.get_json()
@@ -547,6 +630,8 @@ def optimize_strategy():
         limit = data.get("limit", 300)
         score_by = data.get("score_by", "pnl")
         constraints_config = data.get("constraints", {})
+        # 实际并行进程数（上限 CPU 核数），响应中返回该值
+        max_workers = resolve_workers(int(data.get("max_workers", 1) or 1))
         
         # 1. 获取 K 线数据
         log.info(f"获取K线数据: symbol={symbol}, timeframe={timeframe}, limit={limit}")
@@ -556,6 +641,9 @@ def optimize_strategy():
             timeframe=timeframe,
             limit=limit,
             source="live",
+            start_time=data.get("start_time"),
+            end_time=data.get("end_time"),
+            backfill=bool(data.get("backfill", False)),
         )
         
         if not candles or len(candles) < 100:
@@ -590,10 +678,12 @@ def optimize_strategy():
             backtest_func=_run_backtest_for_optimizer,
             score_func=score_func,
             constraints=constraints,
+            max_workers=max_workers,
+            start_method=OPTIMIZER_START_METHOD,
         )
         
         # 6. 执行优化
-        log.info("开始参数优化...")
+        log.info(f"开始参数优化... workers={max_workers}")
         
         result = optimizer.optimize(
             strategy_code=strategy_code,
@@ -607,6 +697,7 @@ def optimize_strategy():
         
         return jsonify({
             "success": True,
+            "max_workers": max_workers,
             **result.to_dict(),
         }), 200
         
@@ -635,21 +726,32 @@ def optimize_strategy_genetic():
         "config": {
             "population_size": 30,
             "generations": 15,
-            "mutation_rate": 0.2
+            "mutation_rate": 0.2,
+            "seed": 42                   // 可选，固定随机种子（结果可复现）
         },
         "score_by": "pnl",
-        "constraints": ["slow_ma > fast_ma"]
+        "constraints": ["slow_ma > fast_ma"],
+        "max_workers": 8,                // 可选，并行进程数（默认 1，每代一批并行评估）
+        "persist_cache": true            // 可选，评估结果写入 optimizer_cache_dir 供后续调用复用（默认 true）
     }
+    
+    Response 额外包含 "cache": {"hits", "misses", "hit_rate", "persistent"}
     """
+    from libs.optimizer.parallel import resolve_workers
     from libs.optimizer import (
         GeneticOptimizer,
         GeneticConfig,
         ParameterSpace,
+        EvaluationCache,
+        fingerprint_candles,
+        fingerprint_code,
         fitness_pnl,
         fitness_sharpe,
         fitness_calmar,
         fitness_composite,
     )
+    from libs import indicators
+    from libs.strategies import STRATEGY_REGISTRY, StrategyBase
     import time
     
     try:
@@ -673,6 +775,8 @@ def optimize_strategy_genetic():
         score_by = data.get("score_by", "pnl")
         ga_config = data.get("config", {})
         constraint_exprs = data.get("constraints", [])
+        # 实际并行进程数（上限 CPU 核数），响应中返回该值
+        max_workers = resolve_workers(int(data.get("max_workers", 1) or 1))
         
         # 1. 获取 K 线数据
         log.info(f"遗传算法优化: symbol={symbol}, timeframe={timeframe}")
@@ -682,6 +786,9 @@ def optimize_strategy_genetic():
             timeframe=timeframe,
             limit=limit,
             source="live",
+            start_time=data.get("start_time"),
+            end_time=data.get("end_time"),
+            backfill=bool(data.get("backfill", False)),
         )
         
         if not candles or len(candles) < 100:
@@ -726,16 +833,14 @@ def optimize_strategy_genetic():
                     a, b = parts
                     constraints.append(lambda p, a=a, b=b: p.get(a, 0) < p.get(b, 0))
         
-        # 5. 创建回测函数（闭包）
-        def backtest_func(params):
-            result = _run_backtest_for_optimizer(
-                strategy_code=strategy_code,
-                config=params,  # params 作为策略配置
-                symbol=symbol,
-                timeframe=timeframe,
-                candles=candles,
-            )
-            return result
+        # 5. 创建回测函数（partial 可 pickle，K 线经进程池 initializer 每个进程只传一次）
+        backtest_func = functools.partial(
+            _run_genetic_backtest,
+            strategy_code=strategy_code,
+            symbol=symbol,
+            timeframe=timeframe,
+            candles=candles,
+        )
         
         # 6. 遗传算法配置
         config_obj = GeneticConfig(
@@ -746,24 +851,48 @@ def optimize_strategy_genetic():
             mutation_rate=ga_config.get("mutation_rate", 0.2),
             tournament_size=ga_config.get("tournament_size", 3),
             early_stop_generations=ga_config.get("early_stop", 5),
+            seed=ga_config.get("seed"),
         )
         
-        # 7. 创建并运行优化器
+        # 7. 评估缓存：策略 + 代码指纹 + 数据集指纹 + 引擎设置 决定命名空间，参数决定键
+        #    代码指纹覆盖策略类（含基类）、指标库与回测引擎源码，改代码后持久化结果自动失效
+        persist_cache = data.get("persist_cache", True)
+        cache = EvaluationCache(
+            namespace={
+                "strategy_code": strategy_code,
+                "code": fingerprint_code(
+                    STRATEGY_REGISTRY.get(strategy_code, StrategyBase), indicators, BacktestEngine,
+                ),
+                "symbol": symbol,
+                "timeframe": timeframe,
+                "dataset": fingerprint_candles(candles),
+                "engine": OPTIMIZER_ENGINE_SETTINGS,
+            },
+            path=OPTIMIZER_CACHE_DIR if persist_cache else None,
+        )
+        
+        # 8. 创建并运行优化器
         optimizer = GeneticOptimizer(
             param_space=param_space,
             backtest_func=backtest_func,
             fitness_func=fitness_func,
             config=config_obj,
             constraints=constraints,
+            max_workers=max_workers,
+            cache=cache,
+            start_method=OPTIMIZER_START_METHOD,
         )
         
         start_time = time.time()
         result = optimizer.optimize(verbose=False)
         elapsed = time.time() - start_time
         
-        log.info(f"遗传算法完成: best_fitness={result.best_fitness:.4f}, generations={result.generations_run}")
+        log.info(
+            f"遗传算法完成: best_fitness={result.best_fitness:.4f}, generations={result.generations_run}, "
+            f"cache_hits={result.cache_stats.get('hits')}, cache_misses={result.cache_stats.get('misses')}"
+        )
         
-        # 8. 排序所有个体，取 top 10
+        # 9. 排序所有个体，取 top 10
         all_sorted = sorted(
             result.all_individuals,
             key=lambda x: x.get("fitness", float("-inf")),
@@ -777,6 +906,8 @@ def optimize_strategy_genetic():
             "best_metrics": result.best_metrics,
             "generations_run": result.generations_run,
             "total_evaluations": len(result.all_individuals),
+            "max_workers": max_workers,
+            "cache": result.cache_stats,
             "elapsed_seconds": round(elapsed, 2),
             "top_10": all_sorted,
             "evolution_history": [
@@ -851,6 +982,9 @@ def backtest_portfolio():
             timeframe=timeframe,
             limit=limit,
             source="live",
+            start_time=data.get("start_time"),
+            end_time=data.get("end_time"),
+            backfill=bool(data.get("backfill", False)),
         )
         
         if not candles or len(candles) < 100:
@@ -27,6 +27,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from libs.core.database import init_database
 from libs.core.logger import get_logger, setup_logging
 from libs.core import get_config
+from libs.position import register_session_events
 
 from .routers import orders, positions, accounts, analytics, auth, strategies, signal_monitor, nodes, sync, tenants, tenant_strategies, admins, dashboard, users, bindings, exchange_accounts, quota, withdrawals, monitor, user_manage, audit_logs, pointcard_rewards, signal_events, profit_pools, user_analytics, batch_ops, risk_config, pending_orders
 
@@ -39,6 +40,8 @@ setup_logging(
 log = get_logger("data-api")
 
 init_database()
+# 手动改 SL/TP、同步持仓后通知持仓监控重载触发簿
+register_session_events()
 log.info("data-api starting")
 
 app = FastAPI(
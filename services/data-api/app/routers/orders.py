@@ -145,7 +145,7 @@ def manual_order(
 ):
     """手动下单 — 代理到 signal-monitor /api/trading/execute"""
     import httpx
-    from libs.core import get_config
+    from libs.core import get_config, get_http_client
     cfg = get_config()
     sm_url = cfg.get_str("signal_monitor_url", "http://127.0.0.1:8020").rstrip("/")
 
@@ -161,10 +161,10 @@ def manual_order(
         payload["strategy"] = body.strategy
 
     try:
-        with httpx.Client(timeout=30.0) as client:
-            r = client.post(f"{sm_url}/api/trading/execute", json=payload)
-            r.raise_for_status()
-            return r.json()
+        client = get_http_client("signal-monitor")
+        r = client.post(f"{sm_url}/api/trading/execute", json=payload, timeout=30.0)
+        r.raise_for_status()
+        return r.json()
     except httpx.ConnectError:
         raise HTTPException(status_code=502, detail="无法连接 signal-monitor 服务，请确认已启动")
     except httpx.HTTPStatusError as e:
@@ -180,7 +180,7 @@ def close_position(
 ):
     """手动平仓 — 代理到 signal-monitor /api/trading/close"""
     import httpx
-    from libs.core import get_config
+    from libs.core import get_config, get_http_client
     cfg = get_config()
     sm_url = cfg.get_str("signal_monitor_url", "http://127.0.0.1:8020").rstrip("/")
 
@@ -190,10 +190,10 @@ def close_position(
             payload["account_id"] = body.account_id
         if body.position_side:
             payload["position_side"] = body.position_side
-        with httpx.Client(timeout=30.0) as client:
-            r = client.post(f"{sm_url}/api/trading/close", json=payload)
-            r.raise_for_status()
-            return r.json()
+        client = get_http_client("signal-monitor")
+        r = client.post(f"{sm_url}/api/trading/close", json=payload, timeout=30.0)
+        r.raise_for_status()
+        return r.json()
     except httpx.ConnectError:
         raise HTTPException(status_code=502, detail="无法连接 signal-monitor 服务")
     except Exception as e:
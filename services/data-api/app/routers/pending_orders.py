@@ -149,22 +149,23 @@ def cancel_pending_limit_order(
 
     # 代理到 signal-monitor
     import httpx
-    from libs.core import get_config
+    from libs.core import get_config, get_http_client
     cfg = get_config()
     sm_url = cfg.get_str("signal_monitor_url", "http://127.0.0.1:8020").rstrip("/")
 
     try:
-        with httpx.Client(timeout=15.0) as client:
-            r = client.post(
-                f"{sm_url}/api/pending-orders/cancel",
-                json={
-                    "pending_key": row.pending_key,
-                    "reason": f"管理员 {_admin.get('username', '?')} 手动撤单",
-                },
-            )
-            r.raise_for_status()
-            result = r.json()
-            return {"success": True, "message": "撤单指令已发送", "detail": result}
+        client = get_http_client("signal-monitor")
+        r = client.post(
+            f"{sm_url}/api/pending-orders/cancel",
+            json={
+                "pending_key": row.pending_key,
+                "reason": f"管理员 {_admin.get('username', '?')} 手动撤单",
+            },
+            timeout=15.0,
+        )
+        r.raise_for_status()
+        result = r.json()
+        return {"success": True, "message": "撤单指令已发送", "detail": result}
     except httpx.ConnectError:
         raise HTTPException(status_code=502, detail="无法连接 signal-monitor 服务，请确认已启动")
     except httpx.HTTPStatusError as e:
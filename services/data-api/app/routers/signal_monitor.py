@@ -10,7 +10,7 @@ from typing import List, Optional, Dict, Any, Tuple
 from fastapi import APIRouter, Depends, Query
 import httpx
 
-from libs.core import get_config
+from libs.core import get_config, get_http_client
 
 from ..deps import get_current_admin
 
@@ -24,10 +24,10 @@ DATA_PROVIDER_URL = config.get_str("data_provider_url", "http://127.0.0.1:8005")
 def signal_monitor_status():
     """获取 signal-monitor 运行状态（running、last_signal、total_signals 等）"""
     try:
-        with httpx.Client(timeout=5.0) as client:
-            r = client.get(f"{SIGNAL_MONITOR_URL}/api/status")
-            r.raise_for_status()
-            return r.json()
+        client = get_http_client("signal-monitor")
+        r = client.get(f"{SIGNAL_MONITOR_URL}/api/status", timeout=5.0)
+        r.raise_for_status()
+        return r.json()
     except Exception as e:
         return {
             "running": False,
@@ -45,10 +45,10 @@ def trigger_position_monitor_scan(
     仅管理员可调用。会立即执行一次扫描并返回结果。
     """
     try:
-        with httpx.Client(timeout=30.0) as client:
-            r = client.post(f"{SIGNAL_MONITOR_URL}/api/position-monitor/scan")
-            r.raise_for_status()
-            return r.json()
+        client = get_http_client("signal-monitor")
+        r = client.post(f"{SIGNAL_MONITOR_URL}/api/position-monitor/scan", timeout=30.0)
+        r.raise_for_status()
+        return r.json()
     except httpx.ConnectError:
         return {"success": False, "error": "无法连接 signal-monitor 服务"}
     except Exception as e:
@@ -113,34 +113,34 @@ def get_realtime_prices(
                 query_items.append((None, ccxt_sym, sym))
 
     try:
-        with httpx.Client(timeout=10.0) as client:
-            for exchange, ccxt_sym, orig_sym in query_items:
-                try:
-                    params: dict = {"symbol": ccxt_sym}
-                    if exchange:
-                        params["exchange"] = exchange
-                    r = client.get(f"{DATA_PROVIDER_URL}/api/ticker", params=params)
-                    if r.status_code == 200:
-                        data = r.json()
-                        price_info = {
-                            "last": data.get("last"),
-                            "bid": data.get("bid"),
-                            "ask": data.get("ask"),
-                            "volume_24h": data.get("volume_24h"),
-                            "exchange": data.get("exchange") or exchange or "",
-                        }
-                    else:
-                        price_info = {"last": None, "error": f"HTTP {r.status_code}"}
-                    # 旧格式（按 symbol）
-                    results[orig_sym] = price_info
-                    # 新格式（按 exchange:symbol）
-                    ex_key = f"{exchange}:{orig_sym}" if exchange else orig_sym
-                    exchange_results[ex_key] = price_info
-                except Exception as e:
-                    err = {"last": None, "error": str(e)}
-                    results[orig_sym] = err
-                    ex_key = f"{exchange}:{orig_sym}" if exchange else orig_sym
-                    exchange_results[ex_key] = err
+        client = get_http_client("data-provider")
+        for exchange, ccxt_sym, orig_sym in query_items:
+            try:
+                params: dict = {"symbol": ccxt_sym}
+                if exchange:
+                    params["exchange"] = exchange
+                r = client.get(f"{DATA_PROVIDER_URL}/api/ticker", params=params, timeout=10.0)
+                if r.status_code == 200:
+                    data = r.json()
+                    price_info = {
+                        "last": data.get("last"),
+                        "bid": data.get("bid"),
+                        "ask": data.get("ask"),
+                        "volume_24h": data.get("volume_24h"),
+                        "exchange": data.get("exchange") or exchange or "",
+                    }
+                else:
+                    price_info = {"last": None, "error": f"HTTP {r.status_code}"}
+                # 旧格式（按 symbol）
+                results[orig_sym] = price_info
+                # 新格式（按 exchange:symbol）
+                ex_key = f"{exchange}:{orig_sym}" if exchange else orig_sym
+                exchange_results[ex_key] = price_info
+            except Exception as e:
+                err = {"last": None, "error": str(e)}
+                results[orig_sym] = err
+                ex_key = f"{exchange}:{orig_sym}" if exchange else orig_sym
+                exchange_results[ex_key] = err
     except Exception as e:
         return {"success": False, "error": str(e), "prices": {}, "exchange_prices": {}}
 
@@ -9,13 +9,16 @@ Data Provider Service
 
 端点：
 - GET /api/candles?symbol=...&timeframe=...&limit=...
+- GET /api/candles/range?symbol=...&timeframe=...&start=...&end=... - 本地存储区间读取（流式）
 - GET /api/mtf/candles?symbol=...&timeframes=...&limit=...
 - GET /api/macro/events?from=...&to=...
 - GET /api/exchanges - 列出支持的交易所
 - GET /api/ticker?symbol=... - 获取最新行情
+- GET /api/fetch/stats - 上游请求合并统计
 - WS /ws - WebSocket 实时行情推送
 """
 
+import json
 import time
 import math
 import random
@@ -23,11 +26,11 @@ import asyncio
 from typing import List, Optional, Dict, Any, Set
 
 from fastapi import FastAPI, Request, Query, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
-from libs.core import get_config, get_logger, setup_logging, gen_id, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, AppError, SingleFlight
 
 # v1 Phase 5: 交易所数据接入
 try:
@@ -40,10 +43,18 @@ except ImportError:
 try:
     from libs.core import init_redis, check_redis_connection
     from libs.cache import CandleCache, TickerCache, CachedCandle, CachedTicker, get_candle_cache, get_ticker_cache
+    from libs.cache import is_series_fresh, merge_tail
     CACHE_AVAILABLE = True
 except ImportError:
     CACHE_AVAILABLE = False
 
+# 本地 K 线存储（长周期回测）
+try:
+    from libs.cache import backfill_candles, get_candle_store
+    STORE_AVAILABLE = True
+except ImportError:
+    STORE_AVAILABLE = False
+
 # v1 Phase 7: WebSocket 实时推送
 try:
     from libs.ws import ConnectionManager, TickerStream, get_connection_manager, get_ticker_stream
@@ -103,6 +114,10 @@ app = FastAPI(title="data-provider")
 DATA_SOURCE = config.get_str("data_source", "mock")
 DEFAULT_EXCHANGE = config.get_str("default_exchange", "binance")
 CACHE_ENABLED = config.get_bool("data_cache_enabled", True)
+# 未收盘 K 线的最大缓存时长（秒）；进入新周期时立即补拉尾部
+CANDLE_CACHE_MAX_AGE = config.get_float("candle_cache_max_age", 10.0)
+# 尾部缺失超过该根数时整段重拉
+CANDLE_TAIL_MAX_BARS = 200
 
 # 初始化 Redis 缓存
 if CACHE_AVAILABLE and CACHE_ENABLED:
@@ -110,6 +125,10 @@ if CACHE_AVAILABLE and CACHE_ENABLED:
         init_redis()
         if check_redis_connection():
             logger.info("redis cache initialized")
+            # K 线缓存旧格式（Hash + JSON）迁移为二进制记录
+            migrated = get_candle_cache().migrate_legacy()
+            if migrated:
+                logger.info("legacy candle cache migrated", keys=migrated)
         else:
             logger.warning("redis not available, cache disabled")
             CACHE_ENABLED = False
@@ -148,6 +167,12 @@ TIMEFRAME_SECONDS = {
     "1h": 3600,
     "4h": 14400,
     "1d": 86400,
+    "1w": 604800,
+}
+
+# 时间周期 -> 起点偏移秒数（与 libs/cache/candle_store 一致：周线按周一 00:00 UTC 对齐）
+TIMEFRAME_OFFSETS = {
+    "1w": 345600,
 }
 
 
@@ -214,10 +239,121 @@ def health():
         "exchange_available": EXCHANGE_AVAILABLE,
         "default_exchange": DEFAULT_EXCHANGE,
         "cache_enabled": CACHE_ENABLED and CACHE_AVAILABLE,
+        "candle_store_enabled": STORE_AVAILABLE and get_candle_store() is not None,
         "websocket_available": WS_AVAILABLE,
     }
 
 
+# 上游请求合并：同一 (exchange, symbol, timeframe, limit) / (exchange, symbol) 的并发请求共享一次交易所调用
+_candle_flight = SingleFlight("candles")
+_tail_flight = SingleFlight("candles_tail")
+_ticker_flight = SingleFlight("ticker")
+
+
+def _flight_symbol(symbol: str) -> str:
+    """合并键中的 symbol 标准化（BTC/USDT 与 BTCUSDT 视为同一请求）"""
+    return symbol.upper().replace("/", "")
+
+
+async def _fetch_live_candles(
+    client: ExchangeClient,
+    exchange: str,
+    symbol: str,
+    timeframe: str,
+    limit: int,
+) -> List[Candle]:
+    """从交易所获取 K 线并写入缓存"""
+    ohlcv_list = await client.fetch_ohlcv(symbol, timeframe, limit)
+    candles = [
+        Candle(
+            timestamp=ohlcv.timestamp // 1000,
+            open=ohlcv.open,
+            high=ohlcv.high,
+            low=ohlcv.low,
+            close=ohlcv.close,
+            volume=ohlcv.volume,
+        )
+        for ohlcv in ohlcv_list
+    ]
+    
+    # 写入缓存
+    if CACHE_ENABLED and CACHE_AVAILABLE and candles:
+        cache = get_candle_cache()
+        cached_candles = [
+            CachedCandle(
+                timestamp=c.timestamp,
+                open=c.open,
+                high=c.high,
+                low=c.low,
+                close=c.close,
+                volume=c.volume,
+            )
+            for c in candles
+        ]
+        cache.set(symbol, timeframe, cached_candles, exchange)
+    
+    return candles
+
+
+async def _fetch_candle_tail(
+    client: ExchangeClient,
+    exchange: str,
+    symbol: str,
+    timeframe: str,
+    since: int,
+    limit: int,
+) -> List[CachedCandle]:
+    """从交易所拉取 since（秒）起的尾部 K 线，并合并进缓存"""
+    ohlcv_list = await client.fetch_ohlcv(symbol, timeframe, limit, since=since * 1000)
+    tail = [
+        CachedCandle(
+            timestamp=ohlcv.timestamp // 1000,
+            open=ohlcv.open,
+            high=ohlcv.high,
+            low=ohlcv.low,
+            close=ohlcv.close,
+            volume=ohlcv.volume,
+        )
+        for ohlcv in ohlcv_list
+        if ohlcv.timestamp // 1000 >= since
+    ]
+    if tail:
+        get_candle_cache().update_tail(symbol, timeframe, tail, exchange)
+    return tail
+
+
+async def _refresh_cached_tail(
+    exchange: str,
+    symbol: str,
+    timeframe: str,
+    cached: List[CachedCandle],
+) -> Optional[List[CachedCandle]]:
+    """
+    缓存序列补尾：since=末尾 K 线时间戳，拉取缺失的几根并合并
+
+    Returns:
+        合并后的序列；缺失过多返回 None（由调用方整段重拉）；上游失败时返回原序列
+    """
+    interval = TIMEFRAME_SECONDS[timeframe]
+    last_ts = cached[-1].timestamp
+    missing = (int(time.time()) - last_ts) // interval + 1
+    if missing > CANDLE_TAIL_MAX_BARS:
+        return None
+
+    client = get_exchange_client(exchange)
+    if not client:
+        return cached
+    try:
+        tail = await _tail_flight.do(
+            (exchange, _flight_symbol(symbol), timeframe, last_ts),
+            lambda: _fetch_candle_tail(client, exchange, symbol, timeframe, last_ts, missing + 1),
+        )
+    except Exception as e:
+        logger.warning("candle tail fetch failed, serving cached", symbol=symbol, timeframe=timeframe, error=str(e))
+        return cached
+    return merge_tail(cached, tail)
+
+
 @app.get("/api/candles", response_model=CandlesResponse)
 async def get_candles(
     request: Request,
@@ -249,8 +385,15 @@ async def get_candles(
         # 1. 尝试从缓存获取
         if CACHE_ENABLED and CACHE_AVAILABLE and not no_cache:
             cache = get_candle_cache()
-            cached = cache.get(symbol, timeframe, limit, use_exchange)
+            cached, updated_at = cache.get_with_meta(symbol, timeframe, limit, use_exchange)
             if cached and len(cached) >= limit * 0.8:  # 缓存命中率 >= 80%
+                # 已进入新周期或未收盘 K 线过旧：只补拉尾部
+                if not is_series_fresh(
+                    cached[-1].timestamp, updated_at, TIMEFRAME_SECONDS[timeframe], CANDLE_CACHE_MAX_AGE,
+                    offset=TIMEFRAME_OFFSETS.get(timeframe, 0),
+                ):
+                    cached = await _refresh_cached_tail(use_exchange, symbol, timeframe, cached)
+            if cached and len(cached) >= limit * 0.8:
                 candles = [
                     Candle(
                         timestamp=c.timestamp,
@@ -271,40 +414,15 @@ async def get_candles(
                     count=len(candles),
                 )
         
-        # 2. 缓存未命中，从交易所获取
+        # 2. 缓存未命中，从交易所获取（并发的相同请求合并为一次上游调用）
         if not candles:
             client = get_exchange_client(use_exchange)
             if client:
                 try:
-                    ohlcv_list = await client.fetch_ohlcv(symbol, timeframe, limit)
-                    candles = [
-                        Candle(
-                            timestamp=ohlcv.timestamp // 1000,
-                            open=ohlcv.open,
-                            high=ohlcv.high,
-                            low=ohlcv.low,
-                            close=ohlcv.close,
-                            volume=ohlcv.volume,
-                        )
-                        for ohlcv in ohlcv_list
-                    ]
-                    
-                    # 3. 写入缓存
-                    if CACHE_ENABLED and CACHE_AVAILABLE and candles:
-                        cache = get_candle_cache()
-                        cached_candles = [
-                            CachedCandle(
-                                timestamp=c.timestamp,
-                                open=c.open,
-                                high=c.high,
-                                low=c.low,
-                                close=c.close,
-                                volume=c.volume,
-                            )
-                            for c in candles
-                        ]
-                        cache.set(symbol, timeframe, cached_candles, use_exchange)
-                    
+                    candles = await _candle_flight.do(
+                        (use_exchange, _flight_symbol(symbol), timeframe, limit),
+                        lambda: _fetch_live_candles(client, use_exchange, symbol, timeframe, limit),
+                    )
                     logger.info(
                         "live candles fetched",
                         request_id=request_id,
@@ -340,6 +458,68 @@ async def get_candles(
     )
 
 
+@app.get("/api/candles/range")
+async def get_candles_range(
+    request: Request,
+    symbol: str = Query(..., description="交易对，如 BTCUSDT 或 BTC/USDT"),
+    timeframe: str = Query("1h", description="时间周期"),
+    start: int = Query(..., ge=0, description="开始时间戳（秒，包含）"),
+    end: int = Query(None, ge=0, description="结束时间戳（秒，不包含），默认当前时间"),
+    exchange: str = Query(None, description="交易所（可选，默认使用配置）"),
+    backfill: bool = Query(False, description="读取前先从交易所回填缺口"),
+):
+    """
+    从本地 K 线存储读取 [start, end) 区间（不受 limit 上限约束）
+
+    响应按存储分块流式输出，格式与 /api/candles 一致，末尾附带仍缺失的区间：
+    {"symbol": ..., "timeframe": ..., "candles": [...], "gaps": [[start, end], ...]}
+    """
+    request_id = request.state.request_id
+    store = get_candle_store() if STORE_AVAILABLE else None
+    if store is None:
+        raise HTTPException(status_code=503, detail="candle store not configured (candle_store_dir)")
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise AppError(code="INVALID_TIMEFRAME", message="Unsupported timeframe", detail={"timeframe": timeframe})
+
+    use_exchange = exchange or DEFAULT_EXCHANGE
+    end = end if end is not None else int(time.time())
+
+    if backfill:
+        client = get_exchange_client(use_exchange)
+        if client is None:
+            raise HTTPException(status_code=503, detail=f"exchange client unavailable: {use_exchange}")
+        await backfill_candles(client, store, symbol, timeframe, start, end, exchange=use_exchange)
+
+    gaps = store.gaps(symbol, timeframe, start, end, use_exchange)
+    logger.info(
+        "candles range requested",
+        request_id=request_id,
+        symbol=symbol,
+        timeframe=timeframe,
+        start=start,
+        end=end,
+        gaps=len(gaps),
+    )
+
+    def stream():
+        yield '{"symbol": %s, "timeframe": %s, "candles": [' % (json.dumps(symbol), json.dumps(timeframe))
+        first = True
+        for frame in store.iter_range(symbol, timeframe, start, end, use_exchange):
+            rows = zip(
+                frame.timestamp.tolist(), frame.open.tolist(), frame.high.tolist(),
+                frame.low.tolist(), frame.close.tolist(), frame.volume.tolist(),
+            )
+            body = ",".join(
+                json.dumps({"timestamp": t, "open": o, "high": h, "low": l, "close": c, "volume": v})
+                for t, o, h, l, c, v in rows
+            )
+            yield body if first else "," + body
+            first = False
+        yield '], "gaps": ' + json.dumps([list(g) for g in gaps]) + "}"
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+
 @app.get("/api/mtf/candles", response_model=MTFCandlesResponse)
 def get_mtf_candles(
     request: Request,
@@ -428,9 +608,10 @@ def generate_mock_candles(symbol: str, timeframe: str, limit: int) -> List[Candl
     rng = random.Random(seed)
     
     interval = TIMEFRAME_SECONDS.get(timeframe, 900)
+    offset = TIMEFRAME_OFFSETS.get(timeframe, 0)
     now = int(time.time())
     # 对齐到时间周期
-    aligned_now = (now // interval) * interval
+    aligned_now = (now - offset) // interval * interval + offset
     
     candles = []
     price = base_price
@@ -572,7 +753,10 @@ async def get_ticker(
         raise HTTPException(status_code=503, detail="Failed to create exchange client")
     
     try:
-        ticker = await client.fetch_ticker(symbol)
+        ticker = await _ticker_flight.do(
+            (exchange or DEFAULT_EXCHANGE, _flight_symbol(symbol)),
+            lambda: client.fetch_ticker(symbol),
+        )
         # 处理 timestamp：可能为 None 或毫秒时间戳
         ticker_timestamp = ticker.timestamp
         if ticker_timestamp is None:
@@ -604,6 +788,17 @@ def get_data_source():
         "exchange_available": EXCHANGE_AVAILABLE,
         "default_exchange": DEFAULT_EXCHANGE,
         "cache_enabled": CACHE_ENABLED and CACHE_AVAILABLE,
+        "candle_store_enabled": STORE_AVAILABLE and get_candle_store() is not None,
+    }
+
+
+@app.get("/api/fetch/stats")
+def get_fetch_stats():
+    """上游请求合并统计（upstream = 实际交易所调用，coalesced = 共享结果的并发请求）"""
+    return {
+        "candles": _candle_flight.stats(),
+        "candles_tail": _tail_flight.stats(),
+        "ticker": _ticker_flight.stats(),
     }
 
 
@@ -784,12 +979,8 @@ def get_ws_stats():
     manager = get_connection_manager()
     stats = manager.get_stats()
     
-    stream_info = {}
-    if _ticker_stream:
-        stream_info = {
-            "running": _ticker_stream.is_running,
-            "subscriptions": list(_ticker_stream.subscriptions),
-        }
+    # 含每个 symbol 的更新次数 / 合并次数 / 距上次更新秒数 / 是否过期
+    stream_info = _ticker_stream.stats() if _ticker_stream else {}
     
     return {
         "available": True,
@@ -1,10 +1,9 @@
-import json
 from dataclasses import asdict
 from datetime import datetime
 from threading import Lock
 from typing import Dict, Optional
-from urllib import request as urllib_request
-from urllib.error import URLError, HTTPError
+
+import httpx
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
@@ -12,7 +11,7 @@ from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
 from libs.contracts import ExecutionTask, ExecutionResult, NodeTask, NodeResult
-from libs.core import get_config, get_logger, setup_logging, gen_id, time_now, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, time_now, AppError, get_http_client
 from .node_registry import get_node_registry
 
 # v1 Facts Layer (可选，失败不阻塞主流程)
@@ -159,16 +158,9 @@ def health():
 
 
 def _post_json(url: str, payload: dict, timeout: float = 5.0) -> dict:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib_request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    with urllib_request.urlopen(req, timeout=timeout) as resp:
-        body = resp.read().decode("utf-8")
-        return json.loads(body) if body else {}
+    resp = get_http_client("execution-node").post(url, json=payload, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json() if resp.content else {}
 
 
 def _build_node_task(task: ExecutionTask) -> NodeTask:
@@ -221,7 +213,7 @@ def submit(req: ExecutionSubmitRequest, request: Request):
     try:
         node_resp = _post_json(f"{node_url}/api/node/execute", asdict(node_task))
         node_result = NodeResult(**node_resp.get("result", {}))
-    except (URLError, HTTPError, ValueError) as exc:
+    except (httpx.HTTPError, ValueError) as exc:
         node_result = NodeResult(
             task_id=task_id,
             success=False,
@@ -4,15 +4,14 @@ Execution Worker - 执行任务消费者
 从队列消费执行任务并处理
 """
 
-import json
 from dataclasses import asdict
 from datetime import datetime
 from typing import Dict, Any
-from urllib import request as urllib_request
-from urllib.error import URLError, HTTPError
+
+import httpx
 
 from libs.contracts import ExecutionTask, ExecutionResult, NodeTask, NodeResult
-from libs.core import get_config, get_logger, setup_logging, gen_id, time_now, init_redis
+from libs.core import get_config, get_logger, setup_logging, gen_id, time_now, init_redis, get_http_client
 from libs.queue import TaskQueue, TaskMessage, TaskWorker, TaskHandler, IdempotencyChecker, get_execution_queue
 
 # Facts Layer (可选)
@@ -34,17 +33,10 @@ logger = get_logger(service_name)
 
 
 def _post_json(url: str, payload: dict, timeout: float = 10.0) -> dict:
-    """发送 JSON POST 请求"""
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib_request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    with urllib_request.urlopen(req, timeout=timeout) as resp:
-        body = resp.read().decode("utf-8")
-        return json.loads(body) if body else {}
+    """发送 JSON POST 请求（复用共享连接池）"""
+    resp = get_http_client("execution-node").post(url, json=payload, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json() if resp.content else {}
 
 
 def _get_node_url(platform: str) -> str:
@@ -115,7 +107,7 @@ class ExecutionHandler(TaskHandler):
         try:
             node_resp = _post_json(f"{node_url}/api/node/execute", asdict(node_task))
             node_result = NodeResult(**node_resp.get("result", {}))
-        except (URLError, HTTPError, ValueError) as exc:
+        except (httpx.HTTPError, ValueError) as exc:
             node_result = NodeResult(
                 task_id=task_id,
                 success=False,
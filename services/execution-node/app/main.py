@@ -3,12 +3,16 @@ Execution Node - 子服务器执行端
 
 接收中心 POST /api/execute，用请求中的凭证调交易所下单，同步返回执行结果。
 不连数据库，不写库。
+LiveTrader 由进程级 TraderPool 复用（常驻事件循环 + 按交易所共享 markets），不再每个任务重建。
+批量端点对 tasks 并发执行（按交易所信号量限流）；?stream=true 或 Accept: application/x-ndjson
+时按完成顺序逐行返回每个账户的结果（NDJSON）。
 支持定时心跳：配置 center_url + node_code 后，节点启动时自动向中心发送心跳。
 """
 
 import sys
 import os
 import math
+import json
 import asyncio
 from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
@@ -16,13 +20,13 @@ from typing import Dict, List, Any, Optional
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
 
-from libs.core import get_config, get_logger, setup_logging
+from libs.core import get_config, get_logger, setup_logging, get_async_http_client, aclose_http_clients
 from libs.exchange.utils import to_canonical_symbol, normalize_symbol
 from libs.exchange.market_service import contracts_to_coins_by_size
-from libs.trading.live_trader import LiveTrader
+from libs.trading.trader_pool import get_trader_pool
 from libs.trading.base import OrderSide, OrderType, OrderStatus
 
 config = get_config()
@@ -45,6 +49,85 @@ HEARTBEAT_TIMEOUT = config.get_float("heartbeat_timeout", 10.0)
 
 _heartbeat_task: Optional[asyncio.Task] = None
 
+# ---------- Trader 复用池 ----------
+
+trader_pool = get_trader_pool()
+
+
+def _lease(task, sandbox: bool):
+    """按任务凭证从池中借出 LiveTrader（task 为 TaskItem 或 ClosePositionRequest）"""
+    return trader_pool.lease(
+        exchange=task.exchange or "binance",
+        api_key=task.api_key,
+        api_secret=task.api_secret,
+        passphrase=task.passphrase,
+        sandbox=sandbox,
+        market_type=task.market_type or "future",
+    )
+
+
+# ---------- 批量任务并发 ----------
+
+# 同一交易所同时在途的任务数（多账户共享节点出口 IP 的频率限制）；
+# 可用 node_exchange_concurrency_<exchange> 单独覆盖，如 node_exchange_concurrency_gate
+NODE_EXCHANGE_CONCURRENCY = config.get_int("node_exchange_concurrency", 10)
+_exchange_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _exchange_semaphore(exchange: Optional[str]) -> asyncio.Semaphore:
+    """按交易所取信号量（仅在 trader_pool 事件循环内调用）"""
+    name = (exchange or "binance").lower()
+    sem = _exchange_semaphores.get(name)
+    if sem is None:
+        limit = config.get_int(f"node_exchange_concurrency_{name}", NODE_EXCHANGE_CONCURRENCY)
+        sem = _exchange_semaphores[name] = asyncio.Semaphore(max(1, limit))
+    return sem
+
+
+async def _bounded(task, coro) -> Dict[str, Any]:
+    async with _exchange_semaphore(task.exchange):
+        try:
+            return await coro
+        except Exception as e:
+            # *_one 自身已兜底，这里防止单个任务异常拖垮整批
+            log.error("node task error", account_id=task.account_id, error=str(e))
+            return {"account_id": task.account_id, "success": False, "error": str(e)}
+
+
+async def _gather_bounded(jobs: list) -> List[Dict[str, Any]]:
+    return list(await asyncio.gather(*(_bounded(task, coro) for task, coro in jobs)))
+
+
+async def _stream_results(jobs: list):
+    """在 trader_pool 循环上并发执行，按完成顺序逐行产出 NDJSON"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _one(task, coro):
+        r = await _bounded(task, coro)
+        loop.call_soon_threadsafe(queue.put_nowait, r)
+
+    async def _all():
+        await asyncio.gather(*(_one(task, coro) for task, coro in jobs))
+
+    # 中心断开连接时已提交的任务仍会执行完（下单不可半途放弃）
+    trader_pool.submit(_all())
+    for _ in range(len(jobs)):
+        r = await queue.get()
+        yield json.dumps(r, ensure_ascii=False, default=str) + "\n"
+
+
+def _wants_stream(request: Request, stream: bool) -> bool:
+    return stream or "application/x-ndjson" in (request.headers.get("accept") or "")
+
+
+async def _run_tasks(jobs: list, stream: bool):
+    """jobs: [(task, coroutine)]；并发执行后整体返回，或以 NDJSON 流式返回"""
+    if stream:
+        return StreamingResponse(_stream_results(jobs), media_type="application/x-ndjson")
+    results = await trader_pool.arun(_gather_bounded(jobs))
+    return {"success": True, "results": results}
+
 
 async def _heartbeat_loop():
     """后台任务：定时向中心 POST /api/nodes/{node_code}/heartbeat"""
@@ -56,12 +139,12 @@ async def _heartbeat_loop():
     log.info("heartbeat started", url=url, interval=HEARTBEAT_INTERVAL)
     while True:
         try:
-            async with httpx.AsyncClient(timeout=HEARTBEAT_TIMEOUT) as client:
-                resp = await client.post(url, headers=headers or None)
-                if resp.status_code == 200:
-                    log.debug("heartbeat ok")
-                else:
-                    log.warning("heartbeat response unexpected", status=resp.status_code, body=resp.text[:200])
+            client = get_async_http_client("center")
+            resp = await client.post(url, headers=headers or None, timeout=HEARTBEAT_TIMEOUT)
+            if resp.status_code == 200:
+                log.debug("heartbeat ok")
+            else:
+                log.warning("heartbeat response unexpected", status=resp.status_code, body=resp.text[:200])
         except Exception as e:
             log.warning("heartbeat failed", error=str(e))
         await asyncio.sleep(HEARTBEAT_INTERVAL)
@@ -83,6 +166,8 @@ async def lifespan(application: FastAPI):
         except asyncio.CancelledError:
             pass
         log.info("heartbeat stopped")
+    await aclose_http_clients()
+    await asyncio.to_thread(trader_pool.shutdown)
 
 
 app = FastAPI(title="Execution Node", version="1.0", lifespan=lifespan)
@@ -145,47 +230,34 @@ class SyncTasksRequest(BaseModel):
 
 async def _sync_balance_one(task: TaskItem, sandbox: bool) -> Dict[str, Any]:
     """节点侧：查交易所余额，不写库，返回结果"""
-    trader = LiveTrader(
-        exchange=task.exchange or "binance",
-        api_key=task.api_key,
-        api_secret=task.api_secret,
-        passphrase=task.passphrase,
-        sandbox=sandbox,
-        market_type=task.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        balances = await trader.get_balance("USDT")
-        await trader.close()
-        usdt = balances.get("USDT")
-        if usdt is None:
+        async with _lease(task, sandbox) as trader:
+            balances = await trader.get_balance("USDT")
+            usdt = balances.get("USDT")
+            if usdt is None:
+                return {
+                    "account_id": task.account_id,
+                    "tenant_id": task.tenant_id,
+                    "success": True,
+                    "balance": 0,
+                    "available": 0,
+                    "frozen": 0,
+                    "error": None,
+                }
             return {
                 "account_id": task.account_id,
                 "tenant_id": task.tenant_id,
                 "success": True,
-                "balance": 0,
-                "available": 0,
-                "frozen": 0,
+                "balance": float(usdt.total or 0),
+                "available": float(usdt.free or 0),
+                "frozen": float(usdt.locked or 0),
+                "unrealized_pnl": float(usdt.unrealized_pnl or 0),
+                "margin_used": float(usdt.margin_used or 0),
+                "margin_ratio": float(usdt.margin_ratio or 0),
+                "equity": float(usdt.equity or usdt.total or 0),
                 "error": None,
             }
-        return {
-            "account_id": task.account_id,
-            "tenant_id": task.tenant_id,
-            "success": True,
-            "balance": float(usdt.total or 0),
-            "available": float(usdt.free or 0),
-            "frozen": float(usdt.locked or 0),
-            "unrealized_pnl": float(usdt.unrealized_pnl or 0),
-            "margin_used": float(usdt.margin_used or 0),
-            "margin_ratio": float(usdt.margin_ratio or 0),
-            "equity": float(usdt.equity or usdt.total or 0),
-            "error": None,
-        }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error("sync_balance error", account_id=task.account_id, error=str(e))
         return {
             "account_id": task.account_id,
@@ -204,78 +276,65 @@ async def _sync_balance_one(task: TaskItem, sandbox: bool) -> Dict[str, Any]:
 
 async def _sync_positions_one(task: TaskItem, sandbox: bool) -> Dict[str, Any]:
     """节点侧：查交易所持仓，不写库，返回结果"""
-    trader = LiveTrader(
-        exchange=task.exchange or "binance",
-        api_key=task.api_key,
-        api_secret=task.api_secret,
-        passphrase=task.passphrase,
-        sandbox=sandbox,
-        market_type=task.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        # ccxt: fetch_positions() 返回当前持仓列表
-        positions = await trader.exchange.fetch_positions()
-        await trader.close()
-        out = []
-        for p in positions or []:
-            qty = float(p.get("contracts", 0) or 0)
-            if qty == 0:
-                continue
-            # 统一转换：合约张数→币数量（Gate/OKX 有 contractSize，Binance=1 不变）
-            contract_size = float(p.get("contractSize") or 0)
-            coin_qty = contracts_to_coins_by_size(abs(qty), contract_size)
-            if contract_size > 0 and contract_size != 1:
-                log.debug("position contract→coin", contracts=qty, contract_size=contract_size, coin_qty=coin_qty)
-            side = (p.get("side") or "long").lower()
-            position_side = "LONG" if side == "long" else "SHORT"
-            # 统一为规范 symbol（BTC/USDT），便于存储与跨所一致
-            raw_sym = p.get("symbol") or ""
-            sym = to_canonical_symbol(raw_sym, "future")
-            # 提取杠杆/强平价/未实现盈亏：区分 None（未返回）和 0（有效值）
-            _lev = p.get("leverage")
-            _liq = p.get("liquidationPrice")
-            _upnl = p.get("unrealizedPnl")
-            # Binance 不直接返回 leverage，需从原始数据计算: notional / initialMargin
-            info = p.get("info") or {}
-            if _lev is None and info:
-                try:
-                    notional = float(info.get("notional") or 0)
-                    initial_margin = float(info.get("initialMargin") or 0)
-                    if initial_margin > 0:
-                        _lev = round(notional / initial_margin)
-                except (ValueError, ZeroDivisionError):
-                    pass
-            # Binance 全仓模式下 liquidationPrice='0'，CCXT 映射为 None
-            # 从原始数据回填（0 = 全仓模式，无独立强平价）
-            if _liq is None and info:
-                try:
-                    raw_liq = info.get("liquidationPrice")
-                    if raw_liq is not None:
-                        _liq = float(raw_liq)
-                except (ValueError, TypeError):
-                    pass
-            out.append({
-                "symbol": sym or raw_sym,
-                "position_side": position_side,
-                "quantity": coin_qty,
-                "entry_price": float(p.get("entryPrice") or p.get("averagePrice") or 0),
-                "unrealized_pnl": float(_upnl) if _upnl is not None else None,
-                "leverage": int(_lev) if _lev is not None else None,
-                "liquidation_price": float(_liq) if _liq is not None else None,
-            })
-        return {
-            "account_id": task.account_id,
-            "tenant_id": task.tenant_id,
-            "success": True,
-            "positions": out,
-            "error": None,
-        }
+        async with _lease(task, sandbox) as trader:
+            # ccxt: fetch_positions() 返回当前持仓列表
+            positions = await trader.exchange.fetch_positions()
+            out = []
+            for p in positions or []:
+                qty = float(p.get("contracts", 0) or 0)
+                if qty == 0:
+                    continue
+                # 统一转换：合约张数→币数量（Gate/OKX 有 contractSize，Binance=1 不变）
+                contract_size = float(p.get("contractSize") or 0)
+                coin_qty = contracts_to_coins_by_size(abs(qty), contract_size)
+                if contract_size > 0 and contract_size != 1:
+                    log.debug("position contract→coin", contracts=qty, contract_size=contract_size, coin_qty=coin_qty)
+                side = (p.get("side") or "long").lower()
+                position_side = "LONG" if side == "long" else "SHORT"
+                # 统一为规范 symbol（BTC/USDT），便于存储与跨所一致
+                raw_sym = p.get("symbol") or ""
+                sym = to_canonical_symbol(raw_sym, "future")
+                # 提取杠杆/强平价/未实现盈亏：区分 None（未返回）和 0（有效值）
+                _lev = p.get("leverage")
+                _liq = p.get("liquidationPrice")
+                _upnl = p.get("unrealizedPnl")
+                # Binance 不直接返回 leverage，需从原始数据计算: notional / initialMargin
+                info = p.get("info") or {}
+                if _lev is None and info:
+                    try:
+                        notional = float(info.get("notional") or 0)
+                        initial_margin = float(info.get("initialMargin") or 0)
+                        if initial_margin > 0:
+                            _lev = round(notional / initial_margin)
+                    except (ValueError, ZeroDivisionError):
+                        pass
+                # Binance 全仓模式下 liquidationPrice='0'，CCXT 映射为 None
+                # 从原始数据回填（0 = 全仓模式，无独立强平价）
+                if _liq is None and info:
+                    try:
+                        raw_liq = info.get("liquidationPrice")
+                        if raw_liq is not None:
+                            _liq = float(raw_liq)
+                    except (ValueError, TypeError):
+                        pass
+                out.append({
+                    "symbol": sym or raw_sym,
+                    "position_side": position_side,
+                    "quantity": coin_qty,
+                    "entry_price": float(p.get("entryPrice") or p.get("averagePrice") or 0),
+                    "unrealized_pnl": float(_upnl) if _upnl is not None else None,
+                    "leverage": int(_lev) if _lev is not None else None,
+                    "liquidation_price": float(_liq) if _liq is not None else None,
+                })
+            return {
+                "account_id": task.account_id,
+                "tenant_id": task.tenant_id,
+                "success": True,
+                "positions": out,
+                "error": None,
+            }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error("sync_positions error", account_id=task.account_id, error=str(e))
         return {
             "account_id": task.account_id,
@@ -302,73 +361,60 @@ async def _run_one(
     if amount_usdt <= 0 or entry_price <= 0:
         return {"account_id": task.account_id, "success": False, "error": "invalid amount_usdt or entry_price"}
     order_side = OrderSide.BUY if (side or "BUY").upper() == "BUY" else OrderSide.SELL
-    trader = LiveTrader(
-        exchange=task.exchange or "binance",
-        api_key=task.api_key,
-        api_secret=task.api_secret,
-        passphrase=task.passphrase,
-        sandbox=sandbox,
-        market_type=task.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        # 传 amount_usdt 让 LiveTrader 内部统一换算数量（自动处理 contractSize、最小限制等）
-        result = await trader.create_order(
-            symbol=symbol,
-            side=order_side,
-            order_type=OrderType.MARKET,
-            amount_usdt=amount_usdt,
-            price=entry_price,
-            leverage=leverage or None,
-            signal_id=None,
-        )
-        ok = result.status in (OrderStatus.FILLED, OrderStatus.PARTIAL)
-        filled_qty = result.filled_quantity or 0
-        filled_price = result.filled_price or entry_price
-        exchange_order_id = str(result.exchange_order_id) if result.exchange_order_id else None
-        # 不在交易所挂止盈止损单，由中心 position_monitor 自管到价平仓
-
-        # 如果 LiveTrader 返回了非 FILLED 状态（如早期校验失败），提取错误信息
-        error_msg = None
-        if not ok:
-            error_msg = getattr(result, "error_message", None) or getattr(result, "error_code", None)
-            if error_msg:
-                log.warning("order not filled", account_id=task.account_id,
-                            exchange=task.exchange, status=str(result.status),
-                            error_code=getattr(result, "error_code", None),
-                            error_message=getattr(result, "error_message", None))
-
-        # 张数→币数量转换（Gate/OKX 合约以张为单位，需 × contractSize 得到真实币量）
-        # 统一转换：张数→币数量
-        coin_qty = filled_qty
-        if filled_qty > 0 and (task.market_type or "future") == "future":
-            try:
-                ccxt_sym = trader._ccxt_symbol(symbol)
-                market = trader.exchange.markets.get(ccxt_sym, {})
-                cs = float(market.get("contractSize") or 0)
-                coin_qty = contracts_to_coins_by_size(filled_qty, cs)
-                if cs > 0 and cs != 1:
-                    log.info("order contract→coin", contracts=filled_qty, contract_size=cs, coin_qty=coin_qty)
-            except Exception as conv_err:
-                log.warning("contract→coin conversion failed, using raw qty", error=str(conv_err))
+        async with _lease(task, sandbox) as trader:
+            # 传 amount_usdt 让 LiveTrader 内部统一换算数量（自动处理 contractSize、最小限制等）
+            result = await trader.create_order(
+                symbol=symbol,
+                side=order_side,
+                order_type=OrderType.MARKET,
+                amount_usdt=amount_usdt,
+                price=entry_price,
+                leverage=leverage or None,
+                signal_id=None,
+            )
+            ok = result.status in (OrderStatus.FILLED, OrderStatus.PARTIAL)
+            filled_qty = result.filled_quantity or 0
+            filled_price = result.filled_price or entry_price
+            exchange_order_id = str(result.exchange_order_id) if result.exchange_order_id else None
+            # 不在交易所挂止盈止损单，由中心 position_monitor 自管到价平仓
+
+            # 如果 LiveTrader 返回了非 FILLED 状态（如早期校验失败），提取错误信息
+            error_msg = None
+            if not ok:
+                error_msg = getattr(result, "error_message", None) or getattr(result, "error_code", None)
+                if error_msg:
+                    log.warning("order not filled", account_id=task.account_id,
+                                exchange=task.exchange, status=str(result.status),
+                                error_code=getattr(result, "error_code", None),
+                                error_message=getattr(result, "error_message", None))
+
+            # 张数→币数量转换（Gate/OKX 合约以张为单位，需 × contractSize 得到真实币量）
+            # 统一转换：张数→币数量
+            coin_qty = filled_qty
+            if filled_qty > 0 and (task.market_type or "future") == "future":
+                try:
+                    ccxt_sym = trader._ccxt_symbol(symbol)
+                    market = trader.exchange.markets.get(ccxt_sym, {})
+                    cs = float(market.get("contractSize") or 0)
+                    coin_qty = contracts_to_coins_by_size(filled_qty, cs)
+                    if cs > 0 and cs != 1:
+                        log.info("order contract→coin", contracts=filled_qty, contract_size=cs, coin_qty=coin_qty)
+                except Exception as conv_err:
+                    log.warning("contract→coin conversion failed, using raw qty", error=str(conv_err))
 
-        await trader.close()
-        return {
-            "account_id": task.account_id,
-            "success": ok,
-            "order_id": result.order_id,
-            "exchange_order_id": exchange_order_id,
-            "filled_quantity": coin_qty,
-            "filled_price": filled_price,
-            "commission": result.commission or 0.0,
-            "commission_asset": result.commission_asset or "",
-            "error": error_msg,
-        }
+            return {
+                "account_id": task.account_id,
+                "success": ok,
+                "order_id": result.order_id,
+                "exchange_order_id": exchange_order_id,
+                "filled_quantity": coin_qty,
+                "filled_price": filled_price,
+                "commission": result.commission or 0.0,
+                "commission_asset": result.commission_asset or "",
+                "error": error_msg,
+            }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error("execute error", account_id=task.account_id, error=str(e))
         return {
             "account_id": task.account_id,
@@ -384,8 +430,13 @@ async def _run_one(
 
 
 @app.post("/api/execute")
-def api_execute(req: ExecuteRequest, _: None = Depends(verify_center_token)):
-    """执行信号：对 tasks 中每个账户下单，返回 results（同步）"""
+async def api_execute(
+    req: ExecuteRequest,
+    request: Request,
+    stream: bool = False,
+    _: None = Depends(verify_center_token),
+):
+    """执行信号：对 tasks 中每个账户并发下单，返回 results（stream=true 时逐行返回）"""
     signal = req.signal or {}
     symbol = signal.get("symbol")
     if not symbol:
@@ -399,89 +450,73 @@ def api_execute(req: ExecuteRequest, _: None = Depends(verify_center_token)):
         raise HTTPException(status_code=400, detail="signal.entry_price required")
     if not req.tasks:
         return {"success": True, "results": []}
-    results = []
+    jobs = []
     for task in req.tasks:
         # 优先用 task 级别的 amount_usdt（按 binding ratio 缩放后），回退到 req 级别
         task_amount = task.amount_usdt if task.amount_usdt and task.amount_usdt > 0 else req.amount_usdt
         # 优先用 task 级别杠杆（租户策略实例覆盖），无则用 signal
         task_leverage = (task.leverage if task.leverage and task.leverage > 0 else None) or leverage
-        r = asyncio.run(
-            _run_one(
-                task=task,
-                symbol=symbol,
-                side=side,
-                entry_price=entry_price,
-                stop_loss=stop_loss,
-                take_profit=take_profit,
-                amount_usdt=task_amount,
-                sandbox=req.sandbox,
-                leverage=task_leverage,
-            )
-        )
-        results.append(r)
-    return {"success": True, "results": results}
+        jobs.append((task, _run_one(
+            task=task,
+            symbol=symbol,
+            side=side,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            amount_usdt=task_amount,
+            sandbox=req.sandbox,
+            leverage=task_leverage,
+        )))
+    return await _run_tasks(jobs, _wants_stream(request, stream))
 
 
 async def _sync_trades_one(task: TaskItem, sandbox: bool, symbols: list = None, since_ms: int = None) -> Dict[str, Any]:
     """节点侧：查交易所最近成交记录，不写库，返回结果"""
-    trader = LiveTrader(
-        exchange=task.exchange or "binance",
-        api_key=task.api_key,
-        api_secret=task.api_secret,
-        passphrase=task.passphrase,
-        sandbox=sandbox,
-        market_type=task.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        all_trades = []
-        target_symbols = symbols or ["BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT"]
-        # 加载市场信息，用于获取 contractSize 做张数→币数量转换
-        await trader.exchange.load_markets()
-        for sym in target_symbols:
-            try:
-                # 获取该 symbol 的 contractSize（Gate/OKX 合约用张数）
-                market = trader.exchange.markets.get(sym, {})
-                contract_size = float(market.get("contractSize") or 0)
-                trades = await trader.exchange.fetch_my_trades(sym, since=since_ms, limit=100)
-                for t in trades or []:
-                    raw_sym = t.get("symbol") or sym
-                    canonical = to_canonical_symbol(raw_sym, "future")
-                    side = (t.get("side") or "buy").upper()
-                    raw_qty = float(t.get("amount") or 0)
-                    # 统一转换：张数→币数量
-                    coin_qty = contracts_to_coins_by_size(raw_qty, contract_size)
-                    if contract_size > 0 and contract_size != 1:
-                        log.debug("trade contract→coin", symbol=sym, contracts=raw_qty,
-                                  contract_size=contract_size, coin_qty=coin_qty)
-                    all_trades.append({
-                        "trade_id": str(t.get("id") or ""),
-                        "order_id": str(t.get("order") or ""),
-                        "symbol": canonical or raw_sym,
-                        "side": side,
-                        "price": float(t.get("price") or 0),
-                        "quantity": coin_qty,
-                        "cost": float(t.get("cost") or 0),
-                        "fee": float((t.get("fee") or {}).get("cost", 0) or 0),
-                        "fee_currency": (t.get("fee") or {}).get("currency", "USDT"),
-                        "timestamp": t.get("timestamp"),
-                        "datetime": t.get("datetime"),
-                    })
-            except Exception as e:
-                log.warning("fetch_my_trades skip", symbol=sym, error=str(e))
-        await trader.close()
-        return {
-            "account_id": task.account_id,
-            "tenant_id": task.tenant_id,
-            "success": True,
-            "trades": all_trades,
-            "error": None,
-        }
+        async with _lease(task, sandbox) as trader:
+            all_trades = []
+            target_symbols = symbols or ["BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT"]
+            # 加载市场信息，用于获取 contractSize 做张数→币数量转换
+            await trader.exchange.load_markets()
+            for sym in target_symbols:
+                try:
+                    # 获取该 symbol 的 contractSize（Gate/OKX 合约用张数）
+                    market = trader.exchange.markets.get(sym, {})
+                    contract_size = float(market.get("contractSize") or 0)
+                    trades = await trader.exchange.fetch_my_trades(sym, since=since_ms, limit=100)
+                    for t in trades or []:
+                        raw_sym = t.get("symbol") or sym
+                        canonical = to_canonical_symbol(raw_sym, "future")
+                        side = (t.get("side") or "buy").upper()
+                        raw_qty = float(t.get("amount") or 0)
+                        # 统一转换：张数→币数量
+                        coin_qty = contracts_to_coins_by_size(raw_qty, contract_size)
+                        if contract_size > 0 and contract_size != 1:
+                            log.debug("trade contract→coin", symbol=sym, contracts=raw_qty,
+                                      contract_size=contract_size, coin_qty=coin_qty)
+                        all_trades.append({
+                            "trade_id": str(t.get("id") or ""),
+                            "order_id": str(t.get("order") or ""),
+                            "symbol": canonical or raw_sym,
+                            "side": side,
+                            "price": float(t.get("price") or 0),
+                            "quantity": coin_qty,
+                            "cost": float(t.get("cost") or 0),
+                            "fee": float((t.get("fee") or {}).get("cost", 0) or 0),
+                            "fee_currency": (t.get("fee") or {}).get("currency", "USDT"),
+                            "timestamp": t.get("timestamp"),
+                            "datetime": t.get("datetime"),
+                        })
+                except Exception as e:
+                    log.warning("fetch_my_trades skip", symbol=sym, error=str(e))
+            return {
+                "account_id": task.account_id,
+                "tenant_id": task.tenant_id,
+                "success": True,
+                "trades": all_trades,
+                "error": None,
+            }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error("sync_trades error", account_id=task.account_id, error=str(e))
         return {
             "account_id": task.account_id,
@@ -500,42 +535,48 @@ class SyncTradesRequest(BaseModel):
 
 
 @app.post("/api/sync-trades")
-def api_sync_trades(req: SyncTradesRequest, _: None = Depends(verify_center_token)):
-    """同步成交：对 tasks 中每个账户查交易所成交记录，返回 results（不写库）"""
+async def api_sync_trades(
+    req: SyncTradesRequest,
+    request: Request,
+    stream: bool = False,
+    _: None = Depends(verify_center_token),
+):
+    """同步成交：对 tasks 中每个账户并发查交易所成交记录，返回 results（不写库）"""
     if not req.tasks:
         return {"success": True, "results": []}
-    results = []
-    for task in req.tasks:
-        r = asyncio.run(_sync_trades_one(
-            task=task, sandbox=req.sandbox,
-            symbols=req.symbols, since_ms=req.since_ms
-        ))
-        results.append(r)
-    return {"success": True, "results": results}
+    jobs = [
+        (task, _sync_trades_one(task=task, sandbox=req.sandbox, symbols=req.symbols, since_ms=req.since_ms))
+        for task in req.tasks
+    ]
+    return await _run_tasks(jobs, _wants_stream(request, stream))
 
 
 @app.post("/api/sync-balance")
-def api_sync_balance(req: SyncTasksRequest, _: None = Depends(verify_center_token)):
-    """同步余额：对 tasks 中每个账户查交易所余额，返回 results（不写库）"""
+async def api_sync_balance(
+    req: SyncTasksRequest,
+    request: Request,
+    stream: bool = False,
+    _: None = Depends(verify_center_token),
+):
+    """同步余额：对 tasks 中每个账户并发查交易所余额，返回 results（不写库）"""
     if not req.tasks:
         return {"success": True, "results": []}
-    results = []
-    for task in req.tasks:
-        r = asyncio.run(_sync_balance_one(task=task, sandbox=req.sandbox))
-        results.append(r)
-    return {"success": True, "results": results}
+    jobs = [(task, _sync_balance_one(task=task, sandbox=req.sandbox)) for task in req.tasks]
+    return await _run_tasks(jobs, _wants_stream(request, stream))
 
 
 @app.post("/api/sync-positions")
-def api_sync_positions(req: SyncTasksRequest, _: None = Depends(verify_center_token)):
-    """同步持仓：对 tasks 中每个账户查交易所持仓，返回 results（不写库）"""
+async def api_sync_positions(
+    req: SyncTasksRequest,
+    request: Request,
+    stream: bool = False,
+    _: None = Depends(verify_center_token),
+):
+    """同步持仓：对 tasks 中每个账户并发查交易所持仓，返回 results（不写库）"""
     if not req.tasks:
         return {"success": True, "results": []}
-    results = []
-    for task in req.tasks:
-        r = asyncio.run(_sync_positions_one(task=task, sandbox=req.sandbox))
-        results.append(r)
-    return {"success": True, "results": results}
+    jobs = [(task, _sync_positions_one(task=task, sandbox=req.sandbox)) for task in req.tasks]
+    return await _run_tasks(jobs, _wants_stream(request, stream))
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -553,38 +594,25 @@ async def _cancel_conditionals_one(
     task: TaskItem, sandbox: bool, symbols: List[str],
 ) -> Dict[str, Any]:
     """对单个账户，取消指定 symbol 的所有残留条件委托单"""
-    trader = LiveTrader(
-        exchange=task.exchange or "binance",
-        api_key=task.api_key,
-        api_secret=task.api_secret,
-        passphrase=task.passphrase,
-        sandbox=sandbox,
-        market_type=task.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        await trader.exchange.load_markets()
-        total_cancelled = 0
-        total_errors = 0
-        results_by_symbol = {}
-        for sym in symbols:
-            r = await trader.cancel_all_open_orders(sym)
-            results_by_symbol[sym] = r
-            total_cancelled += r.get("cancelled", 0)
-            total_errors += r.get("errors", 0)
-        await trader.close()
-        return {
-            "account_id": task.account_id,
-            "success": True,
-            "cancelled": total_cancelled,
-            "errors": total_errors,
-            "by_symbol": results_by_symbol,
-        }
+        async with _lease(task, sandbox) as trader:
+            await trader.exchange.load_markets()
+            total_cancelled = 0
+            total_errors = 0
+            results_by_symbol = {}
+            for sym in symbols:
+                r = await trader.cancel_all_open_orders(sym)
+                results_by_symbol[sym] = r
+                total_cancelled += r.get("cancelled", 0)
+                total_errors += r.get("errors", 0)
+            return {
+                "account_id": task.account_id,
+                "success": True,
+                "cancelled": total_cancelled,
+                "errors": total_errors,
+                "by_symbol": results_by_symbol,
+            }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error("cancel_conditionals error", account_id=task.account_id, error=str(e))
         return {
             "account_id": task.account_id,
@@ -596,15 +624,20 @@ async def _cancel_conditionals_one(
 
 
 @app.post("/api/cancel-conditionals")
-def api_cancel_conditionals(req: CancelConditionalsRequest, _: None = Depends(verify_center_token)):
-    """取消指定交易对的残留条件委托单（止损/止盈）"""
+async def api_cancel_conditionals(
+    req: CancelConditionalsRequest,
+    request: Request,
+    stream: bool = False,
+    _: None = Depends(verify_center_token),
+):
+    """取消指定交易对的残留条件委托单（止损/止盈），各账户并发执行"""
     if not req.tasks or not req.symbols:
         return {"success": True, "results": []}
-    results = []
-    for task in req.tasks:
-        r = asyncio.run(_cancel_conditionals_one(task=task, sandbox=req.sandbox, symbols=req.symbols))
-        results.append(r)
-    return {"success": True, "results": results}
+    jobs = [
+        (task, _cancel_conditionals_one(task=task, sandbox=req.sandbox, symbols=req.symbols))
+        for task in req.tasks
+    ]
+    return await _run_tasks(jobs, _wants_stream(request, stream))
 
 
 # ========== 平仓端点（position_monitor 自管 SL/TP 触发）==========
@@ -629,101 +662,88 @@ async def _close_position_one(req: ClosePositionRequest, sandbox: bool) -> Dict[
     """在节点侧执行平仓市价单"""
     symbol = to_canonical_symbol(normalize_symbol(req.symbol or "", "binance"), "future")
     order_side = OrderSide.BUY if (req.side or "SELL").upper() == "BUY" else OrderSide.SELL
-    trader = LiveTrader(
-        exchange=req.exchange or "binance",
-        api_key=req.api_key,
-        api_secret=req.api_secret,
-        passphrase=req.passphrase or "",
-        sandbox=sandbox,
-        market_type=req.market_type or "future",
-        settlement_service=None,
-    )
     try:
-        await trader.exchange.load_markets()
-        ccxt_sym = trader._ccxt_symbol(symbol)
-        ticker = await trader.exchange.fetch_ticker(ccxt_sym)
-        current_price = float(ticker.get("last") or ticker.get("close") or 0)
-
-        pos_side = (req.position_side or "").strip().upper() or ("LONG" if order_side == OrderSide.SELL else "SHORT")
-
-        # ── 优先使用精确币数量（close_quantity），避免 qty→USDT→qty 双重转换精度丢失 ──
-        if req.close_quantity and req.close_quantity > 0:
-            coin_qty_requested = req.close_quantity
-            market = trader.exchange.markets.get(ccxt_sym, {})
-            cs = float(market.get("contractSize") or 0)
-            eid = getattr(trader.exchange, "id", "")
-            # Gate/OKX 合约按张计：币数量 / contractSize → 张数（向上取整确保全部平仓）
-            if cs > 0 and eid in ("gateio", "okx") and (req.market_type or "future") == "future":
-                exchange_qty = math.ceil(coin_qty_requested / cs)
-            else:
-                # Binance 等以币为单位：直接用精确数量，仅做精度舍入
-                exchange_qty = float(trader.exchange.amount_to_precision(ccxt_sym, coin_qty_requested))
-            log.info(f"[NODE] {req.trigger_type}平仓(精确数量)",
-                     account_id=req.account_id, symbol=symbol,
-                     coin_qty=coin_qty_requested, exchange_qty=exchange_qty,
-                     contract_size=cs, exchange=eid)
-            result = await trader.create_order(
-                symbol=symbol,
-                side=order_side,
-                order_type=OrderType.MARKET,
-                quantity=exchange_qty,
-                price=current_price,
-                signal_id=f"PM_{req.trigger_type}",
-                trade_type="CLOSE",
-                close_reason=req.trigger_type,
-                position_side=pos_side,
-            )
-        else:
-            # 回退：用 amount_usdt 换算（旧逻辑，可能产生精度偏差）
-            log.info(f"[NODE] {req.trigger_type}平仓(USDT换算,回退)",
-                     account_id=req.account_id, symbol=symbol,
-                     amount_usdt=req.amount_usdt)
-            result = await trader.create_order(
-                symbol=symbol,
-                side=order_side,
-                order_type=OrderType.MARKET,
-                amount_usdt=req.amount_usdt,
-                price=current_price,
-                signal_id=f"PM_{req.trigger_type}",
-                trade_type="CLOSE",
-                close_reason=req.trigger_type,
-                position_side=pos_side,
-            )
+        async with _lease(req, sandbox) as trader:
+            await trader.exchange.load_markets()
+            ccxt_sym = trader._ccxt_symbol(symbol)
+            ticker = await trader.exchange.fetch_ticker(ccxt_sym)
+            current_price = float(ticker.get("last") or ticker.get("close") or 0)
 
-        ok = result.status in (OrderStatus.FILLED, OrderStatus.PARTIAL)
-        filled_qty = result.filled_quantity or 0
-        filled_price = result.filled_price or current_price
-        error_msg = None
-        if not ok:
-            error_msg = getattr(result, "error_message", None) or None
-
-        # 张数→币数量转换
-        coin_qty = filled_qty
-        if filled_qty > 0 and (req.market_type or "future") == "future":
-            try:
+            pos_side = (req.position_side or "").strip().upper() or ("LONG" if order_side == OrderSide.SELL else "SHORT")
+
+            # ── 优先使用精确币数量（close_quantity），避免 qty→USDT→qty 双重转换精度丢失 ──
+            if req.close_quantity and req.close_quantity > 0:
+                coin_qty_requested = req.close_quantity
                 market = trader.exchange.markets.get(ccxt_sym, {})
                 cs = float(market.get("contractSize") or 0)
-                coin_qty = contracts_to_coins_by_size(filled_qty, cs)
-            except Exception:
-                pass
-
-        await trader.close()
-        log.info(f"[NODE] {req.trigger_type}平仓{'成功' if ok else '失败'}",
-                 account_id=req.account_id, symbol=symbol,
-                 filled_qty=coin_qty, filled_price=filled_price)
-        return {
-            "account_id": req.account_id,
-            "success": ok,
-            "filled_quantity": coin_qty,
-            "filled_price": filled_price,
-            "trigger_type": req.trigger_type,
-            "error": error_msg,
-        }
+                eid = getattr(trader.exchange, "id", "")
+                # Gate/OKX 合约按张计：币数量 / contractSize → 张数（向上取整确保全部平仓）
+                if cs > 0 and eid in ("gateio", "okx") and (req.market_type or "future") == "future":
+                    exchange_qty = math.ceil(coin_qty_requested / cs)
+                else:
+                    # Binance 等以币为单位：直接用精确数量，仅做精度舍入
+                    exchange_qty = float(trader.exchange.amount_to_precision(ccxt_sym, coin_qty_requested))
+                log.info(f"[NODE] {req.trigger_type}平仓(精确数量)",
+                         account_id=req.account_id, symbol=symbol,
+                         coin_qty=coin_qty_requested, exchange_qty=exchange_qty,
+                         contract_size=cs, exchange=eid)
+                result = await trader.create_order(
+                    symbol=symbol,
+                    side=order_side,
+                    order_type=OrderType.MARKET,
+                    quantity=exchange_qty,
+                    price=current_price,
+                    signal_id=f"PM_{req.trigger_type}",
+                    trade_type="CLOSE",
+                    close_reason=req.trigger_type,
+                    position_side=pos_side,
+                )
+            else:
+                # 回退：用 amount_usdt 换算（旧逻辑，可能产生精度偏差）
+                log.info(f"[NODE] {req.trigger_type}平仓(USDT换算,回退)",
+                         account_id=req.account_id, symbol=symbol,
+                         amount_usdt=req.amount_usdt)
+                result = await trader.create_order(
+                    symbol=symbol,
+                    side=order_side,
+                    order_type=OrderType.MARKET,
+                    amount_usdt=req.amount_usdt,
+                    price=current_price,
+                    signal_id=f"PM_{req.trigger_type}",
+                    trade_type="CLOSE",
+                    close_reason=req.trigger_type,
+                    position_side=pos_side,
+                )
+
+            ok = result.status in (OrderStatus.FILLED, OrderStatus.PARTIAL)
+            filled_qty = result.filled_quantity or 0
+            filled_price = result.filled_price or current_price
+            error_msg = None
+            if not ok:
+                error_msg = getattr(result, "error_message", None) or None
+
+            # 张数→币数量转换
+            coin_qty = filled_qty
+            if filled_qty > 0 and (req.market_type or "future") == "future":
+                try:
+                    market = trader.exchange.markets.get(ccxt_sym, {})
+                    cs = float(market.get("contractSize") or 0)
+                    coin_qty = contracts_to_coins_by_size(filled_qty, cs)
+                except Exception:
+                    pass
+
+            log.info(f"[NODE] {req.trigger_type}平仓{'成功' if ok else '失败'}",
+                     account_id=req.account_id, symbol=symbol,
+                     filled_qty=coin_qty, filled_price=filled_price)
+            return {
+                "account_id": req.account_id,
+                "success": ok,
+                "filled_quantity": coin_qty,
+                "filled_price": filled_price,
+                "trigger_type": req.trigger_type,
+                "error": error_msg,
+            }
     except Exception as e:
-        try:
-            await trader.close()
-        except Exception:
-            pass
         log.error(f"[NODE] {req.trigger_type}平仓异常",
                   account_id=req.account_id, symbol=req.symbol, error=str(e))
         return {
@@ -737,13 +757,13 @@ async def _close_position_one(req: ClosePositionRequest, sandbox: bool) -> Dict[
 
 
 @app.post("/api/close-position")
-def api_close_position(req: ClosePositionRequest, _: None = Depends(verify_center_token)):
+async def api_close_position(req: ClosePositionRequest, _: None = Depends(verify_center_token)):
     """
     接收中心 position_monitor 的平仓指令（自管 SL/TP 到价触发）。
     在节点侧用用户 API key 发市价反向单平仓。
     """
     sandbox = config.get_bool("exchange_sandbox", True)
-    result = asyncio.run(_close_position_one(req, sandbox))
+    result = await trader_pool.arun(_close_position_one(req, sandbox))
     return result
 
 
@@ -759,7 +779,7 @@ def health():
         }
     else:
         heartbeat_info = {"heartbeat_enabled": False}
-    return {"status": "ok", "service": "execution-node", **heartbeat_info}
+    return {"status": "ok", "service": "execution-node", **heartbeat_info, "trader_pool": trader_pool.stats()}
 
 
 if __name__ == "__main__":
@@ -9,7 +9,6 @@ v0 最小实现：
 - 调用 execution-dispatcher 执行
 """
 
-import httpx
 from dataclasses import asdict
 from typing import List, Optional, Dict
 
@@ -18,7 +17,7 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
-from libs.core import get_config, get_logger, setup_logging, gen_id, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, AppError, get_async_http_client, aclose_http_clients
 from libs.contracts import FollowTask, FollowTaskResult, Signal
 
 
@@ -103,6 +102,11 @@ app = FastAPI(title="follow-service")
 DISPATCHER_URL = config.get_str("dispatcher_url", "http://127.0.0.1:8003")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await aclose_http_clients()
+
+
 def _error_payload(code: str, message: str, detail: Optional[dict] = None, request_id: Optional[str] = None) -> dict:
     payload = {"code": code, "message": message, "detail": detail or {}}
     if request_id:
@@ -414,12 +418,11 @@ async def submit_to_dispatcher(
         "take_profit": signal.take_profit,
     }
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{DISPATCHER_URL}/api/execution/submit",
-            json=payload,
-            headers={"X-Request-Id": request_id},
-            timeout=10.0,
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await get_async_http_client("execution-dispatcher").post(
+        f"{DISPATCHER_URL}/api/execution/submit",
+        json=payload,
+        headers={"X-Request-Id": request_id},
+        timeout=10.0,
+    )
+    resp.raise_for_status()
+    return resp.json()
@@ -25,18 +25,19 @@ import os
 import time
 import traceback
 import threading
-import httpx
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from flask import Flask, request, jsonify
-from libs.core import get_config, get_logger, setup_logging, gen_id
+from libs.core import get_config, get_logger, setup_logging, gen_id, get_http_client
 from libs.core.database import get_session
 from libs.strategies import get_strategy, list_strategies
+from libs.indicators import CandleFrame
 from libs.notify import TelegramNotifier
 from libs.trading import (
     AutoTrader,
@@ -48,7 +49,7 @@ from libs.trading import (
     OrderType,
     OrderStatus,
 )
-from libs.member import MemberService, ExecutionTarget
+from libs.member import MemberService, ExecutionTarget, ResolvedTarget
 from libs.execution_node import ExecutionNodeRepository
 from libs.execution_node.apply_results import apply_remote_results as apply_remote_results_to_db
 from libs.queue import get_node_execute_queue, TaskMessage
@@ -88,6 +89,8 @@ monitor_state = {
 
 # 全局监控参数（仅保留与策略无关的配置）
 MONITOR_INTERVAL = config.get_int("monitor_interval_seconds", 300)
+MONITOR_FETCH_CONCURRENCY = max(1, config.get_int("monitor_fetch_concurrency", 8))   # 每轮并发拉取 K 线数
+MONITOR_ANALYZE_WORKERS = max(1, config.get_int("monitor_analyze_workers", 4))       # 策略分析线程数
 NOTIFY_ON_SIGNAL = config.get_bool("notify_on_signal", True)
 SYNC_INTERVAL = config.get_int("sync_interval_seconds", 300)  # 提前定义，供 /api/status 等使用
 
@@ -385,21 +388,26 @@ def fetch_candles(symbol: str, timeframe: str, limit: int = 200) -> List[Dict]:
     try:
         url = f"{DATA_PROVIDER_URL}/api/candles"
         params = {"symbol": symbol, "timeframe": timeframe, "limit": limit, "source": "live"}
-        with httpx.Client(timeout=HTTP_TIMEOUT) as client:
-            resp = client.get(url, params=params)
-            resp.raise_for_status()
-            return resp.json().get("candles", [])
+        resp = get_http_client("data-provider").get(url, params=params, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json().get("candles", [])
     except Exception as e:
         log.error(f"获取K线失败 {symbol}: {e}")
         return []
 
 
 def check_signal(strategy_code: str, strategy_config: Dict, 
-                 symbol: str, timeframe: str) -> Optional[Dict]:
-    """检测单个策略信号（使用缓存策略实例 + 传入持仓信息）"""
+                 symbol: str, timeframe: str,
+                 candles: Optional[CandleFrame] = None) -> Optional[Dict]:
+    """
+    检测单个策略信号（使用缓存策略实例 + 传入持仓信息）
+
+    candles 为空时自行拉取；监控轮次中由 _run_signal_round 预先按 (symbol, timeframe) 拉取后传入。
+    """
     try:
-        # 获取 K 线
-        candles = fetch_candles(symbol, timeframe)
+        # 获取 K 线（转列式容器，策略/指标共享同一份列数组）
+        if candles is None:
+            candles = CandleFrame.from_candles(fetch_candles(symbol, timeframe))
         if len(candles) < 100:
             log.warning(f"K线数据不足: {symbol} {len(candles)}")
             return None
@@ -964,6 +972,176 @@ def _write_signal_event(
             pass
 
 
+def _dispatch_signal(strat_cfg: Dict, symbol: str, signal: Optional[Dict]):
+    """
+    处理单个 (策略, 交易对) 的检测结果：置信度过滤 → 信号事件 → 按策略分发 → 通知 → 冷却
+
+    在监控线程中串行执行（分发涉及下单与挂单登记），检测由 _run_signal_round 并发完成。
+    """
+    code = strat_cfg.get("code")
+    timeframe = strat_cfg.get("timeframe", "1h")
+    min_conf = strat_cfg.get("min_confidence", 50)
+
+    if signal:
+        confidence = signal.get("confidence", 0)
+
+        if confidence >= min_conf:
+            # ── HEDGE 信号拆分为 BUY + SELL 两单 ──
+            sig_type = (signal.get("signal_type") or "OPEN").upper()
+            if sig_type == "HEDGE":
+                signals_to_exec = _split_hedge_signal(signal)
+                log.info(
+                    f"检测到对冲信号: {symbol} @ {signal['entry_price']}，拆分为 BUY+SELL 两单"
+                )
+            else:
+                signals_to_exec = [signal]
+                log.info(f"检测到信号: {signal['side']} {symbol} @ {signal['entry_price']}")
+
+            for sig in signals_to_exec:
+                # 确保信号有 signal_id
+                if not sig.get("signal_id"):
+                    sig["signal_id"] = gen_id("SIG")
+
+                # 将策略层参数注入信号（amount_usdt、leverage），供执行层使用
+                if strat_cfg.get("amount_usdt"):
+                    sig["amount_usdt"] = strat_cfg["amount_usdt"]
+                if strat_cfg.get("leverage"):
+                    sig["leverage"] = strat_cfg["leverage"]
+
+                with _state_lock:
+                    monitor_state["last_signal"] = sig
+                    monitor_state["total_signals"] += 1
+
+                # ── 写入信号事件: CREATED ──
+                _write_signal_event(
+                    signal_id=sig["signal_id"],
+                    event_type="CREATED",
+                    status="pending",
+                    detail={
+                        "strategy": code,
+                        "symbol": symbol,
+                        "side": sig.get("side"),
+                        "signal_type": sig.get("signal_type", "OPEN"),
+                        "entry_price": sig.get("entry_price"),
+                        "stop_loss": sig.get("stop_loss"),
+                        "take_profit": sig.get("take_profit"),
+                        "confidence": confidence,
+                        "timeframe": timeframe,
+                    },
+                )
+
+                # 按策略多账户分发（若启用）
+                if DISPATCH_BY_STRATEGY and sig.get("strategy"):
+                    try:
+                        dispatch_result = execute_signal_by_strategy(sig)
+                        log.info(
+                            f"strategy dispatch [{sig.get('side')}]",
+                            targets=dispatch_result.get("targets", 0),
+                            success_count=dispatch_result.get("success_count", 0),
+                        )
+                        # ── 写入信号事件: DISPATCHED ──
+                        _dispatch_success = dispatch_result.get("success", False)
+                        _dispatch_targets = dispatch_result.get("targets", 0)
+                        _dispatch_ok = dispatch_result.get("success_count", 0)
+                        _write_signal_event(
+                            signal_id=sig["signal_id"],
+                            event_type="DISPATCHED" if _dispatch_success else "FAILED",
+                            status="executed" if _dispatch_success else "failed",
+                            detail={
+                                "action": dispatch_result.get("action"),
+                                "targets": _dispatch_targets,
+                                "success_count": _dispatch_ok,
+                                "strategy": code,
+                                "symbol": symbol,
+                                "side": sig.get("side"),
+                            },
+                            error_message=dispatch_result.get("message") if not _dispatch_success else None,
+                        )
+                    except Exception as e:
+                        log.error(f"strategy dispatch error [{sig.get('side')}]", error=str(e), traceback=traceback.format_exc())
+                        _write_signal_event(
+                            signal_id=sig["signal_id"],
+                            event_type="FAILED",
+                            status="failed",
+                            detail={
+                                "strategy": code,
+                                "symbol": symbol,
+                                "side": sig.get("side"),
+                            },
+                            error_message=str(e),
+                        )
+
+                # 推送通知
+                if NOTIFY_ON_SIGNAL:
+                    result = notifier.send_signal(sig)
+                    if result.success:
+                        log.info(f"信号已推送: {sig.get('side')} {symbol}")
+                    else:
+                        log.error(f"推送失败: {result.error}")
+
+            # 冷却：无论单信号还是对冲，一轮只设一次冷却
+            # 传入 timeframe 确保冷却至少覆盖当前 K 线周期
+            set_cooldown(symbol, code, timeframe)
+        else:
+            log.debug(f"信号置信度不足: {confidence} < {min_conf}")
+
+
+def _run_signal_round(strategies: List[Dict]):
+    """
+    一轮信号检测（有界并发流水线）
+
+    1. 过滤冷却中的 (策略, 交易对)，按 (symbol, timeframe) 去重后并发拉取 K 线
+    2. 每组 K 线到达后立即把使用它的 (策略, 交易对) 提交到分析线程池
+    3. 分析结果按完成顺序在本线程逐个分发（每个 (策略, 交易对) 每轮只检测一次，
+       冷却与挂单检查语义不变）
+    """
+    jobs_by_pair: Dict[tuple, List[tuple]] = defaultdict(list)
+    for strat_cfg in strategies:
+        code = strat_cfg.get("code")
+        timeframe = strat_cfg.get("timeframe", "1h")
+        cooldown = strat_cfg.get("cooldown_minutes", 60)
+        for symbol in strat_cfg.get("symbols", []):
+            # 检查冷却（使用策略级别的冷却时间）
+            if is_in_cooldown(symbol, code, cooldown):
+                log.debug(f"冷却中跳过: {code}/{symbol}")
+                continue
+            jobs_by_pair[(symbol, timeframe)].append((strat_cfg, symbol))
+    if not jobs_by_pair:
+        return
+
+    with ThreadPoolExecutor(max_workers=MONITOR_FETCH_CONCURRENCY, thread_name_prefix="sm-fetch") as fetch_pool, \
+            ThreadPoolExecutor(max_workers=MONITOR_ANALYZE_WORKERS, thread_name_prefix="sm-analyze") as analyze_pool:
+        fetch_futures = {
+            fetch_pool.submit(fetch_candles, symbol, timeframe): (symbol, timeframe)
+            for symbol, timeframe in jobs_by_pair
+        }
+        analyze_futures: Dict[Any, tuple] = {}
+        pending = set(fetch_futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in fetch_futures:
+                    symbol, timeframe = fetch_futures[fut]
+                    # 同一 (symbol, timeframe) 的多个策略共享同一份列式 K 线
+                    candles = CandleFrame.from_candles(fut.result())
+                    for strat_cfg, sym in jobs_by_pair[(symbol, timeframe)]:
+                        job = analyze_pool.submit(
+                            check_signal, strat_cfg.get("code"), strat_cfg.get("config", {}),
+                            sym, timeframe, candles,
+                        )
+                        analyze_futures[job] = (strat_cfg, sym)
+                        pending.add(job)
+                else:
+                    strat_cfg, symbol = analyze_futures[fut]
+                    try:
+                        _dispatch_signal(strat_cfg, symbol, fut.result())
+                    except Exception as e:
+                        # 单个分发失败不影响本轮其他 (策略, 交易对)
+                        log.error(f"信号分发异常 {strat_cfg.get('code')}/{symbol}: {e}", traceback=traceback.format_exc())
+                        with _state_lock:
+                            monitor_state["errors"] += 1
+
+
 def monitor_loop():
     """监控主循环 - 每轮从数据库加载最新策略配置"""
     global monitor_state
@@ -985,125 +1163,7 @@ def monitor_loop():
             # 每轮动态加载策略（支持运行时增删改策略，无需重启）
             strategies = _load_strategies_from_db()
 
-            for strat_cfg in strategies:
-                code = strat_cfg.get("code")
-                cfg = strat_cfg.get("config", {})
-                symbols = strat_cfg.get("symbols", [])
-                timeframe = strat_cfg.get("timeframe", "1h")
-                min_conf = strat_cfg.get("min_confidence", 50)
-                cooldown = strat_cfg.get("cooldown_minutes", 60)
-
-                for symbol in symbols:
-                    # 检查冷却（使用策略级别的冷却时间）
-                    if is_in_cooldown(symbol, code, cooldown):
-                        log.debug(f"冷却中跳过: {code}/{symbol}")
-                        continue
-
-                    # 检测信号
-                    signal = check_signal(code, cfg, symbol, timeframe)
-
-                    if signal:
-                        confidence = signal.get("confidence", 0)
-
-                        if confidence >= min_conf:
-                            # ── HEDGE 信号拆分为 BUY + SELL 两单 ──
-                            sig_type = (signal.get("signal_type") or "OPEN").upper()
-                            if sig_type == "HEDGE":
-                                signals_to_exec = _split_hedge_signal(signal)
-                                log.info(
-                                    f"检测到对冲信号: {symbol} @ {signal['entry_price']}，拆分为 BUY+SELL 两单"
-                                )
-                            else:
-                                signals_to_exec = [signal]
-                                log.info(f"检测到信号: {signal['side']} {symbol} @ {signal['entry_price']}")
-
-                            for sig in signals_to_exec:
-                                # 确保信号有 signal_id
-                                if not sig.get("signal_id"):
-                                    sig["signal_id"] = gen_id("SIG")
-
-                                # 将策略层参数注入信号（amount_usdt、leverage），供执行层使用
-                                if strat_cfg.get("amount_usdt"):
-                                    sig["amount_usdt"] = strat_cfg["amount_usdt"]
-                                if strat_cfg.get("leverage"):
-                                    sig["leverage"] = strat_cfg["leverage"]
-
-                                with _state_lock:
-                                    monitor_state["last_signal"] = sig
-                                    monitor_state["total_signals"] += 1
-
-                                # ── 写入信号事件: CREATED ──
-                                _write_signal_event(
-                                    signal_id=sig["signal_id"],
-                                    event_type="CREATED",
-                                    status="pending",
-                                    detail={
-                                        "strategy": code,
-                                        "symbol": symbol,
-                                        "side": sig.get("side"),
-                                        "signal_type": sig.get("signal_type", "OPEN"),
-                                        "entry_price": sig.get("entry_price"),
-                                        "stop_loss": sig.get("stop_loss"),
-                                        "take_profit": sig.get("take_profit"),
-                                        "confidence": confidence,
-                                        "timeframe": timeframe,
-                                    },
-                                )
-
-                                # 按策略多账户分发（若启用）
-                                if DISPATCH_BY_STRATEGY and sig.get("strategy"):
-                                    try:
-                                        dispatch_result = execute_signal_by_strategy(sig)
-                                        log.info(
-                                            f"strategy dispatch [{sig.get('side')}]",
-                                            targets=dispatch_result.get("targets", 0),
-                                            success_count=dispatch_result.get("success_count", 0),
-                                        )
-                                        # ── 写入信号事件: DISPATCHED ──
-                                        _dispatch_success = dispatch_result.get("success", False)
-                                        _dispatch_targets = dispatch_result.get("targets", 0)
-                                        _dispatch_ok = dispatch_result.get("success_count", 0)
-                                        _write_signal_event(
-                                            signal_id=sig["signal_id"],
-                                            event_type="DISPATCHED" if _dispatch_success else "FAILED",
-                                            status="executed" if _dispatch_success else "failed",
-                                            detail={
-                                                "action": dispatch_result.get("action"),
-                                                "targets": _dispatch_targets,
-                                                "success_count": _dispatch_ok,
-                                                "strategy": code,
-                                                "symbol": symbol,
-                                                "side": sig.get("side"),
-                                            },
-                                            error_message=dispatch_result.get("message") if not _dispatch_success else None,
-                                        )
-                                    except Exception as e:
-                                        log.error(f"strategy dispatch error [{sig.get('side')}]", error=str(e), traceback=traceback.format_exc())
-                                        _write_signal_event(
-                                            signal_id=sig["signal_id"],
-                                            event_type="FAILED",
-                                            status="failed",
-                                            detail={
-                                                "strategy": code,
-                                                "symbol": symbol,
-                                                "side": sig.get("side"),
-                                            },
-                                            error_message=str(e),
-                                        )
-
-                                # 推送通知
-                                if NOTIFY_ON_SIGNAL:
-                                    result = notifier.send_signal(sig)
-                                    if result.success:
-                                        log.info(f"信号已推送: {sig.get('side')} {symbol}")
-                                    else:
-                                        log.error(f"推送失败: {result.error}")
-
-                            # 冷却：无论单信号还是对冲，一轮只设一次冷却
-                            # 传入 timeframe 确保冷却至少覆盖当前 K 线周期
-                            set_cooldown(symbol, code, timeframe)
-                        else:
-                            log.debug(f"信号置信度不足: {confidence} < {min_conf}")
+            _run_signal_round(strategies)
 
         except Exception as e:
             log.error(f"监控循环异常: {e}", traceback=traceback.format_exc())
@@ -1536,6 +1596,12 @@ DISPATCH_BY_STRATEGY = config.get_bool("dispatch_by_strategy", False)
 STRATEGY_DISPATCH_AMOUNT = config.get_float("strategy_dispatch_amount", 100.0)
 # 为 True 时，远程节点任务投递到 NODE_EXECUTE_QUEUE，由 worker 消费并 POST 到节点；否则直接 POST
 USE_NODE_EXECUTION_QUEUE = config.get_bool("use_node_execution_queue", False)
+# 按策略分发并发上限：本机同时下单数（每单占用一个 DB 连接，须小于 db_pool_size + db_max_overflow）、
+# 同一交易所 / 同一 API Key 同时在途的下单数、远程节点并发 POST 数
+DISPATCH_LOCAL_CONCURRENCY = max(1, config.get_int("dispatch_local_concurrency", 10))
+DISPATCH_EXCHANGE_CONCURRENCY = max(1, config.get_int("dispatch_exchange_concurrency", 8))
+DISPATCH_API_KEY_CONCURRENCY = max(1, config.get_int("dispatch_api_key_concurrency", 1))
+DISPATCH_NODE_CONCURRENCY = max(1, config.get_int("dispatch_node_concurrency", 8))
 # 不在交易所挂 SL/TP 单，一律自管：由 position_monitor 监控到价平仓（防止交易所扫损、与注释一致）
 EXCHANGE_SL_TP = False
 
@@ -1813,58 +1879,52 @@ async def _execute_signal_for_target(
         return {"account_id": target.account_id, "user_id": target.user_id, "success": False, "error": str(e)}
 
 
-RISK_MODE_PCT = {1: 0.01, 2: 0.015, 3: 0.02}
-
-
-def _resolve_amount_leverage_for_tenant(repo, strategy, tenant_id: int):
+async def _execute_local_targets(
+    jobs: List[Tuple[ExecutionTarget, Dict[str, Any], float]],
+    sandbox: bool,
+) -> List[Dict[str, Any]]:
     """
-    按租户解析下单金额与杠杆：
-    优先级：dim_tenant_strategy 覆盖 > dim_strategy 默认
-    返回 (amount_usdt, leverage, capital, max_loss_per_trade)。
-    如果设了 max_loss_per_trade，返回它（以损定仓直接用金额）；
-    否则 fallback 到 capital × risk_pct 计算 max_loss。
+    并发执行本机账户下单，结果按 jobs 顺序返回。
+
+    同一信号的所有跟随账户同时下单，避免逐个执行导致尾部账户成交价滑点。
+    每个账户使用独立 session 并各自提交（结算失败会 rollback，不能共享 session）。
     """
-    if not strategy:
-        return STRATEGY_DISPATCH_AMOUNT, 0, 0, 0
-
-    # 主策略默认值
-    base_capital = float(getattr(strategy, "capital", 0) or 0)
-    base_leverage = int(strategy.leverage or 0)
-    base_risk_mode = int(getattr(strategy, "risk_mode", 1) or 1)
-    base_amount = float(strategy.amount_usdt or 0)
-    base_max_loss = float(getattr(strategy, "max_loss_per_trade", 0) or 0)
-
-    # 租户覆盖
-    ts = repo.get_tenant_strategy(tenant_id, strategy.id)
-    if ts:
-        capital = float(ts.capital) if getattr(ts, "capital", None) is not None else base_capital
-        leverage = int(ts.leverage) if ts.leverage is not None else base_leverage
-        risk_mode = int(getattr(ts, "risk_mode", None) or 0) if getattr(ts, "risk_mode", None) is not None else base_risk_mode
-        amount_fallback = float(ts.amount_usdt) if ts.amount_usdt is not None else base_amount
-        max_loss = float(getattr(ts, "max_loss_per_trade", 0) or 0) if getattr(ts, "max_loss_per_trade", None) is not None else base_max_loss
-    else:
-        capital = base_capital
-        leverage = base_leverage
-        risk_mode = base_risk_mode
-        amount_fallback = base_amount
-        max_loss = base_max_loss
-
-    # 计算 max_loss_per_trade: 优先直接设置的值，否则用 capital × risk_pct
-    if max_loss <= 0 and capital > 0:
-        pct = RISK_MODE_PCT.get(risk_mode, 0.01)
-        max_loss = round(capital * pct, 2)
-
-    # 计算固定金额（兜底值 / 非以损定仓策略用）
-    if capital > 0 and leverage > 0 and max_loss > 0:
-        amount = round(max_loss * leverage, 2)
-    elif capital > 0 and leverage > 0:
-        pct = RISK_MODE_PCT.get(risk_mode, 0.01)
-        amount = round(capital * pct * leverage, 2)
-    else:
-        amount = amount_fallback
+    local_sem = asyncio.Semaphore(DISPATCH_LOCAL_CONCURRENCY)
+    exchange_sems: Dict[str, asyncio.Semaphore] = {}
+    key_sems: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+
+    async def _run(target: ExecutionTarget, signal_for_target: Dict[str, Any], amount: float) -> Dict[str, Any]:
+        exchange = target.exchange or ""
+        key_sem = key_sems.setdefault((exchange, target.api_key or ""), asyncio.Semaphore(DISPATCH_API_KEY_CONCURRENCY))
+        ex_sem = exchange_sems.setdefault(exchange, asyncio.Semaphore(DISPATCH_EXCHANGE_CONCURRENCY))
+        # 固定获取顺序：API Key → 交易所 → 全局，避免互相等待
+        async with key_sem, ex_sem, local_sem:
+            session = get_session()
+            try:
+                r = await _execute_signal_for_target(session, target, signal_for_target, amount, sandbox)
+                session.commit()
+                return r
+            except Exception as e:
+                session.rollback()
+                log.error("local target execute failed", account_id=target.account_id, error=str(e))
+                return {"account_id": target.account_id, "user_id": target.user_id, "success": False, "error": str(e)}
+            finally:
+                session.close()
+
+    return await asyncio.gather(*(_run(*job) for job in jobs))
 
-    amount = amount if amount > 0 else STRATEGY_DISPATCH_AMOUNT
-    return amount, leverage, capital, max_loss
+
+def _post_node_execute(base_url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST /api/execute 到远程节点（在线程池中并发调用）"""
+    node_headers = {}
+    secret = config.get_str("node_auth_secret", "").strip()
+    if secret:
+        node_headers["X-Center-Token"] = secret
+    resp = get_http_client("execution-node").post(
+        f"{base_url}/api/execute", json=payload, headers=node_headers or None, timeout=HTTP_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 def _calc_risk_based_amount(
@@ -1938,15 +1998,27 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
     按策略分发：根据 signal["strategy"] 查 dim_strategy_binding，对每个绑定账户执行。
     金额和杠杆按租户解析：优先 dim_tenant_strategy 实例，无则用主策略 dim_strategy。
     本机账户：进程内 LiveTrader；远程节点账户：POST 到节点，再根据响应在中心写库与结算。
+    本机账户与各远程节点同时下单；results 仍按绑定顺序（本机在前、节点在后）返回。
     """
     strategy_code = (signal or {}).get("strategy") or (signal or {}).get("strategy_code")
     if not strategy_code:
         return {"success": False, "action": "no_strategy", "message": "signal 缺少 strategy/strategy_code"}
     session = get_session()
     try:
+        from libs.exchange.utils import normalize_symbol
+        raw_symbol = (signal or {}).get("symbol", "")
+        # 规范化 symbol → BTC/USDT 格式（数据库中可能存 BTCUSDT 或 BTC/USDT）
+        canonical_symbol = normalize_symbol(raw_symbol, "binance")
+        side_str = (signal or {}).get("side", "BUY").upper()
+        # 合约：BUY→LONG, SELL→SHORT
+        position_side = "LONG" if side_str == "BUY" else "SHORT"
+
+        # 批量解析：目标 + 持仓去重 + 单次模式 + 下单金额杠杆（少量集合查询，目标列表短 TTL 缓存）
         member_svc = MemberService(session)
-        targets = member_svc.get_execution_targets_by_strategy_code(strategy_code)
-        if not targets:
+        resolved = member_svc.resolve_execution_targets(
+            strategy_code, canonical_symbol, position_side, default_amount=STRATEGY_DISPATCH_AMOUNT,
+        )
+        if not resolved:
             return {
                 "success": True,
                 "action": "no_bindings",
@@ -1964,146 +2036,84 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
             signal.setdefault("amount_usdt", strategy_amount)
         if strategy_leverage > 0:
             signal.setdefault("leverage", strategy_leverage)
+        strat_cfg = strategy.get_config() if strategy else {}
 
         sandbox = config.get_bool("exchange_sandbox", True)
+        # results 中并发执行的条目先占位（None），执行完按原顺序回填；远程节点的槽位回填为列表
         results = []
+        local_jobs = []     # (slot, target, signal_for_target, amount)
+        node_jobs = []      # (slot, node_id, base_url, payload, remote_targets)
 
-        # ── 持仓去重：检查每个账户是否已有同向持仓，有则跳过 ──
-        from libs.position.repository import PositionRepository
-        from libs.exchange.utils import normalize_symbol
-        pos_repo = PositionRepository(session)
-        raw_symbol = (signal or {}).get("symbol", "")
-        # 规范化 symbol → BTC/USDT 格式（数据库中可能存 BTCUSDT 或 BTC/USDT）
-        canonical_symbol = normalize_symbol(raw_symbol, "binance")
         # 同步写入信号，保证后续存库也用规范格式
         signal["symbol"] = canonical_symbol
         symbol = canonical_symbol
-        side_str = (signal or {}).get("side", "BUY").upper()
-        # 合约：BUY→LONG, SELL→SHORT
-        position_side = "LONG" if side_str == "BUY" else "SHORT"
 
-        def _has_open_position(target) -> bool:
-            """检查目标账户是否已有同 symbol+同向 的 OPEN 持仓（兼容两种 symbol 格式）"""
-            try:
-                # 同时检查规范格式（BTC/USDT）和无斜杠格式（BTCUSDT）
-                variants = set([symbol, symbol.replace("/", "")])
-                for s in variants:
-                    pos = pos_repo.get_by_key(
-                        tenant_id=target.tenant_id,
-                        account_id=target.account_id,
-                        symbol=s,
-                        exchange=target.exchange or "binance",
-                        position_side=position_side,
-                    )
-                    if pos and pos.quantity and float(pos.quantity) > 0:
-                        return True
-            except Exception:
-                pass
-            return False
-
-        # 按 execution_node_id 分组（所有 target 必定 node_id > 0，已在 get_execution_targets 中过滤）
-        by_node = defaultdict(list)
-        for t in targets:
-            nid = t.execution_node_id or 0
-            by_node[nid].append(t)
-
-        def _is_single_mode_exhausted(target) -> bool:
-            """单次模式检查：mode=1 且已有历史成交记录（曾执行过），则不再执行"""
-            if target.mode != 1:
-                return False  # 循环模式，不限制
-            try:
-                from libs.order_trade.models import Order
-                has_order = session.query(Order.id).filter(
-                    Order.account_id == target.account_id,
-                    Order.symbol.in_([symbol, symbol.replace("/", "")]),
-                    Order.status.in_(["FILLED", "PARTIALLY_FILLED"]),
-                ).first()
-                return has_order is not None
-            except Exception:
-                return False
-
-        local_targets = by_node.get(0, [])
-        for target in local_targets:
-            # 单次模式检查
-            if _is_single_mode_exhausted(target):
-                log.info("单次模式已执行过，跳过",
-                         account_id=target.account_id, symbol=symbol, mode=target.mode)
-                results.append({
-                    "account_id": target.account_id,
-                    "user_id": target.user_id,
-                    "success": False,
-                    "error": f"单次模式已执行过 {symbol}，跳过",
-                    "skipped": True,
-                })
-                continue
-            # 持仓去重检查
-            if _has_open_position(target):
-                log.info(
-                    "跳过已有持仓账户",
-                    account_id=target.account_id,
-                    symbol=symbol,
-                    position_side=position_side,
-                )
-                results.append({
-                    "account_id": target.account_id,
-                    "user_id": target.user_id,
-                    "success": False,
-                    "error": f"已有 {symbol} {position_side} 持仓，跳过",
-                    "skipped": True,
-                })
-                continue
-            # 优先级: 用户绑定参数 > 租户配置 > 策略默认
-            if target.binding_amount_usdt > 0:
-                amount = target.binding_amount_usdt
-                leverage = target.binding_leverage if target.binding_leverage > 0 else 20
-                b_capital = float(getattr(target, "binding_capital", 0) or 0)
-                # max_loss_per_trade: 绑定级 > capital×risk_pct
-                b_max_loss = float(getattr(target, "binding_max_loss_per_trade", 0) or 0)
-                if b_max_loss <= 0 and b_capital > 0:
-                    b_risk_mode = int(getattr(target, "binding_risk_mode", 1) or 1)
-                    b_max_loss = round(b_capital * RISK_MODE_PCT.get(b_risk_mode, 0.01), 2)
-            else:
-                amount, leverage, b_capital, b_max_loss = _resolve_amount_leverage_for_tenant(repo, strategy, target.tenant_id)
+        def _skip_reason(rt: ResolvedTarget) -> Optional[str]:
+            """单次模式已执行 / 已有同向持仓 → 跳过原因"""
+            if rt.single_mode_exhausted:
+                return f"单次模式已执行过 {symbol}，跳过"
+            if rt.has_open_position:
+                return f"已有 {symbol} {position_side} 持仓，跳过"
+            return None
 
-            # ── 以损定仓：如果策略配置了 risk_based_sizing 且有 max_loss + SL ──
-            strat_cfg = strategy.get_config() if strategy else {}
-            if strat_cfg.get("risk_based_sizing") and b_max_loss > 0:
+        def _sized_amount(rt: ResolvedTarget) -> float:
+            """以损定仓（策略配置 risk_based_sizing 且有 max_loss + SL）后按 ratio 缩放"""
+            amount = rt.amount_usdt
+            if strat_cfg.get("risk_based_sizing") and rt.max_loss_per_trade > 0:
                 sig_entry = float(signal.get("entry_price", 0))
                 sig_sl = float(signal.get("stop_loss", 0))
                 if sig_entry > 0 and sig_sl > 0:
                     risk_amount = _calc_risk_based_amount(
-                        capital=b_capital,
-                        max_loss=b_max_loss,
+                        capital=rt.capital,
+                        max_loss=rt.max_loss_per_trade,
                         entry_price=sig_entry,
                         stop_loss=sig_sl,
-                        leverage=leverage,
+                        leverage=rt.leverage,
                     )
                     if risk_amount > 0:
                         sl_dist = abs(sig_entry - sig_sl) / sig_entry * 100
                         log.info(
                             "以损定仓",
-                            account_id=target.account_id,
-                            capital=b_capital,
-                            max_loss=f"{b_max_loss:.2f}U",
+                            account_id=rt.target.account_id,
+                            capital=rt.capital,
+                            max_loss=f"{rt.max_loss_per_trade:.2f}U",
                             sl_distance=f"{sl_dist:.2f}%",
                             old_amount=amount,
                             new_amount=risk_amount,
                         )
                         amount = risk_amount
+            ratio = rt.target.ratio
+            return round(amount * (ratio / 100), 2) if ratio and ratio != 100 else amount
 
-            target_amount = round(amount * (target.ratio / 100), 2) if target.ratio and target.ratio != 100 else amount
+        # 按 execution_node_id 分组（所有 target 必定 node_id > 0，已在 get_execution_targets 中过滤）
+        by_node = defaultdict(list)
+        for rt in resolved:
+            by_node[rt.target.execution_node_id or 0].append(rt)
+
+        for rt in by_node.get(0, []):
+            target = rt.target
+            reason = _skip_reason(rt)
+            if reason:
+                log.info("跳过本机账户", account_id=target.account_id, symbol=symbol, reason=reason)
+                results.append({
+                    "account_id": target.account_id,
+                    "user_id": target.user_id,
+                    "success": False,
+                    "error": reason,
+                    "skipped": True,
+                })
+                continue
             signal_for_target = dict(signal)
-            if leverage > 0:
-                signal_for_target["leverage"] = leverage
-            r = run_async(
-                _execute_signal_for_target(session, target, signal_for_target, target_amount, sandbox)
-            )
-            results.append(r)
+            if rt.leverage > 0:
+                signal_for_target["leverage"] = rt.leverage
+            local_jobs.append((len(results), target, signal_for_target, _sized_amount(rt)))
+            results.append(None)
 
         node_repo = ExecutionNodeRepository(session)
-        for node_id, remote_targets in by_node.items():
-            if node_id == 0 or not remote_targets:
+        for node_id, node_resolved in by_node.items():
+            if node_id == 0 or not node_resolved:
                 continue
+            remote_targets = [rt.target for rt in node_resolved]
             node = node_repo.get_by_id(node_id)
             if not node or node.status != 1:
                 for t in remote_targets:
@@ -2114,50 +2124,19 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
                 for t in remote_targets:
                     results.append({"account_id": t.account_id, "user_id": t.user_id, "success": False, "error": "节点 base_url 为空"})
                 continue
-            # 每个 target 按租户解析 amount/leverage，再按 ratio 缩放金额；跳过已有持仓的账户
+            # 每个 target 使用解析好的 amount/leverage，再按 ratio 缩放金额；跳过已有持仓的账户
             task_list = []
-            for t in remote_targets:
-                if _is_single_mode_exhausted(t):
-                    log.info("单次模式已执行过(远程)", account_id=t.account_id, symbol=symbol, mode=t.mode)
-                    results.append({
-                        "account_id": t.account_id, "user_id": t.user_id,
-                        "success": False, "error": f"单次模式已执行过 {symbol}，跳过", "skipped": True,
-                    })
-                    continue
-                if _has_open_position(t):
-                    log.info("跳过已有持仓账户(远程)", account_id=t.account_id, symbol=symbol, position_side=position_side)
+            for rt in node_resolved:
+                t = rt.target
+                reason = _skip_reason(rt)
+                if reason:
+                    log.info("跳过远程账户", account_id=t.account_id, symbol=symbol, reason=reason)
                     results.append({
                         "account_id": t.account_id, "user_id": t.user_id,
-                        "success": False, "error": f"已有 {symbol} {position_side} 持仓，跳过", "skipped": True,
+                        "success": False, "error": reason, "skipped": True,
                     })
                     continue
-                # 优先级: 用户绑定参数 > 租户配置 > 策略默认
-                if t.binding_amount_usdt > 0:
-                    amount = t.binding_amount_usdt
-                    leverage = t.binding_leverage if t.binding_leverage > 0 else 20
-                    r_capital = float(getattr(t, "binding_capital", 0) or 0)
-                    r_max_loss = float(getattr(t, "binding_max_loss_per_trade", 0) or 0)
-                    if r_max_loss <= 0 and r_capital > 0:
-                        r_risk_mode = int(getattr(t, "binding_risk_mode", 1) or 1)
-                        r_max_loss = round(r_capital * RISK_MODE_PCT.get(r_risk_mode, 0.01), 2)
-                else:
-                    amount, leverage, r_capital, r_max_loss = _resolve_amount_leverage_for_tenant(repo, strategy, t.tenant_id)
-
-                # 以损定仓（远程节点）
-                strat_cfg_r = strategy.get_config() if strategy else {}
-                if strat_cfg_r.get("risk_based_sizing") and r_max_loss > 0:
-                    sig_entry_r = float(signal.get("entry_price", 0))
-                    sig_sl_r = float(signal.get("stop_loss", 0))
-                    if sig_entry_r > 0 and sig_sl_r > 0:
-                        risk_amount_r = _calc_risk_based_amount(
-                            capital=r_capital, max_loss=r_max_loss,
-                            entry_price=sig_entry_r, stop_loss=sig_sl_r,
-                            leverage=leverage,
-                        )
-                        if risk_amount_r > 0:
-                            amount = risk_amount_r
-
-                task_amount = round(amount * (t.ratio / 100), 2) if t.ratio and t.ratio != 100 else amount
+                leverage = rt.leverage
                 task_list.append({
                     "account_id": t.account_id,
                     "tenant_id": t.tenant_id,
@@ -2167,7 +2146,7 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
                     "api_secret": t.api_secret,
                     "passphrase": t.passphrase,
                     "market_type": t.market_type,
-                    "amount_usdt": task_amount,
+                    "amount_usdt": _sized_amount(rt),
                     "leverage": leverage if leverage > 0 else None,
                     "binding_id": t.binding_id,
                     "strategy_code": t.strategy_code,
@@ -2202,24 +2181,38 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
                     continue
                 except Exception as eq:
                     log.warning("node execute queue push failed, fallback to direct POST", node_id=node_id, error=str(eq))
-            try:
-                node_headers = {}
-                secret = config.get_str("node_auth_secret", "").strip()
-                if secret:
-                    node_headers["X-Center-Token"] = secret
-                with httpx.Client(timeout=HTTP_TIMEOUT) as client:
-                    resp = client.post(f"{base_url}/api/execute", json=payload, headers=node_headers or None)
-                    resp.raise_for_status()
-                    data = resp.json()
-            except Exception as e:
-                log.warning("remote node POST failed", node_id=node_id, error=str(e))
-                for t in remote_targets:
-                    results.append({"account_id": t.account_id, "user_id": t.user_id, "success": False, "error": str(e)})
-                continue
-            response_results = data.get("results") or []
-            targets_by_account = {t.account_id: t for t in remote_targets}
-            applied = apply_remote_results_to_db(session, signal, targets_by_account, response_results)
-            results.extend(applied)
+            node_jobs.append((len(results), node_id, base_url, payload, remote_targets))
+            results.append(None)
+
+        # ── 远程节点 POST 与本机下单同时发出；节点响应按节点顺序串行写库 ──
+        node_pool = None
+        node_futures = []
+        if node_jobs:
+            node_pool = ThreadPoolExecutor(max_workers=min(DISPATCH_NODE_CONCURRENCY, len(node_jobs)))
+            node_futures = [node_pool.submit(_post_node_execute, base_url, payload)
+                            for _, _, base_url, payload, _ in node_jobs]
+        try:
+            if local_jobs:
+                local_results = run_async(_execute_local_targets([job[1:] for job in local_jobs], sandbox))
+                for (slot, *_), r in zip(local_jobs, local_results):
+                    results[slot] = r
+            for (slot, node_id, _, _, remote_targets), fut in zip(node_jobs, node_futures):
+                try:
+                    data = fut.result()
+                except Exception as e:
+                    log.warning("remote node POST failed", node_id=node_id, error=str(e))
+                    results[slot] = [
+                        {"account_id": t.account_id, "user_id": t.user_id, "success": False, "error": str(e)}
+                        for t in remote_targets
+                    ]
+                    continue
+                response_results = data.get("results") or []
+                targets_by_account = {t.account_id: t for t in remote_targets}
+                results[slot] = apply_remote_results_to_db(session, signal, targets_by_account, response_results)
+        finally:
+            if node_pool is not None:
+                node_pool.shutdown(wait=False)
+        results = [x for r in results for x in (r if isinstance(r, list) else [r])]
 
         session.commit()
         success_count = sum(1 for r in results if r.get("success"))
@@ -2252,7 +2245,7 @@ def execute_signal_by_strategy(signal: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "success": True,
             "action": "dispatched",
-            "targets": len(targets),
+            "targets": len(resolved),
             "success_count": success_count,
             "results": results,
         }
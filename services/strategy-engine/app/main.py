@@ -7,7 +7,6 @@ Strategy Engine Service
 - POST 到 signal-hub
 """
 
-import httpx
 from dataclasses import asdict
 from typing import Optional, List
 
@@ -16,7 +15,7 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
-from libs.core import get_config, get_logger, setup_logging, gen_id, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, AppError, get_async_http_client, aclose_http_clients
 from libs.contracts import StrategyOutput
 from libs.strategies import get_strategy, STRATEGY_REGISTRY
 
@@ -74,6 +73,11 @@ SIGNAL_HUB_URL = config.get_str("signal_hub_url", "http://127.0.0.1:8001")
 DATA_PROVIDER_URL = config.get_str("data_provider_url", "http://127.0.0.1:8005")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await aclose_http_clients()
+
+
 def _error_payload(code: str, message: str, detail: Optional[dict] = None, request_id: Optional[str] = None) -> dict:
     payload = {"code": code, "message": message, "detail": detail or {}}
     if request_id:
@@ -358,16 +362,15 @@ async def fetch_candles_from_provider(
     """
     从 data-provider 获取 K 线数据
     """
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{DATA_PROVIDER_URL}/api/candles",
-            params={"symbol": symbol, "timeframe": timeframe, "limit": limit},
-            headers={"X-Request-Id": request_id},
-            timeout=10.0,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["candles"]
+    resp = await get_async_http_client("data-provider").get(
+        f"{DATA_PROVIDER_URL}/api/candles",
+        params={"symbol": symbol, "timeframe": timeframe, "limit": limit},
+        headers={"X-Request-Id": request_id},
+        timeout=10.0,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    return data["candles"]
 
 
 async def submit_to_signal_hub(
@@ -399,13 +402,12 @@ async def submit_to_signal_hub(
         },
     }
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{SIGNAL_HUB_URL}/api/signals",
-            json=payload,
-            headers={"X-Request-Id": request_id},
-            timeout=10.0,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["signal"]["signal_id"]
+    resp = await get_async_http_client("signal-hub").post(
+        f"{SIGNAL_HUB_URL}/api/signals",
+        json=payload,
+        headers={"X-Request-Id": request_id},
+        timeout=10.0,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    return data["signal"]["signal_id"]
@@ -20,7 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirna
 
 from libs.runner import StrategyRunner, StrategyTask
 from libs.strategies import list_strategies
-from libs.core import get_config, get_logger, setup_logging, gen_id, AppError
+from libs.core import get_config, get_logger, setup_logging, gen_id, AppError, aclose_http_clients
 
 # 配置
 config = get_config()
@@ -114,6 +114,7 @@ async def lifespan(app: FastAPI):
     # 关闭时停止 Runner
     if runner and runner.is_running():
         await runner.stop()
+    await aclose_http_clients()
     logger.info("StrategyRunner shutdown")
 
 
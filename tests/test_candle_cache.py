@@ -0,0 +1,150 @@
+"""
+K 线缓存二进制编码测试
+
+覆盖范围：
+  1. pack_candles / unpack_candles 往返一致，忽略不完整的开头记录
+  2. merge_packed 顺序追加、同一时间戳覆盖、乱序合并、保留上限
+  3. decode_legacy_hash 解析旧格式（Hash + JSON）
+  4. is_series_fresh 周期边界判断（含周线偏移）、merge_tail 尾部合并
+  5. set 与并发 update_tail 交错时不丢尾部（需要 fakeredis）
+
+运行：
+  PYTHONPATH=. pytest tests/test_candle_cache.py -v
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.cache import candle_cache
+from libs.cache.candle_cache import (
+    RECORD_SIZE,
+    CachedCandle,
+    CandleCache,
+    decode_legacy_hash,
+    is_series_fresh,
+    merge_packed,
+    merge_tail,
+    pack_candles,
+    unpack_candles,
+)
+
+
+def _candle(ts: int, price: float = 100.0) -> CachedCandle:
+    return CachedCandle(timestamp=ts, open=price, high=price + 1, low=price - 1, close=price + 0.5, volume=10.0)
+
+
+class TestCodec:
+
+    def test_roundtrip(self):
+        candles = [_candle(1700000000 + i * 60, 100.0 + i) for i in range(5)]
+        data = pack_candles(candles)
+        assert len(data) == 5 * RECORD_SIZE
+        assert unpack_candles(data) == candles
+
+    def test_partial_leading_record(self):
+        candles = [_candle(1700000000 + i * 60) for i in range(3)]
+        data = pack_candles(candles)
+        # GETRANGE 截断到非记录边界时，只保留完整记录
+        assert unpack_candles(data[5:]) == candles[1:]
+        assert unpack_candles(b"") == []
+
+
+class TestMerge:
+
+    def test_append(self):
+        old = pack_candles([_candle(60), _candle(120)])
+        merged = merge_packed(old, [_candle(180), _candle(240)], max_bars=10)
+        assert [c.timestamp for c in unpack_candles(merged)] == [60, 120, 180, 240]
+
+    def test_overwrite_and_out_of_order(self):
+        old = pack_candles([_candle(60), _candle(120), _candle(240)])
+        merged = merge_packed(old, [_candle(240, 200.0), _candle(180, 150.0)], max_bars=10)
+        result = unpack_candles(merged)
+        assert [c.timestamp for c in result] == [60, 120, 180, 240]
+        assert result[2].open == 150.0
+        assert result[3].open == 200.0
+
+    def test_max_bars(self):
+        merged = merge_packed(b"", [_candle(i * 60) for i in range(1, 21)], max_bars=5)
+        assert [c.timestamp for c in unpack_candles(merged)] == [960, 1020, 1080, 1140, 1200]
+
+
+class TestLegacy:
+
+    def test_decode_legacy_hash(self):
+        data = {
+            "120": json.dumps({"o": 2, "h": 3, "l": 1, "c": 2.5, "v": 9}),
+            "60": json.dumps({"o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 8}),
+            "bad": "{}",
+        }
+        candles = decode_legacy_hash(data)
+        assert [c.timestamp for c in candles] == [60, 120]
+        assert candles[1].close == 2.5
+
+
+class TestFreshness:
+
+    def test_new_bar_boundary(self):
+        now = 1700000000 // 900 * 900 + 30   # 当前 15m K 线开始 30 秒
+        current = now // 900 * 900
+        assert is_series_fresh(current, now - 5, 900, max_age=10, now=now)
+        # 未收盘 K 线超过 max_age 未更新
+        assert not is_series_fresh(current, now - 20, 900, max_age=10, now=now)
+        # 末尾仍是上一根（刚收盘），即使刚更新过也需补尾
+        assert not is_series_fresh(current - 900, now - 1, 900, max_age=10, now=now)
+
+    def test_weekly_offset(self):
+        week, monday = 604800, 345600
+        now = 1700000000 + 3 * 86400           # 2023-11-17（周五）
+        current = (now - monday) // week * week + monday
+        assert is_series_fresh(current, now - 1, week, max_age=10, now=now, offset=monday)
+        # 不带偏移时按周四对齐，周四之后本周 K 线一直被判为上一根（每次都补尾）
+        assert not is_series_fresh(current, now - 1, week, max_age=10, now=now)
+        assert not is_series_fresh(current, None, 900, max_age=10, now=now)
+
+    def test_merge_tail(self):
+        cached = [_candle(60), _candle(120), _candle(180)]
+        tail = [_candle(240, 300.0), _candle(180, 200.0)]
+        merged = merge_tail(cached, tail)
+        assert [c.timestamp for c in merged] == [60, 120, 180, 240]
+        assert merged[2].open == 200.0
+        assert merge_tail(cached, []) is cached
+
+
+class TestConcurrentSet:
+
+    @pytest.fixture
+    def redis(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeRedis()
+        with patch.object(candle_cache, "get_redis_binary", return_value=client):
+            yield client
+
+    def test_set_retries_on_concurrent_update_tail(self, redis):
+        cache = CandleCache()
+        cache.set("BTC/USDT", "1m", [_candle(60 * i) for i in range(5)])
+
+        real_merge = candle_cache.merge_packed
+        calls = []
+
+        def racing_merge(existing, candles, max_bars):
+            # 第一次合并期间另一个写入方追加了新 K 线
+            calls.append(len(existing))
+            if len(calls) == 1:
+                cache.update_tail("BTC/USDT", "1m", [_candle(300, 200.0)])
+            return real_merge(existing, candles, max_bars)
+
+        with patch.object(candle_cache, "merge_packed", racing_merge):
+            assert cache.set("BTC/USDT", "1m", [_candle(120, 150.0)])
+
+        assert len(calls) == 2
+        candles = cache.get("BTC/USDT", "1m", limit=10)
+        assert [c.timestamp for c in candles] == [0, 60, 120, 180, 240, 300]
+        assert candles[2].open == 150.0 and candles[-1].open == 200.0
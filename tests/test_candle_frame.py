@@ -0,0 +1,115 @@
+"""
+CandleFrame 列式 K 线容器测试
+
+覆盖范围：
+  1. List[Dict] 兼容行为（len / 下标 / 负下标 / 迭代 / 切片）
+  2. 列视图与切片零拷贝
+  3. 默认不保留原始行，按需构造 dict；keep_rows=True 返回原 dict
+  4. column_list 对 list 与 frame 结果一致
+
+运行：
+  PYTHONPATH=. pytest tests/test_candle_frame.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.indicators.candle_frame import CandleFrame, NUMPY_AVAILABLE, column_list
+
+
+def _candles(n: int = 10):
+    return [
+        {
+            "open": 100.0 + i,
+            "high": 101.0 + i,
+            "low": 99.0 + i,
+            "close": 100.5 + i,
+            "volume": 10.0 * i,
+            "timestamp": 1700000000 + i * 60,
+        }
+        for i in range(n)
+    ]
+
+
+class TestListCompat:
+
+    def test_len_and_index(self):
+        raw = _candles()
+        frame = CandleFrame.from_candles(raw, keep_rows=True)
+        assert len(frame) == 10
+        assert frame[0] is raw[0]
+        assert frame[-1]["close"] == 109.5
+        with pytest.raises(IndexError):
+            frame[10]
+
+    def test_iteration(self):
+        raw = _candles()
+        frame = CandleFrame.from_candles(raw, keep_rows=True)
+        assert [c["close"] for c in frame] == [c["close"] for c in raw]
+        assert list(reversed(frame))[0] is raw[-1]
+
+    def test_slice_view(self):
+        raw = _candles()
+        frame = CandleFrame.from_candles(raw, keep_rows=True)
+        view = frame[2:6]
+        assert isinstance(view, CandleFrame)
+        assert len(view) == 4
+        assert view[0] is raw[2]
+        assert view[-1] is raw[5]
+        assert view[1:3][0] is raw[3]
+        assert list(view.close) == [102.5, 103.5, 104.5, 105.5]
+        assert len(frame[8:3]) == 0
+        assert not frame[8:3]
+
+    def test_step_slice_returns_list(self):
+        frame = CandleFrame.from_candles(_candles())
+        assert [c["close"] for c in frame[::3]] == [100.5, 103.5, 106.5, 109.5]
+
+    def test_from_candles_idempotent(self):
+        frame = CandleFrame.from_candles(_candles())
+        assert CandleFrame.from_candles(frame) is frame
+
+
+class TestColumns:
+
+    def test_columns(self):
+        frame = CandleFrame.from_candles(_candles())
+        assert frame.close.tolist() == [100.5 + i for i in range(10)]
+        assert frame.timestamp.tolist()[-1] == 1700000000 + 9 * 60
+
+    @pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+    def test_slice_shares_memory(self):
+        import numpy as np
+        frame = CandleFrame.from_candles(_candles())
+        assert np.shares_memory(frame.close, frame[3:7].close)
+        assert frame.close.dtype == np.float64
+        assert frame.timestamp.dtype == np.int64
+
+    def test_without_rows(self):
+        raw = _candles()
+        frame = CandleFrame.from_candles(raw)
+        row = frame[4]
+        assert row is not raw[4]
+        assert row == _candles()[4]
+        assert frame.to_list() == _candles()
+
+    def test_non_numeric_timestamp(self):
+        raw = _candles(3)
+        for c in raw:
+            c["timestamp"] = "2024-01-01 00:00:00"
+        frame = CandleFrame.from_candles(raw, keep_rows=True)
+        assert frame[0]["timestamp"] == "2024-01-01 00:00:00"
+        with pytest.raises(KeyError):
+            frame.timestamp
+        with pytest.raises(ValueError):
+            CandleFrame.from_candles(raw)
+
+    def test_column_list(self):
+        raw = _candles()
+        frame = CandleFrame.from_candles(raw)
+        assert column_list(raw, "high") == column_list(frame, "high")
+        assert column_list(frame[5:], "low") == [c["low"] for c in raw[5:]]
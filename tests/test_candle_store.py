@@ -0,0 +1,166 @@
+"""
+本地 K 线存储（CandleStore）与回填任务测试
+
+覆盖范围：
+  1. 写入 / [start, end) 区间读取（跨分块、未对齐边界）
+  2. 覆盖写幂等、缺口检测、bounds
+  3. 无 NumPy 回退路径读取结果一致
+  4. backfill_candles 只拉取缺口并分页推进
+  5. 周线按周一开盘对齐（epoch 为周四）
+
+运行：
+  PYTHONPATH=. pytest tests/test_candle_store.py -v
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.cache import candle_store
+from libs.cache.candle_backfill import backfill_candles
+from libs.cache.candle_store import CHUNK_BARS, CandleStore, bar_open
+
+HOUR = 3600
+# 对齐到分块边界前 10 根，方便覆盖跨块读取
+T0 = (1700000000 // (HOUR * CHUNK_BARS) + 1) * HOUR * CHUNK_BARS - 10 * HOUR
+
+
+def _candles(start: int, n: int, interval: int = HOUR):
+    return [
+        {
+            "timestamp": start + i * interval,
+            "open": 100.0 + i,
+            "high": 101.0 + i,
+            "low": 99.0 + i,
+            "close": 100.5 + i,
+            "volume": float(i),
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+class TestReadWrite:
+
+    def test_range_across_chunks(self, store):
+        assert store.write("BTC/USDT", "1h", _candles(T0, 30)) == 30
+        frame = store.read_range("BTC/USDT", "1h", T0 + 5 * HOUR, T0 + 25 * HOUR)
+        assert len(frame) == 20
+        assert frame[0]["timestamp"] == T0 + 5 * HOUR
+        assert frame[-1]["close"] == 100.5 + 24
+        assert frame.timestamp.tolist() == [T0 + i * HOUR for i in range(5, 25)]
+
+    def test_unaligned_bounds(self, store):
+        store.write("BTC/USDT", "1h", _candles(T0, 5))
+        frame = store.read_range("BTC/USDT", "1h", T0 + 1, T0 + 3 * HOUR + 1)
+        assert frame.timestamp.tolist() == [T0 + HOUR, T0 + 2 * HOUR, T0 + 3 * HOUR]
+
+    def test_overwrite_and_misaligned(self, store):
+        store.write("BTC/USDT", "1h", _candles(T0, 3))
+        updated = dict(_candles(T0, 3)[2], close=999.0)
+        assert store.write("BTC/USDT", "1h", [updated, {**updated, "timestamp": T0 + 7}]) == 1
+        frame = store.read_range("BTC/USDT", "1h", T0, T0 + 3 * HOUR)
+        assert len(frame) == 3
+        assert frame[-1]["close"] == 999.0
+
+    def test_symbol_and_exchange_isolated(self, store):
+        store.write("BTC/USDT", "1h", _candles(T0, 3))
+        assert len(store.read_range("BTCUSDT", "1h", T0, T0 + 3 * HOUR)) == 3
+        assert len(store.read_range("BTC/USDT", "1h", T0, T0 + 3 * HOUR, exchange="okx")) == 0
+        assert len(store.read_range("ETH/USDT", "1h", T0, T0 + 3 * HOUR)) == 0
+
+    def test_pure_python_fallback(self, store, monkeypatch):
+        store.write("BTC/USDT", "1h", _candles(T0, 30))
+        store.write("BTC/USDT", "1h", _candles(T0 + 40 * HOUR, 5))
+        fast = store.read_range("BTC/USDT", "1h", T0, T0 + 50 * HOUR).to_list()
+        fast_gaps = store.gaps("BTC/USDT", "1h", T0, T0 + 50 * HOUR)
+        monkeypatch.setattr(candle_store, "NUMPY_AVAILABLE", False)
+        assert store.read_range("BTC/USDT", "1h", T0, T0 + 50 * HOUR).to_list() == fast
+        assert store.gaps("BTC/USDT", "1h", T0, T0 + 50 * HOUR) == fast_gaps
+
+
+class TestWeekly:
+    WEEK = 7 * 86400
+    MONDAY = 1700438400  # 2023-11-20 00:00 UTC
+
+    def test_round_trip(self, store):
+        assert store.write("BTC/USDT", "1w", _candles(self.MONDAY, 10, self.WEEK)) == 10
+        frame = store.read_range("BTC/USDT", "1w", self.MONDAY - 1, self.MONDAY + 10 * self.WEEK)
+        assert frame.timestamp.tolist() == [self.MONDAY + i * self.WEEK for i in range(10)]
+        assert store.bounds("BTC/USDT", "1w") == (self.MONDAY, self.MONDAY + 9 * self.WEEK)
+        assert store.gaps("BTC/USDT", "1w", self.MONDAY - 2 * self.WEEK, self.MONDAY + 12 * self.WEEK) == [
+            (self.MONDAY - 2 * self.WEEK, self.MONDAY),
+            (self.MONDAY + 10 * self.WEEK, self.MONDAY + 12 * self.WEEK),
+        ]
+
+    def test_thursday_misaligned(self, store):
+        thursday = self.MONDAY // self.WEEK * self.WEEK
+        assert store.write("BTC/USDT", "1w", _candles(thursday, 2, self.WEEK)) == 0
+
+    def test_bar_open(self):
+        assert bar_open(self.MONDAY + 3 * 86400 + 5, "1w") == self.MONDAY
+        assert bar_open(T0 + 5, "1h") == T0
+
+
+class TestGaps:
+
+    def test_gaps(self, store):
+        store.write("BTC/USDT", "1h", _candles(T0, 5))
+        store.write("BTC/USDT", "1h", _candles(T0 + 8 * HOUR, 4))
+        end = T0 + 15 * HOUR
+        assert store.gaps("BTC/USDT", "1h", T0 - 2 * HOUR, end) == [
+            (T0 - 2 * HOUR, T0),
+            (T0 + 5 * HOUR, T0 + 8 * HOUR),
+            (T0 + 12 * HOUR, end),
+        ]
+        assert store.gaps("BTC/USDT", "1h", T0, T0 + 5 * HOUR) == []
+
+    def test_bounds(self, store):
+        assert store.bounds("BTC/USDT", "1h") is None
+        store.write("BTC/USDT", "1h", _candles(T0 + 3 * HOUR, 20))
+        assert store.bounds("BTC/USDT", "1h") == (T0 + 3 * HOUR, T0 + 22 * HOUR)
+
+
+class _FakeClient:
+    """按 since 分页返回连续 1h K 线（毫秒时间戳）"""
+
+    name = "binance"
+    supported_timeframes = ["1h"]
+
+    def __init__(self, page_size: int = 7):
+        self.page_size = page_size
+        self.calls = []
+
+    async def fetch_ohlcv(self, symbol, timeframe="1h", limit=100, since=None):
+        self.calls.append(since // 1000)
+        start = since // 1000
+        return [
+            SimpleNamespace(timestamp=c["timestamp"] * 1000, **{k: c[k] for k in ("open", "high", "low", "close", "volume")})
+            for c in _candles(start, min(limit, self.page_size))
+        ]
+
+
+class TestBackfill:
+
+    def test_fills_only_gaps(self, store):
+        store.write("BTC/USDT", "1h", _candles(T0 + 10 * HOUR, 5))
+        client = _FakeClient(page_size=4)
+        stats = asyncio.run(backfill_candles(client, store, "BTC/USDT", "1h", T0, T0 + 20 * HOUR))
+        assert store.gaps("BTC/USDT", "1h", T0, T0 + 20 * HOUR) == []
+        assert stats["gaps_before"] == 2 and stats["gaps_after"] == 0
+        assert stats["written"] == 15
+        # 缺口 [T0, T0+10h) 分 3 页，[T0+15h, T0+20h) 分 2 页
+        assert client.calls == [T0, T0 + 4 * HOUR, T0 + 8 * HOUR, T0 + 15 * HOUR, T0 + 19 * HOUR]
+
+    def test_unsupported_timeframe(self, store):
+        with pytest.raises(ValueError):
+            asyncio.run(backfill_candles(_FakeClient(), store, "BTC/USDT", "4h", T0, T0 + HOUR))
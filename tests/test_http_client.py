@@ -0,0 +1,105 @@
+"""
+共享 HTTP 客户端测试
+
+覆盖范围：
+  1. 同一 name 返回同一连接池，不同 name 相互隔离
+  2. 关闭后重新获取会重建客户端
+  3. 异步客户端按事件循环缓存
+  4. 单次请求 timeout 覆盖默认值；不同默认超时不共用同一客户端
+  5. 持仓监控单次扫描在关闭事件循环前关闭其客户端
+
+运行：
+  PYTHONPATH=. pytest tests/test_http_client.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.core import (
+    aclose_http_clients,
+    close_http_clients,
+    get_async_http_client,
+    get_http_client,
+)
+
+
+class TestSyncClient:
+
+    def teardown_method(self):
+        close_http_clients()
+
+    def test_shared_per_name(self):
+        a = get_http_client("data-provider")
+        assert get_http_client("data-provider") is a
+        assert get_http_client("execution-node") is not a
+
+    def test_recreate_after_close(self):
+        a = get_http_client("data-provider")
+        close_http_clients()
+        assert a.is_closed
+        b = get_http_client("data-provider")
+        assert b is not a and not b.is_closed
+
+    def test_default_timeout_not_inherited(self):
+        a = get_http_client("execution-node", timeout=30.0)
+        b = get_http_client("execution-node", timeout=5.0)
+        assert a is not b
+        assert a.timeout.read == 30.0 and b.timeout.read == 5.0
+        assert get_http_client("execution-node", timeout=30.0) is a
+        assert get_http_client("execution-node") not in (a, b)
+
+    def test_request_timeout_and_reuse(self):
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.extensions["timeout"]["read"])
+            return httpx.Response(200, json={"ok": True})
+
+        client = get_http_client("mock")
+        client._transport = httpx.MockTransport(handler)
+        assert client.get("http://svc/a", timeout=3.0).json() == {"ok": True}
+        client.get("http://svc/b")
+        assert seen[0] == 3.0
+        assert seen[1] == client.timeout.read
+
+
+class TestAsyncClient:
+
+    def test_cached_per_loop(self):
+        async def scenario():
+            a = get_async_http_client("signal-hub")
+            b = get_async_http_client("signal-hub")
+            await aclose_http_clients()
+            return a, b
+
+        a, b = asyncio.run(scenario())
+        assert a is b and a.is_closed
+        c, _ = asyncio.run(scenario())
+        assert c is not a
+
+    def test_async_default_timeout_not_inherited(self):
+        async def scenario():
+            a = get_async_http_client("center", timeout=10.0)
+            b = get_async_http_client("center", timeout=3.0)
+            result = (a is not b, a.timeout.read, b.timeout.read)
+            await aclose_http_clients()
+            return result
+
+        assert asyncio.run(scenario()) == (True, 10.0, 3.0)
+
+    def test_run_scan_once_closes_loop_clients(self, monkeypatch):
+        from libs.position import monitor
+
+        created = []
+
+        async def fake_cycle(feed=None, reload=False):
+            created.append(get_async_http_client("execution-node"))
+
+        monkeypatch.setattr(monitor, "_monitor_cycle", fake_cycle)
+        assert monitor.run_scan_once()["scanned"] is True
+        assert len(created) == 1 and created[0].is_closed
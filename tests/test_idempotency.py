@@ -0,0 +1,83 @@
+"""
+IdempotencyChecker 测试（需要 fakeredis，未安装时跳过）
+
+覆盖范围：
+  1. acquire_many 一次批量获取，重复键返回 False
+  2. complete / fail 服务端原子更新，保留 task_id / created_at，结果 JSON 原样保存
+  3. complete_many 批量完成
+  4. 已完成的键以 Redis 为准：其他进程 delete 后可立即再次获取
+
+运行：
+  PYTHONPATH=. pytest tests/test_idempotency.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from unittest.mock import patch
+
+from libs.queue.idempotency import IdempotencyChecker, TaskState
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("libs.queue.idempotency.get_redis", return_value=client):
+        yield client
+
+
+class TestIdempotencyChecker:
+    def test_acquire_many(self, redis):
+        checker = IdempotencyChecker()
+        assert checker.acquire("exec:s1", "T0")
+        result = checker.acquire_many(["exec:s1", "exec:s2", "exec:s3", "exec:s2"], task_ids={"exec:s2": "T2"})
+        assert result == {"exec:s1": False, "exec:s2": True, "exec:s3": True}
+        assert checker.get("exec:s2").task_id == "T2"
+        assert checker.get("exec:s3").state == TaskState.PROCESSING
+
+    def test_complete_keeps_metadata(self, redis):
+        checker = IdempotencyChecker(ttl_seconds=60)
+        checker.acquire("exec:s1", "T1")
+        created_at = checker.get("exec:s1").created_at
+        checker.complete("exec:s1", {"fills": [], "price": 1.5, "note": "成交/ok"})
+        record = checker.get("exec:s1")
+        assert record.state == TaskState.COMPLETED
+        assert record.task_id == "T1"
+        assert record.created_at == created_at
+        assert record.result == {"fills": [], "price": 1.5, "note": "成交/ok"}
+        assert 0 < redis.ttl("ironbull:idempotency:exec:s1") <= 60
+
+    def test_fail_and_missing_key(self, redis):
+        checker = IdempotencyChecker()
+        checker.fail("exec:s9", 'node "down"')
+        record = checker.get("exec:s9")
+        assert record.state == TaskState.FAILED
+        assert record.error == 'node "down"'
+        assert record.task_id is None
+        assert record.created_at
+        assert not checker.acquire("exec:s9")
+
+    def test_complete_many(self, redis):
+        checker = IdempotencyChecker()
+        checker.acquire_many(["a", "b"], task_ids="T")
+        checker.complete_many({"a": {"ok": 1}, "b": None})
+        assert checker.get("a").result == {"ok": 1}
+        assert checker.get("b").state == TaskState.COMPLETED
+        assert checker.get("b").task_id == "T"
+
+    def test_completed_then_reset_elsewhere(self, redis):
+        api, worker = IdempotencyChecker(), IdempotencyChecker()
+        assert api.acquire("exec:s1")
+        worker.complete("exec:s1", {})
+        assert not api.acquire("exec:s1")
+        assert api.acquire_many(["exec:s1"]) == {"exec:s1": False}
+        # 其他进程重置后立即可再次获取（无本地缓存残留）
+        worker.delete("exec:s1")
+        assert api.acquire("exec:s1")
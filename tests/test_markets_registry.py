@@ -0,0 +1,123 @@
+"""
+MarketsRegistry 测试
+
+覆盖范围：
+  1. 交易所名 / 市场类型规范化（binance+future → binanceusdm/swap）
+  2. 同一 key 只下载一次，并发 get 合并为一次加载
+  3. 磁盘快照写入后，新实例直接从快照加载不下载
+  4. 刷新失败保留旧数据；过期条目由 refresh_stale 刷新
+  5. apply 注入真实 ccxt 实例后 load_markets 不再下载，版本不变时跳过
+
+运行：
+  PYTHONPATH=. pytest tests/test_markets_registry.py -v
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.exchange.markets_registry import MarketsRegistry, markets_key
+
+BTC_SWAP = {
+    "id": "BTCUSDT", "symbol": "BTC/USDT:USDT", "base": "BTC", "quote": "USDT", "settle": "USDT",
+    "baseId": "BTC", "quoteId": "USDT", "settleId": "USDT", "type": "swap", "spot": False,
+    "swap": True, "contract": True, "linear": True, "active": True, "contractSize": 1,
+    "precision": {"amount": 0.001, "price": 0.1}, "limits": {"amount": {"min": 0.001}},
+}
+
+
+class FakeLoader:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls += 1
+        if self.fail:
+            raise RuntimeError("network down")
+        return {BTC_SWAP["symbol"]: dict(BTC_SWAP)}, {"USDT": {"id": "USDT", "code": "USDT"}}
+
+
+class TestMarketsKey:
+    def test_normalize(self):
+        assert markets_key("binance", "future") == ("binanceusdm", "swap", False)
+        assert markets_key("binanceusdm", "swap") == ("binanceusdm", "swap", False)
+        assert markets_key("binance", "spot") == ("binance", "spot", False)
+        assert markets_key("gate", "future", True) == ("gateio", "swap", True)
+        assert markets_key("gateio", "swap") == markets_key("gate", "future")
+
+
+class TestMarketsRegistry:
+    def test_load_once(self):
+        loader = FakeLoader()
+        registry = MarketsRegistry(loader=loader, background=False)
+        threads = [threading.Thread(target=registry.get, args=("binance", "future")) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        snap = registry.get("binanceusdm", "swap")
+        assert loader.calls == 1
+        assert "BTC/USDT:USDT" in snap.markets
+
+    def test_snapshot_roundtrip(self, tmp_path):
+        loader = FakeLoader()
+        MarketsRegistry(snapshot_dir=str(tmp_path), loader=loader, background=False).get("okx", "swap")
+        assert (tmp_path / "okx-swap.json").exists()
+
+        offline = FakeLoader(fail=True)
+        registry = MarketsRegistry(snapshot_dir=str(tmp_path), loader=offline, background=False)
+        snap = registry.get("okx", "future")
+        assert offline.calls == 0
+        assert registry.stats()["snapshot_loads"] == 1
+        assert snap.markets["BTC/USDT:USDT"]["id"] == "BTCUSDT"
+
+    def test_refresh_failure_keeps_previous(self):
+        loader = FakeLoader()
+        registry = MarketsRegistry(loader=loader, background=False)
+        first = registry.get("gate", "swap")
+        loader.fail = True
+        assert registry.refresh("gate", "swap") is first
+        assert registry.stats()["refresh_errors"] == 1
+        assert registry.get("gate", "swap") is first
+
+    def test_refresh_stale(self):
+        loader = FakeLoader()
+        registry = MarketsRegistry(refresh_interval=60, loader=loader, background=False)
+        first = registry.get("gate", "swap")
+        assert registry.refresh_stale() == 0
+        first.loaded_at -= 120
+        assert registry.refresh_stale() == 1
+        assert registry.get("gate", "swap").version > first.version
+
+    def test_unavailable_returns_none(self):
+        registry = MarketsRegistry(loader=FakeLoader(fail=True), background=False)
+        assert registry.get("binance", "future") is None
+
+
+class TestInjection:
+    def test_apply_to_ccxt(self):
+        import ccxt.async_support as ccxt_async
+
+        registry = MarketsRegistry(loader=FakeLoader(), background=False)
+
+        async def _run():
+            ex = ccxt_async.binanceusdm()
+            try:
+                assert await registry.ainject(ex, "binance", "future")
+                # 已注入：load_markets 直接返回，不走网络
+                markets = await ex.load_markets()
+                assert ex.market("BTC/USDT:USDT")["id"] == "BTCUSDT"
+                assert "BTC/USDT:USDT" in markets
+                before = ex.markets
+                assert registry.inject(ex, "binance", "future")
+                assert ex.markets is before
+            finally:
+                await ex.close()
+
+        asyncio.run(_run())
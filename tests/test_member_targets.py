@@ -0,0 +1,219 @@
+"""
+按策略执行目标解析测试（批量路径使用 sqlite 内存库，不依赖外部数据库）
+
+覆盖范围：
+  1. resolve_target_sizing：绑定参数 > 租户实例 > 主策略 的优先级与兜底金额
+  2. TargetCache：TTL 内命中、版本号变化 / 过期 / clear 后重新加载、ttl=0 不缓存
+  3. resolve_execution_targets 批量解析结果与逐条路径一致，持仓 / 单次模式过滤正确，查询次数固定
+  4. 绑定 / 账户变更提交后 TargetCache 失效
+
+运行：
+  PYTHONPATH=. pytest tests/test_member_targets.py -v
+"""
+
+import os
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from libs.member.models import ExchangeAccount, Strategy, StrategyBinding, TenantStrategy, User
+from libs.member.service import ExecutionTarget, MemberService, resolve_target_sizing, resolve_tenant_sizing
+from libs.member.target_cache import TargetCache, get_target_cache
+from libs.order_trade.models import Order
+from libs.position.models import Position
+from libs.tenant.models import Tenant
+
+
+def _target(**kw) -> ExecutionTarget:
+    base = dict(
+        tenant_id=1, account_id=1, user_id=1, exchange="binance", api_key="k", api_secret="s",
+        passphrase=None, market_type="future", binding_id=1, strategy_code="ma", ratio=100,
+    )
+    base.update(kw)
+    return ExecutionTarget(**base)
+
+
+def _strategy(**kw):
+    base = dict(id=1, capital=0, leverage=10, risk_mode=1, amount_usdt=100, max_loss_per_trade=0)
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def _tenant_strategy(**kw):
+    base = dict(capital=None, leverage=None, risk_mode=None, amount_usdt=None, max_loss_per_trade=None)
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+class TestSizing:
+
+    def test_binding_overrides(self):
+        t = _target(binding_amount_usdt=200, binding_leverage=0, binding_capital=1000, binding_risk_mode=2)
+        amount, leverage, capital, max_loss = resolve_target_sizing(t, _strategy(), _tenant_strategy(leverage=5), 50)
+        assert (amount, leverage, capital, max_loss) == (200, 20, 1000, 15.0)
+
+    def test_tenant_over_strategy(self):
+        amount, leverage, _, _ = resolve_target_sizing(_target(), _strategy(), _tenant_strategy(leverage=5), 50)
+        assert (amount, leverage) == (100, 5)
+        # 租户设置本金：max_loss = capital × risk_pct，金额 = max_loss × leverage
+        amount, leverage, capital, max_loss = resolve_tenant_sizing(
+            _strategy(), _tenant_strategy(capital=2000, risk_mode=3), 50,
+        )
+        assert (amount, leverage, capital, max_loss) == (400.0, 10, 2000, 40.0)
+
+    def test_default_amount(self):
+        assert resolve_tenant_sizing(None, None, 50) == (50, 0, 0, 0)
+        assert resolve_tenant_sizing(_strategy(amount_usdt=0), None, 50)[0] == 50
+
+
+class TestTargetCache:
+
+    def test_hit_and_version_invalidation(self):
+        version = {"v": "1"}
+        cache = TargetCache(ttl=60, version_fn=lambda: version["v"])
+        calls = []
+        loader = lambda: calls.append(1) or len(calls)
+        assert cache.get_or_load("ma", loader) == 1
+        assert cache.get_or_load("ma", loader) == 1
+        version["v"] = "2"
+        assert cache.get_or_load("ma", loader) == 2
+        cache.clear()
+        assert cache.get_or_load("ma", loader) == 3
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    def test_expiry_and_disabled(self):
+        calls = []
+        loader = lambda: calls.append(1) or len(calls)
+        expired = TargetCache(ttl=1e-9, version_fn=lambda: None)
+        expired.get_or_load("ma", loader)
+        expired.get_or_load("ma", loader)
+        assert len(calls) == 2
+        TargetCache(ttl=0, version_fn=lambda: None).get_or_load("ma", loader)
+        assert len(calls) == 3
+
+
+TABLES = [Tenant.__table__, User.__table__, ExchangeAccount.__table__, Strategy.__table__, TenantStrategy.__table__,
+          StrategyBinding.__table__, Position.__table__, Order.__table__]
+
+# (binding/account/user id, tenant_id, execution_node_id, 点卡, 绑定 mode, 账户 status)
+BINDINGS = [
+    (1, 1, 3, 10, 2, 1),   # 可执行
+    (2, 1, None, 10, 2, 1),  # 未绑定执行节点
+    (3, 1, 3, 0, 2, 1),    # 点卡为 0
+    (4, 2, 3, 10, 2, 1),   # 租户 2 策略实例已下架
+    (5, 1, 4, 10, 1, 1),   # 单次模式，已有成交
+    (6, 1, 4, 10, 2, 1),   # 已有同向持仓
+    (7, 1, 3, 10, 2, 0),   # 账户停用
+    (8, 1, 4, 10, 1, 1),   # 单次模式，无成交
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for table in TABLES:
+        table.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Strategy(id=1, code="ma", name="MA", symbol="BTC/USDT", amount_usdt=100, leverage=10))
+    session.add_all([TenantStrategy(id=1, tenant_id=1, strategy_id=1, leverage=5, status=1),
+                     TenantStrategy(id=2, tenant_id=2, strategy_id=1, status=0)])
+    for i, tenant_id, node, point, mode, acc_status in BINDINGS:
+        session.add(User(id=i, tenant_id=tenant_id, email=f"u{i}@x", invite_code=f"INV{i:05d}",
+                         point_card_self=Decimal(point)))
+        session.add(ExchangeAccount(id=i, user_id=i, tenant_id=tenant_id, exchange="binance", api_key=f"k{i}",
+                                    api_secret="s", execution_node_id=node, status=acc_status))
+        session.add(StrategyBinding(id=i, user_id=i, account_id=i, strategy_code="ma", mode=mode,
+                                    capital=Decimal("1000") if i == 6 else None, leverage=20))
+    session.add(Order(id=1, order_id="O5", tenant_id=1, account_id=5, symbol="BTCUSDT", exchange="binance",
+                      side="BUY", order_type="MARKET", quantity=1, status="FILLED"))
+    session.add(Position(id=1, position_id="P6", tenant_id=1, account_id=6, symbol="BTC/USDT", exchange="binance",
+                         position_side="LONG", quantity=Decimal("0.1")))
+    session.commit()
+    get_target_cache().clear()
+    yield engine, session
+    session.close()
+    get_target_cache().clear()
+
+
+class TestResolveExecutionTargets:
+
+    def test_matches_per_row_path(self, db):
+        _, session = db
+        svc = MemberService(session)
+        per_row = svc.get_execution_targets_by_strategy_code("ma")
+        resolved = svc.resolve_execution_targets("ma", "BTC/USDT", "LONG", default_amount=50, use_cache=False)
+        assert [r.target for r in resolved] == per_row
+        assert [t.account_id for t in per_row] == [1, 5, 6, 8]
+        by_account = {r.target.account_id: r for r in resolved}
+        assert (by_account[1].amount_usdt, by_account[1].leverage) == (100, 5)
+        assert by_account[6].capital == 1000
+
+    def test_position_and_single_mode_filters(self, db):
+        _, session = db
+        resolved = MemberService(session).resolve_execution_targets("ma", "BTC/USDT", "LONG", use_cache=False)
+        flags = {r.target.account_id: (r.has_open_position, r.single_mode_exhausted) for r in resolved}
+        assert flags == {1: (False, False), 5: (False, True), 6: (True, False), 8: (False, False)}
+        # 反向信号不受 LONG 持仓影响；其他 symbol 不受单次模式成交影响
+        short = MemberService(session).resolve_execution_targets("ma", "BTC/USDT", "SHORT", use_cache=False)
+        assert not any(r.has_open_position for r in short)
+        eth = MemberService(session).resolve_execution_targets("ma", "ETH/USDT", "LONG", use_cache=False)
+        assert not any(r.single_mode_exhausted or r.has_open_position for r in eth)
+
+    def test_query_count_constant(self, db):
+        engine, session = db
+        for i in range(100, 300):
+            session.add(User(id=i, tenant_id=1, email=f"u{i}@x", invite_code=f"INV{i:05d}", point_card_self=5))
+            session.add(ExchangeAccount(id=i, user_id=i, tenant_id=1, exchange="binance", api_key=f"k{i}",
+                                        api_secret="s", execution_node_id=3))
+            session.add(StrategyBinding(id=i, user_id=i, account_id=i, strategy_code="ma", mode=1 + i % 2))
+        session.commit()
+        session.expunge_all()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            resolved = MemberService(session).resolve_execution_targets("ma", "BTC/USDT", "LONG", use_cache=False)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert len(resolved) == 204
+        # 策略、绑定、账户、用户、租户实例、持仓、订单
+        assert len(statements) == 7
+
+    def test_cache_invalidated_on_commit(self, db):
+        _, session = db
+        svc = MemberService(session)
+        cache = get_target_cache()
+        if cache.ttl <= 0:
+            pytest.skip("member_target_cache_ttl 为 0，未启用缓存")
+
+        def accounts():
+            return [r.target.account_id for r in svc.resolve_execution_targets("ma", "BTC/USDT", "LONG")]
+
+        assert accounts() == [1, 5, 6, 8]
+        hits = cache.hits
+        assert accounts() == [1, 5, 6, 8]
+        assert cache.hits == hits + 1
+
+        # 绑定停用
+        session.get(StrategyBinding, 8).status = 0
+        session.commit()
+        assert accounts() == [1, 5, 6]
+
+        # 账户解绑执行节点
+        session.get(ExchangeAccount, 6).execution_node_id = None
+        session.commit()
+        assert accounts() == [1, 5]
+
+        # 不影响执行目标的账户字段（余额同步）不触发失效
+        session.get(ExchangeAccount, 1).futures_balance = Decimal("123")
+        session.commit()
+        hits = cache.hits
+        assert accounts() == [1, 5]
+        assert cache.hits == hits + 1
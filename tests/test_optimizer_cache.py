@@ -0,0 +1,115 @@
+"""
+遗传算法评估缓存测试
+
+覆盖范围：
+  1. 重复基因只回测一次（批内重复 + 跨代）
+  2. 持久化目录跨优化器实例复用
+  3. 命名空间（数据集指纹 / 引擎设置）变化时不串用
+  4. 回测异常不写入缓存
+  5. 策略源码指纹随代码变化
+
+运行：
+  PYTHONPATH=. pytest tests/test_optimizer_cache.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.optimizer import (
+    EvaluationCache,
+    GeneticOptimizer,
+    GeneticConfig,
+    ParameterSpace,
+    fingerprint_candles,
+    fingerprint_code,
+    fitness_pnl,
+)
+
+
+class _CountingBacktest:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, params):
+        self.calls += 1
+        return {"total_pnl": -(params["a"] - 2) ** 2, "total_trades": 5}
+
+
+def _optimizer(backtest, cache=None, seed=1):
+    # 离散小空间（3 x 2 = 6 种基因）必然产生大量重复
+    space = ParameterSpace().add_int("a", 1, 3).add_choice("b", ["x", "y"])
+    return GeneticOptimizer(
+        param_space=space,
+        backtest_func=backtest,
+        fitness_func=fitness_pnl,
+        config=GeneticConfig(population_size=10, generations=5, early_stop_generations=10, seed=seed),
+        cache=cache,
+    )
+
+
+class TestEvaluationCache:
+
+    def test_duplicates_evaluated_once(self):
+        backtest = _CountingBacktest()
+        result = _optimizer(backtest).optimize(verbose=False)
+        assert backtest.calls <= 6
+        stats = result.cache_stats
+        assert stats["misses"] == backtest.calls
+        assert stats["hits"] + stats["misses"] == len(result.all_individuals)
+        assert result.best_params["a"] == 2
+
+    def test_persistent_cache_reused(self, tmp_path):
+        ns = {"strategy_code": "x", "dataset": "abc"}
+        first = _CountingBacktest()
+        _optimizer(first, EvaluationCache(ns, str(tmp_path))).optimize(verbose=False)
+
+        second = _CountingBacktest()
+        result = _optimizer(second, EvaluationCache(ns, str(tmp_path))).optimize(verbose=False)
+        assert second.calls == 0
+        assert result.cache_stats["misses"] == 0
+
+    def test_namespace_isolation(self, tmp_path):
+        a = EvaluationCache({"dataset": "a"}, str(tmp_path))
+        b = EvaluationCache({"dataset": "b"}, str(tmp_path))
+        a.put({"p": 1}, {"total_pnl": 1})
+        assert a.get({"p": 1}) == {"total_pnl": 1}
+        assert b.get({"p": 1}) is None
+        assert a.key({"p": 1, "q": 2}) == a.key({"q": 2, "p": 1})
+
+    def test_errors_not_cached(self):
+        cache = EvaluationCache()
+        cache.put({"p": 1}, {"error": "boom"})
+        assert cache.get({"p": 1}) is None
+
+    def test_fingerprint_frame_and_list(self):
+        from libs.indicators import CandleFrame
+        candles = [
+            {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0, "timestamp": 1000 + i}
+            for i in range(20)
+        ]
+        assert fingerprint_candles(candles) == fingerprint_candles(list(candles))
+        changed = [dict(c) for c in candles]
+        changed[-1]["close"] = 1.6
+        assert fingerprint_candles(candles) != fingerprint_candles(changed)
+        frame = CandleFrame.from_candles(candles)
+        assert fingerprint_candles(frame) != fingerprint_candles(CandleFrame.from_candles(changed))
+
+    def test_fingerprint_code_tracks_source(self, tmp_path, monkeypatch):
+        import importlib
+
+        from libs.strategies import MACrossStrategy, StrategyBase
+
+        src = tmp_path / "fp_strategy.py"
+        src.write_text("class S:\n    period = 10\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        module = importlib.import_module("fp_strategy")
+        before = fingerprint_code(module.S)
+        assert fingerprint_code(module.S) == before
+        src.write_text("class S:\n    period = 20\n")
+        assert fingerprint_code(module.S) != before
+
+        # 类指纹包含基类源文件
+        assert fingerprint_code(MACrossStrategy) == fingerprint_code(MACrossStrategy, StrategyBase)
+        assert fingerprint_code(MACrossStrategy) != fingerprint_code(StrategyBase)
@@ -0,0 +1,126 @@
+"""
+参数优化器并行评估测试
+
+覆盖范围：
+  1. GridOptimizer 多进程结果与串行一致（顺序 / 最优参数）
+  2. GeneticOptimizer 固定 seed 时结果可复现，且与并行度无关
+  3. 回测异常在 worker 中被捕获，不中断优化
+  4. forkserver 启动方式（回测服务默认）与串行结果一致
+
+运行：
+  PYTHONPATH=. pytest tests/test_optimizer_parallel.py -v
+"""
+
+import functools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.optimizer import (
+    GridOptimizer,
+    ParameterGrid,
+    GeneticOptimizer,
+    GeneticConfig,
+    ParameterSpace,
+    fitness_pnl,
+)
+
+
+def _fake_backtest(strategy_code, config, symbol, timeframe, candles):
+    """确定性的伪回测：收益为参数与 K 线的函数"""
+    if config.get("fast") == 13:
+        raise ValueError("boom")
+    base = sum(candles) / len(candles)
+    pnl = base - (config["fast"] - 10) ** 2 - (config["slow"] - 40) ** 2 / 10
+    return {"total_pnl": pnl, "max_drawdown": 1, "total_trades": 10, "win_rate": 50}
+
+
+def _fake_genetic(params, candles):
+    return _fake_backtest("x", params, "BTC/USDT", "15m", candles)
+
+
+CANDLES = [float(i) for i in range(100)]
+
+
+@pytest.fixture(autouse=True)
+def _multi_core(monkeypatch):
+    """单核 CI 上也强制起多进程（worker 数上限取 CPU 核数）"""
+    from libs.optimizer import parallel
+    monkeypatch.setattr(parallel.os, "cpu_count", lambda: 4)
+
+
+class TestGridParallel:
+
+    def _run(self, workers):
+        optimizer = GridOptimizer(
+            backtest_func=_fake_backtest,
+            score_func=lambda r: r["total_pnl"],
+            max_workers=workers,
+        )
+        grid = ParameterGrid({"fast": list(range(5, 16)), "slow": [20, 30, 40, 50]})
+        return optimizer.optimize("x", "BTC/USDT", "15m", CANDLES, grid)
+
+    def test_parallel_matches_serial(self):
+        serial = self._run(1)
+        parallel = self._run(2)
+        assert serial.best_params == parallel.best_params == {"fast": 10, "slow": 40}
+        assert [r["params"] for r in serial.all_results] == [r["params"] for r in parallel.all_results]
+        # fast=13 的 4 个组合抛异常被跳过
+        assert len(parallel.all_results) == 11 * 4 - 4
+
+    def test_forkserver_matches_serial(self):
+        """多线程服务使用的 forkserver 启动方式：回测函数与 K 线经 pickle 传给 worker"""
+        optimizer = GridOptimizer(
+            backtest_func=_fake_backtest,
+            score_func=lambda r: r["total_pnl"],
+            max_workers=2,
+            start_method="forkserver",
+        )
+        grid = ParameterGrid({"fast": list(range(5, 16)), "slow": [20, 30, 40, 50]})
+        result = optimizer.optimize("x", "BTC/USDT", "15m", CANDLES, grid)
+        assert result.best_params == self._run(1).best_params
+        assert len(result.all_results) == 11 * 4 - 4
+
+
+class TestGeneticParallel:
+
+    def _run(self, workers, seed=7):
+        space = ParameterSpace().add_int("fast", 5, 20).add_int("slow", 20, 60, 5)
+        optimizer = GeneticOptimizer(
+            param_space=space,
+            backtest_func=functools.partial(_fake_genetic, candles=CANDLES),
+            fitness_func=fitness_pnl,
+            config=GeneticConfig(population_size=12, generations=4, seed=seed),
+            max_workers=workers,
+        )
+        return optimizer.optimize(verbose=False)
+
+    def test_seed_deterministic_across_workers(self):
+        serial = self._run(1)
+        parallel = self._run(2)
+        assert serial.best_params == parallel.best_params
+        assert [i["params"] for i in serial.all_individuals] == [i["params"] for i in parallel.all_individuals]
+
+    def test_custom_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        space = ParameterSpace().add_int("fast", 5, 20).add_int("slow", 20, 60, 5)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            optimizer = GeneticOptimizer(
+                param_space=space,
+                backtest_func=functools.partial(_fake_genetic, candles=CANDLES),
+                fitness_func=fitness_pnl,
+                config=GeneticConfig(population_size=12, generations=4, seed=7),
+                executor=executor,
+            )
+            result = optimizer.optimize(verbose=False)
+        assert result.best_params == self._run(1).best_params
+
+    def test_error_individual_gets_neg_inf(self):
+        result = self._run(1)
+        errored = [i for i in result.all_individuals if i["params"]["fast"] == 13]
+        for ind in errored:
+            assert ind["fitness"] == float("-inf")
+            assert "error" in ind["metrics"]
@@ -11,6 +11,7 @@ Position Monitor 自管 SL/TP 回归测试
   7. 冷却回调注册
   8. execution-node ClosePositionRequest 结构
   9. apply_results 远程写入 SL/TP
+  10. 推送价格源：订阅同步、过期回退轮询、按触发簿价位触发检查
 
 运行：
   cd /path/to/ironbull
@@ -662,3 +663,192 @@ class TestEndToEndDataFlow:
         price2 = 95000.0
         amount_usdt2 = qty2 * price2
         assert amount_usdt2 == 95.0
+
+
+# ==================== 13. 推送价格源 ====================
+
+class MockTickerStream:
+    """模拟 TickerStream：记录订阅，push() 直接回调"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.subscriptions = set()
+        self.started = 0
+        self.stopped = False
+        self._callback = None
+
+    def set_callback(self, callback):
+        self._callback = callback
+
+    async def subscribe(self, symbol):
+        self.subscriptions.add(symbol)
+
+    async def unsubscribe(self, symbol):
+        self.subscriptions.discard(symbol)
+
+    async def start(self):
+        self.started += 1
+
+    async def stop(self):
+        self.stopped = True
+
+    @property
+    def is_alive(self):
+        return self.started > 0 and not self.stopped
+
+    def push(self, symbol, last):
+        from libs.ws.ticker_stream import TickerData
+        self._callback(TickerData(symbol=symbol, last=last, bid=last, ask=last, volume_24h=0,
+                                  change_24h=0, change_pct_24h=0, timestamp=0))
+
+
+def _fake_registry():
+    from libs.exchange.markets_registry import MarketsSnapshot
+    snap = MarketsSnapshot(markets={"BTC/USDT:USDT": {}, "ETH/USDT:USDT": {}}, currencies=None,
+                           loaded_at=0, version=1)
+    registry = MagicMock()
+    registry.aget = AsyncMock(return_value=snap)
+    return registry
+
+
+class TestPriceFeed:
+    """验证 PriceFeed 订阅同步与价格时效"""
+
+    def _feed(self, streams, stale_after=10.0):
+        from libs.position.price_feed import PriceFeed
+
+        def factory(exchange):
+            streams[exchange] = MockTickerStream(exchange)
+            return streams[exchange]
+
+        return PriceFeed(stream_factory=factory, stale_after=stale_after)
+
+    def test_sync_and_tick(self):
+        import asyncio
+        streams = {}
+        feed = self._feed(streams)
+        seen = []
+        feed.set_listener(lambda ex, sym, price: seen.append((ex, sym, price)))
+
+        async def _run():
+            with patch("libs.position.price_feed.get_markets_registry", return_value=_fake_registry()):
+                await feed.sync({"binance": {"BTC/USDT", "ETH/USDT"}})
+                assert streams["binance"].subscriptions == {"BTC/USDT:USDT", "ETH/USDT:USDT"}
+                streams["binance"].push("BTC/USDT:USDT", 95000.0)
+                assert feed.get_price("binance", "BTC/USDT") == 95000.0
+                assert feed.get_price("binance", "ETH/USDT") is None
+                # 持仓减少 → 取消订阅；交易所无持仓 → 停止流
+                await feed.sync({"binance": {"BTC/USDT"}})
+                assert streams["binance"].subscriptions == {"BTC/USDT:USDT"}
+                await feed.sync({})
+                assert streams["binance"].stopped
+
+        asyncio.run(_run())
+        assert seen == [("binance", "BTC/USDT", 95000.0)]
+
+    def test_stale_price(self):
+        import asyncio
+        streams = {}
+        feed = self._feed(streams, stale_after=0.01)
+
+        async def _run():
+            with patch("libs.position.price_feed.get_markets_registry", return_value=_fake_registry()):
+                await feed.sync({"gate": {"BTC/USDT"}})
+                streams["gate"].push("BTC/USDT:USDT", 95000.0)
+                await asyncio.sleep(0.05)
+                assert feed.get_price("gate", "BTC/USDT") is None
+
+        asyncio.run(_run())
+
+
+class TestStreamTrigger:
+    """验证推送价格只检查触发簿中越过价位的持仓，并回退轮询过期 symbol"""
+
+    def _pos(self, pid, symbol, side, sl=None, tp=None, exchange="binance"):
+        from libs.position.models import Position
+        pos = Position()
+        pos.position_id = pid
+        pos.exchange = exchange
+        pos.symbol = symbol
+        pos.position_side = side
+        pos.status = "OPEN"
+        pos.quantity = Decimal("1")
+        pos.stop_loss = Decimal(str(sl)) if sl else None
+        pos.take_profit = Decimal(str(tp)) if tp else None
+        return pos
+
+    def test_on_stream_price_checks_crossed_only(self):
+        import asyncio
+        import time as _time
+        from libs.position import monitor
+        from libs.position.trigger_book import get_trigger_book
+
+        monitor._closing_in_progress.clear()
+        positions = [
+            self._pos("P1", "BTC/USDT", "LONG", sl=90000),
+            self._pos("P2", "BTC/USDT", "SHORT", sl=99000, tp=80000),
+            self._pos("P3", "ETH/USDT", "LONG", sl=5000),  # 其他 symbol 不应被检查
+        ]
+        get_trigger_book().replace(positions, _time.time())
+
+        async def _run():
+            with patch.object(monitor, "_close_triggered_ids", new=AsyncMock()) as close_mock:
+                monitor._on_stream_price("binance", "BTC/USDT", 89000.0)
+                await asyncio.gather(*list(monitor._pending_closes))
+                close_mock.assert_awaited_once_with({"P1": 89000.0})
+                # 处理中的持仓不重复触发
+                monitor._on_stream_price("binance", "BTC/USDT", 88000.0)
+                assert close_mock.await_count == 1
+
+        asyncio.run(_run())
+        assert "P1" in monitor._closing_in_progress
+        assert "P3" not in monitor._closing_in_progress
+        monitor._closing_in_progress.clear()
+        get_trigger_book().replace([], _time.time())
+
+    def test_cycle_polls_only_stale_symbols(self):
+        import asyncio
+        from libs.position import monitor
+        from libs.position.trigger_book import get_trigger_book
+
+        monitor._closing_in_progress.clear()
+        positions = [
+            self._pos("P1", "BTC/USDT", "LONG", sl=90000),
+            self._pos("P2", "ETH/USDT", "LONG", sl=3000),
+        ]
+        feed = MagicMock()
+        feed.sync = AsyncMock()
+        feed.get_price = lambda ex, sym: 95000.0 if sym == "BTC/USDT" else None
+        fetch = AsyncMock(return_value={"binance:ETH/USDT": 2900.0})
+        close = AsyncMock()
+
+        with patch.object(monitor, "get_session", return_value=MagicMock()), \
+                patch.object(monitor, "_get_monitored_positions", return_value=positions), \
+                patch.object(monitor, "_fetch_prices_batch", new=fetch), \
+                patch.object(monitor, "_close_triggered_ids", new=close):
+            asyncio.run(monitor._monitor_cycle(feed, reload=True))
+
+        fetch.assert_awaited_once_with({"binance": {"ETH/USDT"}})
+        close.assert_awaited_once_with({"P2": 2900.0})
+        stats = monitor.get_monitor_stats()
+        assert stats["stream_symbols"] == 1
+        assert stats["poll_symbols"] == 1
+        assert stats["trigger_book"]["positions"] == 2
+        monitor._closing_in_progress.clear()
+        get_trigger_book().replace([], 0)
+
+    def test_cycle_skips_reload_within_interval(self):
+        import asyncio
+        import time as _time
+        from libs.position import monitor
+        from libs.position.trigger_book import get_trigger_book
+
+        get_trigger_book().replace([self._pos("P1", "BTC/USDT", "LONG", sl=90000)], _time.time())
+        query = MagicMock(return_value=[])
+        with patch.object(monitor, "remote_version", return_value=None), \
+                patch.object(monitor, "_get_monitored_positions", new=query), \
+                patch.object(monitor, "_fetch_prices_batch", new=AsyncMock(return_value={})):
+            asyncio.run(monitor._monitor_cycle())
+        query.assert_not_called()
+        assert monitor.get_monitor_stats()["positions_monitored"] == 1
+        get_trigger_book().replace([], 0)
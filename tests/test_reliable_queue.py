@@ -0,0 +1,109 @@
+"""
+ReliableTaskQueue 测试（需要 fakeredis，未安装时跳过）
+
+覆盖范围：
+  1. 批量入队 / 批量领取，按优先级通道顺序领取
+  2. 领取后写入租约，ack 释放
+  3. 租约过期由 reap_expired 重新投递，超过 max_retries 进入死信
+  4. nack 重新入队原通道 / 进入死信；v1 遗留消息（无 priority 字段）可消费
+  5. 无任务时 pop 按超时返回，入队后被唤醒
+
+运行：
+  PYTHONPATH=. pytest tests/test_reliable_queue.py -v
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from unittest.mock import patch
+
+from libs.queue.reliable_queue import ReliableTaskQueue
+from libs.queue.task_queue import TaskMessage
+
+
+@pytest.fixture
+def queue():
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    with patch("libs.queue.reliable_queue.get_redis", return_value=client):
+        yield ReliableTaskQueue("test-q", lease_seconds=60, reap_interval=3600)
+
+
+def _msg(task_id, **kwargs):
+    return TaskMessage(task_id=task_id, task_type="node_execute", payload={"tasks": []}, **kwargs)
+
+
+class TestReliableQueue:
+    def test_priority_and_batch(self, queue):
+        queue.push_many([_msg("n1"), _msg("n2")])
+        queue.push_many([_msg("l1")], priority="low")
+        queue.push(_msg("h1", priority="high"))
+        got = [m.task_id for m in queue.pop_many(10, timeout=1)]
+        assert got == ["h1", "n1", "n2", "l1"]
+        assert queue.stats()["processing"] == 4
+        assert queue.ack_many(got) == 4
+        assert queue.stats()["processing"] == 0
+        assert queue.pop(timeout=0.05) is None
+
+    def test_lease_expiry_requeues_then_dead(self, queue):
+        queue.push(_msg("t1", max_retries=1, priority="high"))
+        msg = queue.pop(timeout=1, lease=0.01)
+        assert msg.payload == {"tasks": []}
+        time.sleep(0.03)
+        assert queue.stats()["expired"] == 1
+        assert queue.reap_expired() == {"requeued": 1, "dead": 0}
+        assert queue.stats()["pending_high"] == 1
+        # 第二次过期超过 max_retries → 死信
+        queue.pop(timeout=1, lease=0.01)
+        time.sleep(0.03)
+        assert queue.reap_expired() == {"requeued": 0, "dead": 1}
+        assert queue.stats()["dead"] == 1
+        assert queue.stats()["pending"] == 0
+
+    def test_ack_before_expiry_not_reaped(self, queue):
+        queue.push(_msg("t1"))
+        msg = queue.pop(timeout=1, lease=0.01)
+        assert queue.extend(msg.task_id, lease=60)
+        time.sleep(0.03)
+        assert queue.reap_expired() == {"requeued": 0, "dead": 0}
+        assert queue.ack(msg.task_id)
+        assert not queue.extend(msg.task_id)
+
+    def test_nack(self, queue):
+        queue.push(_msg("t1", max_retries=1), priority="low")
+        msg = queue.pop(timeout=1)
+        assert queue.nack(msg, "boom") is True
+        assert queue.stats()["pending_low"] == 1
+        msg = queue.pop(timeout=1)
+        assert msg.retry_count == 1
+        assert queue.nack(msg, "boom") is False
+        assert queue.stats() == {
+            "pending": 0, "pending_high": 0, "pending_normal": 0, "pending_low": 0,
+            "processing": 0, "expired": 0, "dead": 1,
+        }
+
+    def test_legacy_message(self, queue):
+        from libs.queue.reliable_queue import get_redis
+        legacy = {"task_id": "old", "task_type": "notification", "payload": {}, "retry_count": 0}
+        get_redis().lpush(queue.queue_key, json.dumps(legacy))
+        msg = queue.pop(timeout=1)
+        assert msg.task_id == "old"
+        assert msg.priority == "normal"
+
+    def test_blocking_pop_wakes_on_push(self, queue):
+        timer = threading.Timer(0.1, lambda: queue.push(_msg("late")))
+        timer.start()
+        started = time.monotonic()
+        msg = queue.pop(timeout=3)
+        assert msg.task_id == "late"
+        assert time.monotonic() - started < 1.0
+        timer.join()
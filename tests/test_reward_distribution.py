@@ -0,0 +1,212 @@
+"""
+RewardService 批量分销测试（sqlite 内存库）
+
+覆盖范围：
+  1. distribute_for_pool 结果与既有逐条规则一致（直推 / 级差 / 平级 / 预算封顶 / 未分配归根账户）
+  2. distribute_pools 批量结果与逐条分销一致（奖励、流水余额链、用户余额、租户累计、利润池字段）
+  3. 批量中单条失败（用户不存在）标记 status=3 待重试，不影响其他利润池
+  4. 查询次数与利润池数量、邀请链深度无关
+
+运行：
+  PYTHONPATH=. pytest tests/test_reward_distribution.py -v
+"""
+
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from libs.member.models import ExchangeAccount, LevelConfig, User
+from libs.reward.models import ProfitPool, RewardLog, UserReward
+from libs.reward.service import RewardService
+from libs.tenant.models import Tenant
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # sqlite 只有 INTEGER PRIMARY KEY 才自增
+    return "INTEGER"
+
+
+TABLES = [Tenant.__table__, User.__table__, ExchangeAccount.__table__, LevelConfig.__table__,
+          ProfitPool.__table__, UserReward.__table__, RewardLog.__table__]
+
+# (id, tenant_id, inviter_id, inviter_path, member_level, is_market_node, is_root, 自持)
+USERS = [
+    (1, 1, None, None, 0, 0, 1, 0),
+    (2, 1, 1, "/1/", 3, 1, 0, 5000),
+    (3, 1, 2, "/1/2/", 1, 1, 0, 0),
+    (4, 1, 3, "/1/2/3/", 0, 0, 0, 0),
+    (5, 1, 4, "/1/2/3/4/", 2, 1, 0, 1500),
+    (6, 1, 5, "/1/2/3/4/5/", 2, 0, 0, 0),
+    (7, 1, 2, "/1/2/", 0, 0, 0, 0),
+    (8, 2, None, None, 0, 0, 1, 0),
+    (10, 2, 8, "/8/", 1, 1, 0, 800),
+    (11, 2, 10, "/8/10/", 1, 0, 0, 0),
+    (12, 2, None, None, 0, 0, 0, 0),
+    (13, 1, 3, "/1/2/3/", 1, 0, 0, 0),
+]
+# (level, diff_rate)
+LEVELS = [(0, "0"), (1, "0.1"), (2, "0.4"), (3, "1.0")]
+# (pool_id, user_id, pool_amount)
+POOLS = [(1, 6, "100"), (2, 7, "40"), (3, 11, "250"), (4, 12, "10"), (5, 13, "80"), (6, 6, "33.3")]
+
+
+def _seed(session):
+    session.add_all([
+        Tenant(id=1, name="t1", app_key="k1", app_secret="s", root_user_id=1),
+        Tenant(id=2, name="t2", app_key="k2", app_secret="s", root_user_id=None),
+    ])
+    for uid, tenant_id, inviter_id, path, level, node, root, hold in USERS:
+        session.add(User(id=uid, tenant_id=tenant_id, email=f"u{uid}@x", invite_code=f"INV{uid:05d}",
+                         inviter_id=inviter_id, inviter_path=path, member_level=level,
+                         is_market_node=node, is_root=root))
+        if hold:
+            session.add(ExchangeAccount(id=uid, user_id=uid, tenant_id=tenant_id, exchange="binance",
+                                        api_key="k", api_secret="s", futures_balance=Decimal(hold)))
+    session.add_all([LevelConfig(level=lv, level_name=f"S{lv}", min_team_perf=0, diff_rate=Decimal(rate))
+                     for lv, rate in LEVELS])
+    session.add_all([ProfitPool(id=pid, user_id=uid, profit_amount=Decimal(amount) * 10,
+                                deduct_amount=Decimal(amount), pool_amount=Decimal(amount),
+                                settle_batch=f"b{pid}", status=1)
+                     for pid, uid, amount in POOLS])
+    session.commit()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for table in TABLES:
+        table.create(engine)
+    session = sessionmaker(bind=engine)()
+    _seed(session)
+    yield engine, session
+    session.close()
+
+
+def _pools(session):
+    return session.query(ProfitPool).order_by(ProfitPool.id).all()
+
+
+def _snapshot(session):
+    q = lambda v: str(Decimal(str(v)).quantize(Decimal("0.00000001")))
+    rewards = [(r.user_id, r.profit_pool_id, r.reward_type, q(r.amount), q(r.rate), r.from_level, r.to_level,
+                r.settle_batch, r.remark)
+               for r in session.query(UserReward).order_by(UserReward.id)]
+    logs = [(l.user_id, l.ref_id, q(l.amount), q(l.before_balance), q(l.after_balance), l.remark)
+            for l in session.query(RewardLog).order_by(RewardLog.id)]
+    users = {u.id: (q(u.reward_usdt), q(u.total_reward)) for u in session.query(User)}
+    tenants = {t.id: (q(t.tech_reward_total), q(t.undist_reward_total)) for t in session.query(Tenant)}
+    pools = [(p.id, p.status, q(p.tech_amount), q(p.network_amount), q(p.platform_amount),
+              q(p.direct_distributed), q(p.diff_distributed), q(p.peer_distributed), q(p.network_undistributed))
+             for p in _pools(session)]
+    return {"rewards": rewards, "logs": logs, "users": users, "tenants": tenants, "pools": pools}
+
+
+# 逐条分销的既有结果：(user_id, pool_id, reward_type, amount)
+EXPECTED_REWARDS = [
+    (1, 1, "tech_team", "10"), (5, 1, "direct", "5"), (5, 1, "level_diff", "8"), (2, 1, "level_diff", "7"),
+    (1, 1, "platform_retain", "70"),
+    (1, 2, "tech_team", "4"), (2, 2, "direct", "2"), (2, 2, "level_diff", "6"), (1, 2, "platform_retain", "28"),
+    (8, 3, "tech_team", "25"), (8, 3, "direct_undist", "12.5"), (10, 3, "level_diff", "5"), (10, 3, "peer", "5"),
+    (8, 3, "network_undist", "27.5"), (8, 3, "platform_retain", "175"),
+    (8, 4, "tech_team", "1"), (8, 4, "direct_undist", "0.5"), (8, 4, "peer_undist", "0.2"),
+    (8, 4, "network_undist", "1.3"), (8, 4, "platform_retain", "7"),
+    (1, 5, "tech_team", "8"), (1, 5, "direct_undist", "4"), (3, 5, "level_diff", "1.6"), (2, 5, "level_diff", "10.4"),
+    (1, 5, "platform_retain", "56"),
+    (1, 6, "tech_team", "3.33"), (5, 6, "direct", "1.665"), (5, 6, "level_diff", "2.664"),
+    (2, 6, "level_diff", "2.331"), (1, 6, "platform_retain", "23.31"),
+]
+EXPECTED_BALANCES = {1: "206.64", 2: "27.731", 3: "1.6", 5: "17.329", 8: "250", 10: "10"}
+EXPECTED_TENANTS = {1: ("25.33", "4"), 2: ("26", "42")}
+
+
+def _distribute_sequential(session):
+    svc = RewardService(session)
+    for pool in _pools(session):
+        svc.distribute_for_pool(pool)
+    session.commit()
+
+
+class TestDistribute:
+    def test_sequential_rules(self, db):
+        _, session = db
+        _distribute_sequential(session)
+        snap = _snapshot(session)
+        assert [(r[0], r[1], r[2], Decimal(r[3])) for r in snap["rewards"]] == \
+            [(u, p, t, Decimal(a)) for u, p, t, a in EXPECTED_REWARDS]
+        for uid, bal in EXPECTED_BALANCES.items():
+            assert Decimal(snap["users"][uid][0]) == Decimal(bal)
+        for tid, (tech, undist) in EXPECTED_TENANTS.items():
+            assert tuple(Decimal(v) for v in snap["tenants"][tid]) == (Decimal(tech), Decimal(undist))
+        # 流水余额链：同一用户 before = 上一笔 after
+        last = {}
+        for user_id, _, amount, before, after, _ in snap["logs"]:
+            assert Decimal(before) == last.get(user_id, Decimal("0"))
+            assert Decimal(after) == Decimal(before) + Decimal(amount)
+            last[user_id] = Decimal(after)
+        assert all(p[1] == 2 for p in snap["pools"])
+
+    def test_batch_matches_sequential(self, db):
+        _, session = db
+        result = RewardService(session).distribute_pools(_pools(session))
+        session.commit()
+        assert sorted(result) == [p[0] for p in POOLS]
+
+        engine = create_engine("sqlite://")
+        for table in TABLES:
+            table.create(engine)
+        seq_session = sessionmaker(bind=engine)()
+        _seed(seq_session)
+        _distribute_sequential(seq_session)
+        assert _snapshot(session) == _snapshot(seq_session)
+        seq_session.close()
+
+    def test_failed_pool_isolated(self, db):
+        _, session = db
+        session.add(ProfitPool(id=99, user_id=999, profit_amount=100, deduct_amount=30, pool_amount=30, status=1))
+        session.commit()
+        svc = RewardService(session)
+        with pytest.raises(ValueError):
+            svc.distribute_for_pool(session.get(ProfitPool, 99))
+        assert session.query(UserReward).count() == 0
+
+        result = svc.settle_pending()
+        session.commit()
+        assert 99 not in result and len(result) == len(POOLS)
+        failed = session.get(ProfitPool, 99)
+        assert (failed.status, failed.retry_count) == (3, 1)
+        assert "不存在" in failed.last_error
+        assert session.query(UserReward).count() == len(EXPECTED_REWARDS)
+
+    def test_query_count_constant(self, db):
+        engine, session = db
+        # 加深邀请链：6 → 100 → 101 → ... → 139
+        inviter, path = 6, "/1/2/3/4/5/6/"
+        for uid in range(100, 140):
+            session.add(User(id=uid, tenant_id=1, email=f"u{uid}@x", invite_code=f"INV{uid:05d}",
+                             inviter_id=inviter, inviter_path=path, member_level=uid % 3, is_market_node=1))
+            session.add(ProfitPool(id=uid, user_id=uid, profit_amount=100, deduct_amount=30, pool_amount=30,
+                                   status=1))
+            inviter, path = uid, f"{path}{uid}/"
+        session.commit()
+
+        pools = _pools(session)
+        selects = []
+        listener = lambda conn, cursor, statement, *args: selects.append(statement) \
+            if statement.lstrip().upper().startswith("SELECT") else None
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = RewardService(session).distribute_pools(pools)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        session.commit()
+        assert len(result) == len(POOLS) + 40
+        # 来源用户、租户、根账户兜底、祖先、自持、LevelConfig
+        assert len(selects) <= 6
@@ -0,0 +1,195 @@
+"""
+TradeSettlementService.settle_fills 批量结算测试（sqlite 内存库）
+
+覆盖范围：
+  1. 批量结果与逐笔 settle_fill 一致（订单累计、持仓、已实现盈亏、账户余额、流水条数）
+  2. 幂等：重复 exchange_trade_id（跨批次 / 同批次）不重复记账
+  3. 单笔校验失败（卖出 > 可用、订单不存在）只跳过该笔，不影响其他笔
+  4. 查询次数与成交笔数无关
+
+运行：
+  PYTHONPATH=. pytest tests/test_settlement_batch.py -v
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from libs.ledger.models import Account, Transaction
+from libs.order_trade.models import Order, Fill
+from libs.position.models import Position, PositionChange
+from libs.trading.settlement import SettlementFill, TradeSettlementService
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # sqlite 只有 INTEGER PRIMARY KEY 才自增
+    return "INTEGER"
+
+
+TABLES = [Order.__table__, Fill.__table__, Position.__table__, PositionChange.__table__,
+          Account.__table__, Transaction.__table__]
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for table in TABLES:
+        table.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield engine, session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def _no_point_card(monkeypatch):
+    monkeypatch.setattr(TradeSettlementService, "_deduct_point_card_for_profit", lambda self, pnl: None)
+
+
+def _service(session) -> TradeSettlementService:
+    svc = TradeSettlementService(session, tenant_id=1, account_id=7)
+    svc.deposit(Decimal("100000"))
+    return svc
+
+
+def _order(svc, symbol, side, quantity, position_side):
+    order = svc.create_order(symbol=symbol, exchange="binance", side=side, order_type="MARKET",
+                             quantity=Decimal(quantity), position_side=position_side, market_type="future")
+    svc.submit_order(order.order_id, exchange_order_id=f"EX-{order.order_id}")
+    return order.order_id
+
+
+def _scenario(svc):
+    """开多 BTC 两笔 → 部分平多 → 开空 ETH，返回成交列表"""
+    buy = _order(svc, "BTC/USDT", "BUY", "1.0", "LONG")
+    sell = _order(svc, "BTC/USDT", "SELL", "0.8", "LONG")
+    short = _order(svc, "ETH/USDT", "SELL", "2", "SHORT")
+
+    def fill(order_id, side, qty, price, trade_id, minutes, position_side="LONG", symbol="BTC/USDT"):
+        return SettlementFill(
+            order_id=order_id, symbol=symbol, exchange="binance", side=side,
+            quantity=Decimal(qty), price=Decimal(price), fee=Decimal("1.5"),
+            exchange_trade_id=trade_id, filled_at=T0 + timedelta(minutes=minutes),
+            position_side=position_side, market_type="future",
+        )
+
+    return [
+        fill(buy, "BUY", "0.4", "50000", "t1", 1),
+        fill(buy, "BUY", "0.6", "51000", "t2", 2),
+        fill(sell, "SELL", "0.5", "52000", "t3", 3),
+        fill(short, "SELL", "2", "3000", "t4", 4, "SHORT", "ETH/USDT"),
+        fill(sell, "SELL", "0.3", "49000", "t5", 5),
+    ]
+
+
+def _snapshot(session):
+    positions = {
+        (p.symbol, p.position_side): (p.quantity, p.available, p.avg_cost, p.realized_pnl, p.status)
+        for p in session.query(Position).all()
+    }
+    account = session.query(Account).one()
+    orders = sorted((float(o.quantity), float(o.filled_quantity or 0), round(float(o.avg_price or 0), 6), o.status)
+                    for o in session.query(Order).all())
+    return {
+        "positions": positions,
+        "account": (account.balance, account.available, account.total_fee, account.realized_pnl),
+        "orders": orders,
+        "fills": session.query(Fill).count(),
+        "changes": session.query(PositionChange).count(),
+        "transactions": session.query(Transaction).count(),
+    }
+
+
+class TestSettleFills:
+    def test_matches_sequential(self, db):
+        _, session = db
+        svc = _service(session)
+        results = svc.settle_fills(_scenario(svc))
+        session.commit()
+        assert all(r.success for r in results)
+        assert results[2].realized_pnl == pytest.approx(0.5 * (52000 - 50600))
+        assert results[-1].position_quantity_after == pytest.approx(0.2)
+
+        seq_engine = create_engine("sqlite://")
+        for table in TABLES:
+            table.create(seq_engine)
+        seq_session = sessionmaker(bind=seq_engine)()
+        seq_svc = _service(seq_session)
+        for f in _scenario(seq_svc):
+            r = seq_svc.settle_fill(**f.__dict__)
+            assert r.success
+        seq_session.commit()
+
+        assert _snapshot(session) == _snapshot(seq_session)
+        assert [r.balance_after for r in results][-1] == float(seq_session.query(Account).one().balance)
+        seq_session.close()
+
+    def test_idempotent(self, db):
+        _, session = db
+        svc = _service(session)
+        fills = _scenario(svc)
+        svc.settle_fills(fills[:3])
+        session.commit()
+        before = _snapshot(session)
+
+        # 跨批次重复 + 同批次重复
+        results = svc.settle_fills(fills[:3] + [fills[1]])
+        session.commit()
+        assert all(r.success for r in results)
+        assert results[1].fill_id == results[3].fill_id
+        assert _snapshot(session) == before
+
+    def test_failed_fill_isolated(self, db):
+        _, session = db
+        svc = _service(session)
+        fills = _scenario(svc)
+        big_sell = _order(svc, "BTC/USDT", "SELL", "5", "LONG")
+        oversell = SettlementFill(**{**fills[2].__dict__, "order_id": big_sell,
+                                     "quantity": Decimal("5"), "exchange_trade_id": "tx"})
+        missing = SettlementFill(**{**fills[0].__dict__, "order_id": "ORD-NONE", "exchange_trade_id": "ty"})
+        results = svc.settle_fills([fills[0], oversell, missing, fills[1]])
+        session.commit()
+        assert [r.success for r in results] == [True, False, False, True]
+        assert "Position update failed" in results[1].error
+        assert results[2].error == "Failed to record fill"
+        # 被拒绝的成交不入库、不计入订单
+        assert session.query(Fill).count() == 2
+        sell_order = session.query(Order).filter(Order.order_id == big_sell).one()
+        assert float(sell_order.filled_quantity or 0) == 0
+        assert session.query(Position).one().quantity == Decimal("1.0")
+
+    def test_query_count_constant(self, db):
+        engine, session = db
+        svc = _service(session)
+        order_id = _order(svc, "BTC/USDT", "BUY", "100", "LONG")
+        session.commit()
+        fills = [
+            SettlementFill(order_id=order_id, symbol="BTC/USDT", exchange="binance", side="BUY",
+                           quantity=Decimal("1"), price=Decimal("500"), exchange_trade_id=f"t{i}",
+                           filled_at=T0 + timedelta(seconds=i), position_side="LONG", market_type="future")
+            for i in range(50)
+        ]
+        selects = []
+        listener = lambda conn, cursor, statement, *args: selects.append(statement) \
+            if statement.lstrip().upper().startswith("SELECT") else None
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            results = svc.settle_fills(fills)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        session.commit()
+        assert all(r.success for r in results)
+        assert len(selects) <= 8
+        assert session.query(Fill).count() == 50
+        order = session.query(Order).filter(Order.order_id == order_id).one()
+        assert float(order.filled_quantity) == 50
+        assert order.status == "PARTIAL"
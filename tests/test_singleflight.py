@@ -0,0 +1,115 @@
+"""
+SingleFlight 异步请求合并测试
+
+覆盖范围：
+  1. 同一 key 的并发调用只执行一次上游请求，结果共享
+  2. 不同 key 互不合并；请求完成后 key 释放（不缓存结果）
+  3. 异常传播给所有等待方；发起方取消不影响其他等待方
+  4. stats() 计数
+
+运行：
+  PYTHONPATH=. pytest tests/test_singleflight.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.core import SingleFlight
+
+
+class _Upstream:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+        self.release = None
+
+    async def fetch(self, value):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [value]
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_upstream(self):
+        async def scenario():
+            flight = SingleFlight("candles")
+            upstream = _Upstream()
+            upstream.release = asyncio.Event()
+            tasks = [
+                asyncio.create_task(flight.do(("binance", "BTCUSDT"), lambda: upstream.fetch(1)))
+                for _ in range(10)
+            ]
+            await asyncio.sleep(0)
+            upstream.release.set()
+            results = await asyncio.gather(*tasks)
+            return flight, upstream, results
+
+        flight, upstream, results = _run(scenario())
+        assert upstream.calls == 1
+        assert all(r is results[0] for r in results)
+        stats = flight.stats()
+        assert stats["upstream"] == 1
+        assert stats["coalesced"] == 9
+        assert stats["inflight"] == 0
+
+    def test_distinct_keys_and_no_result_caching(self):
+        async def scenario():
+            flight = SingleFlight()
+            upstream = _Upstream()
+            upstream.release = asyncio.Event()
+            upstream.release.set()
+            a, b = await asyncio.gather(
+                flight.do("a", lambda: upstream.fetch("a")),
+                flight.do("b", lambda: upstream.fetch("b")),
+            )
+            again = await flight.do("a", lambda: upstream.fetch("a2"))
+            return upstream, a, b, again
+
+        upstream, a, b, again = _run(scenario())
+        assert (a, b, again) == (["a"], ["b"], ["a2"])
+        assert upstream.calls == 3
+
+    def test_error_propagates_to_all_waiters(self):
+        async def scenario():
+            flight = SingleFlight()
+            upstream = _Upstream(fail=True)
+            upstream.release = asyncio.Event()
+            tasks = [asyncio.create_task(flight.do("k", lambda: upstream.fetch(1))) for _ in range(3)]
+            await asyncio.sleep(0)
+            upstream.release.set()
+            return flight, await asyncio.gather(*tasks, return_exceptions=True)
+
+        flight, results = _run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats()["errors"] == 1
+
+    def test_leader_cancel_does_not_cancel_followers(self):
+        async def scenario():
+            flight = SingleFlight()
+            upstream = _Upstream()
+            upstream.release = asyncio.Event()
+            leader = asyncio.create_task(flight.do("k", lambda: upstream.fetch(7)))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("k", lambda: upstream.fetch(8)))
+            await asyncio.sleep(0)
+            leader.cancel()
+            upstream.release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return upstream, await follower
+
+        upstream, result = _run(scenario())
+        assert result == [7]
+        assert upstream.calls == 1
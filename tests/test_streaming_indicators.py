@@ -0,0 +1,173 @@
+"""
+流式指标 & 增量策略协议测试
+
+覆盖范围：
+  1. StreamingSMA / EMA / RSI / ATR 与批量函数结果一致
+  2. BacktestEngine 显式 incremental=True 时对 supports_incremental 策略走 on_bar 路径，默认仍走 analyze
+  3. 增量路径 = analyze 全历史；与 lookback 切片路径（EMA 窗口内重新起算）结果不同
+
+运行：
+  PYTHONPATH=. pytest tests/test_streaming_indicators.py -v
+
+无需数据库 / 交易所连接。
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.indicators import (
+    sma, ema, rsi_series, atr,
+    StreamingSMA, StreamingEMA, StreamingRSI, StreamingATR,
+)
+
+
+def _make_candles(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price = price * (1 + rnd.gauss(0, 0.01))
+        candles.append({
+            "open": open_,
+            "high": max(open_, price) * 1.002,
+            "low": min(open_, price) * 0.998,
+            "close": price,
+            "volume": 1000 + rnd.random() * 100,
+            "timestamp": 1700000000000 + i * 60000,
+        })
+    return candles
+
+
+class TestStreamingIndicators:
+
+    def test_sma_matches_batch(self):
+        prices = [c["close"] for c in _make_candles(200)]
+        s = StreamingSMA(20)
+        for i, p in enumerate(prices):
+            v = s.update(p)
+            expected = sma(prices[: i + 1], 20)
+            if expected is None:
+                assert v is None
+            else:
+                assert v == pytest.approx(expected)
+
+    def test_ema_matches_batch(self):
+        prices = [c["close"] for c in _make_candles(200)]
+        s = StreamingEMA(21)
+        for i, p in enumerate(prices):
+            v = s.update(p)
+            expected = ema(prices[: i + 1], 21)
+            if expected is None:
+                assert v is None
+            else:
+                assert v == pytest.approx(expected)
+
+    def test_rsi_matches_batch(self):
+        prices = [c["close"] for c in _make_candles(200)]
+        expected = rsi_series(prices, 14)
+        s = StreamingRSI(14)
+        for i, p in enumerate(prices):
+            v = s.update(p)
+            if expected[i] is None:
+                assert v is None
+            else:
+                assert v == pytest.approx(expected[i])
+
+    def test_atr_matches_batch(self):
+        candles = _make_candles(120)
+        s = StreamingATR(14)
+        for i, c in enumerate(candles):
+            v = s.update(c)
+            assert v == pytest.approx(atr(candles[: i + 1], 14))
+
+    def test_reset(self):
+        s = StreamingEMA(3)
+        for p in [1.0, 2.0, 3.0, 4.0]:
+            s.update(p)
+        s.reset()
+        assert s.value is None
+        assert s.update(5.0) is None
+
+
+class TestIncrementalBacktest:
+
+    def test_engine_uses_on_bar(self):
+        from services.backtest.app.backtest_engine import BacktestEngine
+        from libs.strategies import get_strategy
+
+        candles = _make_candles(600)
+        strategy = get_strategy("ema_cross")
+        calls = {"analyze": 0, "on_bar": 0}
+
+        orig_on_bar = strategy.on_bar
+
+        def counting_on_bar(candle, ctx):
+            calls["on_bar"] += 1
+            return orig_on_bar(candle, ctx)
+
+        def counting_analyze(*args, **kwargs):
+            calls["analyze"] += 1
+            return None
+
+        strategy.on_bar = counting_on_bar
+        strategy.analyze = counting_analyze
+
+        result = BacktestEngine().run(strategy, "BTC/USDT", "1m", candles, lookback=50, incremental=True)
+
+        assert calls["analyze"] == 0
+        assert calls["on_bar"] == len(candles)
+        assert result.total_trades > 0
+
+    def test_default_uses_analyze(self):
+        from services.backtest.app.backtest_engine import BacktestEngine
+        from libs.strategies import get_strategy
+
+        candles = _make_candles(200)
+        strategy = get_strategy("ema_cross")
+        calls = {"on_bar": 0}
+
+        def counting_on_bar(candle, ctx):
+            calls["on_bar"] += 1
+            return None
+
+        strategy.on_bar = counting_on_bar
+        result = BacktestEngine().run(strategy, "BTC/USDT", "1m", candles, lookback=50)
+        assert calls["on_bar"] == 0
+        assert result.strategy_code == "ema_cross"
+
+    def test_fallback_to_analyze(self):
+        from services.backtest.app.backtest_engine import BacktestEngine
+        from libs.strategies import get_strategy
+
+        candles = _make_candles(200)
+        strategy = get_strategy("ma_cross")
+        assert not strategy.supports_incremental
+        result = BacktestEngine().run(strategy, "BTC/USDT", "1m", candles, lookback=50)
+        assert result.strategy_code == "ma_cross"
+
+    def test_incremental_semantics(self):
+        from services.backtest.app.backtest_engine import BacktestEngine
+        from libs.strategies import get_strategy
+
+        candles = _make_candles(3000)
+
+        def run(full_history=False, **kwargs):
+            strategy = get_strategy("ema_cross")
+            strategy.requires_full_history = full_history
+            result = BacktestEngine().run(strategy, "BTC/USDT", "1m", candles, lookback=50, **kwargs)
+            return [(t.entry_time, t.side, t.entry_price) for t in result.trades], result.total_pnl
+
+        incremental = run(incremental=True)
+        windowed = run()
+        full = run(full_history=True)
+
+        # on_bar 的 EMA 连续累积：与 analyze 收到全部历史逐笔一致
+        assert incremental == full
+        # 切片路径每根只看最近 51 根，EMA 在窗口内重新起算：交易序列不同
+        assert incremental[0] != windowed[0]
@@ -0,0 +1,163 @@
+"""
+ConcurrentTaskWorker 测试（内存队列，不依赖 Redis）
+
+覆盖范围：
+  1. 多线程并发处理，同时执行数不超过 concurrency
+  2. 同一分组（执行节点）并发上限，其他分组不被饿死
+  3. 同一账户的任务按领取顺序串行执行
+  4. 失败任务 nack，指标记录重试 / 死信
+  5. 排空：超时后未开始的预取任务通过 release 归还
+
+运行：
+  PYTHONPATH=. pytest tests/test_task_worker.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.queue.task_queue import TaskMessage
+from libs.queue.worker import ConcurrentTaskWorker, FunctionHandler, account_order_keys
+
+
+class MemoryQueue:
+    name = "memory"
+
+    def __init__(self, messages=()):
+        self.items = list(messages)
+        self.acked = []
+        self.nacked = []
+        self.released = []
+        self._lock = threading.Lock()
+
+    def pop_many(self, count, timeout=0):
+        with self._lock:
+            batch, self.items = self.items[:count], self.items[count:]
+        return batch
+
+    def ack(self, task_id):
+        with self._lock:
+            self.acked.append(task_id)
+        return True
+
+    def nack(self, message, error=None):
+        message.retry_count += 1
+        with self._lock:
+            self.nacked.append(message.task_id)
+        return message.retry_count <= message.max_retries
+
+    def release(self, messages):
+        self.released.extend(m.task_id for m in messages)
+        return len(messages)
+
+
+def _msg(task_id, node="n1", accounts=(), **kwargs):
+    tasks = [{"account_id": a} for a in accounts]
+    return TaskMessage(task_id=task_id, task_type="node_execute",
+                       payload={"node_id": node, "tasks": tasks}, **kwargs)
+
+
+class Recorder:
+    """记录执行顺序与并发峰值"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.order = []
+        self.active = 0
+        self.peak = 0
+        self.group_active = {}
+        self.group_peak = {}
+        self.first_start = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        node = message.payload["node_id"]
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.group_active[node] = self.group_active.get(node, 0) + 1
+            self.group_peak[node] = max(self.group_peak.get(node, 0), self.group_active[node])
+            self.first_start.setdefault(node, time.monotonic())
+            self.order.append(message.task_id)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.group_active[node] -= 1
+        return {}
+
+
+def _run(queue, handler, **kwargs):
+    kwargs.setdefault("metrics_interval", 0)
+    worker = ConcurrentTaskWorker(queue=queue, handler=FunctionHandler(handler), **kwargs)
+    worker.start()
+    while queue.items:
+        worker.poll()
+    worker.drain(timeout=5)
+    return worker
+
+
+class TestOrderKeys:
+    def test_accounts_from_payload(self):
+        msg = _msg("t1", accounts=(1, 2), account_id=3)
+        assert account_order_keys(msg) == {"account:1", "account:2", "account:3"}
+        assert account_order_keys(TaskMessage(task_id="x", task_type="t", payload={})) == frozenset()
+
+
+class TestConcurrentTaskWorker:
+    def test_concurrency(self):
+        queue = MemoryQueue([_msg(f"t{i}", node=f"n{i}", accounts=(i,)) for i in range(8)])
+        rec = Recorder()
+        worker = _run(queue, rec, concurrency=4)
+        assert rec.peak == 4
+        assert sorted(queue.acked) == sorted(f"t{i}" for i in range(8))
+        stats = worker.stats()
+        assert stats["succeeded"] == 8
+        assert stats["inflight"] == 0
+        assert stats["latency"]["max_ms"] >= 50
+
+    def test_group_limit(self):
+        slow = [_msg(f"a{i}", node="slow", accounts=(i,)) for i in range(6)]
+        queue = MemoryQueue(slow + [_msg("b0", node="fast", accounts=(100,))])
+        rec = Recorder()
+        _run(queue, rec, concurrency=4, prefetch=8, group_key=lambda m: m.payload["node_id"], group_limit=2)
+        assert rec.group_peak["slow"] == 2
+        # fast 节点的任务不必等 slow 节点全部完成
+        assert rec.order.index("b0") < rec.order.index("a5")
+
+    def test_same_account_ordered(self):
+        messages = [_msg(f"t{i}", node=f"n{i}", accounts=(7,) if i % 2 == 0 else (i,)) for i in range(8)]
+        queue = MemoryQueue(messages)
+        rec = Recorder(delay=0.02)
+        _run(queue, rec, concurrency=4)
+        same = [tid for tid in rec.order if int(tid[1:]) % 2 == 0]
+        assert same == ["t0", "t2", "t4", "t6"]
+
+    def test_failures_nacked(self):
+        def boom(message):
+            raise RuntimeError("node down")
+
+        queue = MemoryQueue([_msg("t1", max_retries=1), _msg("t2", max_retries=0)])
+        worker = _run(queue, boom, concurrency=2)
+        assert sorted(queue.nacked) == ["t1", "t2"]
+        stats = worker.stats()
+        assert stats["failed"] == 2
+        assert stats["retried"] == 1
+        assert stats["dead"] == 1
+
+    def test_drain_releases_unstarted(self):
+        queue = MemoryQueue([_msg(f"t{i}", accounts=(1,)) for i in range(3)])
+        rec = Recorder(delay=0.3)
+        worker = ConcurrentTaskWorker(queue=queue, handler=FunctionHandler(rec), concurrency=2, metrics_interval=0)
+        worker.start()
+        worker.poll()
+        still_running = worker.drain(timeout=0.05)
+        assert still_running == 1
+        assert queue.released == ["t1", "t2"]
+        # 等待仍在执行的任务结束后再确认
+        deadline = time.monotonic() + 2
+        while worker.stats()["inflight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert queue.acked == ["t0"]
@@ -0,0 +1,124 @@
+"""
+TickerStream 多路复用测试
+
+覆盖范围：
+  1. 逐个模式：每个交易对独立任务，安静的交易对不阻塞其他交易对
+  2. watch_tickers 模式：一个任务批量监听，订阅变化时重建
+  3. 回调慢时同一交易对只推送最新值（合并），不积压
+  4. stats() 每个 symbol 的更新次数与过期标记
+
+运行：
+  PYTHONPATH=. pytest tests/test_ticker_stream.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from libs.ws.ticker_stream import TickerStream
+
+
+class FakeClient:
+    """模拟 ccxt.pro 客户端：prices 中有的交易对每 interval 秒推送一次，没有的永远等待"""
+
+    def __init__(self, prices, batch=False, interval=0.01):
+        self.has = {"watchTickers": batch}
+        self.prices = prices
+        self.interval = interval
+        self.batch_calls = []
+        self.closed = False
+
+    async def watch_ticker(self, symbol):
+        if symbol not in self.prices:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.interval)
+        self.prices[symbol] += 1
+        return {"symbol": symbol, "last": self.prices[symbol]}
+
+    async def watch_tickers(self, symbols):
+        self.batch_calls.append(list(symbols))
+        await asyncio.sleep(self.interval)
+        result = {}
+        for s in symbols:
+            if s in self.prices:
+                self.prices[s] += 1
+                result[s] = {"symbol": s, "last": self.prices[s]}
+        return result
+
+    async def close(self):
+        self.closed = True
+
+
+def _stream(client, **kwargs):
+    return TickerStream("binance", client_factory=lambda: client, **kwargs)
+
+
+async def _run_stream(stream, symbols, seconds, callback):
+    stream.set_callback(callback)
+    for s in symbols:
+        await stream.subscribe(s)
+    with patch("libs.ws.ticker_stream.get_markets_registry"):
+        await stream.start()
+        await asyncio.sleep(seconds)
+        stats = stream.stats()
+        await stream.stop()
+    return stats
+
+
+class TestTickerStream:
+    def test_quiet_symbol_does_not_block(self):
+        client = FakeClient({"BTC/USDT": 100.0})
+        stream = _stream(client)
+        seen = []
+        stats = asyncio.run(_run_stream(stream, ["BTC/USDT", "QUIET/USDT"], 0.3, lambda d: seen.append(d.symbol)))
+        assert stats["mode"] == "per_symbol"
+        assert stats["watchers"] == 2
+        # 逐个等待 + 5 秒超时的旧实现在 0.3 秒内最多只能拿到 1 次
+        assert seen.count("BTC/USDT") >= 5
+        assert stats["symbols"]["BTC/USDT"]["stale"] is False
+        assert stats["symbols"]["QUIET/USDT"]["stale"] is True
+        assert stats["symbols"]["QUIET/USDT"]["updates"] == 0
+        assert client.closed
+
+    def test_watch_tickers_batch(self):
+        client = FakeClient({"BTC/USDT": 100.0, "ETH/USDT": 10.0}, batch=True)
+        stream = _stream(client)
+        seen = set()
+
+        async def _run():
+            stream.set_callback(lambda d: seen.add(d.symbol))
+            await stream.subscribe("BTC/USDT")
+            with patch("libs.ws.ticker_stream.get_markets_registry"):
+                await stream.start()
+                await asyncio.sleep(0.1)
+                await stream.subscribe("ETH/USDT")
+                await asyncio.sleep(0.1)
+                stats = stream.stats()
+                await stream.stop()
+            return stats
+
+        stats = asyncio.run(_run())
+        assert stats["mode"] == "watch_tickers"
+        assert stats["watchers"] == 1
+        assert ["BTC/USDT", "ETH/USDT"] in client.batch_calls
+        assert seen == {"BTC/USDT", "ETH/USDT"}
+
+    def test_slow_consumer_gets_latest(self):
+        client = FakeClient({"BTC/USDT": 0.0}, interval=0.005)
+        stream = _stream(client)
+        received = []
+
+        async def slow(data):
+            received.append(data.last)
+            await asyncio.sleep(0.05)
+
+        stats = asyncio.run(_run_stream(stream, ["BTC/USDT"], 0.3, slow))
+        updates = stats["symbols"]["BTC/USDT"]["updates"]
+        assert stats["coalesced"] > 0
+        assert len(received) < updates
+        # 推送的值单调递增：跳过中间值，不回放旧值
+        assert received == sorted(received)
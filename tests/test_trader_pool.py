@@ -0,0 +1,189 @@
+"""
+TraderPool 测试
+
+覆盖范围：
+  1. 相同 (exchange, api_key, sandbox, market_type) 复用同一 trader
+  2. 同一交易所不同账户共享 MarketsRegistry 中的 markets，只下载一次
+  3. 空闲超时的 trader 被关闭回收
+  4. 注册表刷新后，再次借出的 trader 注入新版本 markets
+  5. 凭证变更时重建 trader
+  6. 复用时清除账户级缓存（持仓模式）
+  7. arun 调用方被取消时池内协程仍执行完
+
+运行：
+  PYTHONPATH=. pytest tests/test_trader_pool.py -v
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.exchange.markets_registry import MarketsRegistry
+from libs.trading.trader_pool import TraderPool
+
+
+class FakeExchange:
+    def __init__(self):
+        self.markets = None
+        self.currencies = None
+
+    async def load_markets(self, reload=False):
+        raise AssertionError("markets should come from the registry")
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        self.currencies = currencies
+
+
+class FakeTrader:
+    def __init__(self, exchange, api_key, api_secret, passphrase=None, sandbox=False,
+                 market_type="future", settlement_service=None):
+        self.exchange_name = exchange
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.sandbox = sandbox
+        self.market_type = market_type
+        self.exchange = FakeExchange()
+        self.closed = False
+        self.resets = 0
+
+    def reset_account_state(self):
+        self.resets += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        return {"BTC/USDT:USDT": {"contractSize": 1, "version": self.calls}}, {"USDT": {}}
+
+
+def _pool(**kwargs) -> TraderPool:
+    kwargs.setdefault("sweep_interval", 0)
+    kwargs.setdefault("registry", MarketsRegistry(loader=CountingLoader(), background=False))
+    return TraderPool(trader_factory=FakeTrader, **kwargs)
+
+
+async def _borrow(pool, api_key="k1", api_secret="s1", exchange="binance"):
+    async with pool.lease(exchange=exchange, api_key=api_key, api_secret=api_secret, sandbox=True) as trader:
+        return trader
+
+
+class TestTraderPool:
+    def test_reuse_same_key(self):
+        pool = _pool()
+        try:
+            a = pool.run(_borrow(pool))
+            b = pool.run(_borrow(pool))
+            assert a is b
+            assert not a.closed
+            assert pool.stats()["created"] == 1
+            assert pool.stats()["reused"] == 1
+        finally:
+            pool.shutdown()
+        assert a.closed
+
+    def test_markets_shared_across_accounts(self):
+        pool = _pool()
+        try:
+            a = pool.run(_borrow(pool, api_key="k1"))
+            b = pool.run(_borrow(pool, api_key="k2"))
+            c = pool.run(_borrow(pool, api_key="k3", exchange="okx"))
+            assert a is not b
+            assert b.exchange.markets is a.exchange.markets
+            # okx 单独下载一次
+            assert pool.stats()["markets"]["downloads"] == 2
+            assert c.exchange.markets is not None
+        finally:
+            pool.shutdown()
+
+    def test_idle_eviction(self):
+        pool = _pool(idle_ttl=0.05)
+        try:
+            a = pool.run(_borrow(pool))
+            time.sleep(0.1)
+            pool.run(pool.sweep())
+            assert a.closed
+            assert pool.stats()["traders"] == 0
+            b = pool.run(_borrow(pool))
+            assert b is not a
+        finally:
+            pool.shutdown()
+
+    def test_markets_refresh(self):
+        registry = MarketsRegistry(loader=CountingLoader(), background=False)
+        pool = _pool(idle_ttl=0, registry=registry)
+        try:
+            a = pool.run(_borrow(pool, api_key="k1"))
+            assert a.exchange.markets["BTC/USDT:USDT"]["version"] == 1
+            registry.refresh("binance", "future", sandbox=True)
+            a2 = pool.run(_borrow(pool, api_key="k1"))
+            assert a2 is a
+            assert a.exchange.markets["BTC/USDT:USDT"]["version"] == 2
+        finally:
+            pool.shutdown()
+
+    def test_credentials_change_rebuilds(self):
+        pool = _pool()
+        try:
+            a = pool.run(_borrow(pool, api_secret="old"))
+            b = pool.run(_borrow(pool, api_secret="new"))
+            assert a is not b
+            assert a.closed
+            assert b.api_secret == "new"
+        finally:
+            pool.shutdown()
+
+    def test_reuse_resets_account_state(self):
+        pool = _pool()
+        try:
+            a = pool.run(_borrow(pool))
+            assert a.resets == 0
+            pool.run(_borrow(pool))
+            pool.run(_borrow(pool))
+            assert a.resets == 2
+        finally:
+            pool.shutdown()
+
+    def test_arun_caller_cancel_does_not_abort(self):
+        pool = _pool()
+        started, finished = threading.Event(), threading.Event()
+
+        async def place_order():
+            started.set()
+            await asyncio.sleep(0.1)
+            finished.set()
+
+        async def caller():
+            waiter = asyncio.ensure_future(pool.arun(place_order()))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 1)
+            waiter.cancel()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                pass
+
+        try:
+            asyncio.run(caller())
+            assert finished.wait(1)
+        finally:
+            pool.shutdown()
+
+    def test_live_trader_reset(self):
+        from libs.trading.live_trader import LiveTrader
+
+        trader = LiveTrader.__new__(LiveTrader)
+        trader._position_mode_dual = True
+        trader._margin_isolated_tried = {"BTC/USDT:USDT"}
+        trader.reset_account_state()
+        assert trader._position_mode_dual is None
+        assert trader._margin_isolated_tried == set()
@@ -0,0 +1,140 @@
+"""
+TriggerBook 测试
+
+覆盖范围：
+  1. 二分查找结果与逐个 _check_trigger 一致（多/空 × SL/TP，含边界价）
+  2. upsert / remove 增量维护，symbol 无持仓后移除
+  3. ORM 提交后通过 session 事件增量更新（改 SL、平仓），回滚不生效
+  4. 非触发字段变更不更新
+  5. SL/TP 为 0 视为未设置（is_watchable / from_position / _check_trigger 一致）
+
+运行：
+  PYTHONPATH=. pytest tests/test_trigger_book.py -v
+"""
+
+import os
+import random
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from libs.position.models import Position
+from libs.position.trigger_book import TriggerBook, WatchedPosition, get_trigger_book, register_session_events
+
+
+def _pos(pid, side="LONG", sl=None, tp=None, symbol="BTC/USDT", exchange="binance", row_id=None):
+    return Position(
+        id=row_id, position_id=pid, tenant_id=1, account_id=1, symbol=symbol, exchange=exchange,
+        market_type="future", position_side=side, quantity=Decimal("1"), available=Decimal("1"),
+        frozen=Decimal("0"), avg_cost=Decimal("0"), total_cost=Decimal("0"), realized_pnl=Decimal("0"),
+        status="OPEN",
+        stop_loss=Decimal(str(sl)) if sl is not None else None,
+        take_profit=Decimal(str(tp)) if tp is not None else None,
+    )
+
+
+class TestTriggerBook:
+    def test_matches_linear_scan(self):
+        from libs.position.monitor import _check_trigger
+
+        rng = random.Random(7)
+        positions = []
+        for i in range(300):
+            side = rng.choice(["LONG", "SHORT"])
+            sl = rng.choice([None, rng.randint(90, 110)])
+            tp = rng.choice([None, rng.randint(90, 110)])
+            if sl is None and tp is None:
+                sl = 100
+            positions.append(_pos(f"P{i}", side, sl, tp))
+        book = TriggerBook()
+        book.replace(positions, 0)
+        for price in [89.5, 90, 95, 100, 100.5, 105, 110, 111]:
+            expected = {p.position_id: _check_trigger(p, price) for p in positions}
+            expected = {k: v for k, v in expected.items() if v}
+            got = {w.position_id: trigger for w, trigger in book.crossed("binance", "BTC/USDT", price)}
+            assert got == expected, price
+
+    def test_incremental_updates(self):
+        book = TriggerBook()
+        book.replace([_pos("P1", "LONG", sl=90), _pos("P2", "SHORT", tp=80)], 0)
+        assert [w.position_id for w, _ in book.crossed("binance", "BTC/USDT", 85)] == ["P1"]
+
+        book.upsert(WatchedPosition.from_position(_pos("P1", "LONG", sl=70)))
+        assert book.crossed("binance", "BTC/USDT", 85) == []
+        assert [t for _, t in book.crossed("binance", "BTC/USDT", 75)] == ["TP"]
+
+        book.remove("P2")
+        book.remove("P1")
+        assert len(book) == 0
+        assert book.symbols_by_exchange() == {}
+        assert book.stats()["incremental_updates"] == 3
+
+    def test_zero_levels_consistent(self):
+        from libs.position.monitor import _check_trigger
+        from libs.position.trigger_book import is_watchable
+
+        # SL/TP 为 0 与 _check_trigger 一致视为未设置：不监控，不产生空条目
+        pos = _pos("Z1", "LONG", sl=0, tp=0, symbol="ETH/USDT")
+        assert not is_watchable(pos)
+        book = TriggerBook()
+        book.replace([pos, _pos("Z2", "SHORT", sl=0, tp=90)], 0)
+        assert len(book) == 1
+        assert book.symbols_by_exchange() == {"binance": {"BTC/USDT"}}
+        assert book.crossed("binance", "BTC/USDT", 100) == []
+        assert _check_trigger(pos, 100) is None
+
+    def test_other_symbol_not_crossed(self):
+        book = TriggerBook()
+        book.replace([_pos("P1", "LONG", sl=90, symbol="ETH/USDT")], 0)
+        assert book.crossed("binance", "BTC/USDT", 1) == []
+        assert book.symbols_by_exchange() == {"binance": {"ETH/USDT"}}
+
+
+class TestSessionEvents:
+    @pytest.fixture
+    def session(self):
+        engine = create_engine("sqlite://")
+        Position.__table__.create(engine)
+        session = sessionmaker(bind=engine)()
+        register_session_events()
+        register_session_events()  # 幂等，不重复注册
+        get_trigger_book().replace([], 0)
+        yield session
+        session.close()
+        get_trigger_book().replace([], 0)
+
+    def test_commit_updates_book(self, session):
+        book = get_trigger_book()
+        pos = _pos("EV1", "LONG", sl=90000, row_id=1)
+        session.add(pos)
+        session.commit()
+        assert book.get("EV1").stop_loss == 90000
+
+        pos.stop_loss = Decimal("80000")
+        session.commit()
+        assert book.crossed("binance", "BTC/USDT", 85000) == []
+        assert book.crossed("binance", "BTC/USDT", 79000)[0][0].position_id == "EV1"
+
+        pos.status = "CLOSED"
+        session.rollback()
+        assert book.get("EV1") is not None
+
+        pos.status = "CLOSED"
+        pos.quantity = Decimal("0")
+        session.commit()
+        assert book.get("EV1") is None
+
+    def test_unwatched_field_ignored(self, session):
+        book = get_trigger_book()
+        pos = _pos("EV2", "SHORT", tp=80000, row_id=2)
+        session.add(pos)
+        session.commit()
+        before = book.stats()["incremental_updates"]
+        pos.unrealized_pnl = Decimal("12.5")
+        session.commit()
+        assert book.stats()["incremental_updates"] == before
@@ -0,0 +1,167 @@
+"""
+向量化指标（NumPy 后端）一致性测试
+
+覆盖范围：
+  1. vectorized.* 序列与纯 Python 列表版本逐点一致（浮点容差内）
+  2. 列表版本（含 bollinger / atr 最新值）在 NumPy 可用时自动切换，结果不变
+
+运行：
+  PYTHONPATH=. pytest tests/test_vectorized_indicators.py -v
+"""
+
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from libs.indicators import vectorized as vec
+from libs.indicators import (
+    sma_series, ema, ema_series, rsi, rsi_series, macd, bollinger, atr,
+    obv, vwap, fibo_levels, price_in_fibo_zone,
+)
+from libs.indicators.candle_frame import CandleFrame
+from libs.indicators.volume import obv_series
+
+
+def _series(n: int = 2000, seed: int = 3):
+    rnd = random.Random(seed)
+    price = 30000.0
+    closes, highs, lows, vols = [], [], [], []
+    for _ in range(n):
+        price *= 1 + rnd.gauss(0, 0.005)
+        closes.append(price)
+        highs.append(price * (1 + abs(rnd.gauss(0, 0.002))))
+        lows.append(price * (1 - abs(rnd.gauss(0, 0.002))))
+        vols.append(rnd.random() * 100)
+    return closes, highs, lows, vols
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    """强制列表版本走纯 Python 路径，作为参考实现"""
+    monkeypatch.setattr(vec, "NUMPY_AVAILABLE", False)
+
+
+def _assert_series_close(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if e is None:
+            assert a is None or (isinstance(a, float) and math.isnan(a))
+        else:
+            assert a == pytest.approx(e, rel=1e-9, abs=1e-9)
+
+
+class TestAgainstPurePython:
+
+    def test_sma_ema_rsi(self, pure_python):
+        closes, _, _, _ = _series()
+        for period in (5, 20, 200):
+            _assert_series_close(vec.sma_series(closes, period).tolist(), sma_series(closes, period))
+            _assert_series_close(vec.ema_series(closes, period).tolist(), ema_series(closes, period))
+        _assert_series_close(vec.rsi_series(closes, 14).tolist(), rsi_series(closes, 14))
+
+    def test_macd(self, pure_python):
+        closes, _, _, _ = _series(500)
+        result = vec.macd_series(closes)
+        for i in (100, 250, 499):
+            expected = macd(closes[: i + 1])
+            assert result["macd"][i] == pytest.approx(expected["macd"])
+            assert result["signal"][i] == pytest.approx(expected["signal"])
+            assert result["histogram"][i] == pytest.approx(expected["histogram"])
+
+    def test_bollinger(self, pure_python):
+        closes, _, _, _ = _series(300)
+        result = vec.bollinger_series(closes, 20, 2.0)
+        for i in (19, 150, 299):
+            expected = bollinger(closes[: i + 1], 20, 2.0)
+            for key, val in expected.items():
+                assert result[key][i] == pytest.approx(val)
+        assert math.isnan(result["middle"][18])
+
+    def test_atr(self, pure_python):
+        closes, highs, lows, _ = _series(200)
+        candles = [
+            {"high": h, "low": l, "close": c, "timestamp": i * 60}
+            for i, (h, l, c) in enumerate(zip(highs, lows, closes))
+        ]
+        result = vec.atr_series(highs, lows, closes, 14)
+        for i in (0, 10, 14, 15, 199):
+            assert result[i] == pytest.approx(atr(candles[: i + 1], 14))
+
+    def test_volume(self, pure_python):
+        closes, highs, lows, vols = _series(300)
+        _assert_series_close(vec.obv_series(closes, vols).tolist(), obv_series(closes, vols))
+        assert vec.vwap_series(highs, lows, closes, vols)[-1] == pytest.approx(vwap(highs, lows, closes, vols))
+
+    def test_fibo(self):
+        levels = fibo_levels(110.0, 100.0)
+        batch = vec.fibo_levels([110.0, 120.0], [100.0, 100.0])
+        for level, price in levels.items():
+            assert batch[level][0] == pytest.approx(price)
+        prices = [levels[0.5], levels[0.618] * 1.001, 200.0]
+        hits = vec.price_in_fibo_zone_series(prices, levels)
+        for p, h in zip(prices, hits):
+            expected = price_in_fibo_zone(p, levels)
+            if expected is None:
+                assert math.isnan(h)
+            else:
+                assert h == expected[0]
+
+
+class TestAutoDispatch:
+
+    def test_list_functions_match_pure_python(self, monkeypatch):
+        closes, highs, lows, vols = _series(1000)
+        candles = [
+            {"high": h, "low": l, "close": c, "timestamp": i * 60}
+            for i, (h, l, c) in enumerate(zip(highs, lows, closes))
+        ]
+        fast = {
+            "sma": sma_series(closes, 20),
+            "ema": ema_series(closes, 50),
+            "ema_last": ema(closes, 50),
+            "rsi": rsi_series(closes, 14),
+            "rsi_last": rsi(closes, 14),
+            "obv": obv(closes, vols),
+            "vwap": vwap(highs, lows, closes, vols),
+            "bollinger": bollinger(closes, 20, 2.0),
+            "atr": atr(candles, 14),
+            "atr_frame": atr(CandleFrame.from_candles(candles), 14),
+        }
+        monkeypatch.setattr(vec, "NUMPY_AVAILABLE", False)
+        _assert_series_close(fast["sma"], sma_series(closes, 20))
+        _assert_series_close(fast["ema"], ema_series(closes, 50))
+        _assert_series_close(fast["rsi"], rsi_series(closes, 14))
+        assert fast["ema_last"] == pytest.approx(ema(closes, 50))
+        assert fast["rsi_last"] == pytest.approx(rsi(closes, 14))
+        assert fast["obv"] == pytest.approx(obv(closes, vols))
+        assert fast["vwap"] == pytest.approx(vwap(highs, lows, closes, vols))
+        expected_bands = bollinger(closes, 20, 2.0)
+        assert fast["bollinger"].keys() == expected_bands.keys()
+        for key, value in expected_bands.items():
+            assert type(fast["bollinger"][key]) is float
+            assert fast["bollinger"][key] == pytest.approx(value, rel=1e-9)
+        assert fast["atr"] == pytest.approx(atr(candles, 14), rel=1e-9)
+        assert fast["atr_frame"] == pytest.approx(atr(candles, 14), rel=1e-9)
+
+    def test_returns_python_types(self):
+        closes, _, _, _ = _series(500)
+        out = ema_series(closes, 20)
+        assert out[0] is None
+        assert type(out[-1]) is float
+
+    def test_long_ema_stable(self):
+        # 长序列 + 小周期触发多次分块，验证块间衔接
+        closes, _, _, _ = _series(20000)
+        fast = vec.ema_series(closes, 2)
+        mult = 2 / 3
+        val = sum(closes[:2]) / 2
+        for p in closes[2:]:
+            val = (p - val) * mult + val
+        assert fast[-1] == pytest.approx(val, rel=1e-9)
@@ -0,0 +1,133 @@
+"""
+ConnectionManager 背压测试
+
+覆盖范围：
+  1. 广播只编码一次，入队即返回，慢客户端不拖慢其他客户端
+  2. 行情频道合并：慢客户端只收到最新值
+  3. 持续高水位的客户端被断开
+  4. 发送超时的客户端被断开
+  5. 队列贴着高水位的慢消费者（未回落到低水位）同样被断开
+
+运行：
+  PYTHONPATH=. pytest tests/test_ws_manager.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from libs.ws import manager as ws_manager
+from libs.ws.manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, block=False):
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed_code = None
+        self.unblock = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.block:
+            await self.unblock.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+async def _connect(manager, ws, channel="ticker:BTC/USDT"):
+    client_id = await manager.connect(ws)
+    manager.subscribe(client_id, channel)
+    return client_id
+
+
+class TestConnectionManager:
+    def test_encode_once_and_slow_client_isolated(self):
+        async def _run():
+            manager = ConnectionManager()
+            fast, slow = FakeWebSocket(), FakeWebSocket(block=True)
+            await _connect(manager, fast, "signal:1")
+            await _connect(manager, slow, "signal:1")
+            with patch.object(ws_manager, "encode_message", wraps=ws_manager.encode_message) as enc:
+                for i in range(5):
+                    await asyncio.wait_for(manager.broadcast("signal:1", {"seq": i}), 0.1)
+                assert enc.call_count == 5
+            await asyncio.sleep(0.05)
+            assert [m["seq"] for m in fast.sent if "seq" in m] == [0, 1, 2, 3, 4]
+            assert manager.get_stats()["max_queue_depth"] >= 4
+
+        asyncio.run(_run())
+
+    def test_ticker_conflation(self):
+        async def _run():
+            manager = ConnectionManager()
+            ws = FakeWebSocket(block=True)
+            await _connect(manager, ws)
+            await asyncio.sleep(0)  # 欢迎消息已被写任务取出
+            for price in range(100):
+                await manager.broadcast("ticker:BTC/USDT", {"last": price})
+            assert manager.get_stats()["conflated"] == 99
+            ws.unblock.set()
+            await asyncio.sleep(0.05)
+            assert [m["last"] for m in ws.sent if "last" in m] == [99]
+
+        asyncio.run(_run())
+
+    def test_evict_client_over_high_water(self):
+        async def _run():
+            manager = ConnectionManager(max_queue=3, slow_client_timeout=0.05)
+            ws = FakeWebSocket(block=True)
+            client_id = await _connect(manager, ws, "signal:1")
+            await asyncio.sleep(0)  # 写任务取出欢迎消息后阻塞
+            for i in range(10):
+                await manager.broadcast("signal:1", {"seq": i})
+            assert client_id in manager.clients
+            await asyncio.sleep(0.1)
+            await manager.broadcast("signal:1", {"seq": 99})
+            await asyncio.sleep(0)
+            assert client_id not in manager.clients
+            assert ws.closed_code == ws_manager.SLOW_CLIENT_CLOSE_CODE
+            assert manager.get_stats()["slow_disconnects"] == 1
+            # 断开后接收循环再调用 disconnect 不报错
+            manager.disconnect(ws)
+
+        asyncio.run(_run())
+
+    def test_evict_client_hovering_near_high_water(self):
+        async def _run():
+            manager = ConnectionManager(max_queue=8, slow_client_timeout=0.1)
+            ws = FakeWebSocket(delay=0.01)
+            client_id = await _connect(manager, ws, "signal:1")
+            # 广播速度约为消费速度的 2 倍：队列在 max_queue-1 / max_queue 之间来回
+            for i in range(100):
+                await manager.broadcast("signal:1", {"seq": i})
+                await asyncio.sleep(0.005)
+                if client_id not in manager.clients:
+                    break
+            assert client_id not in manager.clients
+            assert manager.get_stats()["slow_disconnects"] == 1
+
+        asyncio.run(_run())
+
+    def test_send_timeout_evicts(self):
+        async def _run():
+            manager = ConnectionManager(send_timeout=0.05)
+            ws = FakeWebSocket(block=True)
+            client_id = await _connect(manager, ws)
+            await asyncio.sleep(0.1)
+            assert client_id not in manager.clients
+            assert manager.get_stats()["total_channels"] == 0
+
+        asyncio.run(_run())